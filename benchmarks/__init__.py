@@ -0,0 +1 @@
+"""Offline benchmarks and local fakes for BigQuery Stock Quotes Extractor."""
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark many concurrent query jobs: blocking threads vs asyncio polling.
+
+Runs fully offline against FakeBigQueryJobClient (requires the optional
+``duckdb`` package). The thread baseline blocks one worker per job in
+``BigQueryClient.run_query`` (``query_job.result()``); the async client polls
+job status from the event loop and uses a few threads for the API calls.
+
+Usage:
+    python -m benchmarks.bench_async_jobs --jobs 500 --run-seconds 0.5 --threads 16 64
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pyarrow
+
+from benchmarks.fakes import DuckDBQueryClient, FakeBigQueryJobClient, make_candles
+from src.async_bigquery_client import AsyncBigQueryClient
+from src.bigquery_client import BigQueryClient
+from src.query_builder import QueryBuilder
+
+TABLE_FQN = "bench.market.candles"
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+DAYS = 30
+
+
+def make_engine() -> DuckDBQueryClient:
+    """Create the DuckDB engine with a month of hourly candles."""
+    rows = DAYS * 24
+    table = make_candles(rows, start=START, timeframe='1h')
+    table = table.append_column("symbol", pyarrow.array(["BTCUSDT"] * rows))
+    return DuckDBQueryClient(TABLE_FQN, table.append_column("timeframe", pyarrow.array(["1h"] * rows)))
+
+
+def make_queries(jobs: int) -> list:
+    """Build one single-day RANGE query per job."""
+    builder = QueryBuilder(TABLE_FQN)
+    return [
+        builder.build_range_query(
+            "BTCUSDT", "1h",
+            START + timedelta(days=n % DAYS), START + timedelta(days=n % DAYS, hours=23),
+        )
+        for n in range(jobs)
+    ]
+
+
+def bench_threads(server: FakeBigQueryJobClient, queries: list, threads: int) -> float:
+    """Run every query on a thread pool of blocking BigQueryClient calls."""
+    client = BigQueryClient.__new__(BigQueryClient)
+    client.client, client.logger = server, logging.getLogger("bench")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(client.run_query, queries))
+    return time.perf_counter() - start
+
+
+def bench_async(
+    server: FakeBigQueryJobClient,
+    queries: list,
+    max_jobs: int,
+    io_threads: int,
+    poll_interval: float,
+) -> float:
+    """Run every query concurrently on the async client."""
+    client = AsyncBigQueryClient(
+        server,
+        logging.getLogger("bench"),
+        max_concurrent_jobs=max_jobs,
+        poll_interval=poll_interval,
+        io_threads=io_threads,
+    )
+    
+    async def run_all():
+        await asyncio.gather(*(client.run_query(query) for query in queries))
+    
+    start = time.perf_counter()
+    asyncio.run(run_all())
+    elapsed = time.perf_counter() - start
+    client.close()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=500)
+    parser.add_argument('--run-seconds', type=float, default=0.5,
+                        help='Wall time each fake job runs before it is DONE')
+    parser.add_argument('--api-latency', type=float, default=0.01,
+                        help='Simulated latency of each API call in seconds')
+    parser.add_argument('--threads', type=int, nargs='+', default=[16, 64])
+    parser.add_argument('--max-jobs', type=int, default=100,
+                        help='Concurrent query quota for the async client')
+    parser.add_argument('--io-threads', type=int, default=16,
+                        help='API call threads of the async client')
+    parser.add_argument('--poll-interval', type=float, default=0.1,
+                        help='First job status poll interval of the async client')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    
+    engine = make_engine()
+    queries = make_queries(args.jobs)
+    
+    print(f"jobs={args.jobs} run_seconds={args.run_seconds} api_latency={args.api_latency}s")
+    print(f"{'runner':>12} {'seconds':>9} {'jobs/s':>9} {'threads':>8}")
+    for threads in args.threads:
+        server = FakeBigQueryJobClient(engine, args.run_seconds, args.api_latency)
+        elapsed = bench_threads(server, queries, threads)
+        print(f"{'blocking':>12} {elapsed:>9.2f} {args.jobs / elapsed:>9.1f} {threads:>8}")
+    server = FakeBigQueryJobClient(engine, args.run_seconds, args.api_latency)
+    elapsed = bench_async(server, queries, args.max_jobs, args.io_threads, args.poll_interval)
+    print(f"{'async':>12} {elapsed:>9.2f} {args.jobs / elapsed:>9.1f} {args.io_threads:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark NEIGHBORHOOD query strategies: UNION ALL branches vs single-scan QUALIFY.
+
+Runs the SQL generated by QueryBuilder on DuckDB as a local stand-in for
+BigQuery (requires the optional ``duckdb`` package). Latency is measured on
+DuckDB; bytes processed are modelled the way BigQuery bills a table
+partitioned by day: every scan of the table pays for all rows in the daily
+partitions its timestamp predicate touches, for the referenced columns.
+
+Usage:
+    python -m benchmarks.bench_neighborhood --timeframe 15 --days 365 --n 10 100 1000
+"""
+
+import argparse
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+import duckdb
+import pyarrow
+
+from benchmarks.fakes import TIMEFRAME_SECONDS, make_candles, to_duckdb
+from src.query_builder import NEIGHBORHOOD_STRATEGIES, QueryBuilder
+from src.query_helpers import calculate_adaptive_window
+
+TABLE_FQN = "bench.market.candles"
+SYMBOL = "BTCUSDT"
+
+# Bytes per row of the referenced columns: TIMESTAMP + 5 FLOAT64,
+# plus STRING symbol and timeframe (2 bytes + UTF-8 length each)
+NUMERIC_ROW_BYTES = 6 * 8
+
+
+def load_table(con, timeframe: str, days: int, start: datetime) -> None:
+    """Create the candle table in DuckDB."""
+    rows = days * 86400 // TIMEFRAME_SECONDS[timeframe]
+    table = make_candles(rows, start=start, timeframe=timeframe)
+    table = table.append_column("symbol", pyarrow.array([SYMBOL] * rows))
+    table = table.append_column("timeframe", pyarrow.array([timeframe] * rows))
+    con.register("candles", table)
+    con.execute(f'CREATE TABLE "{TABLE_FQN}" AS SELECT * FROM candles')
+    con.unregister("candles")
+
+
+def partition_rows(con, first: date, last: date) -> int:
+    """Count rows stored in the daily partitions first..last."""
+    return con.execute(
+        f'SELECT count(*) FROM "{TABLE_FQN}" WHERE CAST(timestamp AS DATE) BETWEEN ? AND ?',
+        [first, last],
+    ).fetchone()[0]
+
+
+def scanned_bytes(con, strategy: str, timeframe: str, center: datetime, n: int) -> int:
+    """Model bytes processed for one query under day-partition pruning."""
+    window = timedelta(days=calculate_adaptive_window(timeframe, n))
+    lo, hi = (center - window).date(), (center + window).date()
+    if strategy == "union":
+        scans = [(lo, center.date()), (center.date(), center.date()), (center.date(), hi)]
+    else:
+        scans = [(lo, hi)]
+    row_bytes = NUMERIC_ROW_BYTES + (2 + len(SYMBOL)) + (2 + len(timeframe))
+    return sum(partition_rows(con, first, last) for first, last in scans) * row_bytes
+
+
+def run(con, query, repeat: int):
+    """Run a query several times; return (median seconds, result table)."""
+    sql, parameters = to_duckdb(query)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = con.execute(sql, parameters).to_arrow_table()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--timeframe', default='15', choices=sorted(TIMEFRAME_SECONDS))
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--n', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    start = datetime(2020, 1, 1)
+    con = duckdb.connect()
+    con.execute("SET TimeZone = 'UTC'")
+    load_table(con, args.timeframe, args.days, start)
+    builder = QueryBuilder(TABLE_FQN)
+    center = start + timedelta(days=args.days // 2, hours=12, minutes=7)
+    
+    print(f"timeframe={args.timeframe} days={args.days} center={center.isoformat()}")
+    print(f"{'n':>7} {'strategy':>8} {'rows':>7} {'latency ms':>11} {'MB processed':>13}")
+    for n in args.n:
+        results = {}
+        for strategy in NEIGHBORHOOD_STRATEGIES:
+            query = builder.build_neighborhood_query(SYMBOL, args.timeframe, center, n, n, strategy=strategy)
+            elapsed, results[strategy] = run(con, query, args.repeat)
+            mb = scanned_bytes(con, strategy, args.timeframe, center, n) / 1e6
+            print(f"{n:>7} {strategy:>8} {results[strategy].num_rows:>7} "
+                  f"{elapsed * 1000:>11.2f} {mb:>13.2f}")
+        if not results["union"].equals(results["window"]):
+            raise SystemExit(f"Strategies returned different rows for n={n}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark short-query latency: job insertion vs the jobs.query path.
+
+Runs fully offline against FakeBigQueryJobClient (requires the optional
+``duckdb`` package). Each NEIGHBORHOOD and short RANGE query is run once
+through the job path (insert, poll, fetch results) and once through
+``query_and_wait``, which answers in a single round trip. A full-history
+query is included to show large exports keep using the job path.
+
+Usage:
+    python -m benchmarks.bench_short_queries --queries 50 --api-latency 0.05
+"""
+
+import argparse
+import logging
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+import pyarrow
+
+from benchmarks.fakes import DuckDBQueryClient, FakeBigQueryJobClient, make_candles
+from src import bigquery_client
+from src.bigquery_client import BigQueryClient
+from src.query_builder import QueryBuilder
+
+TABLE_FQN = "bench.market.candles"
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+DAYS = 90
+
+
+def make_engine() -> DuckDBQueryClient:
+    """Create the DuckDB engine with three months of hourly candles."""
+    rows = DAYS * 24
+    table = make_candles(rows, start=START, timeframe='1h')
+    table = table.append_column("symbol", pyarrow.array(["BTCUSDT"] * rows))
+    return DuckDBQueryClient(TABLE_FQN, table.append_column("timeframe", pyarrow.array(["1h"] * rows)))
+
+
+def make_workloads(queries: int) -> dict:
+    """Build the NEIGHBORHOOD, short RANGE and full-history query sets."""
+    builder = QueryBuilder(TABLE_FQN)
+    return {
+        "neighborhood": [
+            builder.build_neighborhood_query(
+                "BTCUSDT", "1h", START + timedelta(days=1 + n % (DAYS - 2), hours=12), 50, 50,
+            )
+            for n in range(queries)
+        ],
+        "range_1d": [
+            builder.build_range_query(
+                "BTCUSDT", "1h",
+                START + timedelta(days=n % DAYS), START + timedelta(days=n % DAYS, hours=23),
+            )
+            for n in range(queries)
+        ],
+        "export": [
+            builder.build_range_query(
+                "BTCUSDT", "1h", START - timedelta(days=365), START + timedelta(days=DAYS),
+            )
+        ] * max(1, queries // 10),
+    }
+
+
+def bench(server: FakeBigQueryJobClient, queries: list, max_rows: int) -> list:
+    """Run queries one by one and return each query's latency in seconds."""
+    client = BigQueryClient.__new__(BigQueryClient)
+    client.client, client.logger = server, logging.getLogger("bench")
+    bigquery_client.STATELESS_QUERY_MAX_ROWS = max_rows
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        client.execute_query(query)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--run-seconds', type=float, default=0.02,
+                        help='Server-side run time of each query')
+    parser.add_argument('--api-latency', type=float, default=0.05,
+                        help='Simulated latency of each API call in seconds')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    
+    engine = make_engine()
+    default_max_rows = bigquery_client.STATELESS_QUERY_MAX_ROWS
+    
+    print(f"queries={args.queries} run_seconds={args.run_seconds} api_latency={args.api_latency}s")
+    print(f"{'workload':>14} {'path':>10} {'p50 ms':>9} {'mean ms':>9} {'api calls':>10} {'jobs':>6}")
+    for name, queries in make_workloads(args.queries).items():
+        for path, max_rows in (("jobs", 0), ("routed", default_max_rows)):
+            server = FakeBigQueryJobClient(engine, args.run_seconds, args.api_latency)
+            latencies = bench(server, queries, max_rows)
+            print(
+                f"{name:>14} {path:>10} {statistics.median(latencies) * 1000:>9.1f} "
+                f"{statistics.mean(latencies) * 1000:>9.1f} "
+                f"{server.api_calls / len(queries):>10.1f} {len(server.jobs):>6}"
+            )
+    bigquery_client.STATELESS_QUERY_MAX_ROWS = default_max_rows
+
+
+if __name__ == "__main__":
+    main()
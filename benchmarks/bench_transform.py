@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Benchmark candle transforms: per-row transform_results vs columnar transform_columns.
+
+Usage:
+    python -m benchmarks.bench_transform --rows 1000000 --batch-size 10000
+"""
+
+import argparse
+import logging
+import time
+
+from benchmarks.fakes import make_candles
+from src.output_handler import OutputHandler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    args = parser.parse_args()
+    
+    handler = OutputHandler(logging.getLogger("bench"))
+    batches = make_candles(args.rows).to_batches(max_chunksize=args.batch_size)
+    row_batches = [batch.to_pylist() for batch in batches]
+    
+    start = time.perf_counter()
+    row_output = [record for batch in row_batches for record in handler.transform_results(batch)]
+    row_elapsed = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    columnar_output = [record for batch in batches for record in handler.transform_columns(batch)]
+    columnar_elapsed = time.perf_counter() - start
+    
+    assert row_output == columnar_output, "columnar output differs from per-row output"
+    
+    print(f"rows={args.rows} batch_size={args.batch_size}")
+    print(f"{'per-row':>10}: {args.rows / row_elapsed:>14,.0f} rows/s")
+    print(f"{'columnar':>10}: {args.rows / columnar_elapsed:>14,.0f} rows/s "
+          f"({row_elapsed / columnar_elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
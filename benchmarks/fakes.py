@@ -0,0 +1,501 @@
+"""
+Local fakes of Google Cloud services for offline tests and benchmarks.
+
+Each fake implements only the surface used by the extractor and serves
+synthetic candle data generated in memory.
+"""
+
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pyarrow
+
+
+# Seconds per candle for each supported timeframe
+TIMEFRAME_SECONDS = {
+    '1M': 30 * 86400,
+    '1w': 7 * 86400,
+    '1d': 86400,
+    '4h': 4 * 3600,
+    '1h': 3600,
+    '15': 15 * 60,
+    '5': 5 * 60,
+    '1': 60,
+}
+
+
+def make_candles(
+    n_rows: int,
+    start: Optional[datetime] = None,
+    timeframe: str = '1',
+) -> pyarrow.Table:
+    """Generate a synthetic OHLCV candle table.
+    
+    Args:
+        n_rows: Number of candles to generate
+        start: Timestamp of the first candle (default: 2010-01-01 UTC)
+        timeframe: Timeframe identifier controlling candle spacing
+    
+    Returns:
+        Arrow table with timestamp, open, high, low, close, volume columns
+    """
+    start = start or datetime(2010, 1, 1, tzinfo=timezone.utc)
+    step = timedelta(seconds=TIMEFRAME_SECONDS[timeframe])
+    timestamps = [start + step * i for i in range(n_rows)]
+    prices = [100.0 + (i % 1000) * 0.25 for i in range(n_rows)]
+    
+    return pyarrow.table({
+        "timestamp": pyarrow.array(timestamps, type=pyarrow.timestamp("us", tz="UTC")),
+        "open": pyarrow.array(prices, type=pyarrow.float64()),
+        "high": pyarrow.array([p + 1.5 for p in prices], type=pyarrow.float64()),
+        "low": pyarrow.array([p - 1.5 for p in prices], type=pyarrow.float64()),
+        "close": pyarrow.array([p + 0.5 for p in prices], type=pyarrow.float64()),
+        "volume": pyarrow.array([float(i % 5000) for i in range(n_rows)], type=pyarrow.float64()),
+    })
+
+
+def to_duckdb_sql(sql: str) -> str:
+    """Translate extractor-generated BigQuery SQL to the DuckDB dialect.
+    
+    Covers only the constructs emitted by QueryBuilder: backtick table
+    names, TIMESTAMP_SUB/TIMESTAMP_ADD with DAY intervals, TIMESTAMP_DIFF
+    in microseconds, FORMAT_TIMESTAMP, ``IN UNNEST(@array)``,
+    ``JOIN UNNEST(@structs)`` and named ``@parameters``.
+    
+    Args:
+        sql: BigQuery Standard SQL generated by QueryBuilder
+    
+    Returns:
+        Equivalent DuckDB SQL
+    """
+    sql = re.sub(r"`([^`]+)`", r'"\1"', sql)
+    sql = re.sub(r"FORMAT_TIMESTAMP\('([^']+)', ([^()]+)\)", r"strftime(\2, '\1')", sql)
+    sql = re.sub(
+        r"TIMESTAMP_(SUB|ADD)\(([^,()]+),\s*INTERVAL (@?\w+) DAY\)",
+        lambda m: f"({m.group(2)} {'-' if m.group(1) == 'SUB' else '+'} to_days({m.group(3)}))",
+        sql,
+    )
+    sql = re.sub(
+        r"TIMESTAMP_DIFF\(([^,()]+),\s*([^,()]+),\s*MICROSECOND\)",
+        r"date_diff('microsecond', \2, \1)",
+        sql,
+    )
+    sql = re.sub(r"IN UNNEST\((@\w+)\)", r"IN (SELECT unnest(\1))", sql)
+    sql = re.sub(r"JOIN\s+UNNEST\((@\w+)\)", r"JOIN (SELECT unnest(\1, recursive := true))", sql)
+    return re.sub(r"@(\w+)", r"$\1", sql)
+
+
+def to_duckdb(query: Any) -> Tuple[str, Dict[str, Any]]:
+    """Translate a QueryBuilder query to DuckDB SQL and named parameter values.
+    
+    Args:
+        query: ParameterizedQuery (or plain SQL text)
+    
+    Returns:
+        Tuple of (DuckDB SQL, parameter values by name) for ``con.execute``
+    """
+    if isinstance(query, str):
+        return to_duckdb_sql(query), {}
+    from src.query_builder import parameter_value
+    
+    return to_duckdb_sql(query.sql), {param.name: parameter_value(param) for param in query.parameters}
+
+
+class FakeBigQueryReadClient:
+    """In-memory stand-in for ``google.cloud.bigquery_storage.BigQueryReadClient``.
+    
+    Serves registered tables as serialized Arrow record batches, splitting
+    rows round-robin across streams so that multi-stream reads arrive out
+    of order like the real service.
+    """
+    
+    def __init__(
+        self,
+        tables: Dict[str, pyarrow.Table],
+        batch_rows: int = 10000,
+        message_latency: float = 0.0,
+        fail_sessions: bool = False,
+    ):
+        """Initialize fake read client.
+        
+        Args:
+            tables: Mapping of Storage API table path to table contents
+            batch_rows: Rows per served record batch
+            message_latency: Simulated network latency per message (seconds)
+            fail_sessions: If True, create_read_session raises (API unavailable)
+        """
+        self.tables = tables
+        self.batch_rows = batch_rows
+        self.message_latency = message_latency
+        self.fail_sessions = fail_sessions
+        self.sessions: List[Dict[str, Any]] = []
+        self._streams: Dict[str, List[pyarrow.RecordBatch]] = {}
+    
+    def create_read_session(self, parent: str, read_session: Any, max_stream_count: int = 0) -> Any:
+        """Create a read session splitting the table across streams."""
+        if self.fail_sessions:
+            from google.api_core import exceptions as google_exceptions
+            raise google_exceptions.PermissionDenied("bigquery.readsessions.create denied")
+        
+        table_path = read_session["table"] if isinstance(read_session, dict) else read_session.table
+        table = self.tables[table_path]
+        self.sessions.append({"parent": parent, "table": table_path, "max_stream_count": max_stream_count})
+        
+        batches = table.to_batches(max_chunksize=self.batch_rows)
+        stream_count = max(1, min(max_stream_count or 1, len(batches)))
+        names = []
+        for index in range(stream_count if batches else 0):
+            name = f"{table_path}/streams/{len(self.sessions)}-{index}"
+            self._streams[name] = batches[index::stream_count]
+            names.append(name)
+        
+        return SimpleNamespace(
+            streams=[SimpleNamespace(name=name) for name in names],
+            arrow_schema=SimpleNamespace(serialized_schema=table.schema.serialize().to_pybytes()),
+        )
+    
+    def read_rows(self, name: str) -> Iterator[Any]:
+        """Stream serialized record batches for one read stream."""
+        for batch in self._streams[name]:
+            if self.message_latency:
+                time.sleep(self.message_latency)
+            yield SimpleNamespace(
+                row_count=batch.num_rows,
+                arrow_record_batch=SimpleNamespace(
+                    serialized_record_batch=batch.serialize().to_pybytes(),
+                ),
+            )
+
+
+class DuckDBQueryClient:
+    """BigQueryClient stand-in that runs generated SQL on an in-memory DuckDB.
+    
+    Implements ``run_query``, ``iter_query`` and ``table_modified``; every
+    query is billed a fixed number of bytes so byte budgets can be exercised.
+    Partition modifications are recorded with ``modify_partitions`` and served
+    from a fake INFORMATION_SCHEMA.PARTITIONS view. Requires the optional
+    ``duckdb`` package.
+    """
+    
+    def __init__(self, table_fqn: str, table: pyarrow.Table, bytes_per_query: int = 1000):
+        """Initialize DuckDB-backed client.
+        
+        Args:
+            table_fqn: Table name used in generated queries
+            table: Table contents (candles plus symbol/timeframe columns)
+            bytes_per_query: Bytes reported as processed and billed per query
+        """
+        import duckdb
+        
+        self.con = duckdb.connect()
+        self.con.execute("SET GLOBAL TimeZone = 'UTC'")
+        self.con.register("source_table", table)
+        self.con.execute(f'CREATE TABLE "{table_fqn}" AS SELECT * FROM source_table')
+        self.con.unregister("source_table")
+        self.table_fqn = table_fqn
+        dataset_fqn, self.table_name = table_fqn.rsplit(".", 1)
+        self.partitions_table = f"{dataset_fqn}.INFORMATION_SCHEMA.PARTITIONS"
+        self.con.execute(
+            f'CREATE TABLE "{self.partitions_table}" '
+            "(table_name VARCHAR, partition_id VARCHAR, last_modified_time TIMESTAMPTZ)"
+        )
+        self.bytes_per_query = bytes_per_query
+        self.modified = datetime.now(timezone.utc)
+        self.queries: List[str] = []
+    
+    def insert(self, table: pyarrow.Table) -> None:
+        """Append rows to the table."""
+        self.con.register("new_rows", table)
+        self.con.execute(f'INSERT INTO "{self.table_fqn}" SELECT * FROM new_rows')
+        self.con.unregister("new_rows")
+    
+    def modify_partitions(self, partition_ids: List[str]) -> None:
+        """Record partitions ('YYYYMMDD' or '__UNPARTITIONED__') as modified now."""
+        self.modified = datetime.now(timezone.utc)
+        for partition_id in partition_ids:
+            self.con.execute(
+                f'INSERT INTO "{self.partitions_table}" VALUES (?, ?, ?)',
+                [self.table_name, partition_id, self.modified],
+            )
+    
+    def table_modified(self, table_fqn: str) -> datetime:
+        """Return the time of the last recorded modification."""
+        return self.modified
+    
+    def run_query(
+        self,
+        sql: str,
+        context: Optional[Dict[str, Any]] = None,
+        maximum_bytes_billed: Optional[int] = None,
+    ) -> Any:
+        """Execute BigQuery SQL on DuckDB and return a QueryResult."""
+        from src.bigquery_client import QueryResult
+        from src.exceptions import QueryExecutionError
+        
+        if maximum_bytes_billed is not None and maximum_bytes_billed < self.bytes_per_query:
+            raise QueryExecutionError(
+                "Query exceeded limit for bytes billed",
+                context={"reason": "bytesBilledLimitExceeded"},
+            )
+        self.queries.append(sql)
+        # A cursor per query, so concurrent callers (--batch, --chunked) do not share one
+        rows = self.con.cursor().execute(*to_duckdb(sql)).to_arrow_table().to_pylist()
+        return QueryResult(rows, self.bytes_per_query, self.bytes_per_query)
+    
+    def iter_query(
+        self,
+        sql: str,
+        context: Optional[Dict[str, Any]] = None,
+        page_size: int = 10000,
+        maximum_bytes_billed: Optional[int] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Execute BigQuery SQL on DuckDB and yield non-empty pages of rows."""
+        rows = self.run_query(sql, context=context, maximum_bytes_billed=maximum_bytes_billed).rows
+        for start in range(0, len(rows), page_size):
+            yield rows[start:start + page_size]
+
+
+class FakeRowIterator:
+    """Result rows of a FakeQueryJob, iterable by row or by page.
+    
+    Page tokens are row offsets; ``next_page_token`` is None before the
+    first page and after the last one, like the real RowIterator. Results of
+    ``query_and_wait`` carry their first page in the query response.
+    """
+    
+    def __init__(
+        self,
+        server: "FakeBigQueryJobClient",
+        rows: List[Dict[str, Any]],
+        page_size: Optional[int],
+        page_token: Optional[str] = None,
+        inline_first_page: bool = False,
+    ):
+        self.server = server
+        self.rows = rows
+        self.page_size = page_size or max(1, len(rows))
+        self.next_page_token = page_token
+        self.inline_first_page = inline_first_page
+        self.job_id: Optional[str] = None
+        self.query_id: Optional[str] = None
+        self.location: Optional[str] = None
+        self.total_bytes_processed: Optional[int] = None
+    
+    @property
+    def pages(self) -> Iterator[List[Dict[str, Any]]]:
+        """Yield pages of rows, one API call each (failing as the server is told to)."""
+        start = int(self.next_page_token or 0)
+        while start < len(self.rows):
+            if start > 0 or not self.inline_first_page:
+                self.server.api_call()
+            self.server.page_fetch(start // self.page_size)
+            end = start + self.page_size
+            self.next_page_token = str(end) if end < len(self.rows) else None
+            yield self.rows[start:end]
+            start = end
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (row for page in self.pages for row in page)
+
+
+class FakeQueryJob:
+    """Query job of FakeBigQueryJobClient that runs for a fixed wall time.
+    
+    The job becomes DONE on the first status reload after its run time has
+    passed; ``result()`` blocks until then, like the real client.
+    """
+    
+    def __init__(self, server: "FakeBigQueryJobClient", job_id: str, query: Any):
+        self.server = server
+        self.job_id = job_id
+        self.destination = job_id
+        self.query = query
+        self.state = "RUNNING"
+        self.finish_at = time.monotonic() + server.run_seconds
+        self.rows: List[Dict[str, Any]] = []
+        self.error_result: Optional[Dict[str, str]] = None
+        self.total_bytes_processed = 0
+        self.total_bytes_billed = 0
+        self.cache_hit = False
+    
+    def reload(self) -> None:
+        """Refresh the job state (one status API call)."""
+        self.server.api_call()
+        if self.state == "RUNNING" and time.monotonic() >= self.finish_at:
+            try:
+                result = self.server.engine.run_query(self.query)
+            except Exception as exc:
+                self.error_result = {"reason": "invalidQuery", "message": str(exc)}
+            else:
+                self.rows = result.rows
+                self.total_bytes_processed = result.bytes_processed
+                self.total_bytes_billed = result.bytes_billed
+            self.server.finish(self)
+    
+    def result(self, page_size: Optional[int] = None) -> Any:
+        """Wait for the job, then return its rows as an iterator with ``pages``."""
+        while self.state != "DONE":
+            time.sleep(max(0.0, self.finish_at - time.monotonic()))
+            self.reload()
+        if self.error_result is not None:
+            from google.api_core import exceptions as google_exceptions
+            
+            raise google_exceptions.BadRequest(self.error_result["message"])
+        self.server.api_call()
+        return FakeRowIterator(self.server, self.rows, page_size)
+    
+    def cancel(self) -> None:
+        """Cancel the job if it is still running."""
+        self.server.api_call()
+        if self.state == "RUNNING":
+            self.error_result = {"reason": "stopped", "message": "Job cancelled"}
+            self.server.finish(self, cancelled=True)
+
+
+class FakeBigQueryJobClient:
+    """``google.cloud.bigquery.Client`` stand-in serving query jobs from DuckDB.
+    
+    Jobs run for ``run_seconds`` of wall time and then return the rows of
+    the query on a DuckDBQueryClient. The server tracks running jobs (and
+    their peak) and API calls; ``query_and_wait`` answers queries in one
+    call without a job. Submitting more than ``max_running`` jobs at
+    once fails like BigQuery's concurrent query quota.
+    """
+    
+    def __init__(
+        self,
+        engine: DuckDBQueryClient,
+        run_seconds: float = 0.05,
+        api_latency: float = 0.0,
+        max_running: Optional[int] = None,
+        failing_pages: Iterable[int] = (),
+        failing_submissions: int = 0,
+    ):
+        """Initialize fake job server.
+        
+        Args:
+            engine: DuckDBQueryClient that computes job results
+            run_seconds: Wall time each job runs before it is DONE
+            api_latency: Simulated latency of every API call (seconds)
+            max_running: Concurrent query quota (None for unlimited)
+            failing_pages: Result page numbers whose first fetch fails with a
+                connection reset
+            failing_submissions: Number of job submissions that create their
+                job but then fail, as if the response was lost
+        """
+        import threading
+        
+        self.engine = engine
+        self.run_seconds = run_seconds
+        self.api_latency = api_latency
+        self.max_running = max_running
+        self.jobs: List[FakeQueryJob] = []
+        self.running = 0
+        self.peak_running = 0
+        self.cancelled = 0
+        self.api_calls = 0
+        self.failing_pages = set(failing_pages)
+        self.failing_submissions = failing_submissions
+        self.page_fetches = 0
+        self.stateless_queries = 0
+        self._lock = threading.Lock()
+    
+    def api_call(self) -> None:
+        """Count one API call and wait for its simulated latency."""
+        with self._lock:
+            self.api_calls += 1
+        if self.api_latency:
+            time.sleep(self.api_latency)
+    
+    def page_fetch(self, page_number: int) -> None:
+        """Count one result page fetch, failing it once if it is listed in failing_pages."""
+        with self._lock:
+            self.page_fetches += 1
+            if page_number in self.failing_pages:
+                self.failing_pages.discard(page_number)
+                raise ConnectionResetError(f"Connection reset while fetching page {page_number}")
+    
+    def query(self, sql: str, job_config: Any = None, job_id: Optional[str] = None) -> FakeQueryJob:
+        """Start a query job (failing with Conflict if job_id already exists)."""
+        from google.api_core import exceptions as google_exceptions
+        from src.query_builder import ParameterizedQuery
+        
+        self.api_call()
+        parameters = getattr(job_config, "query_parameters", None)
+        with self._lock:
+            if job_id is not None and any(job.job_id == job_id for job in self.jobs):
+                raise google_exceptions.Conflict(f"Already Exists: Job {job_id}")
+            if self.max_running is not None and self.running >= self.max_running:
+                raise google_exceptions.Forbidden(
+                    "Exceeded rate limits: too many concurrent queries for this project"
+                )
+            self.running += 1
+            self.peak_running = max(self.peak_running, self.running)
+            job = FakeQueryJob(
+                self,
+                job_id or f"job_{len(self.jobs)}",
+                ParameterizedQuery(sql, parameters) if parameters else sql,
+            )
+            self.jobs.append(job)
+            if self.failing_submissions:
+                self.failing_submissions -= 1
+                raise google_exceptions.ServiceUnavailable("Connection lost after job insert")
+        return job
+    
+    def query_and_wait(
+        self,
+        sql: str,
+        job_config: Any = None,
+        page_size: Optional[int] = None,
+        **kwargs: Any,
+    ) -> FakeRowIterator:
+        """Run a query through jobs.query without creating a job.
+        
+        The query runs for ``run_seconds`` within one API call, which returns
+        the first result page with the response.
+        """
+        from google.api_core import exceptions as google_exceptions
+        from src.query_builder import ParameterizedQuery
+        
+        self.api_call()
+        parameters = getattr(job_config, "query_parameters", None)
+        with self._lock:
+            self.stateless_queries += 1
+            query_id = f"query_{self.stateless_queries}"
+        time.sleep(self.run_seconds)
+        try:
+            result = self.engine.run_query(ParameterizedQuery(sql, parameters) if parameters else sql)
+        except Exception as exc:
+            raise google_exceptions.BadRequest(str(exc))
+        row_iterator = FakeRowIterator(self, result.rows, page_size, inline_first_page=True)
+        row_iterator.query_id = query_id
+        row_iterator.total_bytes_processed = result.bytes_processed
+        return row_iterator
+    
+    def get_job(self, job_id: str, location: Optional[str] = None) -> FakeQueryJob:
+        """Return an existing job."""
+        self.api_call()
+        return next(job for job in self.jobs if job.job_id == job_id)
+    
+    def list_rows(
+        self,
+        table: str,
+        page_size: Optional[int] = None,
+        page_token: Optional[str] = None,
+    ) -> FakeRowIterator:
+        """List the result rows of a finished job (its destination table) from a page token."""
+        return FakeRowIterator(self, self.get_job(table).rows, page_size, page_token)
+    
+    def finish(self, job: FakeQueryJob, cancelled: bool = False) -> None:
+        """Mark a running job DONE."""
+        with self._lock:
+            if job.state == "RUNNING":
+                job.state = "DONE"
+                self.running -= 1
+                self.cancelled += int(cancelled)
+    
+    def close(self) -> None:
+        """Release resources (nothing to do)."""
@@ -3,20 +3,55 @@
 BigQuery Stock Quotes Extractor - Main CLI Entry Point
 
 Python 3.13 script for extracting historical stock quotes from Google BigQuery.
-Supports three query modes: ALL, RANGE, NEIGHBORHOOD.
+Supports query modes ALL, RANGE, NEIGHBORHOOD and incremental SYNC.
 """
 
 import argparse
+import functools
+import itertools
+import math
 import sys
 from datetime import datetime
 from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
-from src.config import load_config
+from src.config import (
+    load_config,
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_READ_STREAMS,
+    DEFAULT_UPLOAD_CHUNK_SIZE,
+    DEFAULT_SLICE_ROWS,
+    DEFAULT_MAX_PARALLEL_JOBS,
+    DEFAULT_MAX_EXPANSION_ROUNDS,
+    DEFAULT_NEIGHBORHOOD_BYTES_BILLED,
+    DEFAULT_RESULT_CACHE_MAX_MB,
+    DEFAULT_BATCH_WORKERS,
+    DEFAULT_SERVE_WORKERS,
+    UPLOAD_MEMO_TTL_SECONDS,
+)
 from src.logger import build_logger, log_struct, set_request_id, get_request_id
-from src.query_builder import QueryBuilder
-from src.bigquery_client import BigQueryClient
-from src.output_handler import OutputHandler
-from src.query_helpers import validate_symbol_format, validate_timeframe
+from src.query_builder import (
+    QueryBuilder,
+    NEIGHBORHOOD_STRATEGIES,
+    DEFAULT_NEIGHBORHOOD_STRATEGY,
+)
+from src.bigquery_client import BigQueryClient, Query, estimate_result_rows
+from src.chunked_executor import ChunkedQueryExecutor
+from src.neighborhood_fetcher import NeighborhoodFetcher
+from src.density_index import DensityIndex
+from src.cached_fetcher import CachedFetcher
+from src.coverage_index import CoverageIndex
+from src.partition_cache import PartitionCache
+from src.incremental_sync import IncrementalSync, SyncState
+from src.batch_runner import BatchRunner, load_batch_file
+from src.request_coalescer import CoalescedStream, RangeRequest, log_plan, plan_groups
+from src.http_service import ExtractionService
+from src.single_flight import SharedQueryClient, SingleFlight, request_fingerprint
+from src.query_preflight import PreflightEstimate, QueryPreflight
+from src.output_handler import (
+    OutputHandler, OUTPUT_WRITERS, DEFAULT_OUTPUT_FORMAT, validate_compression_level,
+)
+from src.query_helpers import RECORDS_PER_DAY, validate_symbol_format, validate_timeframe
 from src.exceptions import BQExtractorError, ValidationError, DataNotFoundError
 from src.gcs_handler import GCSHandler
 
@@ -46,9 +81,12 @@ def parse_timestamp(ts_str: str) -> datetime:
         )
 
 
-def parse_args():
+def parse_args(argv: Optional[List[str]] = None):
     """Parse command-line arguments.
     
+    Args:
+        argv: Arguments to parse (default: sys.argv)
+    
     Returns:
         Parsed arguments namespace
     """
@@ -59,30 +97,90 @@ def parse_args():
 Examples:
   # Query all data (15 years)
   python main.py --symbol BTCUSDT --timeframe 1d --all
-
+  
   # Query time range
   python main.py --symbol ETHUSDT --timeframe 1h \\
     --from 2024-01-01T00:00:00Z --to 2024-12-31T23:59:59Z
-
+  
+  # Query a universe of symbols with one job, one file per symbol
+  python main.py --symbols BTCUSDT,ETHUSDT,SOLUSDT --timeframe 1d --all
+  
   # Query neighborhood (100 records before/after timestamp)
   python main.py --symbol BTCUSDT --timeframe 15 \\
     --timestamp 2024-06-15T12:00:00Z --n-before 100 --n-after 100
+  
+  # Run many requests (one JSON object of options per line) over shared clients
+  python main.py --batch requests.jsonl --batch-workers 8
+  
+  # Serve requests over HTTP with warm clients
+  python main.py --serve 127.0.0.1:8080
+  curl 'http://127.0.0.1:8080/v1/candles?symbol=BTCUSDT&timeframe=1h&from=2024-01-01T00:00:00Z&to=2024-01-31T23:59:59Z'
         """
     )
     
-    # Required arguments
-    parser.add_argument(
+    # Required arguments (unless --batch or --serve): one symbol or a universe of symbols
+    symbol_group = parser.add_mutually_exclusive_group()
+    symbol_group.add_argument(
         '--symbol', '-s',
-        required=True,
         help='Stock symbol (e.g., BTCUSDT, ETHUSDT)'
     )
+    symbol_group.add_argument(
+        '--symbols',
+        help='Comma-separated symbols exported with one query into per-symbol files '
+             '(ALL and RANGE modes)'
+    )
+    symbol_group.add_argument(
+        '--symbols-file',
+        type=Path,
+        help='File with one symbol per line (# starts a comment), exported like --symbols'
+    )
     parser.add_argument(
         '--timeframe', '-t',
-        required=True,
         choices=['1M', '1w', '1d', '4h', '1h', '15', '5', '1'],
         help='Timeframe identifier'
     )
     
+    # Batch mode
+    parser.add_argument(
+        '--batch',
+        type=Path,
+        help='JSON Lines file of requests; each line holds the options of one request '
+             '(e.g. {"symbol": "BTCUSDT", "timeframe": "1d", "all": true})'
+    )
+    parser.add_argument(
+        '--batch-workers',
+        type=int,
+        default=DEFAULT_BATCH_WORKERS,
+        help=f'Requests run concurrently in --batch mode (default: {DEFAULT_BATCH_WORKERS})'
+    )
+    parser.add_argument(
+        '--no-coalesce',
+        action='store_true',
+        help='In --batch mode, run every RANGE request as its own job instead of merging '
+             'requests with the same timeframe and overlapping windows into one job'
+    )
+    
+    # Service mode
+    parser.add_argument(
+        '--serve',
+        metavar='[HOST]:PORT',
+        help='Serve ALL, RANGE and NEIGHBORHOOD requests over HTTP '
+             '(GET /v1/candles?symbol=...&timeframe=...) with warm shared clients'
+    )
+    parser.add_argument(
+        '--serve-workers',
+        type=int,
+        default=DEFAULT_SERVE_WORKERS,
+        help=f'Requests processed concurrently in --serve mode (default: {DEFAULT_SERVE_WORKERS})'
+    )
+    parser.add_argument(
+        '--no-dedup',
+        action='store_true',
+        help='In --batch and --serve modes, run identical concurrent queries as separate jobs '
+             f'and do not reuse GCS objects uploaded in the last {UPLOAD_MEMO_TTL_SECONDS}s '
+             'by identical requests'
+    )
+    
     # Optional arguments
     parser.add_argument(
         '--exchange', '-e',
@@ -93,6 +191,124 @@ Examples:
         default=None,
         help='Output directory (if not specified, uploads to GCS bucket if configured)'
     )
+    parser.add_argument(
+        '--format', '-f',
+        dest='output_format',
+        choices=sorted(OUTPUT_WRITERS),
+        default=DEFAULT_OUTPUT_FORMAT,
+        help=f'Output file format (default: {DEFAULT_OUTPUT_FORMAT})'
+    )
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help='Write compact JSON without indentation (default: indented)'
+    )
+    parser.add_argument(
+        '--compression',
+        choices=['none', 'gzip', 'zstd'],
+        default='none',
+        help='Streaming compression for json/ndjson/csv output (default: none)'
+    )
+    parser.add_argument(
+        '--compression-level',
+        type=int,
+        default=None,
+        help='Compression level (gzip 0-9, default 6; zstd 1-22, default 3)'
+    )
+    parser.add_argument(
+        '--parquet-row-group-size',
+        type=int,
+        default=None,
+        help='Rows per Parquet row group (default: 1000000)'
+    )
+    parser.add_argument(
+        '--parquet-compression',
+        choices=['zstd', 'snappy', 'gzip', 'none'],
+        default=None,
+        help='Parquet compression codec (default: zstd)'
+    )
+    parser.add_argument(
+        '--ndjson-metadata',
+        action='store_true',
+        help='Write the metadata block as the first line of ndjson output '
+             '(default: records only)'
+    )
+    parser.add_argument(
+        '--gcs-chunk-size-mb',
+        type=int,
+        default=DEFAULT_UPLOAD_CHUNK_SIZE // (1024 * 1024),
+        help='Chunk size in MiB for streaming GCS uploads '
+             f'(default: {DEFAULT_UPLOAD_CHUNK_SIZE // (1024 * 1024)})'
+    )
+    parser.add_argument(
+        '--page-size',
+        type=int,
+        default=DEFAULT_PAGE_SIZE,
+        help=f'Rows fetched per BigQuery result page (default: {DEFAULT_PAGE_SIZE})'
+    )
+    parser.add_argument(
+        '--engine',
+        choices=['rest', 'storage'],
+        default='rest',
+        help='Result fetch engine: REST pages or BigQuery Storage Read API with Arrow '
+             '(falls back to REST if unavailable; default: rest)'
+    )
+    parser.add_argument(
+        '--read-streams',
+        type=int,
+        default=DEFAULT_READ_STREAMS,
+        help='Parallel read streams for --engine storage reads that need no row order; '
+             f'ordered exports use one stream (default: {DEFAULT_READ_STREAMS})'
+    )
+    parser.add_argument(
+        '--chunked',
+        action='store_true',
+        help='Split ALL/RANGE queries into day-aligned slices run as parallel jobs'
+    )
+    parser.add_argument(
+        '--max-parallel-jobs',
+        type=int,
+        default=DEFAULT_MAX_PARALLEL_JOBS,
+        help=f'Concurrent slice jobs for --chunked (default: {DEFAULT_MAX_PARALLEL_JOBS})'
+    )
+    parser.add_argument(
+        '--slice-rows',
+        type=int,
+        default=DEFAULT_SLICE_ROWS,
+        help=f'Approximate rows per slice for --chunked (default: {DEFAULT_SLICE_ROWS})'
+    )
+    parser.add_argument(
+        '--max-scan-gb',
+        type=float,
+        help='Dry-run ALL/RANGE queries first and handle those estimated to process more '
+             'than this many GiB as set by --over-budget (default: no pre-flight check)'
+    )
+    parser.add_argument(
+        '--over-budget',
+        choices=['split', 'reject'],
+        default='split',
+        help='Split queries above --max-scan-gb into time slices run as separate jobs, '
+             'or reject them (default: split)'
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Print the bytes the query would process (and the --max-scan-gb outcome) '
+             'without running it'
+    )
+    parser.add_argument(
+        '--result-cache',
+        action='store_true',
+        help='Serve complete days from a local Parquet cache under CACHE_DIR and fetch '
+             'only missing days (invalidated when the table is modified)'
+    )
+    parser.add_argument(
+        '--result-cache-max-mb',
+        type=int,
+        default=DEFAULT_RESULT_CACHE_MAX_MB,
+        help='Size of the result cache before least recently used days are evicted '
+             f'(default: {DEFAULT_RESULT_CACHE_MAX_MB})'
+    )
     
     # Query mode: ALL
     parser.add_argument(
@@ -100,6 +316,25 @@ Examples:
         action='store_true',
         help='Query all historical data (15 years)'
     )
+    parser.add_argument(
+        '--coverage-index',
+        action='store_true',
+        help='Bound ALL queries by the symbol\'s first and last candle from a coverage '
+             'table cached under CACHE_DIR (built and refreshed with one grouped query)'
+    )
+    
+    # Query mode: SYNC
+    parser.add_argument(
+        '--sync',
+        action='store_true',
+        help='Export only closed candles newer than the last sync and add them to the '
+             'existing dataset (appended for ndjson/csv, new part file otherwise)'
+    )
+    parser.add_argument(
+        '--sync-state',
+        type=Path,
+        help='JSON file holding sync watermarks (default: CACHE_DIR/sync_state.json)'
+    )
     
     # Query mode: RANGE
     parser.add_argument(
@@ -129,8 +364,67 @@ Examples:
         type=int,
         help='Number of records after center timestamp'
     )
+    parser.add_argument(
+        '--neighborhood-strategy',
+        choices=NEIGHBORHOOD_STRATEGIES,
+        default=DEFAULT_NEIGHBORHOOD_STRATEGY,
+        help='Neighborhood query strategy: three UNION ALL branches or a single '
+             f'scan with ROW_NUMBER()/QUALIFY (default: {DEFAULT_NEIGHBORHOOD_STRATEGY})'
+    )
+    parser.add_argument(
+        '--density-index',
+        action='store_true',
+        help='Size neighborhood windows from per-symbol monthly candle counts cached '
+             'under CACHE_DIR (built and refreshed with a cheap aggregate query)'
+    )
+    parser.add_argument(
+        '--max-expansion-rounds',
+        type=int,
+        default=DEFAULT_MAX_EXPANSION_ROUNDS,
+        help='Rounds of re-querying a short neighborhood side with a doubled window '
+             f'(0 disables; default: {DEFAULT_MAX_EXPANSION_ROUNDS})'
+    )
+    parser.add_argument(
+        '--expansion-budget-gb',
+        type=float,
+        default=None,
+        help='Total GiB billed allowed for a neighborhood request including expansions '
+             f'(default: {DEFAULT_NEIGHBORHOOD_BYTES_BILLED // 1024 ** 3})'
+    )
+    
+    return parser.parse_args(argv)
+
+
+def parse_symbols(args) -> Optional[List[str]]:
+    """Collect the symbols of a multi-symbol request.
+    
+    Args:
+        args: Parsed arguments namespace
+    
+    Returns:
+        Unique symbols in the given order, or None for a single-symbol request
+    
+    Raises:
+        ValidationError: If the symbols file cannot be read or is empty
+    """
+    if args.symbols_file:
+        try:
+            lines = args.symbols_file.read_text(encoding="utf-8").splitlines()
+        except OSError as exc:
+            raise ValidationError(
+                f"Cannot read symbols file: {exc}",
+                context={"symbols_file": str(args.symbols_file)}
+            )
+        symbols = [line.split("#", 1)[0].strip() for line in lines]
+    elif args.symbols:
+        symbols = [symbol.strip() for symbol in args.symbols.split(",")]
+    else:
+        return None
     
-    return parser.parse_args()
+    symbols = list(dict.fromkeys(symbol for symbol in symbols if symbol))
+    if not symbols:
+        raise ValidationError("No symbols given (--symbols/--symbols-file)")
+    return symbols
 
 
 def validate_args(args) -> str:
@@ -140,18 +434,26 @@ def validate_args(args) -> str:
         args: Parsed arguments namespace
     
     Returns:
-        Query mode: 'ALL', 'RANGE', or 'NEIGHBORHOOD'
+        Query mode: 'ALL', 'SYNC', 'RANGE', or 'NEIGHBORHOOD'
     
     Raises:
         ValidationError: If arguments are invalid or ambiguous
     """
+    if not (args.symbol or args.symbols or args.symbols_file):
+        raise ValidationError("One of --symbol, --symbols or --symbols-file is required")
+    
+    if not args.timeframe:
+        raise ValidationError("--timeframe is required")
+    
     # Validate symbol format
-    if not validate_symbol_format(args.symbol):
-        raise ValidationError(
-            f"Invalid symbol format: {args.symbol}. "
-            f"Symbol must be alphanumeric and uppercase (e.g., BTCUSDT)",
-            context={"symbol": args.symbol}
-        )
+    args.symbol_list = parse_symbols(args)
+    for symbol in args.symbol_list or [args.symbol]:
+        if not validate_symbol_format(symbol):
+            raise ValidationError(
+                f"Invalid symbol format: {symbol}. "
+                f"Symbol must be alphanumeric and uppercase (e.g., BTCUSDT)",
+                context={"symbol": symbol}
+            )
     
     # Validate timeframe
     if not validate_timeframe(args.timeframe):
@@ -160,27 +462,108 @@ def validate_args(args) -> str:
             context={"timeframe": args.timeframe}
         )
     
+    if args.page_size <= 0:
+        raise ValidationError(
+            "Page size (--page-size) must be positive",
+            context={"page_size": args.page_size}
+        )
+    
+    if args.parquet_row_group_size is not None and args.parquet_row_group_size <= 0:
+        raise ValidationError(
+            "Parquet row group size (--parquet-row-group-size) must be positive",
+            context={"parquet_row_group_size": args.parquet_row_group_size}
+        )
+    
+    if args.compression_level is not None:
+        if args.compression == 'none':
+            raise ValidationError(
+                "--compression-level requires --compression gzip or zstd",
+                context={"compression_level": args.compression_level}
+            )
+        validate_compression_level(args.compression, args.compression_level)
+    
+    if args.gcs_chunk_size_mb <= 0:
+        raise ValidationError(
+            "GCS chunk size (--gcs-chunk-size-mb) must be positive",
+            context={"gcs_chunk_size_mb": args.gcs_chunk_size_mb}
+        )
+    
+    if args.read_streams <= 0:
+        raise ValidationError(
+            "Read stream count (--read-streams) must be positive",
+            context={"read_streams": args.read_streams}
+        )
+    
+    if args.max_parallel_jobs <= 0 or args.slice_rows <= 0:
+        raise ValidationError(
+            "Chunking options (--max-parallel-jobs, --slice-rows) must be positive",
+            context={
+                "max_parallel_jobs": args.max_parallel_jobs,
+                "slice_rows": args.slice_rows,
+            }
+        )
+    
+    if args.result_cache_max_mb <= 0:
+        raise ValidationError(
+            "Result cache size (--result-cache-max-mb) must be positive",
+            context={"result_cache_max_mb": args.result_cache_max_mb}
+        )
+    
+    if args.result_cache and args.chunked:
+        raise ValidationError("--result-cache cannot be combined with --chunked")
+    
+    if args.max_scan_gb is not None and args.max_scan_gb <= 0:
+        raise ValidationError(
+            "Scan budget (--max-scan-gb) must be positive",
+            context={"max_scan_gb": args.max_scan_gb}
+        )
+    
     # Determine query mode
     mode_count = sum([
         args.all,
+        args.sync,
         bool(args.from_timestamp or args.to_timestamp),
         bool(args.center_timestamp or args.n_before is not None or args.n_after is not None),
     ])
     
     if mode_count == 0:
         raise ValidationError(
-            "No query mode specified. Use one of: --all, --from/--to, or --timestamp/--n-before/--n-after"
+            "No query mode specified. Use one of: --all, --sync, --from/--to, or --timestamp/--n-before/--n-after"
         )
     
     if mode_count > 1:
         raise ValidationError(
-            "Multiple query modes specified. Use only one: --all, --from/--to, or --timestamp/--n-before/--n-after"
+            "Multiple query modes specified. Use only one: --all, --sync, --from/--to, or --timestamp/--n-before/--n-after"
+        )
+    
+    if args.symbol_list and not (args.all or args.from_timestamp or args.to_timestamp):
+        raise ValidationError("--symbols/--symbols-file are only supported for ALL and RANGE modes")
+    
+    if args.symbol_list and (
+        args.chunked or args.result_cache or args.coverage_index or args.engine == 'storage'
+    ):
+        raise ValidationError(
+            "--symbols/--symbols-file cannot be combined with --chunked, --result-cache, "
+            "--coverage-index or --engine storage"
         )
     
     # Validate mode-specific arguments
+    if args.coverage_index and not args.all:
+        raise ValidationError("--coverage-index is only supported for ALL mode")
+    
+    if args.sync_state and not args.sync:
+        raise ValidationError("--sync-state requires --sync")
+    
     if args.all:
         return 'ALL'
     
+    if args.sync:
+        if args.chunked or args.result_cache or args.dry_run:
+            raise ValidationError(
+                "--chunked, --result-cache and --dry-run are not supported for SYNC mode"
+            )
+        return 'SYNC'
+    
     if args.from_timestamp or args.to_timestamp:
         if not (args.from_timestamp and args.to_timestamp):
             raise ValidationError(
@@ -193,245 +576,838 @@ def validate_args(args) -> str:
             raise ValidationError(
                 "NEIGHBORHOOD mode requires --timestamp, --n-before, and --n-after"
             )
+        if args.chunked:
+            raise ValidationError(
+                "--chunked is only supported for ALL and RANGE modes"
+            )
         if args.n_before < 0 or args.n_after < 0:
             raise ValidationError(
                 "Record counts (--n-before, --n-after) must be non-negative"
             )
+        if args.max_expansion_rounds < 0 or (
+            args.expansion_budget_gb is not None and args.expansion_budget_gb <= 0
+        ):
+            raise ValidationError(
+                "--max-expansion-rounds must be non-negative and --expansion-budget-gb positive",
+                context={
+                    "max_expansion_rounds": args.max_expansion_rounds,
+                    "expansion_budget_gb": args.expansion_budget_gb,
+                }
+            )
+        # Cached neighborhoods read whole days; neither the query strategy
+        # nor the bytes-billed budget applies to them
+        if args.result_cache and (
+            args.neighborhood_strategy != DEFAULT_NEIGHBORHOOD_STRATEGY
+            or args.expansion_budget_gb is not None
+        ):
+            raise ValidationError(
+                "--neighborhood-strategy and --expansion-budget-gb cannot be combined "
+                "with --result-cache",
+                context={
+                    "neighborhood_strategy": args.neighborhood_strategy,
+                    "expansion_budget_gb": args.expansion_budget_gb,
+                }
+            )
+        if args.expansion_budget_gb is None:
+            args.expansion_budget_gb = DEFAULT_NEIGHBORHOOD_BYTES_BILLED / 1024 ** 3
         return 'NEIGHBORHOOD'
     
     # Should never reach here
     raise ValidationError("Unable to determine query mode")
 
 
-def main():
-    """Main entry point."""
-    # Parse arguments
-    args = parse_args()
+def build_gcs_handler(config, logger) -> Optional[GCSHandler]:
+    """Create the GCS handler if GCS is configured and reachable.
     
-    # Initialize logger (before config to catch config errors)
-    logger = build_logger(
-        service_name="bq-stock-extractor",
-        environment="development",
-        level="INFO",
-    )
-    
-    # Generate unique request ID for this extraction
-    request_id = set_request_id()
+    Args:
+        config: Loaded configuration
+        logger: Logger instance
     
-    try:
-        # Validate arguments and determine query mode
-        query_mode = validate_args(args)
-        
-        log_struct(
-            logger,
-            "INFO",
-            f"Starting BigQuery extraction in {query_mode} mode",
-            labels={
-                "symbol": args.symbol,
-                "timeframe": args.timeframe,
-                "mode": query_mode,
-            },
-            fields={
-                "exchange": args.exchange,
-                "output_dir": args.output,
-                "request_id": request_id,
-            }
-        )
-        
-        # Load configuration
-        config = load_config()
-        
-        # Initialize GCS handler if configured
-        gcs_handler = None
-        if config.gcs_enabled:
-            try:
-                gcs_handler = GCSHandler(
-                    bucket_name=config.gcs_bucket_name,
-                    credentials_path=config.gcs_service_account_key_path,
-                    logger=logger
-                )
-                log_struct(
-                    logger,
-                    "INFO",
-                    "GCS handler initialized successfully",
-                    labels={"bucket": config.gcs_bucket_name},
-                    fields={}
-                )
-            except Exception as exc:
-                # Log warning but continue with local-only mode
-                log_struct(
-                    logger,
-                    "WARNING",
-                    f"GCS unavailable, using local storage only: {exc}",
-                    labels={},
-                    fields={"error": str(exc), "error_type": type(exc).__name__}
-                )
-                gcs_handler = None
-        else:
+    Returns:
+        GCSHandler, or None to use local storage only
+    """
+    gcs_handler = None
+    if config.gcs_enabled:
+        try:
+            gcs_handler = GCSHandler(
+                bucket_name=config.gcs_bucket_name,
+                credentials_path=config.gcs_service_account_key_path,
+                logger=logger
+            )
             log_struct(
                 logger,
                 "INFO",
-                "GCS not configured, using local storage only",
-                labels={},
+                "GCS handler initialized successfully",
+                labels={"bucket": config.gcs_bucket_name},
                 fields={}
             )
-        
-        # Initialize components
-        query_builder = QueryBuilder(config.bq_table_fqn)
-        bq_client = BigQueryClient(config, logger)
-        output_handler = OutputHandler(logger, gcs_handler=gcs_handler)
-        
-        # Build query based on mode
-        if query_mode == 'ALL':
-            sql = query_builder.build_all_query(
-                args.symbol,
-                args.timeframe,
-                args.exchange,
-            )
-        elif query_mode == 'RANGE':
-            from_ts = parse_timestamp(args.from_timestamp)
-            to_ts = parse_timestamp(args.to_timestamp)
-            sql = query_builder.build_range_query(
-                args.symbol,
-                args.timeframe,
-                from_ts,
-                to_ts,
-                args.exchange,
-            )
-        else:  # NEIGHBORHOOD
-            center_ts = parse_timestamp(args.center_timestamp)
-            sql = query_builder.build_neighborhood_query(
-                args.symbol,
-                args.timeframe,
-                center_ts,
-                args.n_before,
-                args.n_after,
-                args.exchange,
-            )
-        
-        # Execute query
-        rows = bq_client.execute_query(
-            sql,
-            context={
-                "symbol": args.symbol,
-                "timeframe": args.timeframe,
-                "mode": query_mode,
-            }
-        )
-        
-        # Check if any data returned
-        if not rows:
+        except Exception as exc:
+            # Log warning but continue with local-only mode
             log_struct(
                 logger,
                 "WARNING",
-                "No data found for query",
-                labels={
-                    "symbol": args.symbol,
-                    "timeframe": args.timeframe,
-                },
-                fields={}
+                f"GCS unavailable, using local storage only: {exc}",
+                labels={},
+                fields={"error": str(exc), "error_type": type(exc).__name__}
             )
-            raise DataNotFoundError(
-                f"No data found for symbol={args.symbol}, timeframe={args.timeframe}",
-                context={
-                    "symbol": args.symbol,
-                    "timeframe": args.timeframe,
-                    "mode": query_mode,
-                }
+            gcs_handler = None
+    else:
+        log_struct(
+            logger,
+            "INFO",
+            "GCS not configured, using local storage only",
+            labels={},
+            fields={}
+        )
+    
+    return gcs_handler
+
+
+def scan_budget_slice_rows(
+    args,
+    sql: Query,
+    estimate: PreflightEstimate,
+    splittable: bool = True,
+) -> Optional[int]:
+    """Decide how to run a query checked against the --max-scan-gb budget.
+    
+    Over-budget queries are split into time slices of at most
+    ``estimate.slices``-th of the query's estimated rows, so each slice job
+    processes roughly the budget. Slices cover at least one day, so a query
+    whose single day is estimated above the budget is rejected instead.
+    
+    Args:
+        args: Parsed arguments namespace
+        sql: Checked query
+        estimate: Pre-flight estimate of the query
+        splittable: Whether the query can run as time slices
+    
+    Returns:
+        Rows per slice if the query must be split, None if it fits
+    
+    Raises:
+        ValidationError: If the query is over budget and cannot or must not
+            be split (--over-budget reject), or one day of it is over budget
+    """
+    if estimate.within_budget:
+        return None
+    rows = estimate_result_rows(sql) if splittable else None
+    if args.over_budget == 'reject' or rows is None:
+        raise ValidationError(
+            f"Query would process {estimate.bytes_processed / 1024 ** 3:.2f} GiB, "
+            f"above the --max-scan-gb budget of {args.max_scan_gb} GiB",
+            context={
+                "bytes_processed": estimate.bytes_processed,
+                "max_bytes": estimate.max_bytes,
+                "over_budget": args.over_budget,
+            }
+        )
+    slice_rows = max(1, math.ceil(rows / estimate.slices))
+    records_per_day = RECORDS_PER_DAY.get(args.timeframe, 1)
+    if slice_rows < records_per_day:
+        day_bytes = estimate.bytes_processed * records_per_day / rows
+        raise ValidationError(
+            f"A one-day slice would process {day_bytes / 1024 ** 3:.2f} GiB, "
+            f"above the --max-scan-gb budget of {args.max_scan_gb} GiB",
+            context={
+                "bytes_processed": estimate.bytes_processed,
+                "max_bytes": estimate.max_bytes,
+                "day_bytes": int(day_bytes),
+            }
+        )
+    return slice_rows
+
+
+def scan_budget(args) -> Optional[int]:
+    """Return the --max-scan-gb budget in bytes (None if not set)."""
+    return int(args.max_scan_gb * 1024 ** 3) if args.max_scan_gb is not None else None
+
+
+def run_dry_run(args, query_mode: str, logger, query_builder: QueryBuilder, preflight: QueryPreflight) -> int:
+    """Print the estimated bytes processed by a request's query without running it.
+    
+    The query is built as the extraction would build it before any index
+    lookups (ALL uses the full 15-year range, NEIGHBORHOOD the first round
+    without expansions).
+    
+    Args:
+        args: Parsed and validated arguments namespace
+        query_mode: 'ALL', 'RANGE' or 'NEIGHBORHOOD'
+        logger: Logger instance
+        query_builder: QueryBuilder for the configured table
+        preflight: QueryPreflight caching the estimates
+    
+    Returns:
+        Exit code (0 if the query would run)
+    
+    Raises:
+        ValidationError: If the query would be rejected by --max-scan-gb
+    """
+    if args.symbol_list or query_mode != 'NEIGHBORHOOD':
+        if query_mode == 'ALL':
+            from_ts, to_ts = query_builder.all_time_range(args.timeframe)
+        else:
+            from_ts = parse_timestamp(args.from_timestamp)
+            to_ts = parse_timestamp(args.to_timestamp)
+        if args.symbol_list:
+            sql = query_builder.build_symbols_range_query(
+                args.symbol_list, args.timeframe, from_ts, to_ts, args.exchange,
             )
-        
-        # Transform results
-        transformed_data = output_handler.transform_results(rows)
-        
-        # Build metadata
-        metadata = {
-            "request_id": get_request_id() or "N/A",
-            "request_timestamp": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
-            "symbol": args.symbol,
+        else:
+            sql = query_builder.build_range_query(
+                args.symbol, args.timeframe, from_ts, to_ts, args.exchange,
+            )
+        max_bytes = scan_budget(args)
+    else:
+        sql = query_builder.build_neighborhood_query(
+            args.symbol,
+            args.timeframe,
+            parse_timestamp(args.center_timestamp),
+            args.n_before,
+            args.n_after,
+            args.exchange,
+            strategy=args.neighborhood_strategy,
+        )
+        max_bytes = None
+    
+    estimate = preflight.check(
+        sql,
+        max_bytes=max_bytes,
+        context={
+            "symbol": args.symbol or f"{len(args.symbol_list)} symbols",
             "timeframe": args.timeframe,
-            "query_type": query_mode.lower(),
-            "query_parameters": {}
+            "mode": query_mode,
+        },
+    )
+    print(f"🔎 Dry run: {query_mode} query would process "
+          f"{estimate.bytes_processed / 1024 ** 3:.3f} GiB ({estimate.bytes_processed:,} bytes)")
+    if max_bytes is not None:
+        print(f"   Budget: {args.max_scan_gb} GiB")
+        slice_rows = scan_budget_slice_rows(args, sql, estimate, splittable=not args.symbol_list)
+        if slice_rows is None:
+            print("   Within budget")
+        else:
+            print(f"   Over budget: would run as ~{estimate.slices} slices of up to {slice_rows} rows")
+    return 0
+
+
+def run_extraction(
+    args,
+    query_mode: str,
+    config,
+    logger,
+    bq_client,
+    gcs_handler,
+    request_id: str,
+    batch_source: Optional[Callable[[], Iterator[List[Dict[str, Any]]]]] = None,
+    upload_memo: Optional[SingleFlight] = None,
+    preflight: Optional[QueryPreflight] = None,
+) -> int:
+    """Run one validated extraction request with shared clients.
+    
+    Args:
+        args: Parsed and validated arguments namespace
+        query_mode: Query mode returned by validate_args
+        config: Loaded configuration
+        logger: Logger instance
+        bq_client: BigQueryClient (not closed here)
+        gcs_handler: Optional GCSHandler
+        request_id: Request ID of this extraction
+        batch_source: Streams the request's RANGE rows instead of running its
+            own query (requests coalesced into a shared job)
+        upload_memo: Shares GCS uploads between identical single-symbol
+            extractions (see request_fingerprint)
+        preflight: Caches dry-run estimates for --dry-run and --max-scan-gb
+            (created per call if None)
+    
+    Returns:
+        Exit code (0 on success)
+    
+    Raises:
+        BQExtractorError: If the extraction fails
+    """
+    log_struct(
+        logger,
+        "INFO",
+        f"Starting BigQuery extraction in {query_mode} mode",
+        labels={
+            "symbol": args.symbol or f"{len(args.symbol_list)} symbols",
+            "timeframe": args.timeframe,
+            "mode": query_mode,
+        },
+        fields={
+            "symbols": args.symbol_list,
+            "exchange": args.exchange,
+            "output_dir": args.output,
+            "output_format": args.output_format,
+            "request_id": request_id,
         }
+    )
+    
+    # Initialize components
+    query_builder = QueryBuilder(config.bq_table_fqn)
+    if preflight is None and (args.dry_run or args.max_scan_gb is not None):
+        preflight = QueryPreflight(bq_client, logger)
+    if args.dry_run:
+        return run_dry_run(args, query_mode, logger, query_builder, preflight)
+    
+    output_handler = OutputHandler(
+        logger,
+        gcs_handler=gcs_handler,
+        output_format=args.output_format,
+        writer_options={
+            "row_group_size": args.parquet_row_group_size,
+            "compression": args.parquet_compression,
+            "metadata_line": args.ndjson_metadata,
+        },
+        upload_chunk_size=args.gcs_chunk_size_mb * 1024 * 1024,
+        compression=args.compression,
+        compression_level=args.compression_level,
+    )
+    
+    # Determine storage destination
+    # If --output is None (not provided), use GCS if available
+    # If --output is provided (any path), use local storage
+    use_gcs = args.output is None and gcs_handler is not None
+    
+    # Set output_path for local storage (fallback to current directory)
+    output_path = Path(args.output) if args.output else Path('.')
+    
+    if query_mode == 'SYNC':
+        syncer = IncrementalSync(
+            bq_client,
+            query_builder,
+            output_handler,
+            SyncState(args.sync_state or config.cache_dir / "sync_state.json", logger),
+            logger,
+            page_size=args.page_size,
+        )
+        result = syncer.run(
+            args.symbol,
+            args.timeframe,
+            output_path,
+            args.exchange,
+            use_gcs=use_gcs,
+            pretty=not args.compact,
+            metadata={
+                "request_id": get_request_id() or "N/A",
+                "request_timestamp": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "symbol": args.symbol,
+                "timeframe": args.timeframe,
+                "query_type": "sync",
+            },
+            context={
+                "symbol": args.symbol,
+                "timeframe": args.timeframe,
+                "mode": query_mode,
+            },
+        )
         
-        # Add query-specific parameters
-        if query_mode == 'RANGE':
-            metadata["query_parameters"] = {
-                "from_timestamp": args.from_timestamp,
-                "to_timestamp": args.to_timestamp,
-            }
-        elif query_mode == 'NEIGHBORHOOD':
-            metadata["query_parameters"] = {
-                "center_timestamp": args.center_timestamp,
-                "n_before": args.n_before,
-                "n_after": args.n_after,
-            }
-        # ALL mode has no parameters (empty dict already set)
-        
-        # Determine storage destination
-        # If --output is None (not provided), use GCS if available
-        # If --output is provided (any path), use local storage
-        use_gcs = args.output is None and gcs_handler is not None
-        
-        # Set output_path for local storage (fallback to current directory)
-        output_path = Path(args.output) if args.output else Path('.')
+        if result.file_path is None:
+            print(f"✅ Already up to date (last candle: {result.watermark})")
+        else:
+            print(f"✅ Success! {result.record_count} new records added:")
+            print(f"   {'Download URL' if result.gcs_url else 'File'}: {result.gcs_url or result.file_path}")
+            print(f"   Last candle: {result.watermark}")
         
-        # Save to file with metadata (GCS or local)
-        file_path, gcs_url = output_handler.save_to_file(
-            transformed_data,
+        return 0
+    
+    if args.symbol_list:
+        # Universe: one job for all symbols, split into per-symbol files
+        if query_mode == 'ALL':
+            from_ts, to_ts = query_builder.all_time_range(args.timeframe)
+        else:
+            from_ts = parse_timestamp(args.from_timestamp)
+            to_ts = parse_timestamp(args.to_timestamp)
+        query = query_builder.build_symbols_range_query(
+            args.symbol_list,
+            args.timeframe,
+            from_ts,
+            to_ts,
+            args.exchange,
+        )
+        if preflight is not None and args.max_scan_gb is not None:
+            # One job serves every symbol, so it cannot be split
+            scan_budget_slice_rows(args, query, preflight.check(
+                query,
+                max_bytes=scan_budget(args),
+                context={"symbols": len(args.symbol_list), "timeframe": args.timeframe},
+            ), splittable=False)
+        results = output_handler.write_symbol_streams(
+            bq_client.iter_query(
+                query,
+                context={
+                    "symbols": len(args.symbol_list),
+                    "timeframe": args.timeframe,
+                    "mode": query_mode,
+                },
+                page_size=args.page_size,
+            ),
             output_path,
-            args.symbol,
             args.timeframe,
-            metadata=metadata,
+            metadata={
+                "request_id": get_request_id() or "N/A",
+                "request_timestamp": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "timeframe": args.timeframe,
+                "query_type": query_mode.lower(),
+                "query_parameters": {
+                    "from_timestamp": args.from_timestamp,
+                    "to_timestamp": args.to_timestamp,
+                } if query_mode == 'RANGE' else {},
+            },
             use_gcs=use_gcs,
+            pretty=not args.compact,
         )
+        missing = [symbol for symbol in args.symbol_list if symbol not in results]
         
-        # Success - different messages for GCS vs local
-        if gcs_url:
+        log_struct(
+            logger,
+            "INFO" if results else "WARNING",
+            f"Universe extraction completed: {len(results)} of {len(args.symbol_list)} symbols",
+            labels={
+                "timeframe": args.timeframe,
+                "storage": "gcs" if use_gcs else "local",
+            },
+            fields={
+                "record_count": sum(count for _, _, count in results.values()),
+                "files": {symbol: url or str(path) for symbol, (path, url, _) in results.items()},
+                "missing_symbols": missing,
+                "request_id": request_id,
+            }
+        )
+        if not results:
+            raise DataNotFoundError(
+                f"No data found for {len(args.symbol_list)} symbols, timeframe={args.timeframe}",
+                context={
+                    "symbols": args.symbol_list,
+                    "timeframe": args.timeframe,
+                    "mode": query_mode,
+                }
+            )
+        
+        print(f"✅ Success! {len(results)} of {len(args.symbol_list)} symbols exported:")
+        for symbol, (path, url, count) in results.items():
+            print(f"   {symbol}: {url or path} ({count} records)")
+        if missing:
+            print(f"   No data: {', '.join(missing)}")
+        
+        return 0
+    
+    extract = functools.partial(
+        fetch_and_write,
+        args,
+        query_mode,
+        config,
+        logger,
+        bq_client,
+        query_builder,
+        output_handler,
+        output_path,
+        use_gcs,
+        batch_source,
+        preflight,
+    )
+    if upload_memo is not None and use_gcs:
+        # Identical extractions running at the same time or shortly before
+        # share one uploaded object
+        (file_path, gcs_url, record_count), shared = upload_memo.do(
+            request_fingerprint(args, query_mode), extract,
+        )
+        if shared:
             log_struct(
                 logger,
                 "INFO",
-                f"Extraction completed successfully: {gcs_url}",
+                "Reusing the GCS object of an identical extraction",
                 labels={
                     "symbol": args.symbol,
                     "timeframe": args.timeframe,
-                    "storage": "gcs",
                 },
                 fields={
                     "gcs_url": gcs_url,
-                    "record_count": len(transformed_data),
                     "request_id": request_id,
                 }
             )
-            
-            print(f"✅ Success! Data uploaded to GCS:")
-            print(f"   Download URL: {gcs_url}")
-            print(f"   Records: {len(transformed_data)}")
-        else:
+    else:
+        file_path, gcs_url, record_count = extract()
+    
+    # Success - different messages for GCS vs local
+    if gcs_url:
+        log_struct(
+            logger,
+            "INFO",
+            f"Extraction completed successfully: {gcs_url}",
+            labels={
+                "symbol": args.symbol,
+                "timeframe": args.timeframe,
+                "storage": "gcs",
+            },
+            fields={
+                "gcs_url": gcs_url,
+                "record_count": record_count,
+                "request_id": request_id,
+            }
+        )
+        
+        print(f"✅ Success! Data uploaded to GCS:")
+        print(f"   Download URL: {gcs_url}")
+        print(f"   Records: {record_count}")
+    else:
+        log_struct(
+            logger,
+            "INFO",
+            f"Extraction completed successfully: {file_path}",
+            labels={
+                "symbol": args.symbol,
+                "timeframe": args.timeframe,
+                "storage": "local",
+            },
+            fields={
+                "file_path": str(file_path),
+                "record_count": record_count,
+            }
+        )
+        
+        print(f"✅ Success! Data saved locally:")
+        print(f"   File: {file_path}")
+        print(f"   Records: {record_count}")
+    
+    return 0
+
+
+def fetch_and_write(
+    args,
+    query_mode: str,
+    config,
+    logger,
+    bq_client,
+    query_builder: QueryBuilder,
+    output_handler: OutputHandler,
+    output_path: Path,
+    use_gcs: bool,
+    batch_source: Optional[Callable[[], Iterator[List[Dict[str, Any]]]]] = None,
+    preflight: Optional[QueryPreflight] = None,
+) -> Tuple[Path, Optional[str], int]:
+    """Fetch the rows of a single-symbol ALL, RANGE or NEIGHBORHOOD request and write them.
+    
+    Args:
+        args: Parsed and validated arguments namespace
+        query_mode: 'ALL', 'RANGE' or 'NEIGHBORHOOD'
+        config: Loaded configuration
+        logger: Logger instance
+        bq_client: BigQueryClient (not closed here)
+        query_builder: QueryBuilder for the configured table
+        output_handler: OutputHandler writing the output file
+        output_path: Output directory for local saves
+        use_gcs: If True, upload to GCS
+        batch_source: Streams the request's RANGE rows instead of running its
+            own query (requests coalesced into a shared job)
+        preflight: Dry-runs ALL/RANGE queries against --max-scan-gb (None
+            skips the check)
+    
+    Returns:
+        Tuple of (local file path, GCS URL or None, record count)
+    
+    Raises:
+        DataNotFoundError: If the query returns no rows
+        BQExtractorError: If fetching or writing fails
+    """
+    # Build query based on mode
+    if query_mode == 'ALL':
+        first_candle = last_candle = None
+        if args.coverage_index:
+            coverage_index = CoverageIndex(
+                config.cache_dir / "coverage_index.json",
+                bq_client,
+                query_builder,
+                logger,
+            )
+            try:
+                bounds = coverage_index.bounds(
+                    args.symbol,
+                    args.timeframe,
+                    args.exchange,
+                )
+            except BQExtractorError as exc:
+                log_struct(
+                    logger,
+                    "WARNING",
+                    f"Coverage index unavailable, using the 15-year range: {exc.message}",
+                    labels={"symbol": args.symbol},
+                    fields=exc.to_dict(),
+                )
+            else:
+                if bounds is None:
+                    raise DataNotFoundError(
+                        f"No data found for symbol={args.symbol}, timeframe={args.timeframe}",
+                        context={
+                            "symbol": args.symbol,
+                            "timeframe": args.timeframe,
+                            "mode": query_mode,
+                            "source": "coverage_index",
+                        }
+                    )
+                first_candle, last_candle = bounds
+        sql = query_builder.build_all_query(
+            args.symbol,
+            args.timeframe,
+            args.exchange,
+            first_candle=first_candle,
+            last_candle=last_candle,
+        )
+    elif query_mode == 'RANGE':
+        from_ts = parse_timestamp(args.from_timestamp)
+        to_ts = parse_timestamp(args.to_timestamp)
+        sql = query_builder.build_range_query(
+            args.symbol,
+            args.timeframe,
+            from_ts,
+            to_ts,
+            args.exchange,
+        )
+    else:  # NEIGHBORHOOD
+        center_ts = parse_timestamp(args.center_timestamp)
+    
+    # Execute query, streaming results page by page
+    query_context = {
+        "symbol": args.symbol,
+        "timeframe": args.timeframe,
+        "mode": query_mode,
+    }
+    
+    # Pre-flight: split or reject ALL/RANGE queries above the scan budget
+    chunked, slice_rows = args.chunked, args.slice_rows
+    if (
+        preflight is not None
+        and args.max_scan_gb is not None
+        and query_mode != 'NEIGHBORHOOD'
+        and batch_source is None
+        and not args.result_cache
+    ):
+        estimate = preflight.check(sql, max_bytes=scan_budget(args), context=query_context)
+        budget_slice_rows = scan_budget_slice_rows(args, sql, estimate)
+        if budget_slice_rows is not None:
+            slice_rows = min(slice_rows, budget_slice_rows) if chunked else budget_slice_rows
+            chunked = True
             log_struct(
                 logger,
-                "INFO",
-                f"Extraction completed successfully: {file_path}",
-                labels={
-                    "symbol": args.symbol,
-                    "timeframe": args.timeframe,
-                    "storage": "local",
-                },
+                "WARNING",
+                f"Query exceeds the scan budget, splitting into ~{estimate.slices} slices",
+                labels=query_context,
                 fields={
-                    "file_path": str(file_path),
-                    "record_count": len(transformed_data),
+                    "bytes_processed": estimate.bytes_processed,
+                    "max_bytes": estimate.max_bytes,
+                    "slice_rows": slice_rows,
                 }
             )
-            
-            print(f"✅ Success! Data saved locally:")
-            print(f"   File: {file_path}")
-            print(f"   Records: {len(transformed_data)}")
-        
-        # Close client
-        bq_client.close()
-        
-        return 0
+    
+    cached_fetcher = None
+    if args.result_cache:
+        cached_fetcher = CachedFetcher(
+            bq_client,
+            query_builder,
+            PartitionCache(
+                config.cache_dir / "partitions",
+                logger,
+                max_bytes=args.result_cache_max_mb * 1024 * 1024,
+            ),
+            logger,
+            page_size=args.page_size,
+        )
+        cached_fetcher.sync_snapshot()
+    
+    if query_mode == 'NEIGHBORHOOD':
+        month_density = None
+        if args.density_index:
+            density_index = DensityIndex(
+                config.cache_dir / "density_index.json",
+                bq_client,
+                query_builder,
+                logger,
+            )
+            try:
+                month_density = density_index.month_density(
+                    args.symbol,
+                    args.timeframe,
+                    args.exchange,
+                )
+            except BQExtractorError as exc:
+                log_struct(
+                    logger,
+                    "WARNING",
+                    f"Density index unavailable, using static window sizing: {exc.message}",
+                    labels={"symbol": args.symbol},
+                    fields=exc.to_dict(),
+                )
         
-    except BQExtractorError as exc:
+        # Small result: fetched whole, re-querying short sides if data is sparse
+        if cached_fetcher is not None:
+            neighborhood = cached_fetcher.fetch_neighborhood(
+                args.symbol,
+                args.timeframe,
+                center_ts,
+                args.n_before,
+                args.n_after,
+                args.exchange,
+                month_density=month_density,
+                max_rounds=args.max_expansion_rounds,
+                context=query_context,
+            )
+        else:
+            fetcher = NeighborhoodFetcher(
+                bq_client,
+                query_builder,
+                logger,
+                max_rounds=args.max_expansion_rounds,
+                max_bytes_billed=int(args.expansion_budget_gb * 1024 ** 3),
+            )
+            neighborhood = fetcher.fetch(
+                args.symbol,
+                args.timeframe,
+                center_ts,
+                args.n_before,
+                args.n_after,
+                args.exchange,
+                strategy=args.neighborhood_strategy,
+                month_density=month_density,
+                context=query_context,
+            )
+        batches = iter([neighborhood.rows] if neighborhood.rows else [])
+    elif batch_source is not None:
+        batches = batch_source()
+    elif cached_fetcher is not None:
+        if query_mode == 'ALL':
+            from_ts, to_ts = query_builder.all_time_range(
+                args.timeframe, first_candle, last_candle,
+            )
+        batches = cached_fetcher.iter_range(
+            args.symbol,
+            args.timeframe,
+            from_ts,
+            to_ts,
+            args.exchange,
+            context=query_context,
+        )
+    elif chunked:
+        executor = ChunkedQueryExecutor(
+            bq_client,
+            query_builder,
+            logger,
+            max_parallel=args.max_parallel_jobs,
+            slice_rows=slice_rows,
+            page_size=args.page_size,
+            engine=args.engine,
+            read_streams=args.read_streams,
+            # A slice processing more than estimated fails instead of
+            # running past the budget
+            max_bytes_billed=scan_budget(args),
+        )
+        if query_mode == 'ALL':
+            batches = executor.iter_all(
+                args.symbol,
+                args.timeframe,
+                args.exchange,
+                context=query_context,
+                first_candle=first_candle,
+                last_candle=last_candle,
+            )
+        else:
+            batches = executor.iter_range(
+                args.symbol,
+                args.timeframe,
+                from_ts,
+                to_ts,
+                args.exchange,
+                context=query_context,
+            )
+    elif args.engine == 'storage':
+        batches = bq_client.iter_query_arrow(
+            sql,
+            context=query_context,
+            page_size=args.page_size,
+            max_streams=args.read_streams,
+        )
+    else:
+        batches = bq_client.iter_query(
+            sql,
+            context=query_context,
+            page_size=args.page_size,
+        )
+    
+    # Check if any data returned
+    first_batch = next(batches, None)
+    if first_batch is None:
+        log_struct(
+            logger,
+            "WARNING",
+            "No data found for query",
+            labels={
+                "symbol": args.symbol,
+                "timeframe": args.timeframe,
+            },
+            fields={}
+        )
+        raise DataNotFoundError(
+            f"No data found for symbol={args.symbol}, timeframe={args.timeframe}",
+            context={
+                "symbol": args.symbol,
+                "timeframe": args.timeframe,
+                "mode": query_mode,
+            }
+        )
+    
+    # Transform results lazily as pages arrive
+    transformed_batches = output_handler.transform_batches(
+        itertools.chain([first_batch], batches)
+    )
+    
+    # Build metadata
+    metadata = {
+        "request_id": get_request_id() or "N/A",
+        "request_timestamp": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "symbol": args.symbol,
+        "timeframe": args.timeframe,
+        "query_type": query_mode.lower(),
+        "query_parameters": {}
+    }
+    
+    # Add query-specific parameters
+    if query_mode == 'RANGE':
+        metadata["query_parameters"] = {
+            "from_timestamp": args.from_timestamp,
+            "to_timestamp": args.to_timestamp,
+        }
+    elif query_mode == 'NEIGHBORHOOD':
+        metadata["query_parameters"] = {
+            "center_timestamp": args.center_timestamp,
+            "n_before": args.n_before,
+            "n_after": args.n_after,
+        }
+        metadata["expansion_rounds"] = neighborhood.expansion_rounds
+    # ALL mode has no parameters (empty dict already set)
+    
+    # Stream to file with metadata (GCS or local)
+    return output_handler.write_stream(
+        transformed_batches,
+        output_path,
+        args.symbol,
+        args.timeframe,
+        metadata=metadata,
+        use_gcs=use_gcs,
+        pretty=not args.compact,
+    )
+
+
+def report_error(logger, exc: Exception) -> int:
+    """Log and print an extraction failure.
+    
+    Args:
+        logger: Logger instance
+        exc: Raised exception
+    
+    Returns:
+        Exit code for the failure
+    """
+    if isinstance(exc, BQExtractorError):
         # Handle our custom exceptions
         log_struct(
             logger,
@@ -449,21 +1425,352 @@ def main():
             print(f"Context: {exc.context}", file=sys.stderr)
         
         return exc.exit_code
+    
+    # Handle unexpected exceptions
+    log_struct(
+        logger,
+        "ERROR",
+        f"Unexpected error: {str(exc)}",
+        labels={},
+        fields={"exception_type": type(exc).__name__}
+    )
+    
+    print(f"Unexpected error: {exc}", file=sys.stderr)
+    return 1
+
+
+def record_to_argv(record: Dict[str, Any]) -> List[str]:
+    """Convert a batch request record to command-line arguments.
+    
+    Keys are option names without the leading dashes (underscores may be
+    used for dashes). True values become flags, False and null values are
+    omitted and lists are joined with commas. The optional "request_id"
+    key is not an option.
+    
+    Args:
+        record: Request record
+    
+    Returns:
+        Argument list for parse_args
+    """
+    argv = []
+    for key, value in record.items():
+        if key == "request_id" or value is None or value is False:
+            continue
+        argv.append(f"--{key.replace('_', '-')}")
+        if value is not True:
+            argv.append(",".join(map(str, value)) if isinstance(value, list) else str(value))
+    return argv
+
+
+def parse_request_record(record: Dict[str, Any]):
+    """Parse and validate the options of one batch or service request.
+    
+    Args:
+        record: Request record (see record_to_argv)
+    
+    Returns:
+        Tuple of (arguments namespace, query mode)
+    
+    Raises:
+        ValidationError: If the options are invalid
+    """
+    for key in ("batch", "serve"):
+        if key in record:
+            raise ValidationError(f"Requests cannot contain --{key}")
+    try:
+        request_args = parse_args(record_to_argv(record))
+    except SystemExit:
+        raise ValidationError(
+            "Invalid request options",
+            context={"request": record}
+        )
+    return request_args, validate_args(request_args)
+
+
+# Query parameters accepted by the HTTP service (CLI option names)
+SERVICE_OPTIONS = {
+    "symbol", "timeframe", "exchange", "format", "compact", "page_size",
+    "all", "from", "to", "timestamp", "n_before", "n_after",
+    "neighborhood_strategy", "max_expansion_rounds", "expansion_budget_gb",
+}
+SERVICE_FLAGS = {"all", "compact"}
+
+
+def parse_service_request(params: Dict[str, str]):
+    """Parse and validate the query parameters of an HTTP service request.
+    
+    Parameters are CLI option names (dashes or underscores), e.g.
+    ``symbol=BTCUSDT&timeframe=1h&from=...&to=...``. Flags accept
+    true/1 (or no value) and false/0. Only single-symbol ALL, RANGE and
+    NEIGHBORHOOD requests are served.
+    
+    Args:
+        params: Query parameters
+    
+    Returns:
+        Tuple of (arguments namespace, query mode); parsed timestamps are
+        set as from_ts, to_ts and center_ts
+    
+    Raises:
+        ValidationError: If a parameter is unknown or the request is invalid
+    """
+    record: Dict[str, Any] = {}
+    for key, value in params.items():
+        option = key.replace("-", "_")
+        if option not in SERVICE_OPTIONS:
+            raise ValidationError(
+                f"Unsupported query parameter: {key}",
+                context={"parameter": key}
+            )
+        if option in SERVICE_FLAGS:
+            record[option] = value.lower() in ("", "1", "true")
+        else:
+            record[option] = value
+    
+    request_args, query_mode = parse_request_record(record)
+    request_args.from_ts = request_args.to_ts = request_args.center_ts = None
+    if query_mode == 'RANGE':
+        request_args.from_ts = parse_timestamp(request_args.from_timestamp)
+        request_args.to_ts = parse_timestamp(request_args.to_timestamp)
+    elif query_mode == 'NEIGHBORHOOD':
+        request_args.center_ts = parse_timestamp(request_args.center_timestamp)
+    return request_args, query_mode
+
+
+def plan_coalesced_streams(
+    records: List[Dict[str, Any]],
+    parse_record: Callable[[Dict[str, Any]], Any],
+    config,
+    logger,
+    bq_client,
+    page_size: int,
+) -> Dict[int, CoalescedStream]:
+    """Plan shared jobs for the compatible RANGE requests of a batch.
+    
+    Only single-symbol RANGE requests fetched with the default REST engine
+    (not chunked, not served from the result cache, not dry runs) are
+    considered.
+    Requests that fail to parse are left to fail when they run.
+    
+    Args:
+        records: Request records
+        parse_record: Parses and validates a record into (args, query_mode)
+        config: Loaded configuration
+        logger: Logger instance
+        bq_client: Shared BigQueryClient
+        page_size: Rows fetched per result page of a shared job
+    
+    Returns:
+        CoalescedStream by record index, for requests in groups of two or more
+    """
+    candidates = []
+    for index, record in enumerate(records):
+        try:
+            request_args, query_mode = parse_record(record)
+        except BQExtractorError:
+            continue
+        if (
+            query_mode != 'RANGE'
+            or not request_args.symbol
+            or request_args.chunked
+            or request_args.result_cache
+            or request_args.dry_run
+            or request_args.engine != 'rest'
+        ):
+            continue
+        candidates.append(RangeRequest(
+            index,
+            request_args.symbol,
+            request_args.timeframe,
+            request_args.exchange,
+            parse_timestamp(request_args.from_timestamp),
+            parse_timestamp(request_args.to_timestamp),
+        ))
+    if not candidates:
+        return {}
+    
+    groups = plan_groups(candidates)
+    log_plan(logger, groups)
+    query_builder = QueryBuilder(config.bq_table_fqn)
+    streams = {}
+    for group in groups:
+        if len(group.requests) < 2:
+            continue
+        stream = CoalescedStream(
+            bq_client,
+            query_builder,
+            group,
+            page_size=page_size,
+            context={
+                "symbols": len({request.symbol for request in group.requests}),
+                "timeframe": group.timeframe,
+                "mode": "COALESCED",
+            },
+        )
+        streams.update((request.key, stream) for request in group.requests)
+    return streams
+
+
+def deduplicating_clients(args, bq_client, logger):
+    """Wrap shared clients for single-flight deduplication unless --no-dedup is set.
+    
+    Args:
+        args: Parsed arguments namespace
+        bq_client: Shared BigQueryClient
+        logger: Logger instance
+    
+    Returns:
+        Tuple of (query client sharing jobs between identical concurrent
+        queries, SingleFlight memo of GCS uploads), or (bq_client, None)
+    """
+    if args.no_dedup:
+        return bq_client, None
+    return SharedQueryClient(bq_client, logger), SingleFlight(ttl=UPLOAD_MEMO_TTL_SECONDS)
+
+
+def run_batch(args, logger) -> int:
+    """Run every request of a batch file over shared clients.
+    
+    Args:
+        args: Parsed arguments namespace with --batch set
+        logger: Logger instance
+    
+    Returns:
+        0 if every request succeeded, otherwise 1
+    """
+    try:
+        if args.batch_workers <= 0:
+            raise ValidationError(
+                "Batch workers (--batch-workers) must be positive",
+                context={"batch_workers": args.batch_workers}
+            )
+        records = load_batch_file(args.batch)
+        config = load_config()
+        gcs_handler = build_gcs_handler(config, logger)
+        bq_client = BigQueryClient(config, logger)
+    except Exception as exc:
+        return report_error(logger, exc)
+    
+    query_client, upload_memo = deduplicating_clients(args, bq_client, logger)
+    preflight = QueryPreflight(query_client, logger)
+    try:
+        streams = {} if args.no_coalesce or args.dry_run else plan_coalesced_streams(
+            records, parse_request_record, config, logger, query_client, args.page_size,
+        )
+        groups = list({id(stream): stream.group for stream in streams.values()}.values())
         
+        def run_record(index: int, record: Dict[str, Any], request_id: str) -> int:
+            request_args, query_mode = parse_request_record(record)
+            # Batch-level --dry-run and --max-scan-gb apply to every request
+            request_args.dry_run = request_args.dry_run or args.dry_run
+            if request_args.max_scan_gb is None:
+                request_args.max_scan_gb = args.max_scan_gb
+                request_args.over_budget = args.over_budget
+            stream = streams.get(index)
+            return run_extraction(
+                request_args, query_mode, config, logger, query_client, gcs_handler, request_id,
+                batch_source=functools.partial(stream.batches, index) if stream else None,
+                upload_memo=upload_memo,
+                preflight=preflight,
+            )
+        
+        summary = BatchRunner(logger, max_workers=args.batch_workers).run(
+            records,
+            run_record,
+            groups=[[request.key for request in group.requests] for group in groups],
+        )
+    finally:
+        bq_client.close()
+    
+    print(f"{'✅' if not summary.failed else '⚠️'} Batch completed: "
+          f"{len(records) - len(summary.failed)} of {len(records)} requests succeeded "
+          f"in {summary.elapsed:.1f}s ({summary.requests_per_second:.2f} requests/s)")
+    for result in summary.failed:
+        print(f"   #{result.index} {result.request_id}: exit {result.exit_code}: {result.error}",
+              file=sys.stderr)
+    return 0 if not summary.failed else 1
+
+
+def run_server(args, logger) -> int:
+    """Serve extraction requests over HTTP until interrupted.
+    
+    Config, BigQueryClient, GCSHandler and QueryBuilder are created once and
+    shared by every request.
+    
+    Args:
+        args: Parsed arguments namespace with --serve set
+        logger: Logger instance
+    
+    Returns:
+        Exit code (0 after a clean shutdown)
+    """
+    try:
+        host, _, port = args.serve.rpartition(":")
+        if not port.isdigit() or args.serve_workers <= 0:
+            raise ValidationError(
+                "--serve expects [HOST]:PORT and --serve-workers must be positive",
+                context={"serve": args.serve, "serve_workers": args.serve_workers}
+            )
+        config = load_config()
+        gcs_handler = build_gcs_handler(config, logger)
+        bq_client = BigQueryClient(config, logger)
     except Exception as exc:
-        # Handle unexpected exceptions
-        log_struct(
+        return report_error(logger, exc)
+    
+    query_client, upload_memo = deduplicating_clients(args, bq_client, logger)
+    try:
+        ExtractionService(
+            config,
             logger,
-            "ERROR",
-            f"Unexpected error: {str(exc)}",
-            labels={},
-            fields={"exception_type": type(exc).__name__}
-        )
+            query_client,
+            parse_service_request,
+            gcs_handler=gcs_handler,
+            max_concurrent=args.serve_workers,
+            upload_memo=upload_memo,
+        ).serve(host, int(port))
+    finally:
+        bq_client.close()
+    return 0
+
+
+def main():
+    """Main entry point."""
+    # Parse arguments
+    args = parse_args()
+    
+    # Initialize logger (before config to catch config errors)
+    logger = build_logger(
+        service_name="bq-stock-extractor",
+        environment="development",
+        level="INFO",
+    )
+    
+    if args.batch:
+        return run_batch(args, logger)
+    
+    if args.serve:
+        return run_server(args, logger)
+    
+    # Generate unique request ID for this extraction
+    request_id = set_request_id()
+    
+    try:
+        # Validate arguments and determine query mode
+        query_mode = validate_args(args)
         
-        print(f"Unexpected error: {exc}", file=sys.stderr)
-        return 1
+        # Load configuration and shared clients
+        config = load_config()
+        gcs_handler = build_gcs_handler(config, logger)
+        bq_client = BigQueryClient(config, logger)
+        try:
+            return run_extraction(args, query_mode, config, logger, bq_client, gcs_handler, request_id)
+        finally:
+            bq_client.close()
+    
+    except Exception as exc:
+        return report_error(logger, exc)
 
 
 if __name__ == "__main__":
     sys.exit(main())
-
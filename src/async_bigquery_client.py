@@ -0,0 +1,319 @@
+"""
+asyncio-native BigQuery query execution.
+
+BigQueryClient blocks a thread in ``query_job.result()`` for the whole run
+of a job, most of it spent sleeping between status polls. AsyncBigQueryClient
+submits jobs and polls their status from the event loop instead, sleeping
+between polls with ``asyncio.sleep``: a job holds a thread only for the
+short blocking API calls (job insert, status reload, page fetch), which run
+on a small dedicated thread pool. Hundreds of jobs can be in flight on one
+process; a semaphore keeps the number of running jobs within BigQuery's
+concurrent query quota.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .bigquery_client import (
+    BigQueryClient,
+    Query,
+    QueryResult,
+    async_retrying,
+    query_error_context,
+    query_job_arguments,
+)
+from .config import (
+    Config,
+    ASYNC_POLL_INTERVAL,
+    ASYNC_POLL_INTERVAL_MAX,
+    DEFAULT_ASYNC_IO_THREADS,
+    DEFAULT_MAX_CONCURRENT_QUERIES,
+    DEFAULT_PAGE_SIZE,
+)
+from .error_mapper import ErrorMapper
+
+
+class AsyncBigQueryClient:
+    """Async counterpart of BigQueryClient for many concurrent query jobs."""
+    
+    def __init__(
+        self,
+        client: Any,
+        logger: logging.Logger,
+        max_concurrent_jobs: int = DEFAULT_MAX_CONCURRENT_QUERIES,
+        poll_interval: float = ASYNC_POLL_INTERVAL,
+        max_poll_interval: float = ASYNC_POLL_INTERVAL_MAX,
+        io_threads: int = DEFAULT_ASYNC_IO_THREADS,
+    ):
+        """Initialize async BigQuery client.
+        
+        Args:
+            client: google.cloud.bigquery.Client used for the API calls
+            logger: Logger instance for structured logging
+            max_concurrent_jobs: Jobs allowed to run at once; further jobs
+                wait for a slot before they are submitted
+            poll_interval: First delay between job status polls (seconds);
+                doubles per poll up to max_poll_interval
+            max_poll_interval: Longest delay between job status polls (seconds)
+            io_threads: Threads running the blocking API calls
+        """
+        self.client = client
+        self.logger = logger
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._semaphore = asyncio.Semaphore(max_concurrent_jobs)
+        self._executor = ThreadPoolExecutor(max_workers=io_threads, thread_name_prefix="bq-async")
+    
+    @classmethod
+    def from_config(cls, config: Config, logger: logging.Logger, **kwargs: Any) -> "AsyncBigQueryClient":
+        """Create an async client authenticated like BigQueryClient.
+        
+        Args:
+            config: Application configuration
+            logger: Logger instance
+            **kwargs: Options passed to the constructor
+        
+        Returns:
+            AsyncBigQueryClient instance
+        
+        Raises:
+            AuthenticationError: If credentials cannot be loaded
+        """
+        return cls(BigQueryClient(config, logger).client, logger, **kwargs)
+    
+    async def _call(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking API call on the I/O threads in the caller's context."""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            functools.partial(contextvars.copy_context().run, func, *args, **kwargs),
+        )
+    
+    async def _run_job(
+        self,
+        sql: Query,
+        page_size: Optional[int] = None,
+        maximum_bytes_billed: Optional[int] = None,
+    ) -> Tuple[Any, Any]:
+        """Submit a job, wait for it without blocking the loop, and open its results.
+        
+        The concurrency slot is held from submission until the job is done;
+        fetching result pages does not count against the quota. If the
+        waiting task is cancelled, the job is cancelled too.
+        
+        Returns:
+            Tuple of (finished query job, unstarted RowIterator)
+        """
+        sql_text, job_config = query_job_arguments(sql, maximum_bytes_billed)
+        async with self._semaphore:
+            query_job = await self._call(self.client.query, sql_text, job_config=job_config)
+            try:
+                interval = self.poll_interval
+                while True:
+                    await self._call(query_job.reload)
+                    if query_job.state == "DONE":
+                        break
+                    await asyncio.sleep(interval)
+                    interval = min(interval * 2, self.max_poll_interval)
+            except asyncio.CancelledError:
+                self._executor.submit(query_job.cancel)
+                raise
+        
+        # Raises the job's error, if any
+        return query_job, await self._call(query_job.result, page_size=page_size)
+    
+    @staticmethod
+    def _next_batch(pages: Iterator[Any]) -> Optional[List[Dict[str, Any]]]:
+        """Fetch the next result page as row dictionaries, or None when exhausted."""
+        page = next(pages, None)
+        return None if page is None else [dict(row) for row in page]
+    
+    async def execute_query(
+        self,
+        sql: Query,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Execute a query with retry logic and return all rows.
+        
+        Materializes the full result set; use iter_query() for large results.
+        
+        Args:
+            sql: SQL query or ParameterizedQuery to execute
+            context: Additional context for logging (e.g., symbol, timeframe)
+        
+        Returns:
+            List of result rows as dictionaries
+        
+        Raises:
+            QueryExecutionError: If query fails after all retries
+            NetworkError: If network error occurs after all retries
+        
+        Example:
+            >>> client = AsyncBigQueryClient.from_config(config, logger)
+            >>> results = await asyncio.gather(*(client.execute_query(q) for q in queries))
+        """
+        async for attempt in async_retrying():
+            with attempt:
+                rows: List[Dict[str, Any]] = []
+                async for batch in self.iter_query(sql, context=context):
+                    rows.extend(batch)
+        return rows
+    
+    async def run_query(
+        self,
+        sql: Query,
+        context: Optional[Dict[str, Any]] = None,
+        maximum_bytes_billed: Optional[int] = None,
+    ) -> QueryResult:
+        """Execute a small query and return its rows with byte statistics.
+        
+        Args:
+            sql: SQL query or ParameterizedQuery to execute
+            context: Additional context for logging (e.g., symbol, timeframe)
+            maximum_bytes_billed: Fail the job instead of billing more than this
+        
+        Returns:
+            QueryResult with rows and bytes processed/billed by the job
+        
+        Raises:
+            QueryExecutionError: If query fails or exceeds maximum_bytes_billed
+            NetworkError: If network error occurs after all retries
+        """
+        context = context or {}
+        
+        async for attempt in async_retrying():
+            with attempt:
+                try:
+                    query_job, row_iterator = await self._run_job(
+                        sql, maximum_bytes_billed=maximum_bytes_billed,
+                    )
+                    rows = await self._call(lambda: [dict(row) for row in row_iterator])
+                except Exception as exc:
+                    custom_exc = ErrorMapper.map_exception(
+                        exc,
+                        context={**context, **query_error_context(sql)},
+                    )
+                    self.logger.error(
+                        f"Query execution failed: {custom_exc.message}",
+                        extra={
+                            "labels": context,
+                            "fields": custom_exc.to_dict(),
+                        }
+                    )
+                    raise custom_exc
+        
+        result = QueryResult(
+            rows=rows,
+            bytes_processed=query_job.total_bytes_processed or 0,
+            bytes_billed=query_job.total_bytes_billed or 0,
+            cache_hit=bool(query_job.cache_hit),
+        )
+        self.logger.info(
+            f"Query completed successfully, {len(rows)} rows returned",
+            extra={
+                "labels": context,
+                "fields": {
+                    "row_count": len(rows),
+                    "bytes_processed": result.bytes_processed,
+                    "bytes_billed": result.bytes_billed,
+                    "cache_hit": result.cache_hit,
+                    "maximum_bytes_billed": maximum_bytes_billed,
+                },
+            }
+        )
+        return result
+    
+    async def iter_query(
+        self,
+        sql: Query,
+        context: Optional[Dict[str, Any]] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Execute a query and stream results page by page.
+        
+        Only one page of rows is held in memory at a time. The next page is
+        fetched only when the consumer asks for it.
+        
+        Args:
+            sql: SQL query or ParameterizedQuery to execute
+            context: Additional context for logging (e.g., symbol, timeframe)
+            page_size: Maximum number of rows fetched per result page
+        
+        Yields:
+            Non-empty batches of result rows as dictionaries (one per page)
+        
+        Raises:
+            QueryExecutionError: If query fails
+            NetworkError: If network error occurs
+        
+        Example:
+            >>> async for batch in client.iter_query(sql, page_size=5000):
+            ...     process(batch)
+        """
+        context = context or {}
+        
+        try:
+            self.logger.info(
+                "Executing BigQuery query",
+                extra={
+                    "labels": context,
+                    "fields": {
+                        "query_length": len(query_job_arguments(sql)[0]),
+                        "page_size": page_size,
+                        "async": True,
+                    },
+                }
+            )
+            
+            query_job, row_iterator = await self._run_job(sql, page_size=page_size)
+            pages = row_iterator.pages
+            
+            row_count = 0
+            page_count = 0
+            while True:
+                batch = await self._call(self._next_batch, pages)
+                if batch is None:
+                    break
+                page_count += 1
+                if batch:
+                    row_count += len(batch)
+                    yield batch
+            
+            self.logger.info(
+                f"Query completed successfully, {row_count} rows returned",
+                extra={
+                    "labels": context,
+                    "fields": {
+                        "row_count": row_count,
+                        "page_count": page_count,
+                        "bytes_processed": query_job.total_bytes_processed,
+                        "bytes_billed": query_job.total_bytes_billed,
+                        "cache_hit": bool(query_job.cache_hit),
+                    },
+                }
+            )
+        
+        except Exception as exc:
+            custom_exc = ErrorMapper.map_exception(
+                exc,
+                context={**context, **query_error_context(sql)},
+            )
+            self.logger.error(
+                f"Query execution failed: {custom_exc.message}",
+                extra={
+                    "labels": context,
+                    "fields": custom_exc.to_dict(),
+                }
+            )
+            raise custom_exc
+    
+    def close(self) -> None:
+        """Close the BigQuery client once pending API calls (e.g. job cancels) finish."""
+        self._executor.shutdown(wait=True)
+        if self.client:
+            self.client.close()
+            self.logger.info("BigQuery client closed")
@@ -0,0 +1,203 @@
+"""
+Batch execution of extraction requests over shared clients.
+
+Requests are read from a JSON Lines file and run on a bounded thread pool.
+Each request runs in its own copy of the caller's context with its own
+request ID, so log lines, output names and exit statuses stay per request
+while clients, credentials and connection pools are shared.
+"""
+
+import contextvars
+import json
+import logging
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from .config import DEFAULT_BATCH_WORKERS
+from .exceptions import BQExtractorError, ValidationError
+from .logger import log_struct, set_request_id
+
+
+class BatchResult(NamedTuple):
+    """Outcome of one batch request."""
+    
+    index: int
+    request_id: str
+    exit_code: int
+    duration: float
+    error: Optional[str] = None
+
+
+class BatchSummary(NamedTuple):
+    """Outcome of a batch run."""
+    
+    results: List[BatchResult]
+    elapsed: float
+    
+    @property
+    def failed(self) -> List[BatchResult]:
+        """Results of requests that did not exit with status 0."""
+        return [result for result in self.results if result.exit_code != 0]
+    
+    @property
+    def requests_per_second(self) -> float:
+        """Completed requests per second of wall time."""
+        return len(self.results) / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def load_batch_file(path: Path) -> List[Dict[str, Any]]:
+    """Read request records from a JSON Lines file.
+    
+    Blank lines are skipped. Every other line must be a JSON object.
+    
+    Args:
+        path: Batch file path
+    
+    Returns:
+        Request records in file order
+    
+    Raises:
+        ValidationError: If the file cannot be read or a line is not a JSON object
+    """
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except OSError as exc:
+        raise ValidationError(
+            f"Cannot read batch file: {exc}",
+            context={"batch_file": str(path)},
+        )
+    
+    records = []
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            record = None
+        if not isinstance(record, dict):
+            raise ValidationError(
+                f"Batch file line {line_number} is not a JSON object",
+                context={"batch_file": str(path), "line": line_number},
+            )
+        records.append(record)
+    return records
+
+
+class BatchRunner:
+    """Runs request records concurrently and summarizes the outcome."""
+    
+    def __init__(self, logger: logging.Logger, max_workers: int = DEFAULT_BATCH_WORKERS):
+        """Initialize batch runner.
+        
+        Args:
+            logger: Logger instance
+            max_workers: Requests run concurrently
+        """
+        self.logger = logger
+        self.max_workers = max_workers
+    
+    def run(
+        self,
+        records: Sequence[Dict[str, Any]],
+        handler: Callable[[int, Dict[str, Any], str], int],
+        groups: Optional[Sequence[Sequence[int]]] = None,
+    ) -> BatchSummary:
+        """Run every record through the handler on the worker pool.
+        
+        Args:
+            records: Request records
+            handler: Runs one record given its index and request ID and
+                returns an exit code; raised exceptions are logged and count
+                as failures
+            groups: Record indices that must run one after another, in the
+                given order, in a single worker (e.g. requests sharing a
+                coalesced query); other records run on their own
+        
+        Returns:
+            BatchSummary with one result per record, in record order
+        """
+        grouped = {index for group in groups or [] for index in group}
+        tasks = [list(group) for group in groups or []] + [
+            [index] for index in range(len(records)) if index not in grouped
+        ]
+        
+        started = time.monotonic()
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(self.max_workers, len(tasks))),
+            thread_name_prefix="batch",
+        ) as pool:
+            futures = [pool.submit(self._run_task, task, records, handler) for task in tasks]
+            results = sorted(
+                (result for future in futures for result in future.result()),
+                key=lambda result: result.index,
+            )
+        summary = BatchSummary(results, time.monotonic() - started)
+        
+        durations = [result.duration for result in results]
+        log_struct(
+            self.logger,
+            "INFO" if not summary.failed else "WARNING",
+            f"Batch completed: {len(results) - len(summary.failed)} of {len(results)} requests succeeded",
+            labels={},
+            fields={
+                "requests": len(results),
+                "failed": len(summary.failed),
+                "workers": self.max_workers,
+                "tasks": len(tasks),
+                "elapsed_seconds": round(summary.elapsed, 3),
+                "requests_per_second": round(summary.requests_per_second, 3),
+                "median_request_seconds": round(statistics.median(durations), 3) if durations else None,
+                "max_request_seconds": round(max(durations), 3) if durations else None,
+                "failures": [result._asdict() for result in summary.failed],
+            }
+        )
+        return summary
+    
+    def _run_task(
+        self,
+        indices: Sequence[int],
+        records: Sequence[Dict[str, Any]],
+        handler: Callable[[int, Dict[str, Any], str], int],
+    ) -> List[BatchResult]:
+        """Run the records of one task in order."""
+        # Each record gets its own context, so set_request_id stays per record
+        return [
+            contextvars.copy_context().run(self._run_one, index, records[index], handler)
+            for index in indices
+        ]
+    
+    def _run_one(
+        self,
+        index: int,
+        record: Dict[str, Any],
+        handler: Callable[[int, Dict[str, Any], str], int],
+    ) -> BatchResult:
+        """Run one record in the current (record-local) context."""
+        request_id = set_request_id(record.get("request_id"))
+        started = time.monotonic()
+        error = None
+        try:
+            exit_code = handler(index, record, request_id)
+        except BQExtractorError as exc:
+            exit_code, error = exc.exit_code, exc.message
+            log_struct(
+                self.logger,
+                "ERROR",
+                f"Batch request failed: {exc.message}",
+                labels={"error_type": exc.__class__.__name__},
+                fields={"index": index, **exc.to_dict()},
+            )
+        except Exception as exc:
+            exit_code, error = 1, str(exc)
+            log_struct(
+                self.logger,
+                "ERROR",
+                f"Batch request failed: {exc}",
+                labels={"error_type": type(exc).__name__},
+                fields={"index": index},
+            )
+        return BatchResult(index, request_id, exit_code, time.monotonic() - started, error)
@@ -2,36 +2,452 @@
 BigQuery client wrapper with exponential backoff retry logic.
 
 Implements connection management and query execution with automatic retries
-for transient errors.
+for transient errors. Large results can optionally be fetched through the
+BigQuery Storage Read API as Arrow record batches.
 """
 
+import hashlib
+import json
 import logging
-from typing import List, Dict, Any, Optional
+import math
+import queue
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
 
+from google.api_core import exceptions as google_exceptions
 from google.cloud import bigquery
 from google.oauth2 import service_account
+from requests import exceptions as requests_exceptions
 from tenacity import (
-    retry,
+    AsyncRetrying,
+    Retrying,
     stop_after_attempt,
     wait_exponential,
     retry_if_exception,
     before_sleep_log,
 )
 
-from .config import Config, BACKOFF_BASE, BACKOFF_FACTOR, BACKOFF_MAX, BACKOFF_ATTEMPTS
+from .config import (
+    Config,
+    BACKOFF_BASE,
+    BACKOFF_FACTOR,
+    BACKOFF_MAX,
+    BACKOFF_ATTEMPTS,
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_READ_STREAMS,
+    JOB_ID_PREFIX,
+    STATELESS_QUERY_MAX_ROWS,
+)
 from .exceptions import AuthenticationError, QueryExecutionError
 from .error_mapper import ErrorMapper
+from .query_builder import ParameterizedQuery, parameter_value
+from .query_helpers import RECORDS_PER_DAY
+
+# Optional dependencies for the Storage Read API fetch engine
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover - depends on environment
+    pyarrow = None
+
+try:
+    from google.cloud import bigquery_storage
+except ImportError:  # pragma: no cover - depends on environment
+    bigquery_storage = None
+
+
+# Column used to restore result order when reading from several streams
+ORDER_COLUMN = "timestamp"
+
+# SQL text or a template with bound query parameters from QueryBuilder
+Query = Union[str, ParameterizedQuery]
+
+# jobs.query job creation mode letting BigQuery skip creating a job
+JOB_CREATION_OPTIONAL = "JOB_CREATION_OPTIONAL"
+
+
+def query_error_context(query: Query) -> Dict[str, Any]:
+    """Describe a query for error context: leading SQL text and parameter values."""
+    if isinstance(query, ParameterizedQuery):
+        return {
+            "query": query.sql[:500],
+            "parameters": {param.name: str(parameter_value(param)) for param in query.parameters},
+        }
+    return {"query": query[:500]}
+
+
+def query_fingerprint(query: Query) -> str:
+    """Identify a query by its SQL text and bound parameters.
+    
+    Queries from QueryBuilder use canonical templates, so identical requests
+    get identical fingerprints.
+    """
+    if isinstance(query, ParameterizedQuery):
+        sql = query.sql
+        parameters = json.dumps(
+            [param.to_api_repr() for param in query.parameters],
+            sort_keys=True,
+            default=str,
+        )
+    else:
+        sql, parameters = query, ""
+    return hashlib.sha256(f"{sql}\n{parameters}".encode("utf-8")).hexdigest()
+
+
+def query_job_arguments(
+    sql: Query,
+    maximum_bytes_billed: Optional[int] = None,
+    dry_run: bool = False,
+) -> Tuple[str, Optional[bigquery.QueryJobConfig]]:
+    """Build the SQL text and job configuration used to start a query job.
+    
+    Args:
+        sql: SQL query or ParameterizedQuery
+        maximum_bytes_billed: Fail the job instead of billing more than this
+        dry_run: Only validate the query and estimate the bytes it processes
+    
+    Returns:
+        Tuple of (SQL text, QueryJobConfig binding the parameters and byte
+        limit, or None if no option is needed)
+    """
+    if isinstance(sql, ParameterizedQuery):
+        sql, parameters = sql.sql, sql.parameters
+    else:
+        parameters = None
+    
+    if parameters is None and maximum_bytes_billed is None and not dry_run:
+        return sql, None
+    
+    job_config = bigquery.QueryJobConfig()
+    if parameters is not None:
+        job_config.query_parameters = parameters
+    if maximum_bytes_billed is not None:
+        job_config.maximum_bytes_billed = maximum_bytes_billed
+    if dry_run:
+        # Cached results would report zero bytes
+        job_config.dry_run = True
+        job_config.use_query_cache = False
+    return sql, job_config
+
+
+def estimate_result_rows(query: Query) -> Optional[int]:
+    """Estimate an upper bound of the rows a QueryBuilder query returns.
+    
+    NEIGHBORHOOD queries return at most n_before + n_after + 1 rows, side
+    queries at most their limit, and single-symbol RANGE queries at most one
+    candle per timeframe period of the range.
+    
+    Args:
+        query: SQL query or ParameterizedQuery
+    
+    Returns:
+        Maximum number of result rows, or None if it cannot be estimated
+    
+    Example:
+        >>> query = QueryBuilder('p.d.t').build_range_query(
+        ...     'BTCUSDT', '1h', datetime(2024, 1, 1), datetime(2024, 1, 1, 23))
+        >>> estimate_result_rows(query)
+        24
+    """
+    if not isinstance(query, ParameterizedQuery):
+        return None
+    values = {param.name: parameter_value(param) for param in query.parameters}
+    
+    if "n_before" in values and "n_after" in values:
+        return values["n_before"] + values["n_after"] + 1
+    if "limit" in values:
+        return values["limit"]
+    if {"symbol", "timeframe", "from_timestamp", "to_timestamp"} <= values.keys():
+        per_day = RECORDS_PER_DAY.get(values["timeframe"])
+        if per_day is None:
+            return None
+        days = (values["to_timestamp"] - values["from_timestamp"]).total_seconds() / 86400
+        return math.floor(days * per_day) + 1
+    return None
+
+
+def new_job_id(sql: Query) -> str:
+    """Generate the ID of a query job, shared by all its submission attempts."""
+    return f"{JOB_ID_PREFIX}{query_fingerprint(sql)[:16]}_{uuid.uuid4().hex}"
+
+
+def _retry_policy(
+    attempts: int,
+    retryable: Callable[[BaseException], bool] = ErrorMapper.is_retryable,
+) -> Dict[str, Any]:
+    """Exponential backoff policy for transient BigQuery errors."""
+    return {
+        "stop": stop_after_attempt(attempts),
+        "wait": wait_exponential(
+            multiplier=BACKOFF_BASE,
+            max=BACKOFF_MAX,
+            exp_base=BACKOFF_FACTOR,
+        ),
+        "retry": retry_if_exception(retryable),
+        "before_sleep": before_sleep_log(logging.getLogger(__name__), logging.WARNING),
+        "reraise": True,
+    }
+
+
+def retrying(
+    attempts: int = BACKOFF_ATTEMPTS,
+    retryable: Callable[[BaseException], bool] = ErrorMapper.is_retryable,
+) -> Retrying:
+    """Create the exponential backoff retry policy for transient BigQuery errors.
+    
+    Args:
+        attempts: Maximum number of attempts
+        retryable: Predicate selecting the errors to retry
+    
+    Returns:
+        tenacity Retrying controller (use as ``for attempt in retrying(): with attempt: ...``)
+    """
+    return Retrying(**_retry_policy(attempts, retryable))
+
+
+def can_resend_query(exc: BaseException) -> bool:
+    """Check if a failed jobs.query request can be sent again.
+    
+    Each jobs.query request gets a new request id, so a resent request is a
+    new query. Timeouts are not resent: the first request may still have
+    started a query, which would then run (and bill) twice.
+    
+    Args:
+        exc: Exception raised by the request
+    
+    Returns:
+        True if the error is transient and the query certainly did not start
+    """
+    if isinstance(exc, (google_exceptions.DeadlineExceeded,
+                        google_exceptions.GatewayTimeout,
+                        requests_exceptions.ReadTimeout)):
+        return False
+    return ErrorMapper.is_retryable(exc)
+
+
+def async_retrying(attempts: int = BACKOFF_ATTEMPTS) -> AsyncRetrying:
+    """Create the retry policy of retrying() for coroutines.
+    
+    Args:
+        attempts: Maximum number of attempts
+    
+    Returns:
+        tenacity AsyncRetrying controller (use as
+        ``async for attempt in async_retrying(): with attempt: ...``)
+    """
+    return AsyncRetrying(**_retry_policy(attempts))
+
+
+class QueryResult(NamedTuple):
+    """Fully materialized query result with job statistics."""
+    
+    rows: List[Dict[str, Any]]
+    bytes_processed: int
+    bytes_billed: int
+    cache_hit: bool = False
+
+
+class StatelessQuery(NamedTuple):
+    """Statistics of a query answered by jobs.query, standing in for its job.
+    
+    job_id is None if BigQuery did not create a job; results are then only
+    available from the RowIterator returned with the response, and
+    total_bytes_billed is the bytes processed (jobs.query does not report
+    billing), so byte budgets are still charged.
+    """
+    
+    job_id: Optional[str]
+    query_id: Optional[str]
+    total_bytes_processed: Optional[int]
+    total_bytes_billed: Optional[int] = None
+    cache_hit: Optional[bool] = None
+    destination: None = None
+
+
+def query_api_method(query_job: Any) -> str:
+    """Name the API a query ran through (QUERY for jobs.query, INSERT for jobs.insert)."""
+    return "QUERY" if isinstance(query_job, StatelessQuery) else "INSERT"
+
+
+class StorageReadEngine:
+    """Reads BigQuery tables as Arrow record batches via the Storage Read API.
+    
+    Opens a read session with up to ``max_streams`` streams and drains them
+    in parallel threads. Works with any client exposing the
+    ``create_read_session``/``read_rows`` surface of ``BigQueryReadClient``,
+    which allows running against a local fake for offline benchmarks.
+    """
+    
+    def __init__(
+        self,
+        read_client: Any,
+        billing_project: str,
+        logger: logging.Logger,
+        max_streams: int = DEFAULT_READ_STREAMS,
+    ):
+        """Initialize Storage Read engine.
+        
+        Args:
+            read_client: BigQueryReadClient (or compatible fake)
+            billing_project: Project billed for the read session
+            logger: Logger instance for structured logging
+            max_streams: Maximum number of parallel read streams
+        
+        Raises:
+            QueryExecutionError: If pyarrow is not installed
+        """
+        if pyarrow is None:
+            raise QueryExecutionError(
+                "pyarrow is required for the Storage Read API engine",
+                context={"engine": "storage"},
+            )
+        
+        self.read_client = read_client
+        self.billing_project = billing_project
+        self.logger = logger
+        self.max_streams = max(1, max_streams)
+    
+    @staticmethod
+    def table_path(project: str, dataset_id: str, table_id: str) -> str:
+        """Build Storage API table path.
+        
+        Args:
+            project: Table project ID
+            dataset_id: Table dataset ID
+            table_id: Table ID
+        
+        Returns:
+            Path in the form 'projects/{p}/datasets/{d}/tables/{t}'
+        """
+        return f"projects/{project}/datasets/{dataset_id}/tables/{table_id}"
+    
+    def _session_request(self, table_path: str) -> Any:
+        """Build the ReadSession request for an Arrow-format read."""
+        if bigquery_storage is not None:
+            return bigquery_storage.types.ReadSession(
+                table=table_path,
+                data_format=bigquery_storage.types.DataFormat.ARROW,
+            )
+        return {"table": table_path, "data_format": "ARROW"}
+    
+    def read_table(
+        self,
+        table_path: str,
+        order_by: Optional[str] = ORDER_COLUMN,
+        batch_size: int = DEFAULT_PAGE_SIZE,
+    ) -> Iterator["pyarrow.RecordBatch"]:
+        """Read a table as Arrow record batches, streaming them as they arrive.
+        
+        Rows are spread across streams without any ordering guarantee, and
+        restoring the order would require buffering the whole table. Ordered
+        reads (the results of an ORDER BY query) therefore use a single
+        stream, which preserves the table's row order; only unordered reads
+        are spread over up to ``max_streams`` parallel streams.
+        
+        Args:
+            table_path: Storage API table path (see table_path())
+            order_by: Column the rows are ordered by (None if order does not
+                matter, allowing parallel streams)
+            batch_size: Maximum rows per yielded batch
+        
+        Yields:
+            Non-empty Arrow record batches
+        """
+        session = self.read_client.create_read_session(
+            parent=f"projects/{self.billing_project}",
+            read_session=self._session_request(table_path),
+            max_stream_count=self.max_streams if order_by is None else 1,
+        )
+        streams = list(session.streams)
+        if not streams:
+            # Empty tables produce sessions without streams
+            return
+        
+        schema = pyarrow.ipc.read_schema(
+            pyarrow.py_buffer(session.arrow_schema.serialized_schema)
+        )
+        
+        self.logger.info(
+            "Storage Read session created",
+            extra={
+                "labels": {"engine": "storage"},
+                "fields": {"table": table_path, "stream_count": len(streams)},
+            }
+        )
+        
+        if len(streams) == 1:
+            batches = self._read_stream(streams[0].name, schema)
+        else:
+            batches = self._read_parallel([stream.name for stream in streams], schema)
+        for batch in batches:
+            for offset in range(0, batch.num_rows, batch_size):
+                yield batch.slice(offset, batch_size)
+    
+    def _read_stream(self, stream_name: str, schema: "pyarrow.Schema") -> Iterator["pyarrow.RecordBatch"]:
+        """Read and deserialize every Arrow batch from one stream."""
+        for message in self.read_client.read_rows(stream_name):
+            batch = pyarrow.ipc.read_record_batch(
+                pyarrow.py_buffer(message.arrow_record_batch.serialized_record_batch),
+                schema,
+            )
+            if batch.num_rows:
+                yield batch
+    
+    def _read_parallel(
+        self,
+        stream_names: List[str],
+        schema: "pyarrow.Schema",
+    ) -> Iterator["pyarrow.RecordBatch"]:
+        """Drain several streams concurrently, yielding batches as they arrive."""
+        results: "queue.Queue[Any]" = queue.Queue(maxsize=len(stream_names) * 4)
+        done = object()
+        cancelled = threading.Event()
+        
+        def worker(stream_name: str) -> None:
+            try:
+                for batch in self._read_stream(stream_name, schema):
+                    if cancelled.is_set():
+                        return
+                    results.put(batch)
+            except Exception as exc:
+                results.put(exc)
+            finally:
+                results.put(done)
+        
+        with ThreadPoolExecutor(max_workers=len(stream_names)) as executor:
+            for stream_name in stream_names:
+                executor.submit(worker, stream_name)
+            
+            remaining = len(stream_names)
+            try:
+                while remaining:
+                    item = results.get()
+                    if item is done:
+                        remaining -= 1
+                    elif isinstance(item, Exception):
+                        raise item
+                    else:
+                        yield item
+            finally:
+                # Unblock workers waiting on a full queue
+                cancelled.set()
+                while remaining:
+                    if results.get() is done:
+                        remaining -= 1
 
 
 class BigQueryClient:
     """BigQuery client with exponential backoff retry logic."""
     
-    def __init__(self, config: Config, logger: logging.Logger):
+    def __init__(self, config: Config, logger: logging.Logger, read_client: Any = None):
         """Initialize BigQuery client.
         
         Args:
             config: Application configuration
             logger: Logger instance for structured logging
+            read_client: Optional Storage Read API client (created lazily if None)
         
         Raises:
             AuthenticationError: If credentials cannot be loaded
@@ -39,6 +455,8 @@ class BigQueryClient:
         self.config = config
         self.logger = logger
         self.client: Optional[bigquery.Client] = None
+        self.credentials = None
+        self.read_client = read_client
         
         # Initialize client
         self._initialize_client()
@@ -56,11 +474,17 @@ class BigQueryClient:
                 scopes=["https://www.googleapis.com/auth/bigquery"],
             )
             
+            self.credentials = credentials
+            
             # Create BigQuery client
             self.client = bigquery.Client(
                 project=self.config.gcp_project_id,
                 credentials=credentials,
             )
+            # Let jobs.query answer short queries without creating a job
+            # (client library 3.29+; older versions always create one)
+            if hasattr(self.client, "default_job_creation_mode"):
+                self.client.default_job_creation_mode = JOB_CREATION_OPTIONAL
             
             self.logger.info(
                 "BigQuery client initialized",
@@ -69,7 +493,7 @@ class BigQueryClient:
                     "fields": {},
                 }
             )
-            
+        
         except Exception as exc:
             # Map to custom exception
             custom_exc = ErrorMapper.map_exception(
@@ -101,22 +525,15 @@ class BigQueryClient:
         """
         return ErrorMapper.is_retryable(exception)
     
-    @retry(
-        stop=stop_after_attempt(BACKOFF_ATTEMPTS),
-        wait=wait_exponential(
-            multiplier=BACKOFF_BASE,
-            max=BACKOFF_MAX,
-            exp_base=BACKOFF_FACTOR,
-        ),
-        retry=retry_if_exception(lambda exc: ErrorMapper.is_retryable(exc)),
-        before_sleep=before_sleep_log(logging.getLogger(__name__), logging.WARNING),
-        reraise=True,
-    )
-    def execute_query(self, sql: str, context: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    def execute_query(self, sql: Query, context: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Execute BigQuery SQL query with retry logic.
         
+        Materializes the full result set; use iter_query() for large results.
+        Retries follow iter_query(): failed page fetches resume from the last
+        page instead of re-running the query.
+        
         Args:
-            sql: SQL query to execute
+            sql: SQL query or ParameterizedQuery to execute
             context: Additional context for logging (e.g., symbol, timeframe)
         
         Returns:
@@ -133,6 +550,185 @@ class BigQueryClient:
             ...     context={"symbol": "BTCUSDT", "mode": "ALL"}
             ... )
         """
+        rows: List[Dict[str, Any]] = []
+        for batch in self.iter_query(sql, context=context):
+            rows.extend(batch)
+        return rows
+    
+    def run_query(
+        self,
+        sql: Query,
+        context: Optional[Dict[str, Any]] = None,
+        maximum_bytes_billed: Optional[int] = None,
+    ) -> QueryResult:
+        """Execute a small query and return its rows with byte statistics.
+        
+        Args:
+            sql: SQL query or ParameterizedQuery to execute
+            context: Additional context for logging (e.g., symbol, timeframe)
+            maximum_bytes_billed: Fail the job instead of billing more than this
+        
+        Returns:
+            QueryResult with rows and bytes processed/billed by the job
+        
+        Raises:
+            QueryExecutionError: If query fails or exceeds maximum_bytes_billed
+            NetworkError: If network error occurs after all retries
+        """
+        context = context or {}
+        
+        if not self.client:
+            raise QueryExecutionError(
+                "BigQuery client not initialized",
+                context=context,
+            )
+        
+        try:
+            query_job, row_iterator = self._run_job(sql, maximum_bytes_billed=maximum_bytes_billed)
+            rows = [dict(row) for row in row_iterator]
+        except Exception as exc:
+            custom_exc = ErrorMapper.map_exception(
+                exc,
+                context={**context, **query_error_context(sql)},
+            )
+            self.logger.error(
+                f"Query execution failed: {custom_exc.message}",
+                extra={
+                    "labels": context,
+                    "fields": custom_exc.to_dict(),
+                }
+            )
+            raise custom_exc
+        
+        result = QueryResult(
+            rows=rows,
+            bytes_processed=query_job.total_bytes_processed or 0,
+            bytes_billed=query_job.total_bytes_billed or 0,
+            cache_hit=bool(query_job.cache_hit),
+        )
+        self.logger.info(
+            f"Query completed successfully, {len(rows)} rows returned",
+            extra={
+                "labels": context,
+                "fields": {
+                    "row_count": len(rows),
+                    "bytes_processed": result.bytes_processed,
+                    "bytes_billed": result.bytes_billed,
+                    "cache_hit": result.cache_hit,
+                    "maximum_bytes_billed": maximum_bytes_billed,
+                    "api_method": query_api_method(query_job),
+                    "job_id": query_job.job_id,
+                },
+            }
+        )
+        return result
+    
+    def dry_run(self, sql: Query, context: Optional[Dict[str, Any]] = None) -> int:
+        """Estimate the bytes a query would process without running it.
+        
+        BigQuery validates the query and plans partition pruning; nothing is
+        billed. Transient errors are retried.
+        
+        Args:
+            sql: SQL query or ParameterizedQuery
+            context: Additional context for logging (e.g., symbol, timeframe)
+        
+        Returns:
+            Estimated total bytes processed
+        
+        Raises:
+            QueryExecutionError: If the query is invalid
+            NetworkError: If network error occurs after all retries
+        """
+        context = context or {}
+        
+        if not self.client:
+            raise QueryExecutionError(
+                "BigQuery client not initialized",
+                context=context,
+            )
+        
+        sql_text, job_config = query_job_arguments(sql, dry_run=True)
+        try:
+            for attempt in retrying():
+                with attempt:
+                    query_job = self.client.query(sql_text, job_config=job_config)
+        except Exception as exc:
+            custom_exc = ErrorMapper.map_exception(
+                exc,
+                context={**context, **query_error_context(sql)},
+            )
+            self.logger.error(
+                f"Query dry run failed: {custom_exc.message}",
+                extra={
+                    "labels": context,
+                    "fields": custom_exc.to_dict(),
+                }
+            )
+            raise custom_exc
+        return query_job.total_bytes_processed or 0
+    
+    def table_modified(self, table_fqn: str) -> datetime:
+        """Return the last modification time of a table.
+        
+        Args:
+            table_fqn: Fully qualified table name (project.dataset.table)
+        
+        Returns:
+            Timezone-aware modification timestamp from the table metadata
+        
+        Raises:
+            QueryExecutionError: If the table metadata cannot be read
+            NetworkError: If network error occurs after all retries
+        """
+        if not self.client:
+            raise QueryExecutionError(
+                "BigQuery client not initialized",
+                context={"table": table_fqn},
+            )
+        
+        try:
+            for attempt in retrying():
+                with attempt:
+                    return self.client.get_table(table_fqn).modified
+        except Exception as exc:
+            custom_exc = ErrorMapper.map_exception(exc, context={"table": table_fqn})
+            self.logger.error(
+                f"Reading table metadata failed: {custom_exc.message}",
+                extra={"labels": {}, "fields": custom_exc.to_dict()}
+            )
+            raise custom_exc
+    
+    def iter_query(
+        self,
+        sql: Query,
+        context: Optional[Dict[str, Any]] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        maximum_bytes_billed: Optional[int] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Execute BigQuery SQL query and stream results page by page.
+        
+        Only one page of rows is held in memory at a time, so peak memory
+        does not depend on the total number of rows returned.
+        
+        Args:
+            sql: SQL query or ParameterizedQuery to execute
+            context: Additional context for logging (e.g., symbol, timeframe)
+            page_size: Maximum number of rows fetched per result page
+            maximum_bytes_billed: Fail the job instead of billing more than this
+        
+        Yields:
+            Non-empty batches of result rows as dictionaries (one per page)
+        
+        Raises:
+            QueryExecutionError: If query fails or exceeds maximum_bytes_billed
+            NetworkError: If network error occurs
+        
+        Example:
+            >>> client = BigQueryClient(config, logger)
+            >>> for batch in client.iter_query(sql, page_size=5000):
+            ...     process(batch)
+        """
         context = context or {}
         
         if not self.client:
@@ -146,40 +742,140 @@ class BigQueryClient:
                 "Executing BigQuery query",
                 extra={
                     "labels": context,
-                    "fields": {"query_length": len(sql)},
+                    "fields": {"query_length": len(self._sql_text(sql)), "page_size": page_size},
+                }
+            )
+            
+            # Execute query and wait for completion
+            query_job, row_iterator = self._run_job(
+                sql, page_size=page_size, maximum_bytes_billed=maximum_bytes_billed,
+            )
+            yield from self._iter_row_pages(query_job, row_iterator, context, page_size)
+        
+        except Exception as exc:
+            # Map to custom exception
+            custom_exc = ErrorMapper.map_exception(
+                exc,
+                context={
+                    **context,
+                    **query_error_context(sql),  # First 500 chars of query and parameters
+                }
+            )
+            
+            self.logger.error(
+                f"Query execution failed: {custom_exc.message}",
+                extra={
+                    "labels": context,
+                    "fields": custom_exc.to_dict(),
+                }
+            )
+            
+            raise custom_exc
+    
+    def iter_query_arrow(
+        self,
+        sql: Query,
+        context: Optional[Dict[str, Any]] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_streams: int = DEFAULT_READ_STREAMS,
+        maximum_bytes_billed: Optional[int] = None,
+    ) -> Iterator[Union["pyarrow.RecordBatch", List[Dict[str, Any]]]]:
+        """Execute query and read its destination table via the Storage Read API.
+        
+        Results arrive as Arrow record batches read over up to ``max_streams``
+        parallel streams. If the Storage Read API (or pyarrow) is unavailable,
+        falls back to the REST page path of iter_query() on the same job and
+        yields row dictionaries instead.
+        
+        Args:
+            sql: SQL query or ParameterizedQuery to execute
+            context: Additional context for logging (e.g., symbol, timeframe)
+            page_size: Maximum rows per batch
+            max_streams: Maximum number of parallel read streams
+            maximum_bytes_billed: Fail the job instead of billing more than this
+        
+        Yields:
+            Arrow record batches, or row dictionary batches after fallback
+        
+        Raises:
+            QueryExecutionError: If query fails or exceeds maximum_bytes_billed
+            NetworkError: If network error occurs
+        """
+        context = context or {}
+        
+        if not self.client:
+            raise QueryExecutionError(
+                "BigQuery client not initialized",
+                context=context,
+            )
+        
+        try:
+            self.logger.info(
+                "Executing BigQuery query (storage engine)",
+                extra={
+                    "labels": context,
+                    "fields": {"query_length": len(self._sql_text(sql)), "max_streams": max_streams},
                 }
             )
             
-            # Execute query
-            query_job = self.client.query(sql)
+            query_job, row_iterator = self._run_job(
+                sql, page_size=page_size, maximum_bytes_billed=maximum_bytes_billed,
+            )
+            
+            engine = self._storage_engine(max_streams, context)
+            destination = query_job.destination
+            if engine is None or destination is None:
+                yield from self._iter_row_pages(query_job, row_iterator, context, page_size)
+                return
             
-            # Wait for query to complete and fetch results
-            results = list(query_job.result())
+            table_path = StorageReadEngine.table_path(
+                destination.project, destination.dataset_id, destination.table_id
+            )
+            batches = engine.read_table(table_path, batch_size=page_size)
             
-            # Convert to list of dictionaries
-            rows = [dict(row) for row in results]
+            # Fall back only if the session cannot be opened; once rows have
+            # been yielded a failure must surface rather than duplicate data
+            try:
+                first_batch = next(batches, None)
+            except Exception as exc:
+                self.logger.warning(
+                    f"Storage Read API unavailable, falling back to REST pages: {exc}",
+                    extra={
+                        "labels": context,
+                        "fields": {"error_type": type(exc).__name__},
+                    }
+                )
+                yield from self._iter_row_pages(query_job, row_iterator, context, page_size)
+                return
+            
+            row_count = 0
+            if first_batch is not None:
+                row_count += first_batch.num_rows
+                yield first_batch
+                for batch in batches:
+                    row_count += batch.num_rows
+                    yield batch
             
             self.logger.info(
-                f"Query completed successfully, {len(rows)} rows returned",
+                f"Query completed successfully, {row_count} rows returned",
                 extra={
                     "labels": context,
                     "fields": {
-                        "row_count": len(rows),
+                        "row_count": row_count,
+                        "engine": "storage",
                         "bytes_processed": query_job.total_bytes_processed,
                         "bytes_billed": query_job.total_bytes_billed,
+                        "cache_hit": bool(query_job.cache_hit),
                     },
                 }
             )
-            
-            return rows
-            
+        
         except Exception as exc:
-            # Map to custom exception
             custom_exc = ErrorMapper.map_exception(
                 exc,
                 context={
                     **context,
-                    "query": sql[:500],  # Include first 500 chars of query
+                    **query_error_context(sql),
                 }
             )
             
@@ -191,11 +887,271 @@ class BigQueryClient:
                 }
             )
             
-            # Re-raise the custom exception
-            # If retryable, tenacity will catch and retry
-            # If not retryable, it will propagate up
             raise custom_exc
     
+    def _submit(
+        self,
+        sql: Query,
+        maximum_bytes_billed: Optional[int] = None,
+        job_id: Optional[str] = None,
+    ) -> Any:
+        """Start a query job, binding the parameters of a ParameterizedQuery.
+        
+        If a job with job_id already exists (an earlier attempt was created
+        although its request failed), that job is returned instead.
+        
+        Args:
+            sql: SQL query or ParameterizedQuery
+            maximum_bytes_billed: Fail the job instead of billing more than this
+            job_id: Job ID to create the job with (generated by BigQuery if None)
+        
+        Returns:
+            Started BigQuery query job
+        """
+        sql_text, job_config = query_job_arguments(sql, maximum_bytes_billed)
+        try:
+            return self.client.query(sql_text, job_config=job_config, job_id=job_id)
+        except google_exceptions.Conflict:
+            if job_id is None:
+                raise
+            self.logger.info(
+                "Query job already exists, attaching to it",
+                extra={"labels": {}, "fields": {"job_id": job_id}}
+            )
+            return self.client.get_job(job_id)
+    
+    def _run_job(
+        self,
+        sql: Query,
+        page_size: Optional[int] = None,
+        maximum_bytes_billed: Optional[int] = None,
+    ) -> Tuple[Any, Any]:
+        """Submit a query and wait for it, retrying transient errors.
+        
+        Queries estimated to return at most STATELESS_QUERY_MAX_ROWS rows run
+        through jobs.query (see _run_stateless). Other queries insert a job:
+        every attempt reuses the same job ID, so an attempt after an
+        ambiguous failure (job created, response lost) waits for the existing
+        job rather than billing a duplicate. Only a job that itself failed
+        is re-run under a new ID.
+        
+        Args:
+            sql: SQL query or ParameterizedQuery
+            page_size: Maximum number of rows fetched per result page
+            maximum_bytes_billed: Fail the job instead of billing more than this
+        
+        Returns:
+            Tuple of (finished query job or StatelessQuery, unstarted RowIterator)
+        """
+        estimated_rows = estimate_result_rows(sql)
+        if estimated_rows is not None and estimated_rows <= STATELESS_QUERY_MAX_ROWS:
+            return self._run_stateless(sql, page_size, maximum_bytes_billed)
+        
+        job_id = new_job_id(sql)
+        for attempt in retrying():
+            with attempt:
+                query_job = None
+                try:
+                    query_job = self._submit(sql, maximum_bytes_billed, job_id)
+                    return query_job, query_job.result(page_size=page_size)
+                except Exception:
+                    if query_job is not None and query_job.state == "DONE" and query_job.error_result:
+                        job_id = new_job_id(sql)
+                    raise
+    
+    def _run_stateless(
+        self,
+        sql: Query,
+        page_size: Optional[int] = None,
+        maximum_bytes_billed: Optional[int] = None,
+    ) -> Tuple[StatelessQuery, Any]:
+        """Run a short query through the synchronous jobs.query API.
+        
+        The query is sent and its first result page returned in one request,
+        without inserting a job and polling it. BigQuery creates a job only
+        if the query needs one (e.g. it runs past the request timeout), and
+        the remaining pages are then read from it, and its exact billing
+        statistics are loaded. The client library retries a request with
+        its request id; a request that still fails is sent again with a new
+        one unless it timed out (see can_resend_query).
+        
+        Args:
+            sql: SQL query or ParameterizedQuery
+            page_size: Maximum number of rows fetched per result page
+            maximum_bytes_billed: Fail the query instead of billing more than this
+        
+        Returns:
+            Tuple of (StatelessQuery statistics, unstarted RowIterator)
+        """
+        sql_text, job_config = query_job_arguments(sql, maximum_bytes_billed)
+        for attempt in retrying(retryable=can_resend_query):
+            with attempt:
+                row_iterator = self.client.query_and_wait(
+                    sql_text,
+                    job_config=job_config,
+                    page_size=page_size,
+                    job_retry=None,
+                )
+        stats = StatelessQuery(
+            job_id=row_iterator.job_id,
+            query_id=row_iterator.query_id,
+            total_bytes_processed=row_iterator.total_bytes_processed,
+            total_bytes_billed=row_iterator.total_bytes_processed,
+        )
+        if row_iterator.job_id is not None:
+            for attempt in retrying():
+                with attempt:
+                    query_job = self.client.get_job(row_iterator.job_id, location=row_iterator.location)
+            stats = stats._replace(
+                total_bytes_billed=query_job.total_bytes_billed,
+                cache_hit=query_job.cache_hit,
+            )
+        return stats, row_iterator
+    
+    @staticmethod
+    def _sql_text(sql: Query) -> str:
+        """Return the SQL text of a query."""
+        return sql.sql if isinstance(sql, ParameterizedQuery) else sql
+    
+    def _storage_engine(
+        self,
+        max_streams: int,
+        context: Dict[str, Any],
+    ) -> Optional[StorageReadEngine]:
+        """Create Storage Read engine, or None if the API is not available.
+        
+        Args:
+            max_streams: Maximum number of parallel read streams
+            context: Logging context
+        
+        Returns:
+            StorageReadEngine instance, or None to use the REST path
+        """
+        reason = None
+        if pyarrow is None:
+            reason = "pyarrow not installed"
+        elif self.read_client is None:
+            if bigquery_storage is None:
+                reason = "google-cloud-bigquery-storage not installed"
+            else:
+                try:
+                    self.read_client = bigquery_storage.BigQueryReadClient(
+                        credentials=self.credentials,
+                    )
+                except Exception as exc:
+                    reason = f"read client creation failed: {exc}"
+        
+        if reason:
+            self.logger.warning(
+                f"Storage Read API unavailable, falling back to REST pages: {reason}",
+                extra={"labels": context, "fields": {}}
+            )
+            return None
+        
+        return StorageReadEngine(
+            self.read_client,
+            self.config.gcp_project_id,
+            self.logger,
+            max_streams=max_streams,
+        )
+    
+    def _iter_row_pages(
+        self,
+        query_job: Any,
+        row_iterator: Any,
+        context: Dict[str, Any],
+        page_size: Optional[int] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Yield a finished job's results as row dictionary batches.
+        
+        A page fetch failing with a transient error is retried from the page
+        token of the last page received, reading the job's destination table;
+        the query is not run again.
+        
+        Args:
+            query_job: Completed BigQuery query job
+            row_iterator: Unstarted RowIterator returned by query_job.result()
+            context: Logging context
+            page_size: Maximum number of rows fetched per result page
+        
+        Yields:
+            Non-empty batches of result rows as dictionaries (one per page)
+        """
+        # Results without a destination table cannot be resumed
+        attempts = BACKOFF_ATTEMPTS if query_job.destination is not None else 1
+        pages = iter(row_iterator.pages)
+        
+        # Fetch and convert one page at a time
+        row_count = 0
+        page_count = 0
+        resumes = 0
+        while True:
+            for attempt in retrying(attempts):
+                with attempt:
+                    if attempt.retry_state.attempt_number > 1:
+                        row_iterator = self._resume_rows(query_job, row_iterator, page_size, page_count, context)
+                        pages = iter(row_iterator.pages)
+                        resumes += 1
+                    page = next(pages, None)
+            if page is None:
+                break
+            batch = [dict(row) for row in page]
+            page_count += 1
+            if batch:
+                row_count += len(batch)
+                yield batch
+        
+        self.logger.info(
+            f"Query completed successfully, {row_count} rows returned",
+            extra={
+                "labels": context,
+                "fields": {
+                    "row_count": row_count,
+                    "page_count": page_count,
+                    "resumes": resumes,
+                    "bytes_processed": query_job.total_bytes_processed,
+                    "bytes_billed": query_job.total_bytes_billed,
+                    "cache_hit": bool(query_job.cache_hit),
+                    "api_method": query_api_method(query_job),
+                    "job_id": query_job.job_id,
+                },
+            }
+        )
+    
+    def _resume_rows(
+        self,
+        query_job: Any,
+        row_iterator: Any,
+        page_size: Optional[int],
+        page_count: int,
+        context: Dict[str, Any],
+    ) -> Any:
+        """List a job's result rows from the page where a failed fetch stopped.
+        
+        Args:
+            query_job: Completed BigQuery query job
+            row_iterator: Iterator whose page fetch failed
+            page_size: Maximum number of rows fetched per result page
+            page_count: Pages received before the failure
+            context: Logging context
+        
+        Returns:
+            RowIterator starting at the first page not yet received
+        """
+        page_token = row_iterator.next_page_token
+        self.logger.warning(
+            f"Resuming result download at page {page_count + 1}",
+            extra={
+                "labels": context,
+                "fields": {"job_id": query_job.job_id, "page_token": bool(page_token)},
+            }
+        )
+        return self.client.list_rows(
+            query_job.destination,
+            page_size=page_size,
+            page_token=page_token,
+        )
+    
     def close(self) -> None:
         """Close BigQuery client connection."""
         if self.client:
@@ -0,0 +1,329 @@
+"""
+Cache-backed fetching of RANGE, ALL and NEIGHBORHOOD results.
+
+Requests are split into UTC days. Days already in the PartitionCache are
+read locally; contiguous runs of missing days are fetched from BigQuery
+with one range query per run and stored day by day. The current day is
+still being written to, so it is always queried directly and never cached.
+Before serving, the cache is checked against the table's modification
+time and partitions modified since the cached snapshot are dropped.
+"""
+
+import logging
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+from .config import (
+    DEFAULT_MAX_EXPANSION_ROUNDS,
+    DEFAULT_PAGE_SIZE,
+    NEIGHBORHOOD_WINDOW_GROWTH,
+)
+from .exceptions import BQExtractorError
+from .neighborhood_fetcher import NeighborhoodResult
+from .partition_cache import PartitionCache
+from .query_helpers import MAX_WINDOW_DAYS, MonthDensity, _as_naive_utc
+
+
+# Partition IDs that do not map to a single day (streaming buffer, NULL timestamps)
+SPECIAL_PARTITIONS = ("__UNPARTITIONED__", "__NULL__")
+
+
+def _day_bounds(first: date, last: date) -> tuple:
+    """Return the first and last microsecond of a run of days (naive UTC)."""
+    return (
+        datetime.combine(first, dt_time.min),
+        datetime.combine(last + timedelta(days=1), dt_time.min) - timedelta(microseconds=1),
+    )
+
+
+class CachedFetcher:
+    """Serves query results from the partition cache, fetching missing days."""
+    
+    def __init__(
+        self,
+        bq_client: Any,
+        query_builder: Any,
+        cache: PartitionCache,
+        logger: logging.Logger,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        growth_factor: int = NEIGHBORHOOD_WINDOW_GROWTH,
+    ):
+        """Initialize cached fetcher.
+        
+        Args:
+            bq_client: BigQueryClient used for missing days and table metadata
+            query_builder: QueryBuilder used to build queries
+            cache: PartitionCache storing day partitions
+            logger: Logger instance
+            page_size: Maximum number of rows fetched per result page
+            growth_factor: NEIGHBORHOOD window multiplier per expansion round
+        """
+        self.bq_client = bq_client
+        self.query_builder = query_builder
+        self.cache = cache
+        self.logger = logger
+        self.page_size = page_size
+        self.growth_factor = max(2, growth_factor)
+    
+    def sync_snapshot(self) -> None:
+        """Drop cached days modified since the cache's table snapshot.
+        
+        Only partitions reported as modified are dropped. If the partition
+        metadata cannot be read, or rows sit in the streaming buffer, the
+        whole cache is dropped.
+        
+        Raises:
+            QueryExecutionError: If the table metadata cannot be read
+        """
+        modified = _as_naive_utc(self.bq_client.table_modified(self.query_builder.table_fqn))
+        snapshot = self.cache.snapshot
+        if snapshot is not None and modified <= snapshot:
+            return
+        
+        dropped = 0
+        if snapshot is None:
+            dropped = self.cache.invalidate()
+        else:
+            try:
+                result = self.bq_client.run_query(
+                    self.query_builder.build_partitions_query(snapshot),
+                    context={"mode": "PARTITIONS"},
+                )
+                partition_ids = [row["partition_id"] for row in result.rows]
+            except BQExtractorError as exc:
+                self.logger.warning(
+                    f"Partition metadata unavailable, dropping result cache: {exc.message}",
+                    extra={"labels": {}, "fields": exc.to_dict()}
+                )
+                partition_ids = list(SPECIAL_PARTITIONS)
+            
+            if any(partition_id in SPECIAL_PARTITIONS for partition_id in partition_ids):
+                dropped = self.cache.invalidate()
+            else:
+                dropped = self.cache.invalidate(
+                    datetime.strptime(partition_id, "%Y%m%d").date()
+                    for partition_id in partition_ids
+                )
+        
+        self.cache.snapshot = modified
+        self.cache.flush()
+        self.logger.info(
+            "Result cache synchronized with table",
+            extra={
+                "labels": {},
+                "fields": {
+                    "table_modified": modified.isoformat(),
+                    "previous_snapshot": snapshot.isoformat() if snapshot else None,
+                    "dropped_partitions": dropped,
+                },
+            }
+        )
+    
+    def iter_range(
+        self,
+        symbol: str,
+        timeframe: str,
+        from_timestamp: datetime,
+        to_timestamp: datetime,
+        exchange: Optional[str] = None,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Stream a time range, reading cached days and fetching the rest.
+        
+        Args:
+            symbol: Stock symbol
+            timeframe: Timeframe identifier
+            from_timestamp: Start of time range (inclusive)
+            to_timestamp: End of time range (inclusive)
+            exchange: Optional exchange identifier
+            context: Additional context for logging
+        
+        Yields:
+            Non-empty batches of rows (one per day) in ascending timestamp order
+        """
+        context = context or {}
+        start = _as_naive_utc(from_timestamp)
+        end = _as_naive_utc(to_timestamp)
+        today = datetime.utcnow().date()
+        key = self.cache.key(symbol, timeframe, exchange)
+        
+        days = [
+            start.date() + timedelta(days=offset)
+            for offset in range((min(end.date(), today - timedelta(days=1)) - start.date()).days + 1)
+        ]
+        missing = self.cache.missing_days(key, days)
+        
+        runs: List[List[date]] = []
+        for day in missing:
+            if runs and day - runs[-1][-1] == timedelta(days=1):
+                runs[-1].append(day)
+            else:
+                runs.append([day])
+        for run in runs:
+            self._fetch_days(key, symbol, timeframe, run[0], run[-1], exchange, context)
+        
+        self.logger.info(
+            "Serving range from result cache",
+            extra={
+                "labels": context,
+                "fields": {
+                    "cached_days": len(days) - len(missing),
+                    "fetched_days": len(missing),
+                    "fetch_queries": len(runs),
+                    "live_tail": end.date() >= today,
+                },
+            }
+        )
+        
+        lower = start.replace(tzinfo=timezone.utc)
+        upper = end.replace(tzinfo=timezone.utc)
+        for day in days:
+            rows = self.cache.read(key, day)
+            if rows is None:
+                # Evicted by a concurrent request since it was fetched
+                rows = self._query_day(symbol, timeframe, day, exchange, context)
+            rows = [row for row in rows if lower <= row["timestamp"] <= upper]
+            if rows:
+                yield rows
+        self.cache.flush()
+        
+        # The current day is incomplete: always query it directly
+        if end.date() >= today:
+            query = self.query_builder.build_range_query(
+                symbol,
+                timeframe,
+                max(start, datetime.combine(today, dt_time.min)),
+                end,
+                exchange,
+            )
+            yield from self.bq_client.iter_query(query, context=context, page_size=self.page_size)
+    
+    def fetch_neighborhood(
+        self,
+        symbol: str,
+        timeframe: str,
+        center_timestamp: datetime,
+        n_before: int,
+        n_after: int,
+        exchange: Optional[str] = None,
+        month_density: Optional[Mapping[str, MonthDensity]] = None,
+        max_rounds: int = DEFAULT_MAX_EXPANSION_ROUNDS,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> NeighborhoodResult:
+        """Fetch N records before and after a center timestamp through the cache.
+        
+        The adaptive windows are served as a cached range. Short sides are
+        re-read with a geometrically growing window; only days not yet cached
+        are fetched from BigQuery. Bytes billed are not tracked (reported as 0).
+        
+        Args:
+            symbol: Stock symbol
+            timeframe: Timeframe identifier
+            center_timestamp: Central timestamp point
+            n_before: Number of records to fetch before center
+            n_after: Number of records to fetch after center
+            exchange: Optional exchange identifier
+            month_density: Optional monthly density from the density index
+            max_rounds: Maximum expansion rounds (0 disables expansion)
+            context: Additional context for logging
+        
+        Returns:
+            NeighborhoodResult with rows in ascending timestamp order
+        """
+        center = _as_naive_utc(center_timestamp)
+        center_utc = center.replace(tzinfo=timezone.utc)
+        requested = {"before": n_before, "after": n_after}
+        windows = dict(zip(
+            ("before", "after"),
+            self.query_builder.neighborhood_windows(
+                timeframe, center_timestamp, n_before, n_after, month_density,
+            ),
+        ))
+        
+        rounds = 0
+        while True:
+            rows = [
+                row
+                for batch in self.iter_range(
+                    symbol,
+                    timeframe,
+                    center - timedelta(days=windows["before"]),
+                    center + timedelta(days=windows["after"]),
+                    exchange,
+                    context,
+                )
+                for row in batch
+            ]
+            sides = {
+                "before": [row for row in rows if row["timestamp"] < center_utc],
+                "after": [row for row in rows if row["timestamp"] > center_utc],
+            }
+            short_sides = [
+                side for side in sides
+                if len(sides[side]) < requested[side] and windows[side] < MAX_WINDOW_DAYS
+            ]
+            if not short_sides or rounds >= max_rounds:
+                break
+            rounds += 1
+            for side in short_sides:
+                windows[side] = min(MAX_WINDOW_DAYS, windows[side] * self.growth_factor)
+        
+        before = sides["before"][-n_before:] if n_before else []
+        at_center = [row for row in rows if row["timestamp"] == center_utc][:1]
+        after = sides["after"][:n_after]
+        
+        return NeighborhoodResult(
+            rows=before + at_center + after,
+            expansion_rounds=rounds,
+            bytes_billed=0,
+            complete=len(before) >= n_before and len(after) >= n_after,
+        )
+    
+    def _query_day(
+        self,
+        symbol: str,
+        timeframe: str,
+        day: date,
+        exchange: Optional[str],
+        context: Dict[str, Any],
+    ) -> List[Dict[str, Any]]:
+        """Query the rows of one complete day without caching them."""
+        query = self.query_builder.build_range_query(
+            symbol, timeframe, *_day_bounds(day, day), exchange,
+        )
+        return [
+            row
+            for batch in self.bq_client.iter_query(query, context=context, page_size=self.page_size)
+            for row in batch
+        ]
+    
+    def _fetch_days(
+        self,
+        key: str,
+        symbol: str,
+        timeframe: str,
+        first: date,
+        last: date,
+        exchange: Optional[str],
+        context: Dict[str, Any],
+    ) -> None:
+        """Fetch a run of complete days with one query and cache each day.
+        
+        Rows arrive in timestamp order, so each day is written as soon as
+        the next day starts and only one day is held in memory.
+        """
+        query = self.query_builder.build_range_query(
+            symbol, timeframe, *_day_bounds(first, last), exchange,
+        )
+        day = first
+        rows: List[Dict[str, Any]] = []
+        for batch in self.bq_client.iter_query(query, context=context, page_size=self.page_size):
+            for row in batch:
+                row_day = _as_naive_utc(row["timestamp"]).date()
+                while day < row_day:
+                    self.cache.write(key, day, rows)
+                    day, rows = day + timedelta(days=1), []
+                rows.append(row)
+        while day <= last:
+            self.cache.write(key, day, rows)
+            day, rows = day + timedelta(days=1), []
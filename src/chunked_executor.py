@@ -0,0 +1,224 @@
+"""
+Chunked execution of large RANGE and ALL queries.
+
+Splits the requested time range into day-aligned slices, runs the slices as
+concurrent BigQuery jobs with bounded parallelism and yields their rows back
+in timestamp order. Transient errors are retried by the BigQuery client for
+the slice they hit (its job is re-run, or its result download resumed), so a
+failure late in a long export never repeats the slices before it.
+"""
+
+import contextvars
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+from .config import (
+    DEFAULT_MAX_PARALLEL_JOBS,
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_READ_STREAMS,
+    DEFAULT_SLICE_ROWS,
+)
+from .query_helpers import plan_time_slices
+
+
+class ChunkedQueryExecutor:
+    """Runs a time range as parallel partition-aligned slice queries.
+    
+    Slices are submitted in order and at most ``max_parallel`` are open at
+    once. Only the oldest slice streams its rows to the caller; the others
+    run their jobs ahead and hold just their first result batch until their
+    turn, so peak memory is roughly ``max_parallel * page_size`` rows
+    regardless of the slice size or total range.
+    """
+    
+    def __init__(
+        self,
+        bq_client: Any,
+        query_builder: Any,
+        logger: logging.Logger,
+        max_parallel: int = DEFAULT_MAX_PARALLEL_JOBS,
+        slice_rows: int = DEFAULT_SLICE_ROWS,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        engine: str = "rest",
+        read_streams: int = DEFAULT_READ_STREAMS,
+        max_bytes_billed: Optional[int] = None,
+    ):
+        """Initialize chunked executor.
+        
+        Args:
+            bq_client: BigQueryClient used to run each slice
+            query_builder: QueryBuilder used to build slice queries
+            logger: Logger instance
+            max_parallel: Maximum number of slice jobs in flight
+            slice_rows: Approximate number of rows per slice
+            page_size: Rows fetched per result page within a slice
+            engine: Result fetch engine per slice ('rest' or 'storage')
+            read_streams: Parallel read streams per slice for the storage engine
+            max_bytes_billed: Bytes each slice job may bill before BigQuery
+                fails it (None for no limit)
+        """
+        self.bq_client = bq_client
+        self.query_builder = query_builder
+        self.logger = logger
+        self.max_parallel = max(1, max_parallel)
+        self.slice_rows = slice_rows
+        self.page_size = page_size
+        self.engine = engine
+        self.read_streams = read_streams
+        self.max_bytes_billed = max_bytes_billed
+    
+    def iter_all(
+        self,
+        symbol: str,
+        timeframe: str,
+        exchange: Optional[str] = None,
+        context: Optional[Dict[str, Any]] = None,
+        first_candle: Optional[datetime] = None,
+        last_candle: Optional[datetime] = None,
+    ) -> Iterator[Any]:
+        """Stream the ALL-mode time range (15 years) slice by slice.
+        
+        Args:
+            symbol: Stock symbol
+            timeframe: Timeframe identifier
+            exchange: Optional exchange identifier
+            context: Additional context for logging
+            first_candle: Optional first candle timestamp narrowing the range
+            last_candle: Optional last candle timestamp narrowing the range
+        
+        Yields:
+            Result batches in ascending timestamp order
+        """
+        start_time, end_time = self.query_builder.all_time_range(timeframe, first_candle, last_candle)
+        yield from self.iter_range(symbol, timeframe, start_time, end_time, exchange, context)
+    
+    def iter_range(
+        self,
+        symbol: str,
+        timeframe: str,
+        from_timestamp: datetime,
+        to_timestamp: datetime,
+        exchange: Optional[str] = None,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[Any]:
+        """Stream a time range as parallel slice queries.
+        
+        Args:
+            symbol: Stock symbol
+            timeframe: Timeframe identifier
+            from_timestamp: Start of time range (inclusive)
+            to_timestamp: End of time range (inclusive)
+            exchange: Optional exchange identifier
+            context: Additional context for logging
+        
+        Yields:
+            Result batches in ascending timestamp order
+        
+        Raises:
+            ValueError: If from_timestamp > to_timestamp
+            BQExtractorError: If a slice still fails after the client's retries
+        """
+        context = context or {}
+        slices = plan_time_slices(from_timestamp, to_timestamp, timeframe, self.slice_rows)
+        
+        self.logger.info(
+            "Executing chunked query",
+            extra={
+                "labels": context,
+                "fields": {
+                    "slice_count": len(slices),
+                    "max_parallel": self.max_parallel,
+                    "slice_rows": self.slice_rows,
+                },
+            }
+        )
+        
+        queries = (
+            (index, self.query_builder.build_range_query(
+                symbol, timeframe, slice_start, slice_end, exchange,
+            ), slice_start, slice_end)
+            for index, (slice_start, slice_end) in enumerate(slices)
+        )
+        
+        pool = ThreadPoolExecutor(
+            max_workers=min(self.max_parallel, len(slices)),
+            thread_name_prefix="bq-slice",
+        )
+        pending: Deque[Future] = deque()
+        
+        def submit_next() -> None:
+            item = next(queries, None)
+            if item is None:
+                return
+            index, sql, slice_start, slice_end = item
+            slice_context = {
+                **context,
+                "slice": index,
+                "slice_start": slice_start.isoformat(),
+                "slice_end": slice_end.isoformat(),
+            }
+            # Copy context so worker logs keep the caller's request ID
+            pending.append(pool.submit(
+                contextvars.copy_context().run, self._start_slice, sql, slice_context,
+            ))
+        
+        def close_slice(future: Future) -> None:
+            if not future.cancelled() and future.exception() is None:
+                future.result()[1].close()
+        
+        batches = None
+        try:
+            for _ in range(self.max_parallel):
+                submit_next()
+            
+            while pending:
+                first_batch, batches = pending.popleft().result()
+                if first_batch is not None:
+                    yield first_batch
+                    yield from batches
+                # Start the next slice only once this one is drained, so at
+                # most max_parallel slices are open at a time
+                submit_next()
+        finally:
+            # Stop the slice being read and every started slice, including
+            # those still fetching their first batch once they return
+            if batches is not None:
+                batches.close()
+            for future in pending:
+                if not future.cancel():
+                    future.add_done_callback(close_slice)
+            pool.shutdown(wait=False)
+    
+    def _start_slice(self, sql: str, context: Dict[str, Any]) -> Tuple[Any, Iterator[Any]]:
+        """Run one slice query and fetch its first result batch.
+        
+        Args:
+            sql: Slice query
+            context: Slice context for logging
+        
+        Returns:
+            Tuple of (first batch or None if the slice is empty, iterator
+            over the remaining batches)
+        """
+        batches = self._iter_slice(sql, context)
+        return next(batches, None), batches
+    
+    def _iter_slice(self, sql: str, context: Dict[str, Any]) -> Iterator[Any]:
+        """Run one slice query with the configured fetch engine."""
+        if self.engine == "storage":
+            return self.bq_client.iter_query_arrow(
+                sql,
+                context=context,
+                page_size=self.page_size,
+                max_streams=self.read_streams,
+                maximum_bytes_billed=self.max_bytes_billed,
+            )
+        return self.bq_client.iter_query(
+            sql,
+            context=context,
+            page_size=self.page_size,
+            maximum_bytes_billed=self.max_bytes_billed,
+        )
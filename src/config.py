@@ -31,6 +31,9 @@ class Config:
     environment: str = "development"
     log_level: str = "INFO"
     
+    # Local cache directory (density index and other persisted lookups)
+    cache_dir: Path = Path(".cache")
+    
     @property
     def bq_table_fqn(self) -> str:
         """Fully qualified BigQuery table name."""
@@ -145,6 +148,7 @@ def load_config(env_file: Optional[Path] = None) -> Config:
         service_name=os.getenv("SERVICE_NAME", "bq-stock-extractor"),
         environment=os.getenv("ENVIRONMENT", "development"),
         log_level=os.getenv("LOG_LEVEL", "INFO"),
+        cache_dir=Path(os.getenv("CACHE_DIR", ".cache")),
     )
     
     # Validate configuration
@@ -159,3 +163,80 @@ BACKOFF_FACTOR = 2.0
 BACKOFF_MAX = 32.0
 BACKOFF_ATTEMPTS = 5
 
+# Result streaming configuration
+# Rows requested per tabledata.list page when iterating query results
+DEFAULT_PAGE_SIZE = 10000
+
+# Parallel read streams requested from the BigQuery Storage Read API
+DEFAULT_READ_STREAMS = 4
+
+# Chunk size for streaming resumable uploads to GCS (multiple of 256 KiB)
+DEFAULT_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+# Chunked execution: target rows per partition-aligned slice and the number
+# of slice jobs allowed to run concurrently
+DEFAULT_SLICE_ROWS = 500000
+DEFAULT_MAX_PARALLEL_JOBS = 4
+
+# Self-correcting NEIGHBORHOOD windows: window growth per expansion round,
+# maximum expansion rounds and the total bytes billed allowed per request
+NEIGHBORHOOD_WINDOW_GROWTH = 2
+DEFAULT_MAX_EXPANSION_ROUNDS = 6
+DEFAULT_NEIGHBORHOOD_BYTES_BILLED = 10 * 1024 ** 3
+
+# Density index: refresh a symbol's monthly candle counts when older than this
+DENSITY_INDEX_TTL_HOURS = 24
+
+# Coverage index: refresh per-symbol first/last candle bounds when older than
+# this, re-scanning an overlap before the previous refresh for late rows
+COVERAGE_INDEX_TTL_HOURS = 1
+COVERAGE_REFRESH_OVERLAP_HOURS = 24
+
+# Partition-level result cache: total size of cached day files before
+# least recently used days are evicted
+DEFAULT_RESULT_CACHE_MAX_MB = 2048
+
+# Batch runner: requests from a --batch file executed concurrently over
+# shared clients
+DEFAULT_BATCH_WORKERS = 8
+
+# Request coalescing: compatible RANGE requests of a batch are merged into one
+# job when their windows overlap or are at most this many days apart, up to a
+# maximum number of windows per job
+COALESCE_MAX_GAP_DAYS = 1
+COALESCE_MAX_WINDOWS = 100
+
+# Async BigQuery execution: jobs allowed to run at once (BigQuery's default
+# concurrent interactive query quota), job status polling interval bounds and
+# the threads used for the short blocking API calls
+DEFAULT_MAX_CONCURRENT_QUERIES = 100
+ASYNC_POLL_INTERVAL = 0.5
+ASYNC_POLL_INTERVAL_MAX = 5.0
+DEFAULT_ASYNC_IO_THREADS = 16
+
+# HTTP service mode: requests served concurrently by one --serve process
+DEFAULT_SERVE_WORKERS = 32
+
+# Single-flight deduplication in --batch and --serve modes: identical queries
+# running at the same time share one job, whose result pages are buffered for
+# requests joining late or reading slower, up to a page limit (a slower request
+# further behind runs its own job); an identical extraction uploaded to GCS
+# within the memo TTL reuses that object instead of running again
+SHARED_STREAM_MAX_PAGES = 10
+UPLOAD_MEMO_TTL_SECONDS = 60
+
+# Query job IDs: every submission attempt of a query reuses one generated ID
+# with this prefix, so a retry after an ambiguous failure attaches to the job
+# already created instead of starting (and billing) a duplicate
+JOB_ID_PREFIX = "bq_extractor_"
+
+# Low-latency query path: queries estimated to return at most this many rows
+# run through the synchronous jobs.query API (one round trip, and no job is
+# created where BigQuery allows it); larger or unestimated queries insert a job
+STATELESS_QUERY_MAX_ROWS = 5000
+
+# Scan budget pre-flight: dry-run estimates are reused for identical queries
+# within the TTL (the table keeps growing) and at most this many are kept
+PREFLIGHT_ESTIMATE_TTL_SECONDS = 900
+PREFLIGHT_ESTIMATE_MAX_ENTRIES = 1024
@@ -0,0 +1,167 @@
+"""
+Per-symbol data coverage index.
+
+Stores the first and last candle timestamp of every (symbol, timeframe,
+exchange) in a local JSON file, so ALL-mode queries can scan exactly the
+range a symbol has data for instead of the full 15-year window. The index
+is built with one grouped query over the whole table and refreshed
+incrementally by re-aggregating only candles written since the previous
+refresh (minus an overlap for late-arriving rows). History backfilled
+before that point is picked up by deleting the cache file.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .config import COVERAGE_INDEX_TTL_HOURS, COVERAGE_REFRESH_OVERLAP_HOURS
+from .json_cache import JsonCacheFile
+from .query_helpers import _as_naive_utc, calculate_default_time_range
+
+
+# Bump when the on-disk layout changes; older files are rebuilt
+INDEX_VERSION = 1
+
+
+class CoverageIndex:
+    """Locally persisted first/last candle timestamps per symbol."""
+    
+    def __init__(
+        self,
+        path: Path,
+        bq_client: Any,
+        query_builder: Any,
+        logger: logging.Logger,
+        ttl: timedelta = timedelta(hours=COVERAGE_INDEX_TTL_HOURS),
+        overlap: timedelta = timedelta(hours=COVERAGE_REFRESH_OVERLAP_HOURS),
+    ):
+        """Initialize coverage index.
+        
+        Args:
+            path: JSON file holding the index (created on first refresh)
+            bq_client: BigQueryClient used for the grouped query
+            query_builder: QueryBuilder used to build the grouped query
+            logger: Logger instance
+            ttl: The index is refreshed before use when older than this
+            overlap: Time before the previous refresh re-aggregated on refresh
+        """
+        self.cache_file = JsonCacheFile(path, INDEX_VERSION, logger)
+        self.bq_client = bq_client
+        self.query_builder = query_builder
+        self.logger = logger
+        self.ttl = ttl
+        self.overlap = overlap
+        self._lock = threading.Lock()
+        data = self.cache_file.load()
+        self._entries = data.get("entries", {})
+        self._refreshed_at = data.get("refreshed_at")
+    
+    @staticmethod
+    def key(symbol: str, timeframe: str, exchange: Optional[str] = None) -> str:
+        """Build the index key for a symbol/timeframe/exchange combination."""
+        return f"{symbol}|{timeframe}|{exchange or ''}"
+    
+    def bounds(
+        self,
+        symbol: str,
+        timeframe: str,
+        exchange: Optional[str] = None,
+    ) -> Optional[Tuple[datetime, Optional[datetime]]]:
+        """Return the time range a symbol has data for.
+        
+        Without an exchange, the bounds span all exchanges of the symbol.
+        A symbol whose last candle falls within the refresh overlap is
+        treated as live and its range is left open-ended, so candles written
+        after the last refresh are not cut off.
+        
+        Args:
+            symbol: Stock symbol
+            timeframe: Timeframe identifier
+            exchange: Optional exchange identifier
+        
+        Returns:
+            Tuple of (first_candle, last_candle or None if live) in naive
+            UTC, or None if the table has no data for the symbol
+        """
+        if self._refreshed_at is None or (
+            datetime.utcnow() - datetime.fromisoformat(self._refreshed_at) >= self.ttl
+        ):
+            self.refresh()
+        
+        if exchange:
+            keys = [self.key(symbol, timeframe, exchange)]
+        else:
+            prefix = f"{symbol}|{timeframe}|"
+            keys = [key for key in self._entries if key.startswith(prefix)]
+        spans = [self._entries[key] for key in keys if key in self._entries]
+        if not spans:
+            return None
+        
+        first_candle = min(datetime.fromisoformat(first) for first, _ in spans)
+        last_candle = max(datetime.fromisoformat(last) for _, last in spans)
+        live_since = datetime.fromisoformat(self._refreshed_at) - self.overlap
+        return first_candle, (None if last_candle >= live_since else last_candle)
+    
+    def refresh(self) -> None:
+        """Update all entries with one grouped query and persist the index.
+        
+        The first refresh aggregates the full ALL-mode range. Later refreshes
+        only aggregate candles from the previous refresh minus the overlap
+        and widen the stored bounds with the result.
+        """
+        refreshed_at = datetime.utcnow()
+        if self._refreshed_at is not None:
+            since = datetime.fromisoformat(self._refreshed_at) - self.overlap
+        else:
+            since, _ = calculate_default_time_range(years=15)
+        
+        sql = self.query_builder.build_coverage_query(since)
+        result = self.bq_client.run_query(sql, context={"mode": "COVERAGE"})
+        
+        spans = [
+            (
+                self.key(row["symbol"], row["timeframe"], row["exchange"]),
+                _as_naive_utc(row["first_candle"]),
+                _as_naive_utc(row["last_candle"]),
+            )
+            for row in result.rows
+        ]
+        
+        # Widen the bounds stored by other instances sharing the file
+        def merge(data: Dict[str, Any]) -> Dict[str, Any]:
+            entries = dict(data.get("entries", {}))
+            merged = [
+                (key, datetime.fromisoformat(first), datetime.fromisoformat(last))
+                for key, (first, last) in self._entries.items()
+            ]
+            for key, first, last in merged + spans:
+                if key in entries:
+                    stored_first, stored_last = entries[key]
+                    first = min(first, datetime.fromisoformat(stored_first))
+                    last = max(last, datetime.fromisoformat(stored_last))
+                entries[key] = [first.isoformat(), last.isoformat()]
+            stored_at = data.get("refreshed_at")
+            return {
+                "entries": entries,
+                "refreshed_at": max(filter(None, [stored_at, refreshed_at.isoformat()])),
+            }
+        
+        with self._lock:
+            data = self.cache_file.update(merge)
+            self._entries = data["entries"]
+            self._refreshed_at = data["refreshed_at"]
+        
+        self.logger.info(
+            "Coverage index refreshed",
+            extra={
+                "labels": {},
+                "fields": {
+                    "since": since.isoformat(),
+                    "updated_keys": len(result.rows),
+                    "key_count": len(self._entries),
+                    "bytes_billed": result.bytes_billed,
+                },
+            }
+        )
@@ -0,0 +1,170 @@
+"""
+Per-symbol data density index.
+
+Stores the candle count and first/last candle timestamp per UTC month for
+each (symbol, timeframe, exchange) in a local JSON file. Counts come from
+one aggregate query per key and are refreshed incrementally from the most
+recent stored month. NEIGHBORHOOD windows sized from these counts account
+for trading calendars, late listings and gaps that the static
+RECORDS_PER_DAY table ignores.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .config import DENSITY_INDEX_TTL_HOURS
+from .json_cache import JsonCacheFile
+from .query_helpers import MonthDensity, calculate_default_time_range
+
+
+# Bump when the on-disk layout changes; older files are rebuilt
+INDEX_VERSION = 1
+
+
+class DensityIndex:
+    """Locally persisted monthly candle density per symbol."""
+    
+    def __init__(
+        self,
+        path: Path,
+        bq_client: Any,
+        query_builder: Any,
+        logger: logging.Logger,
+        ttl: timedelta = timedelta(hours=DENSITY_INDEX_TTL_HOURS),
+    ):
+        """Initialize density index.
+        
+        Args:
+            path: JSON file holding the index (created on first refresh)
+            bq_client: BigQueryClient used for aggregate queries
+            query_builder: QueryBuilder used to build aggregate queries
+            logger: Logger instance
+            ttl: Entries older than this are refreshed before use
+        """
+        self.cache_file = JsonCacheFile(path, INDEX_VERSION, logger)
+        self.bq_client = bq_client
+        self.query_builder = query_builder
+        self.logger = logger
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = self.cache_file.load().get("entries", {})
+    
+    @staticmethod
+    def key(symbol: str, timeframe: str, exchange: Optional[str] = None) -> str:
+        """Build the index key for a symbol/timeframe/exchange combination."""
+        return f"{symbol}|{timeframe}|{exchange or '*'}"
+    
+    def month_density(
+        self,
+        symbol: str,
+        timeframe: str,
+        exchange: Optional[str] = None,
+    ) -> Dict[str, MonthDensity]:
+        """Return monthly density, refreshing the entry if missing or stale.
+        
+        Args:
+            symbol: Stock symbol
+            timeframe: Timeframe identifier
+            exchange: Optional exchange identifier
+        
+        Returns:
+            MonthDensity keyed by 'YYYY-MM'
+        """
+        entry = self._entries.get(self.key(symbol, timeframe, exchange))
+        if entry is not None:
+            refreshed_at = datetime.fromisoformat(entry["refreshed_at"])
+            if datetime.utcnow() - refreshed_at < self.ttl:
+                return self._to_density(entry["months"])
+        return self.refresh(symbol, timeframe, exchange)
+    
+    def refresh(
+        self,
+        symbol: str,
+        timeframe: str,
+        exchange: Optional[str] = None,
+    ) -> Dict[str, MonthDensity]:
+        """Update an entry with one aggregate query and persist the index.
+        
+        A new entry counts the full ALL-mode range. An existing entry only
+        re-counts from the start of its latest stored month, which may have
+        been partial when it was last counted.
+        
+        Args:
+            symbol: Stock symbol
+            timeframe: Timeframe identifier
+            exchange: Optional exchange identifier
+        
+        Returns:
+            Updated MonthDensity keyed by 'YYYY-MM'
+        """
+        key = self.key(symbol, timeframe, exchange)
+        entry = self._entries.get(key)
+        months = dict(entry["months"]) if entry else {}
+        
+        if months:
+            since = datetime.strptime(max(months), "%Y-%m")
+        else:
+            since, _ = calculate_default_time_range(years=15)
+        
+        sql = self.query_builder.build_density_query(symbol, timeframe, since, exchange)
+        result = self.bq_client.run_query(
+            sql,
+            context={"symbol": symbol, "timeframe": timeframe, "mode": "DENSITY"},
+        )
+        
+        since_month = since.strftime("%Y-%m")
+        months = {month: value for month, value in months.items() if month < since_month}
+        months.update({
+            row["month"]: [
+                int(row["candles"]),
+                row["first_candle"].isoformat(),
+                row["last_candle"].isoformat(),
+            ]
+            for row in result.rows
+        })
+        
+        # Keep the newest entry per key from other instances sharing the file
+        def merge(data: Dict[str, Any]) -> Dict[str, Any]:
+            entries = dict(data.get("entries", {}))
+            for other_key, other in self._entries.items():
+                stored = entries.get(other_key)
+                if stored is None or other["refreshed_at"] > stored["refreshed_at"]:
+                    entries[other_key] = other
+            entries[key] = {
+                "months": months,
+                "refreshed_at": datetime.utcnow().isoformat(),
+            }
+            return {"entries": entries}
+        
+        with self._lock:
+            self._entries = self.cache_file.update(merge)["entries"]
+        
+        self.logger.info(
+            "Density index refreshed",
+            extra={
+                "labels": {"symbol": symbol, "timeframe": timeframe},
+                "fields": {
+                    "exchange": exchange,
+                    "incremental": entry is not None,
+                    "since": since.isoformat(),
+                    "month_count": len(months),
+                    "bytes_billed": result.bytes_billed,
+                },
+            }
+        )
+        return self._to_density(months)
+    
+    @staticmethod
+    def _to_density(months: Dict[str, Any]) -> Dict[str, MonthDensity]:
+        """Convert stored [candles, first, last] lists to MonthDensity."""
+        return {
+            month: MonthDensity(
+                candles=candles,
+                first=datetime.fromisoformat(first),
+                last=datetime.fromisoformat(last),
+            )
+            for month, (candles, first, last) in months.items()
+        }
@@ -8,6 +8,7 @@ from typing import Any, Dict, Optional
 
 from google.api_core import exceptions as google_exceptions
 from google.auth import exceptions as auth_exceptions
+from requests import exceptions as requests_exceptions
 
 from .exceptions import (
     BQExtractorError,
@@ -44,6 +45,10 @@ class ErrorMapper:
         """
         context = context or {}
         
+        # Already mapped - keep the original type and retryability
+        if isinstance(exc, BQExtractorError):
+            return exc
+        
         # Authentication errors
         if isinstance(exc, (auth_exceptions.DefaultCredentialsError,
                            auth_exceptions.RefreshError,
@@ -70,11 +75,16 @@ class ErrorMapper:
                 retryable=False,
             )
         
-        # Bad request (SQL syntax errors, invalid parameters)
+        # Bad request (SQL syntax errors, invalid parameters, byte limits)
         if isinstance(exc, google_exceptions.BadRequest):
+            reasons = [error.get("reason") for error in (exc.errors or []) if isinstance(error, dict)]
             return QueryExecutionError(
                 message=f"Bad request: {str(exc)}",
-                context={**context, "original_error": "BadRequest"},
+                context={
+                    **context,
+                    "original_error": "BadRequest",
+                    **({"reason": reasons[0]} if reasons else {}),
+                },
                 retryable=False,
             )
         
@@ -88,6 +98,17 @@ class ErrorMapper:
                 retryable=True,
             )
         
+        # Dropped connections (e.g. reset while downloading a result page)
+        if isinstance(exc, (ConnectionError,
+                           requests_exceptions.ConnectionError,
+                           requests_exceptions.ChunkedEncodingError,
+                           requests_exceptions.Timeout)):
+            return NetworkError(
+                message=f"Connection error: {str(exc)}",
+                context={**context, "original_error": type(exc).__name__},
+                retryable=True,
+            )
+        
         # Resource exhausted (quota, rate limiting) - retryable with backoff
         if isinstance(exc, google_exceptions.ResourceExhausted):
             return NetworkError(
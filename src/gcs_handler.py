@@ -2,19 +2,178 @@
 Google Cloud Storage handler for BigQuery Stock Quotes Extractor.
 
 Handles file uploads to GCS bucket and generates public download URLs.
+Output can also be streamed directly into a resumable upload session
+without a local temporary file.
 """
 
+import contextvars
+import io
 import logging
+import queue
+import tempfile
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from google.cloud import storage
 from google.cloud.exceptions import GoogleCloudError
 from google.api_core import exceptions as google_exceptions
 
+from .config import DEFAULT_UPLOAD_CHUNK_SIZE
 from .exceptions import GCSUploadError, GCSAuthenticationError
 from .logger import log_struct
 
+# Resumable upload chunks must be a multiple of 256 KiB
+UPLOAD_CHUNK_ALIGNMENT = 256 * 1024
+
+# Chunks buffered between the serializer and the uploader thread
+UPLOAD_QUEUE_CHUNKS = 4
+
+# GCS rejects composing an object from more than this many components
+COMPOSE_MAX_COMPONENTS = 1024
+
+
+class GCSUploadStream(io.RawIOBase):
+    """Writable binary stream that uploads to GCS while it is being written.
+    
+    Bytes are cut into fixed-size chunks and handed to a background thread
+    that pushes them into a resumable upload session, so serialization (and
+    the query fetch feeding it) overlaps with the upload. At most
+    UPLOAD_QUEUE_CHUNKS chunks are buffered in memory.
+    
+    The object is finalized only by a successful close(); abort() (or leaving
+    the ``with`` block with an exception) discards the upload session.
+    """
+    
+    def __init__(
+        self,
+        handler: "GCSHandler",
+        blob: Any,
+        object_name: str,
+        content_type: str,
+        chunk_size: int,
+    ):
+        """Initialize stream and start the uploader thread.
+        
+        Args:
+            handler: Owning GCS handler (for logging and error mapping)
+            blob: Target blob
+            object_name: Object name in bucket
+            content_type: MIME type of the object
+            chunk_size: Upload chunk size in bytes (multiple of 256 KiB)
+        """
+        super().__init__()
+        self.handler = handler
+        self.blob = blob
+        self.object_name = object_name
+        self.content_type = content_type
+        self.chunk_size = chunk_size
+        self.bytes_written = 0
+        self.url: Optional[str] = None
+        
+        self._buffer = bytearray()
+        self._chunks: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=UPLOAD_QUEUE_CHUNKS)
+        self._error: Optional[BaseException] = None
+        self._aborted = threading.Event()
+        # Run in a copy of the caller's context so upload logs keep its request ID
+        self._thread = threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(self._upload_loop,),
+            name=f"gcs-upload-{object_name}",
+            daemon=True,
+        )
+        self._thread.start()
+    
+    def _upload_loop(self) -> None:
+        """Drain queued chunks into the resumable upload session."""
+        writer = None
+        finished = False
+        try:
+            writer = self.blob.open(
+                "wb",
+                chunk_size=self.chunk_size,
+                content_type=self.content_type,
+                ignore_flush=True,
+            )
+            while True:
+                chunk = self._chunks.get()
+                if chunk is None:
+                    finished = True
+                    break
+                if self._aborted.is_set():
+                    continue
+                writer.write(chunk)
+            if not self._aborted.is_set():
+                # Uploads the final chunk and finalizes the object
+                writer.close()
+        except BaseException as exc:
+            self._error = exc
+            self._aborted.set()
+            # Keep draining so the producer never blocks on a full queue,
+            # unless the end-of-stream marker was already consumed
+            while not finished and self._chunks.get() is not None:
+                pass
+    
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise self.handler._map_upload_error(self._error, self.object_name)
+    
+    def writable(self) -> bool:
+        return True
+    
+    def tell(self) -> int:
+        return self.bytes_written
+    
+    def write(self, data: Any) -> int:
+        """Buffer bytes and enqueue every full chunk for upload.
+        
+        Raises:
+            GCSUploadError: If the upload thread has failed
+        """
+        self._raise_if_failed()
+        view = memoryview(data).cast("B")
+        self._buffer += view
+        self.bytes_written += len(view)
+        while len(self._buffer) >= self.chunk_size:
+            self._chunks.put(bytes(self._buffer[:self.chunk_size]))
+            del self._buffer[:self.chunk_size]
+        return len(view)
+    
+    def close(self) -> None:
+        """Upload remaining bytes, finalize the object and set ``url``.
+        
+        Raises:
+            GCSUploadError: If the upload failed
+        """
+        if self.closed:
+            return
+        try:
+            if not self._aborted.is_set() and self._buffer:
+                self._chunks.put(bytes(self._buffer))
+                self._buffer.clear()
+            self._chunks.put(None)
+            self._thread.join()
+            self._raise_if_failed()
+            if not self._aborted.is_set():
+                self.url = self.handler.generate_download_url(self.object_name)
+        finally:
+            super().close()
+    
+    def abort(self) -> None:
+        """Stop uploading without finalizing the object."""
+        self._aborted.set()
+        self._buffer.clear()
+        if not self.closed:
+            self._chunks.put(None)
+            self._thread.join()
+            super().close()
+    
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
 
 class GCSHandler:
     """Handles uploads to Google Cloud Storage bucket.
@@ -60,7 +219,7 @@ class GCSHandler:
                 labels={"bucket": bucket_name},
                 fields={}
             )
-            
+        
         except google_exceptions.Forbidden as exc:
             raise GCSAuthenticationError(
                 f"Permission denied accessing GCS bucket '{bucket_name}'. "
@@ -95,12 +254,22 @@ class GCSHandler:
                 }
             )
     
-    def upload_file(self, local_file_path: Path, object_name: str) -> str:
+    def upload_file(
+        self,
+        local_file_path: Path,
+        object_name: str,
+        content_type: str = 'application/json',
+        content_encoding: Optional[str] = None,
+        cache_control: Optional[str] = None,
+    ) -> str:
         """Upload local file to GCS bucket.
         
         Args:
             local_file_path: Path to local file to upload
             object_name: Name for object in bucket (e.g., 'request_id.json')
+            content_type: MIME type of the object (default: 'application/json')
+            content_encoding: Optional Content-Encoding of the file (e.g., 'gzip')
+            cache_control: Optional Cache-Control header for the object
         
         Returns:
             Public download URL for the uploaded file
@@ -139,16 +308,21 @@ class GCSHandler:
                 fields={
                     "local_file": str(local_file_path),
                     "file_size_bytes": file_size,
+                    "content_type": content_type,
                 }
             )
             
             # Create blob (object) reference
             blob = self.bucket.blob(object_name)
+            if content_encoding:
+                blob.content_encoding = content_encoding
+            if cache_control:
+                blob.cache_control = cache_control
             
-            # Upload file with appropriate content type for JSON
+            # Upload file with content type of the output format
             blob.upload_from_filename(
                 str(local_file_path),
-                content_type='application/json'
+                content_type=content_type
             )
             
             # Generate public download URL
@@ -169,51 +343,231 @@ class GCSHandler:
             )
             
             return download_url
+        
+        except Exception as exc:
+            raise self._map_upload_error(
+                exc,
+                object_name,
+                context={"local_file": str(local_file_path)},
+            )
+    
+    def open_upload_stream(
+        self,
+        object_name: str,
+        content_type: str = 'application/json',
+        chunk_size: int = DEFAULT_UPLOAD_CHUNK_SIZE,
+        content_encoding: Optional[str] = None,
+        cache_control: Optional[str] = None,
+    ) -> GCSUploadStream:
+        """Open a writable stream that uploads directly into a GCS object.
+        
+        Data is pushed into a resumable upload session chunk by chunk while it
+        is being written, without a local temporary file.
+        
+        Args:
+            object_name: Name for object in bucket (e.g., 'request_id.json')
+            content_type: MIME type of the object (default: 'application/json')
+            chunk_size: Upload chunk size in bytes, rounded up to a multiple
+                of 256 KiB (default: 8 MiB)
+            content_encoding: Optional Content-Encoding (e.g., 'gzip' for
+                decompressive transcoding)
+            cache_control: Optional Cache-Control header for the object
+        
+        Returns:
+            GCSUploadStream; its ``url`` is set after a successful close()
+        
+        Example:
+            >>> with handler.open_upload_stream('abc123.json') as stream:
+            ...     stream.write(b'[]')
+            >>> stream.url
+            'https://storage.googleapis.com/my-bucket/abc123.json'
+        """
+        chunks = max(1, -(-chunk_size // UPLOAD_CHUNK_ALIGNMENT))
+        chunk_size = chunks * UPLOAD_CHUNK_ALIGNMENT
+        
+        log_struct(
+            self.logger,
+            "INFO",
+            f"Streaming upload to GCS: {object_name}",
+            labels={
+                "bucket": self.bucket_name,
+                "object_name": object_name,
+            },
+            fields={
+                "content_type": content_type,
+                "content_encoding": content_encoding,
+                "chunk_size_bytes": chunk_size,
+            }
+        )
+        
+        blob = self.bucket.blob(object_name)
+        if content_encoding:
+            blob.content_encoding = content_encoding
+        if cache_control:
+            blob.cache_control = cache_control
+        return GCSUploadStream(self, blob, object_name, content_type, chunk_size)
+    
+    def object_exists(self, object_name: str) -> bool:
+        """Check whether an object exists in the bucket.
+        
+        Args:
+            object_name: Name of the object in the bucket
+        
+        Returns:
+            True if the object exists
+        
+        Raises:
+            GCSUploadError: If the object metadata cannot be read
+        """
+        try:
+            return self.bucket.get_blob(object_name) is not None
+        except Exception as exc:
+            raise self._map_upload_error(exc, object_name)
+    
+    def compose_append(self, object_name: str, part_name: str) -> str:
+        """Append an uploaded part to an object with GCS compose.
+        
+        The object is replaced by the concatenation of its current content
+        and the part (or created from the part if missing), then the part
+        is deleted. The compose is conditional on the object's generation,
+        so a concurrent append fails instead of being lost. An object whose
+        next compose would exceed COMPOSE_MAX_COMPONENTS is first rewritten
+        as a single component.
+        
+        Args:
+            object_name: Name of the object to append to
+            part_name: Name of the uploaded part holding the new data
+        
+        Returns:
+            Public download URL of the object
+        
+        Raises:
+            GCSUploadError: If the compose fails
+        """
+        try:
+            part = self.bucket.get_blob(part_name)
+            if part is None:
+                raise GCSUploadError(
+                    f"Part to append not found: {part_name}",
+                    context={"bucket_name": self.bucket_name, "object_name": part_name},
+                )
+            destination = self.bucket.get_blob(object_name)
+            if destination is not None and (destination.component_count or 1) >= COMPOSE_MAX_COMPONENTS:
+                destination = self._consolidate(destination)
+            generation = destination.generation if destination is not None else 0
+            sources = [destination, part] if destination is not None else [part]
             
-        except google_exceptions.Forbidden as exc:
-            raise GCSUploadError(
-                f"Permission denied uploading to GCS bucket '{self.bucket_name}'. "
-                f"Check 'Storage Object Creator' role.",
-                context={
-                    "bucket_name": self.bucket_name,
+            # Compose does not inherit metadata; copy it from the part
+            target = self.bucket.blob(object_name)
+            target.content_type = part.content_type
+            target.content_encoding = part.content_encoding
+            target.cache_control = part.cache_control
+            target.compose(sources, if_generation_match=generation)
+            part.delete()
+            
+            log_struct(
+                self.logger,
+                "INFO",
+                f"Appended part to GCS object: {object_name}",
+                labels={
+                    "bucket": self.bucket_name,
                     "object_name": object_name,
-                    "error": str(exc),
                 },
+                fields={
+                    "part_name": part_name,
+                    "part_size_bytes": part.size,
+                    "created": destination is None,
+                }
+            )
+            
+            return self.generate_download_url(object_name)
+        
+        except Exception as exc:
+            raise self._map_upload_error(exc, object_name, context={"part_name": part_name})
+    
+    def _consolidate(self, blob: Any) -> Any:
+        """Rewrite a composite object as a single-component object.
+        
+        The stored bytes are downloaded to a temporary file and uploaded
+        again unchanged, conditional on the object's generation.
+        
+        Args:
+            blob: Composite object
+        
+        Returns:
+            The rewritten object, with its new generation
+        """
+        with tempfile.TemporaryFile() as buffer:
+            blob.download_to_file(buffer, raw_download=True, if_generation_match=blob.generation)
+            buffer.seek(0)
+            target = self.bucket.blob(blob.name)
+            target.content_type = blob.content_type
+            target.content_encoding = blob.content_encoding
+            target.cache_control = blob.cache_control
+            target.upload_from_file(buffer, if_generation_match=blob.generation)
+        
+        log_struct(
+            self.logger,
+            "INFO",
+            f"Rewrote composite GCS object as one component: {blob.name}",
+            labels={
+                "bucket": self.bucket_name,
+                "object_name": blob.name,
+            },
+            fields={"component_count": blob.component_count},
+        )
+        return target
+    
+    def _map_upload_error(
+        self,
+        exc: BaseException,
+        object_name: str,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> GCSUploadError:
+        """Map an upload exception to GCSUploadError.
+        
+        Args:
+            exc: Original exception
+            object_name: Target object name
+            context: Additional context to attach
+        
+        Returns:
+            GCSUploadError with retryability set by error type
+        """
+        if isinstance(exc, GCSUploadError):
+            return exc
+        
+        context = {
+            "bucket_name": self.bucket_name,
+            "object_name": object_name,
+            **(context or {}),
+            "error": str(exc),
+        }
+        
+        if isinstance(exc, google_exceptions.Forbidden):
+            return GCSUploadError(
+                f"Permission denied uploading to GCS bucket '{self.bucket_name}'. "
+                f"Check 'Storage Object Creator' role.",
+                context=context,
                 retryable=False  # Permission errors are not retryable
             )
-        except google_exceptions.ServiceUnavailable as exc:
-            raise GCSUploadError(
+        if isinstance(exc, google_exceptions.ServiceUnavailable):
+            return GCSUploadError(
                 f"GCS service temporarily unavailable: {exc}",
-                context={
-                    "bucket_name": self.bucket_name,
-                    "object_name": object_name,
-                    "error": str(exc),
-                },
+                context=context,
                 retryable=True  # Service errors can be retried
             )
-        except GoogleCloudError as exc:
-            raise GCSUploadError(
+        if isinstance(exc, GoogleCloudError):
+            return GCSUploadError(
                 f"Failed to upload file to GCS: {exc}",
-                context={
-                    "bucket_name": self.bucket_name,
-                    "object_name": object_name,
-                    "local_file": str(local_file_path),
-                    "error": str(exc),
-                },
+                context=context,
                 retryable=True  # Generic GCS errors might be transient
             )
-        except Exception as exc:
-            # Catch any unexpected errors
-            raise GCSUploadError(
-                f"Unexpected error uploading to GCS: {exc}",
-                context={
-                    "bucket_name": self.bucket_name,
-                    "object_name": object_name,
-                    "local_file": str(local_file_path),
-                    "error_type": type(exc).__name__,
-                    "error": str(exc),
-                }
-            )
+        # Unexpected errors
+        return GCSUploadError(
+            f"Unexpected error uploading to GCS: {exc}",
+            context={**context, "error_type": type(exc).__name__},
+        )
     
     def generate_download_url(self, object_name: str) -> str:
         """Generate publicly accessible download URL.
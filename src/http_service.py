@@ -0,0 +1,424 @@
+"""
+Long-running HTTP service with warm clients.
+
+A CLI run pays for imports, credential parsing and client creation before
+its first query. The service does that once: Config, BigQueryClient,
+GCSHandler and QueryBuilder (with its rendered templates) are created at
+startup and shared by every request. Requests are served concurrently by
+a threading HTTP server:
+    
+    GET /health
+    GET /v1/candles?symbol=BTCUSDT&timeframe=1h&from=...&to=...
+
+The query parameters are the CLI options of the ALL, RANGE and
+NEIGHBORHOOD modes, validated exactly like a command line. Rows are
+streamed back in the requested output format (JSON by default, or NDJSON,
+CSV, Arrow, Parquet) with chunked transfer encoding, or uploaded to GCS
+with ``upload=true``.
+"""
+
+import functools
+import io
+import itertools
+import json
+import logging
+import threading
+import time
+import urllib.parse
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .config import DEFAULT_SERVE_WORKERS, Config
+from .exceptions import (
+    AuthenticationError,
+    BQExtractorError,
+    DataNotFoundError,
+    GCSUploadError,
+    NetworkError,
+    QueryExecutionError,
+    ValidationError,
+)
+from .logger import log_struct, set_request_id
+from .neighborhood_fetcher import NeighborhoodFetcher
+from .output_handler import OutputHandler
+from .query_builder import QueryBuilder
+from .single_flight import SingleFlight, request_fingerprint
+
+
+# Response body buffer: rows are sent in HTTP chunks of about this size
+RESPONSE_CHUNK_SIZE = 64 * 1024
+
+
+def http_status(exc: Exception) -> int:
+    """Map an extraction error to an HTTP status code."""
+    if isinstance(exc, ValidationError):
+        return 400
+    if isinstance(exc, DataNotFoundError):
+        return 404
+    if isinstance(exc, (QueryExecutionError, NetworkError, GCSUploadError, AuthenticationError)):
+        return 502
+    return 500
+
+
+class ChunkedWriter(io.RawIOBase):
+    """Binary writer sending each write as one HTTP/1.1 chunk."""
+    
+    def __init__(self, target: Any):
+        """Initialize writer.
+        
+        Args:
+            target: Socket file receiving the chunks
+        """
+        super().__init__()
+        self.target = target
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data: Any) -> int:
+        size = len(memoryview(data))
+        if size:
+            self.target.write(f"{size:X}\r\n".encode("ascii"))
+            self.target.write(data)
+            self.target.write(b"\r\n")
+        return size
+    
+    def finish(self) -> None:
+        """Send the terminating zero-length chunk."""
+        self.target.write(b"0\r\n\r\n")
+
+
+class ExtractionService:
+    """Serves candle requests over HTTP with shared, warm clients."""
+    
+    def __init__(
+        self,
+        config: Config,
+        logger: logging.Logger,
+        bq_client: Any,
+        parse_request: Callable[[Dict[str, str]], Tuple[Any, str]],
+        gcs_handler: Optional[Any] = None,
+        max_concurrent: int = DEFAULT_SERVE_WORKERS,
+        upload_memo: Optional[SingleFlight] = None,
+    ):
+        """Initialize service.
+        
+        Args:
+            config: Loaded configuration
+            logger: Logger instance
+            bq_client: Shared BigQueryClient
+            parse_request: Validates query parameters into (args, query_mode),
+                with timestamps parsed into from_ts, to_ts and center_ts
+                (raises ValidationError)
+            gcs_handler: Optional shared GCSHandler for upload=true requests
+            max_concurrent: Requests processed at once; others wait
+            upload_memo: Shares GCS uploads between identical upload=true
+                requests (see request_fingerprint)
+        """
+        self.config = config
+        self.logger = logger
+        self.bq_client = bq_client
+        self.parse_request = parse_request
+        self.gcs_handler = gcs_handler
+        self.upload_memo = upload_memo
+        self.query_builder = QueryBuilder(config.bq_table_fqn)
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+    
+    def fetch(
+        self,
+        args: Any,
+        query_mode: str,
+        context: Dict[str, Any],
+    ) -> Tuple[Iterator[List[Dict[str, Any]]], Dict[str, Any]]:
+        """Start fetching a request's rows.
+        
+        Args:
+            args: Validated request arguments
+            query_mode: 'ALL', 'RANGE' or 'NEIGHBORHOOD'
+            context: Logging context
+        
+        Returns:
+            Tuple of (raw row batches, extra metadata)
+        """
+        if query_mode == 'NEIGHBORHOOD':
+            fetcher = NeighborhoodFetcher(
+                self.bq_client,
+                self.query_builder,
+                self.logger,
+                max_rounds=args.max_expansion_rounds,
+                max_bytes_billed=int(args.expansion_budget_gb * 1024 ** 3),
+            )
+            neighborhood = fetcher.fetch(
+                args.symbol,
+                args.timeframe,
+                args.center_ts,
+                args.n_before,
+                args.n_after,
+                args.exchange,
+                strategy=args.neighborhood_strategy,
+                context=context,
+            )
+            batches = iter([neighborhood.rows] if neighborhood.rows else [])
+            return batches, {"expansion_rounds": neighborhood.expansion_rounds}
+        
+        if query_mode == 'ALL':
+            sql = self.query_builder.build_all_query(args.symbol, args.timeframe, args.exchange)
+        else:
+            sql = self.query_builder.build_range_query(
+                args.symbol,
+                args.timeframe,
+                args.from_ts,
+                args.to_ts,
+                args.exchange,
+            )
+        return self.bq_client.iter_query(sql, context=context, page_size=args.page_size), {}
+    
+    def handle(self, handler: BaseHTTPRequestHandler) -> None:
+        """Serve one HTTP request.
+        
+        Args:
+            handler: Request handler of the HTTP server
+        """
+        started = time.monotonic()
+        request_id = set_request_id(handler.headers.get("X-Request-ID"))
+        url = urllib.parse.urlsplit(handler.path)
+        handler.response_started = False
+        status, record_count = 200, 0
+        
+        try:
+            if url.path == "/health":
+                self._send_json(handler, 200, {"status": "ok"}, request_id)
+                return
+            if url.path != "/v1/candles":
+                status = 404
+                self._send_json(handler, 404, {"error": f"Not found: {url.path}"}, request_id)
+                return
+            
+            params = dict(urllib.parse.parse_qsl(url.query, keep_blank_values=True))
+            upload = params.pop("upload", "false").lower() in ("", "1", "true")
+            with self._slots:
+                args, query_mode = self.parse_request(params)
+                record_count = self._serve_candles(handler, args, query_mode, upload, request_id)
+        except Exception as exc:
+            if isinstance(exc, BQExtractorError):
+                status, payload = http_status(exc), exc.to_dict()
+            else:
+                status, payload = 500, {"error_type": type(exc).__name__, "message": str(exc)}
+            self._send_error(handler, status, payload, request_id)
+        finally:
+            log_struct(
+                self.logger,
+                "INFO" if status < 500 else "ERROR",
+                f"{handler.command} {url.path} {status}",
+                labels={"status": status},
+                fields={
+                    "query": url.query,
+                    "record_count": record_count,
+                    "duration_ms": round((time.monotonic() - started) * 1000, 1),
+                    "request_id": request_id,
+                },
+            )
+    
+    def open_output(
+        self,
+        args: Any,
+        query_mode: str,
+        request_id: str,
+    ) -> Tuple[OutputHandler, Iterator[List[Dict[str, Any]]], Dict[str, Any]]:
+        """Start a request's query and prepare its output.
+        
+        Args:
+            args: Validated request arguments
+            query_mode: 'ALL', 'RANGE' or 'NEIGHBORHOOD'
+            request_id: Request ID recorded in the output metadata
+        
+        Returns:
+            Tuple of (output handler, transformed batches, metadata)
+        
+        Raises:
+            DataNotFoundError: If the query returns no rows
+        """
+        output_handler = OutputHandler(
+            self.logger,
+            gcs_handler=self.gcs_handler,
+            output_format=args.output_format,
+        )
+        context = {"symbol": args.symbol, "timeframe": args.timeframe, "mode": query_mode}
+        batches, extra_metadata = self.fetch(args, query_mode, context)
+        
+        # Fail with a proper status before any byte of the body is sent
+        first_batch = next(batches, None)
+        if first_batch is None:
+            raise DataNotFoundError(
+                f"No data found for symbol={args.symbol}, timeframe={args.timeframe}",
+                context=context,
+            )
+        transformed_batches = output_handler.transform_batches(
+            itertools.chain([first_batch], batches)
+        )
+        
+        if query_mode == 'RANGE':
+            query_parameters = {
+                "from_timestamp": args.from_timestamp,
+                "to_timestamp": args.to_timestamp,
+            }
+        elif query_mode == 'NEIGHBORHOOD':
+            query_parameters = {
+                "center_timestamp": args.center_timestamp,
+                "n_before": args.n_before,
+                "n_after": args.n_after,
+            }
+        else:
+            query_parameters = {}
+        metadata = {
+            "request_id": request_id,
+            "request_timestamp": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "symbol": args.symbol,
+            "timeframe": args.timeframe,
+            "query_type": query_mode.lower(),
+            "query_parameters": query_parameters,
+            **extra_metadata,
+        }
+        return output_handler, transformed_batches, metadata
+    
+    def upload(self, args: Any, query_mode: str, request_id: str) -> Tuple[str, int]:
+        """Write a request's output to GCS.
+        
+        Returns:
+            Tuple of (GCS URL, record count)
+        """
+        output_handler, transformed_batches, metadata = self.open_output(args, query_mode, request_id)
+        _, gcs_url, record_count = output_handler.write_stream(
+            transformed_batches,
+            Path("."),
+            args.symbol,
+            args.timeframe,
+            metadata=metadata,
+            use_gcs=True,
+            pretty=not args.compact,
+        )
+        return gcs_url, record_count
+    
+    def _serve_candles(
+        self,
+        handler: BaseHTTPRequestHandler,
+        args: Any,
+        query_mode: str,
+        upload: bool,
+        request_id: str,
+    ) -> int:
+        """Fetch a request's rows and stream them into the response (or GCS)."""
+        if upload:
+            if self.gcs_handler is None:
+                raise ValidationError("upload=true requires GCS to be configured")
+            if self.upload_memo is None:
+                (gcs_url, record_count), shared = self.upload(args, query_mode, request_id), False
+            else:
+                # Identical requests running at the same time or shortly
+                # before share one uploaded object
+                (gcs_url, record_count), shared = self.upload_memo.do(
+                    request_fingerprint(args, query_mode),
+                    functools.partial(self.upload, args, query_mode, request_id),
+                )
+            self._send_json(
+                handler,
+                200,
+                {
+                    "gcs_url": gcs_url,
+                    "record_count": record_count,
+                    "request_id": request_id,
+                    "shared": shared,
+                },
+                request_id,
+            )
+            return record_count
+        
+        output_handler, transformed_batches, metadata = self.open_output(args, query_mode, request_id)
+        handler.send_response(200)
+        handler.send_header("Content-Type", output_handler.writer_cls.content_type)
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.send_header("X-Request-ID", request_id)
+        handler.end_headers()
+        handler.response_started = True
+        
+        chunked = ChunkedWriter(handler.wfile)
+        body = io.BufferedWriter(chunked, buffer_size=RESPONSE_CHUNK_SIZE)
+        record_count = output_handler.write_to(
+            body, transformed_batches, metadata=metadata, pretty=not args.compact,
+        )
+        body.flush()
+        chunked.finish()
+        return record_count
+    
+    @staticmethod
+    def _send_json(handler: BaseHTTPRequestHandler, status: int, payload: Dict[str, Any], request_id: str) -> None:
+        """Send a small JSON response."""
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.send_header("X-Request-ID", request_id)
+        handler.end_headers()
+        handler.wfile.write(body)
+    
+    def _send_error(
+        self,
+        handler: BaseHTTPRequestHandler,
+        status: int,
+        payload: Dict[str, Any],
+        request_id: str,
+    ) -> None:
+        """Send an error response, or cut the connection if the body has started.
+        
+        A failure while streaming rows cannot change the 200 status that was
+        already sent; the response is left without its terminating chunk so
+        the client sees it as truncated.
+        """
+        if handler.response_started:
+            handler.close_connection = True
+            return
+        try:
+            self._send_json(handler, status, payload, request_id)
+        except OSError:
+            handler.close_connection = True
+    
+    def make_server(self, host: str, port: int) -> ThreadingHTTPServer:
+        """Create the threading HTTP server bound to host:port."""
+        service = self
+        
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def do_GET(self) -> None:
+                service.handle(self)
+            
+            def log_message(self, format: str, *args: Any) -> None:
+                service.logger.debug(format % args)
+        
+        server = ThreadingHTTPServer((host, port), RequestHandler)
+        server.daemon_threads = True
+        return server
+    
+    def serve(self, host: str, port: int) -> None:
+        """Serve requests until interrupted.
+        
+        Args:
+            host: Interface to bind ('' for all)
+            port: TCP port
+        """
+        server = self.make_server(host, port)
+        log_struct(
+            self.logger,
+            "INFO",
+            f"Serving on http://{host or '0.0.0.0'}:{server.server_address[1]}",
+            labels={},
+            fields={"host": host, "port": server.server_address[1]},
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,246 @@
+"""
+Incremental export of newly closed candles.
+
+A watermark per (symbol, timeframe, exchange) in a local JSON state file
+records the last exported candle. Each sync queries only closed candles after
+the watermark and adds them to a stable dataset instead of rewriting it:
+appendable formats (NDJSON, CSV) are appended to one file or GCS object (with
+GCS compose), other formats get a new part file under the dataset prefix.
+The watermark advances only after the new candles are written.
+"""
+
+import itertools
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .config import DEFAULT_PAGE_SIZE
+from .json_cache import JsonCacheFile
+from .query_helpers import _as_naive_utc, closed_candle_cutoff
+
+
+# Bump when the on-disk layout changes; older files are rebuilt
+STATE_VERSION = 1
+
+
+class SyncResult(NamedTuple):
+    """Outcome of one incremental sync."""
+    
+    file_path: Optional[Path]
+    gcs_url: Optional[str]
+    record_count: int
+    watermark: Optional[datetime]
+
+
+class SyncState:
+    """Locally persisted export watermark per symbol."""
+    
+    def __init__(self, path: Path, logger: logging.Logger):
+        """Initialize sync state.
+        
+        Args:
+            path: JSON file holding the watermarks (created on first sync)
+            logger: Logger instance
+        """
+        self.cache_file = JsonCacheFile(path, STATE_VERSION, logger)
+        self.logger = logger
+        self._entries = self.cache_file.load().get("entries", {})
+    
+    @staticmethod
+    def key(symbol: str, timeframe: str, exchange: Optional[str] = None) -> str:
+        """Build the state key for a symbol/timeframe/exchange combination."""
+        return f"{symbol}|{timeframe}|{exchange or '*'}"
+    
+    def watermark(self, key: str) -> Optional[datetime]:
+        """Return the timestamp of the last exported candle, or None if never synced."""
+        entry = self._entries.get(key)
+        return datetime.fromisoformat(entry["watermark"]) if entry else None
+    
+    def advance(self, key: str, watermark: datetime, dataset: str, record_count: int) -> None:
+        """Record newly exported candles and persist the state.
+        
+        The file is re-read before saving so entries advanced by other
+        syncs sharing it are kept.
+        
+        Args:
+            key: State key
+            watermark: Timestamp of the last exported candle
+            dataset: Name of the dataset the candles were added to
+            record_count: Number of candles added
+        """
+        def merge(data: Dict[str, Any]) -> Dict[str, Any]:
+            entries = {**self._entries, **data.get("entries", {})}
+            entry = entries.get(key, {})
+            entries[key] = {
+                "watermark": _as_naive_utc(watermark).isoformat(),
+                "dataset": dataset,
+                "record_count": entry.get("record_count", 0) + record_count,
+                "synced_at": datetime.utcnow().isoformat(),
+            }
+            return {"entries": entries}
+        
+        self._entries = self.cache_file.update(merge)["entries"]
+
+
+class IncrementalSync:
+    """Exports candles newer than the stored watermark into a growing dataset."""
+    
+    def __init__(
+        self,
+        bq_client: Any,
+        query_builder: Any,
+        output_handler: Any,
+        state: SyncState,
+        logger: logging.Logger,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ):
+        """Initialize incremental sync.
+        
+        Args:
+            bq_client: BigQueryClient used to stream new candles
+            query_builder: QueryBuilder used to build range queries
+            output_handler: OutputHandler writing the dataset
+            state: SyncState holding the watermarks
+            logger: Logger instance
+            page_size: Maximum number of rows fetched per result page
+        """
+        self.bq_client = bq_client
+        self.query_builder = query_builder
+        self.output_handler = output_handler
+        self.state = state
+        self.logger = logger
+        self.page_size = page_size
+    
+    @staticmethod
+    def dataset_name(symbol: str, timeframe: str, exchange: Optional[str] = None) -> str:
+        """Name of the file, object or part prefix holding a symbol's dataset."""
+        return f"{symbol}_{timeframe}_{exchange or 'all'}"
+    
+    def sync_range(
+        self,
+        symbol: str,
+        timeframe: str,
+        exchange: Optional[str] = None,
+    ) -> Optional[Tuple[datetime, datetime]]:
+        """Calculate the time range of candles not yet exported.
+        
+        Starts right after the watermark (or at the ALL-mode start on the
+        first sync) and ends at the last candle that has closed, so candles
+        still being updated are exported by a later sync.
+        
+        Args:
+            symbol: Stock symbol
+            timeframe: Timeframe identifier
+            exchange: Optional exchange identifier
+        
+        Returns:
+            Tuple of (start, end) in naive UTC, or None if nothing can be new
+        """
+        watermark = self.state.watermark(self.state.key(symbol, timeframe, exchange))
+        if watermark is not None:
+            start = watermark + timedelta(microseconds=1)
+        else:
+            start, _ = self.query_builder.all_time_range(timeframe)
+        end = closed_candle_cutoff(timeframe)
+        return (start, end) if start <= end else None
+    
+    def run(
+        self,
+        symbol: str,
+        timeframe: str,
+        output_path: Path,
+        exchange: Optional[str] = None,
+        use_gcs: bool = True,
+        pretty: bool = True,
+        metadata: Optional[Dict[str, Any]] = None,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> SyncResult:
+        """Export candles newer than the watermark and advance it.
+        
+        Args:
+            symbol: Stock symbol
+            timeframe: Timeframe identifier
+            output_path: Output directory path (used for local saves)
+            exchange: Optional exchange identifier
+            use_gcs: If True and GCS is available, write the dataset to GCS
+            pretty: If True, indent JSON parts with 2 spaces
+            metadata: Optional metadata for part files (not written into
+                appended datasets)
+            context: Additional context for logging
+        
+        Returns:
+            SyncResult; file_path is None when there were no new candles
+        """
+        context = context or {}
+        key = self.state.key(symbol, timeframe, exchange)
+        previous = self.state.watermark(key)
+        time_range = self.sync_range(symbol, timeframe, exchange)
+        
+        batches: Iterator[List[Dict[str, Any]]] = iter([])
+        if time_range is not None:
+            query = self.query_builder.build_range_query(symbol, timeframe, *time_range, exchange)
+            batches = self.bq_client.iter_query(query, context=context, page_size=self.page_size)
+        
+        # Rows arrive in timestamp order: the last row seen is the new watermark
+        last_timestamp: List[datetime] = []
+        
+        def track(pages: Iterator[List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+            for page in pages:
+                last_timestamp[:] = [page[-1]["timestamp"]]
+                yield page
+        
+        tracked = track(batches)
+        first_batch = next(tracked, None)
+        if first_batch is None:
+            self.logger.info(
+                "Dataset already up to date",
+                extra={
+                    "labels": context,
+                    "fields": {"watermark": previous.isoformat() if previous else None},
+                }
+            )
+            return SyncResult(None, None, 0, previous)
+        
+        dataset = self.dataset_name(symbol, timeframe, exchange)
+        append = self.output_handler.writer_cls.appendable
+        name = dataset
+        if not append:
+            name = f"{dataset}/part-{time_range[0]:%Y%m%dT%H%M%S}"
+            metadata = {
+                **(metadata or {}),
+                "query_parameters": {
+                    "from_timestamp": time_range[0].isoformat() + "Z",
+                    "to_timestamp": time_range[1].isoformat() + "Z",
+                },
+            }
+        
+        file_path, gcs_url, record_count = self.output_handler.write_stream(
+            self.output_handler.transform_batches(itertools.chain([first_batch], tracked)),
+            output_path,
+            symbol,
+            timeframe,
+            metadata=None if append else metadata,
+            use_gcs=use_gcs,
+            pretty=pretty,
+            name=name,
+            append=append,
+        )
+        
+        watermark = _as_naive_utc(last_timestamp[0])
+        self.state.advance(key, watermark, dataset, record_count)
+        self.logger.info(
+            "Incremental sync completed",
+            extra={
+                "labels": context,
+                "fields": {
+                    "dataset": dataset,
+                    "file": str(file_path),
+                    "append": append,
+                    "record_count": record_count,
+                    "previous_watermark": previous.isoformat() if previous else None,
+                    "watermark": watermark.isoformat(),
+                },
+            }
+        )
+        return SyncResult(file_path, gcs_url, record_count, watermark)
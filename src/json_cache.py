@@ -0,0 +1,118 @@
+"""
+Versioned JSON cache files.
+
+Small local lookups (density index, coverage table) are persisted as JSON
+under CACHE_DIR. Files are written atomically, and a missing, corrupt or
+outdated file is treated as an empty cache so it is simply rebuilt. Several
+instances may share a file (e.g. concurrent --batch requests): update()
+re-reads and merges under a per-file lock so no writer drops another's
+entries.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+# Per-file locks serializing update() across instances sharing a file
+_FILE_LOCKS: Dict[Path, threading.Lock] = {}
+_FILE_LOCKS_GUARD = threading.Lock()
+
+
+def _file_lock(path: Path) -> threading.Lock:
+    """Return the process-wide lock for a cache file."""
+    with _FILE_LOCKS_GUARD:
+        return _FILE_LOCKS.setdefault(path.resolve(), threading.Lock())
+
+
+def atomic_write_path(path: Path) -> Any:
+    """Create a uniquely named temporary file next to ``path``.
+    
+    The caller writes the file, then moves it into place with os.replace().
+    Unique names keep concurrent writers of the same path from replacing
+    or deleting each other's temporary files.
+    
+    Args:
+        path: Final file location
+    
+    Returns:
+        Open binary NamedTemporaryFile that is not deleted on close
+    """
+    return tempfile.NamedTemporaryFile(
+        dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False,
+    )
+
+
+class JsonCacheFile:
+    """Atomically written JSON document with a layout version."""
+    
+    def __init__(self, path: Path, version: int, logger: logging.Logger):
+        """Initialize cache file.
+        
+        Args:
+            path: JSON file location (parent directories are created on save)
+            version: Layout version; files with another version are ignored
+            logger: Logger instance
+        """
+        self.path = Path(path)
+        self.version = version
+        self.logger = logger
+    
+    def load(self) -> Dict[str, Any]:
+        """Load cached data (empty if missing, unreadable or outdated).
+        
+        Returns:
+            Cached document without the version field
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as exc:
+            self.logger.warning(
+                f"Ignoring unreadable cache file: {exc}",
+                extra={"labels": {}, "fields": {"path": str(self.path)}},
+            )
+            return {}
+        
+        if not isinstance(data, dict) or data.pop("version", None) != self.version:
+            return {}
+        return data
+    
+    def save(self, data: Dict[str, Any]) -> None:
+        """Write data atomically so readers never see a partial file.
+        
+        Args:
+            data: JSON-serializable document
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        content = json.dumps({"version": self.version, **data}, indent=2, sort_keys=True)
+        with atomic_write_path(self.path) as f:
+            try:
+                f.write(content.encode("utf-8"))
+            except BaseException:
+                os.unlink(f.name)
+                raise
+        os.replace(f.name, self.path)
+    
+    def update(self, merge: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+        """Re-read the file, merge local changes into it and save the result.
+        
+        The file's lock is held throughout, so concurrent updates from
+        instances sharing the file are applied one after another.
+        
+        Args:
+            merge: Function receiving the current document and returning
+                the document to save
+        
+        Returns:
+            Saved document
+        """
+        with _file_lock(self.path):
+            data = merge(self.load())
+            self.save(data)
+        return data
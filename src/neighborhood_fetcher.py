@@ -0,0 +1,209 @@
+"""
+Self-correcting NEIGHBORHOOD fetcher.
+
+The adaptive window from calculate_adaptive_window assumes dense candles.
+When a symbol has gaps, the first query returns fewer than the requested
+records on one or both sides. The fetcher then re-queries only the short
+side, scanning the next band of days with a geometrically growing window,
+until the side is filled, the window reaches its cap or the byte budget
+is spent.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional
+
+from .config import (
+    DEFAULT_MAX_EXPANSION_ROUNDS,
+    DEFAULT_NEIGHBORHOOD_BYTES_BILLED,
+    NEIGHBORHOOD_WINDOW_GROWTH,
+)
+from .exceptions import QueryExecutionError
+from .query_builder import DEFAULT_NEIGHBORHOOD_STRATEGY
+from .query_helpers import MAX_WINDOW_DAYS, MonthDensity
+
+
+# BigQuery error reason when a job would bill more than maximum_bytes_billed
+BYTES_BILLED_LIMIT_REASON = "bytesBilledLimitExceeded"
+
+
+class NeighborhoodResult(NamedTuple):
+    """Rows of a NEIGHBORHOOD request and how they were obtained."""
+    
+    rows: List[Dict[str, Any]]
+    expansion_rounds: int
+    bytes_billed: int
+    complete: bool
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes as UTC so they compare with BigQuery timestamps."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class NeighborhoodFetcher:
+    """Fetches NEIGHBORHOOD results, expanding short sides until filled."""
+    
+    def __init__(
+        self,
+        bq_client: Any,
+        query_builder: Any,
+        logger: logging.Logger,
+        max_rounds: int = DEFAULT_MAX_EXPANSION_ROUNDS,
+        max_bytes_billed: int = DEFAULT_NEIGHBORHOOD_BYTES_BILLED,
+        growth_factor: int = NEIGHBORHOOD_WINDOW_GROWTH,
+    ):
+        """Initialize neighborhood fetcher.
+        
+        Args:
+            bq_client: BigQueryClient used to run queries
+            query_builder: QueryBuilder used to build queries
+            logger: Logger instance
+            max_rounds: Maximum expansion rounds (0 disables expansion)
+            max_bytes_billed: Total bytes billed allowed across all queries
+            growth_factor: Window multiplier applied each expansion round
+        """
+        self.bq_client = bq_client
+        self.query_builder = query_builder
+        self.logger = logger
+        self.max_rounds = max_rounds
+        self.max_bytes_billed = max_bytes_billed
+        self.growth_factor = max(2, growth_factor)
+    
+    def fetch(
+        self,
+        symbol: str,
+        timeframe: str,
+        center_timestamp: datetime,
+        n_before: int,
+        n_after: int,
+        exchange: Optional[str] = None,
+        strategy: str = DEFAULT_NEIGHBORHOOD_STRATEGY,
+        month_density: Optional[Mapping[str, MonthDensity]] = None,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> NeighborhoodResult:
+        """Fetch N records before and after a center timestamp.
+        
+        Args:
+            symbol: Stock symbol
+            timeframe: Timeframe identifier
+            center_timestamp: Central timestamp point
+            n_before: Number of records to fetch before center
+            n_after: Number of records to fetch after center
+            exchange: Optional exchange identifier
+            strategy: Initial query strategy ("union" or "window")
+            month_density: Optional monthly density from the density index
+            context: Additional context for logging
+        
+        Returns:
+            NeighborhoodResult with rows in ascending timestamp order
+        
+        Raises:
+            QueryExecutionError: If a query fails
+            NetworkError: If network error occurs after all retries
+        """
+        context = context or {}
+        
+        sql = self.query_builder.build_neighborhood_query(
+            symbol, timeframe, center_timestamp, n_before, n_after, exchange,
+            strategy=strategy,
+            month_density=month_density,
+        )
+        result = self.bq_client.run_query(
+            sql, context=context, maximum_bytes_billed=self.max_bytes_billed
+        )
+        bytes_billed = result.bytes_billed
+        
+        center = _as_utc(center_timestamp)
+        rows = list(result.rows)
+        requested = {"before": n_before, "after": n_after}
+        found = {
+            "before": sum(1 for row in rows if _as_utc(row["timestamp"]) < center),
+            "after": sum(1 for row in rows if _as_utc(row["timestamp"]) > center),
+        }
+        window_before, window_after = self.query_builder.neighborhood_windows(
+            timeframe, center_timestamp, n_before, n_after, month_density,
+        )
+        windows = {"before": window_before, "after": window_after}
+        
+        rounds = 0
+        stop_reason = None
+        while True:
+            short_sides = [
+                side for side in ("before", "after")
+                if found[side] < requested[side] and windows[side] < MAX_WINDOW_DAYS
+            ]
+            if not short_sides:
+                break
+            if rounds >= self.max_rounds:
+                stop_reason = "max_rounds"
+                break
+            
+            rounds += 1
+            for side in short_sides:
+                remaining_bytes = self.max_bytes_billed - bytes_billed
+                if remaining_bytes <= 0:
+                    stop_reason = "byte_budget"
+                    break
+                
+                outer_days = min(MAX_WINDOW_DAYS, windows[side] * self.growth_factor)
+                sql = self.query_builder.build_neighborhood_side_query(
+                    symbol,
+                    timeframe,
+                    center_timestamp,
+                    side,
+                    requested[side] - found[side],
+                    windows[side],
+                    outer_days,
+                    exchange,
+                )
+                try:
+                    side_result = self.bq_client.run_query(
+                        sql,
+                        context={**context, "expansion_round": rounds, "side": side},
+                        maximum_bytes_billed=remaining_bytes,
+                    )
+                except QueryExecutionError as exc:
+                    if exc.context.get("reason") != BYTES_BILLED_LIMIT_REASON:
+                        raise
+                    stop_reason = "byte_budget"
+                    break
+                
+                bytes_billed += side_result.bytes_billed
+                rows.extend(side_result.rows)
+                found[side] += len(side_result.rows)
+                windows[side] = outer_days
+            
+            if stop_reason:
+                break
+        
+        complete = all(found[side] >= requested[side] for side in requested)
+        rows.sort(key=lambda row: _as_utc(row["timestamp"]))
+        
+        self.logger.log(
+            logging.INFO if complete else logging.WARNING,
+            "Neighborhood fetched" if complete else "Neighborhood result is short",
+            extra={
+                "labels": context,
+                "fields": {
+                    "n_before": n_before,
+                    "n_after": n_after,
+                    "found_before": found["before"],
+                    "found_after": found["after"],
+                    "expansion_rounds": rounds,
+                    "window_before_days": windows["before"],
+                    "window_after_days": windows["after"],
+                    "bytes_billed": bytes_billed,
+                    "stop_reason": stop_reason or ("filled" if complete else "window_cap"),
+                },
+            }
+        )
+        
+        return NeighborhoodResult(
+            rows=rows,
+            expansion_rounds=rounds,
+            bytes_billed=bytes_billed,
+            complete=complete,
+        )
@@ -1,39 +1,560 @@
 """
 Output handler for BigQuery query results.
 
-Transforms BigQuery results to JSON format and saves to file or GCS.
-Output file naming: {request_id}.json (both local and GCS)
+Transforms BigQuery results and saves them to file or GCS in one of the
+registered output formats (JSON, NDJSON, CSV, Parquet, Arrow IPC).
+Output file naming: {request_id}.{extension} by default (both local and GCS);
+appendable formats can also be appended to an existing file or object.
 """
 
+import csv
+import gzip
+import io
+import itertools
 import json
 import logging
-import tempfile
+from collections.abc import Mapping
 from datetime import datetime, timezone
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple, TYPE_CHECKING
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+    Type,
+    TYPE_CHECKING,
+)
 
-from .exceptions import FileSystemError
+from .config import DEFAULT_UPLOAD_CHUNK_SIZE
+from .exceptions import ConfigurationError, FileSystemError, ValidationError
 from .logger import get_request_id
 
+# Optional dependencies for the columnar transform path
+try:
+    import numpy
+except ImportError:  # pragma: no cover - depends on environment
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - depends on environment
+    pyarrow = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on environment
+    zstandard = None
+
 if TYPE_CHECKING:
     from .gcs_handler import GCSHandler
 
 
+# Registry of output writers by format name (see register_writer)
+OUTPUT_WRITERS: Dict[str, Type[Any]] = {}
+
+DEFAULT_OUTPUT_FORMAT = "json"
+
+# Streaming compression codecs for text output formats.
+# gzip objects in GCS are stored with Content-Encoding: gzip so that clients
+# get decompressive transcoding; GCS does not transcode zstd.
+COMPRESSION_CODECS: Dict[str, Dict[str, Any]] = {
+    "gzip": {"extension": "gz", "content_encoding": "gzip", "default_level": 6, "levels": (0, 9)},
+    "zstd": {
+        "extension": "zst", "content_type": "application/zstd", "default_level": 3, "levels": (1, 22),
+    },
+}
+
+# Cache-Control for transcoded objects; must not contain "no-transform"
+TRANSCODING_CACHE_CONTROL = "public, max-age=3600"
+
+
+def validate_compression_level(compression: str, level: Optional[int]) -> None:
+    """Check a compression level against the codec's supported range.
+    
+    Args:
+        compression: Codec name from COMPRESSION_CODECS
+        level: Requested level (None for the codec default)
+    
+    Raises:
+        ValidationError: If the level is outside the codec's range
+    """
+    if level is None:
+        return
+    low, high = COMPRESSION_CODECS[compression]["levels"]
+    if not low <= level <= high:
+        raise ValidationError(
+            f"Compression level {level} is out of range for {compression} ({low}-{high})",
+            context={"compression": compression, "compression_level": level},
+        )
+
+
+def register_writer(writer_cls: Type[Any]) -> Type[Any]:
+    """Register an output writer class under its ``format_name``.
+    
+    Writer classes expose ``format_name``, ``extension``, ``content_type``,
+    ``binary`` and ``appendable`` class attributes, take
+    ``(f, metadata=None, **options)`` in their constructor and implement
+    ``write_batch(records)``, ``close()`` and a ``record_count`` attribute.
+    Output of appendable writers stays valid when written after existing
+    output of the same format.
+    
+    Args:
+        writer_cls: Writer class to register
+    
+    Returns:
+        The same class (usable as a decorator)
+    """
+    OUTPUT_WRITERS[writer_cls.format_name] = writer_cls
+    return writer_cls
+
+
+def get_writer(format_name: str) -> Type[Any]:
+    """Look up a registered output writer class.
+    
+    Args:
+        format_name: Output format name (e.g., 'json', 'parquet')
+    
+    Returns:
+        Writer class
+    
+    Raises:
+        ValidationError: If the format is not registered
+    """
+    try:
+        return OUTPUT_WRITERS[format_name]
+    except KeyError:
+        raise ValidationError(
+            f"Unsupported output format: {format_name}. "
+            f"Supported formats: {', '.join(sorted(OUTPUT_WRITERS))}",
+            context={"format": format_name},
+        )
+
+
+@register_writer
+class JsonStreamWriter:
+    """Incremental JSON writer for candle record batches.
+    
+    Emits the metadata header first, then serializes records batch by batch,
+    so memory use does not grow with the number of records. Pretty output is
+    byte-identical to json.dump(output, f, indent=2, ensure_ascii=False);
+    compact output matches json.dump with separators=(",", ":").
+    
+    Example:
+        >>> with open("out.json", "w", encoding="utf-8") as f:
+        ...     writer = JsonStreamWriter(f, metadata={"request_id": "abc"})
+        ...     for batch in batches:
+        ...         writer.write_batch(batch)
+        ...     writer.close()
+    """
+    
+    format_name = "json"
+    extension = "json"
+    content_type = "application/json"
+    binary = False
+    appendable = False
+    
+    COMPACT_SEPARATORS = (",", ":")
+    
+    def __init__(
+        self,
+        f: TextIO,
+        metadata: Optional[Dict[str, Any]] = None,
+        pretty: bool = True,
+        **options: Any,
+    ):
+        """Initialize writer and emit the metadata header.
+        
+        Args:
+            f: Text file object to write to
+            metadata: Optional metadata; if empty, output is the bare data array
+            pretty: If True, indent with 2 spaces; otherwise write compact JSON
+            **options: Options for other formats (ignored)
+        """
+        self.f = f
+        self.pretty = pretty
+        self.has_metadata = bool(metadata)
+        self.record_count = 0
+        # Extra indentation for records nested under "data"
+        self._prefix = "  " if (pretty and self.has_metadata) else ""
+        
+        if self.has_metadata:
+            if pretty:
+                header = json.dumps(metadata, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+                f.write('{\n  "metadata": ' + header + ',\n  "data": ')
+            else:
+                header = json.dumps(metadata, ensure_ascii=False, separators=self.COMPACT_SEPARATORS)
+                f.write('{"metadata":' + header + ',"data":')
+    
+    def write_batch(self, records: List[Dict[str, Any]]) -> None:
+        """Serialize one batch of records.
+        
+        Args:
+            records: Transformed candle records
+        """
+        if not records:
+            return
+        
+        if self.pretty:
+            # Strip the enclosing "[\n" and "\n]" of the batch array
+            body = json.dumps(records, indent=2, ensure_ascii=False)[2:-2]
+            if self._prefix:
+                body = self._prefix + body.replace("\n", "\n" + self._prefix)
+            separator = "[\n" if self.record_count == 0 else ",\n"
+        else:
+            body = json.dumps(records, ensure_ascii=False, separators=self.COMPACT_SEPARATORS)[1:-1]
+            separator = "[" if self.record_count == 0 else ","
+        
+        self.f.write(separator + body)
+        self.record_count += len(records)
+    
+    def close(self) -> None:
+        """Close the data array (and enclosing object). Does not close the file."""
+        if self.record_count == 0:
+            self.f.write("[]")
+        elif self.pretty:
+            self.f.write("\n" + self._prefix + "]")
+        else:
+            self.f.write("]")
+        
+        if self.has_metadata:
+            self.f.write("\n}" if self.pretty else "}")
+
+
+@register_writer
+class NdjsonStreamWriter:
+    """Newline-delimited JSON writer: one compact record per line.
+    
+    Output is a homogeneous stream of candle records, readable by line-based
+    loaders (``pandas.read_json(lines=True)``, ``bq load``). Metadata is only
+    written, as a leading ``{"metadata": {...}}`` line, with the
+    ``metadata_line`` option.
+    """
+    
+    format_name = "ndjson"
+    extension = "ndjson"
+    content_type = "application/x-ndjson"
+    binary = False
+    appendable = True
+    
+    def __init__(
+        self,
+        f: TextIO,
+        metadata: Optional[Dict[str, Any]] = None,
+        metadata_line: bool = False,
+        **options: Any,
+    ):
+        """Initialize writer and emit the metadata line if requested.
+        
+        Args:
+            f: Text file object to write to
+            metadata: Optional metadata dictionary
+            metadata_line: If True, write the metadata as the first line
+            **options: Options for other formats (ignored)
+        """
+        self.f = f
+        self.record_count = 0
+        self._dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        if metadata and metadata_line:
+            f.write(self._dumps({"metadata": metadata}) + "\n")
+    
+    def write_batch(self, records: List[Dict[str, Any]]) -> None:
+        """Serialize one batch of records, one per line."""
+        if not records:
+            return
+        self.f.write("".join(self._dumps(record) + "\n" for record in records))
+        self.record_count += len(records)
+    
+    def close(self) -> None:
+        """Finish output (nothing to close for NDJSON)."""
+
+
+@register_writer
+class CsvStreamWriter:
+    """CSV writer with a header row of candle fields.
+    
+    Metadata, if any, is written as a leading ``# metadata: {...}`` comment
+    line (readable with ``pandas.read_csv(comment="#")`` or
+    ``polars.read_csv(comment_prefix="#")``).
+    """
+    
+    format_name = "csv"
+    extension = "csv"
+    content_type = "text/csv"
+    binary = False
+    appendable = True
+    
+    def __init__(
+        self,
+        f: TextIO,
+        metadata: Optional[Dict[str, Any]] = None,
+        header: bool = True,
+        **options: Any,
+    ):
+        """Initialize writer and emit the metadata comment and header row.
+        
+        Args:
+            f: Text file object to write to (opened with newline='')
+            metadata: Optional metadata dictionary
+            header: If False, omit the header row (when appending to existing CSV)
+            **options: Options for other formats (ignored)
+        """
+        self.f = f
+        self.record_count = 0
+        if metadata:
+            f.write("# metadata: " + json.dumps(metadata, ensure_ascii=False) + "\n")
+        self._writer = csv.writer(f, lineterminator="\n")
+        if header:
+            self._writer.writerow(OutputHandler.CANDLE_FIELDS)
+    
+    def write_batch(self, records: List[Dict[str, Any]]) -> None:
+        """Serialize one batch of records as CSV rows."""
+        if not records:
+            return
+        fields = OutputHandler.CANDLE_FIELDS
+        self._writer.writerows([record[field] for field in fields] for record in records)
+        self.record_count += len(records)
+    
+    def close(self) -> None:
+        """Finish output (nothing to close for CSV)."""
+
+
+class _ArrowStreamWriterBase:
+    """Shared logic for Arrow-based binary writers.
+    
+    Records are converted to Arrow batches with ``date`` stored as a UTC
+    timestamp and OHLCV as float64. The output metadata block is stored as
+    JSON under the ``metadata`` key of the Arrow schema metadata.
+    """
+    
+    binary = True
+    appendable = False
+    
+    def __init__(self, f: BinaryIO, metadata: Optional[Dict[str, Any]] = None, **options: Any):
+        """Initialize writer.
+        
+        Args:
+            f: Binary file object to write to
+            metadata: Optional metadata dictionary
+            **options: Format-specific options
+        
+        Raises:
+            ConfigurationError: If pyarrow is not installed
+        """
+        if pyarrow is None:
+            raise ConfigurationError(
+                f"pyarrow is required for {self.format_name} output",
+                context={"format": self.format_name},
+            )
+        
+        self.f = f
+        self.record_count = 0
+        self.schema = pyarrow.schema(
+            [pyarrow.field("date", pyarrow.timestamp("s", tz="UTC"))]
+            + [pyarrow.field(name, pyarrow.float64()) for name in OutputHandler.OHLCV_FIELDS],
+            metadata={"metadata": json.dumps(metadata, ensure_ascii=False)} if metadata else None,
+        )
+    
+    def _to_arrow(self, records: List[Dict[str, Any]]) -> "pyarrow.RecordBatch":
+        """Convert transformed records to an Arrow batch matching the schema."""
+        columns = [
+            pyarrow.array([record["date"] for record in records]).cast(self.schema.field("date").type)
+        ] + [
+            pyarrow.array([record[name] for record in records], type=pyarrow.float64())
+            for name in OutputHandler.OHLCV_FIELDS
+        ]
+        return pyarrow.RecordBatch.from_arrays(columns, schema=self.schema)
+
+
+@register_writer
+class ParquetStreamWriter(_ArrowStreamWriterBase):
+    """Parquet writer with configurable row-group size and compression."""
+    
+    format_name = "parquet"
+    extension = "parquet"
+    content_type = "application/vnd.apache.parquet"
+    
+    DEFAULT_ROW_GROUP_SIZE = 1_000_000
+    DEFAULT_COMPRESSION = "zstd"
+    
+    def __init__(
+        self,
+        f: BinaryIO,
+        metadata: Optional[Dict[str, Any]] = None,
+        row_group_size: Optional[int] = None,
+        compression: Optional[str] = None,
+        **options: Any,
+    ):
+        """Initialize writer.
+        
+        Args:
+            f: Binary file object to write to
+            metadata: Optional metadata dictionary
+            row_group_size: Rows per Parquet row group (default: 1,000,000)
+            compression: Parquet codec ('zstd', 'snappy', 'gzip', 'none')
+            **options: Options for other formats (ignored)
+        """
+        super().__init__(f, metadata)
+        self.row_group_size = row_group_size or self.DEFAULT_ROW_GROUP_SIZE
+        self._pending: List["pyarrow.RecordBatch"] = []
+        self._pending_rows = 0
+        self._writer = pyarrow.parquet.ParquetWriter(
+            f,
+            self.schema,
+            compression=compression or self.DEFAULT_COMPRESSION,
+        )
+    
+    def write_batch(self, records: List[Dict[str, Any]]) -> None:
+        """Buffer one batch; flush full row groups to the file."""
+        if not records:
+            return
+        self._pending.append(self._to_arrow(records))
+        self._pending_rows += len(records)
+        self.record_count += len(records)
+        if self._pending_rows >= self.row_group_size:
+            self._flush(final=False)
+    
+    def _flush(self, final: bool) -> None:
+        """Write buffered rows as complete row groups (all rows if final)."""
+        table = pyarrow.Table.from_batches(self._pending, schema=self.schema)
+        full_rows = len(table) if final else len(table) - len(table) % self.row_group_size
+        if full_rows:
+            self._writer.write_table(table.slice(0, full_rows), row_group_size=self.row_group_size)
+        remainder = table.slice(full_rows)
+        self._pending = remainder.to_batches() if len(remainder) else []
+        self._pending_rows = len(remainder)
+    
+    def close(self) -> None:
+        """Flush the last row group and write the Parquet footer."""
+        if self._pending_rows:
+            self._flush(final=True)
+        self._writer.close()
+
+
+@register_writer
+class ArrowIpcStreamWriter(_ArrowStreamWriterBase):
+    """Arrow IPC file writer (Feather v2 compatible)."""
+    
+    format_name = "arrow"
+    extension = "arrow"
+    content_type = "application/vnd.apache.arrow.file"
+    
+    def __init__(self, f: BinaryIO, metadata: Optional[Dict[str, Any]] = None, **options: Any):
+        """Initialize writer.
+        
+        Args:
+            f: Binary file object to write to
+            metadata: Optional metadata dictionary
+            **options: Options for other formats (ignored)
+        """
+        super().__init__(f, metadata)
+        self._writer = pyarrow.ipc.new_file(f, self.schema)
+    
+    def write_batch(self, records: List[Dict[str, Any]]) -> None:
+        """Write one batch as an Arrow record batch."""
+        if not records:
+            return
+        self._writer.write_batch(self._to_arrow(records))
+        self.record_count += len(records)
+    
+    def close(self) -> None:
+        """Write the IPC file footer."""
+        self._writer.close()
+
+
+class CountingWriter(io.RawIOBase):
+    """Pass-through binary writer that counts bytes written to it."""
+    
+    def __init__(self, target: Any):
+        """Initialize writer.
+        
+        Args:
+            target: Binary writable object receiving the bytes
+        """
+        super().__init__()
+        self.target = target
+        self.bytes_written = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data: Any) -> int:
+        size = self.target.write(data)
+        size = len(memoryview(data)) if size is None else size
+        self.bytes_written += size
+        return size
+
+
 class OutputHandler:
     """Handles output formatting and file writing (local or GCS)."""
     
     # Fields to include in output (in order)
     CANDLE_FIELDS = ["date", "open", "high", "low", "close", "volume"]
     
-    def __init__(self, logger: logging.Logger, gcs_handler: Optional['GCSHandler'] = None):
+    # Numeric source columns cast to float (in output order)
+    OHLCV_FIELDS = ["open", "high", "low", "close", "volume"]
+    
+    def __init__(
+        self,
+        logger: logging.Logger,
+        gcs_handler: Optional['GCSHandler'] = None,
+        output_format: str = DEFAULT_OUTPUT_FORMAT,
+        writer_options: Optional[Dict[str, Any]] = None,
+        upload_chunk_size: int = DEFAULT_UPLOAD_CHUNK_SIZE,
+        compression: Optional[str] = None,
+        compression_level: Optional[int] = None,
+    ):
         """Initialize output handler.
         
         Args:
             logger: Logger instance for structured logging
             gcs_handler: Optional GCS handler for cloud storage uploads
+            output_format: Registered output format name (default: 'json')
+            writer_options: Format-specific writer options
+                (e.g., row_group_size, compression for Parquet)
+            upload_chunk_size: Chunk size in bytes for streaming GCS uploads
+            compression: Optional streaming compression codec ('gzip' or 'zstd')
+                for text formats
+            compression_level: Codec level (default: gzip 6, zstd 3)
+        
+        Raises:
+            ValidationError: If output_format or compression is not supported
+            ConfigurationError: If the zstandard package is required but missing
         """
         self.logger = logger
         self.gcs_handler = gcs_handler
+        self.writer_cls = get_writer(output_format)
+        self.writer_options = writer_options or {}
+        self.upload_chunk_size = upload_chunk_size
+        
+        # Normalize "none" to no compression
+        self.compression = compression if compression not in (None, "none") else None
+        self.compression_level = compression_level
+        if self.compression:
+            if self.compression not in COMPRESSION_CODECS:
+                raise ValidationError(
+                    f"Unsupported compression: {compression}. "
+                    f"Supported: none, {', '.join(sorted(COMPRESSION_CODECS))}",
+                    context={"compression": compression},
+                )
+            validate_compression_level(self.compression, compression_level)
+            if self.writer_cls.binary:
+                raise ValidationError(
+                    f"Compression is not supported for {output_format} output; "
+                    f"it is compressed natively",
+                    context={"format": output_format, "compression": compression},
+                )
+            if self.compression == "zstd" and zstandard is None:
+                raise ConfigurationError(
+                    "zstandard package is required for zstd compression",
+                    context={"compression": compression},
+                )
     
     def transform_results(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Transform BigQuery results to output format.
@@ -78,6 +599,112 @@ class OutputHandler:
         
         return transformed
     
+    def transform_columns(self, columns: Any) -> List[Dict[str, Any]]:
+        """Transform a columnar batch to output format using vectorized operations.
+        
+        Produces the same records as transform_results() for timestamp-typed
+        input: dates are formatted in bulk from epoch microseconds and OHLCV
+        columns are cast to float64 as whole arrays. Missing columns and Arrow
+        nulls become 0.0.
+        
+        Args:
+            columns: Arrow RecordBatch/Table, or mapping of column name to
+                NumPy array (timestamps as datetime64 or int64 epoch microseconds)
+        
+        Returns:
+            Transformed rows with candle fields
+        
+        Raises:
+            ImportError: If numpy is not installed
+        
+        Example:
+            >>> batch = pyarrow.record_batch({"timestamp": [...], "open": [...], ...})
+            >>> handler.transform_columns(batch)[0]["date"]
+            "2024-01-01T00:00:00Z"
+        """
+        if numpy is None:
+            raise ImportError("numpy is required for columnar transforms")
+        
+        num_rows = len(columns) if not isinstance(columns, Mapping) else None
+        
+        def column(name: str) -> Any:
+            if isinstance(columns, Mapping):
+                return columns.get(name)
+            if name not in columns.schema.names:
+                return None
+            values = columns.column(name)
+            if isinstance(values, pyarrow.ChunkedArray):
+                values = values.combine_chunks()
+            return values
+        
+        # Timestamps -> epoch microseconds -> ISO seconds strings
+        micros = self._epoch_micros(column("timestamp"))
+        if num_rows is None:
+            num_rows = len(micros)
+        seconds = micros.astype("datetime64[us]").astype("datetime64[s]")
+        dates = numpy.char.add(numpy.datetime_as_string(seconds, unit="s"), "Z").tolist()
+        
+        # OHLCV -> float64 arrays
+        values = []
+        for name in self.OHLCV_FIELDS:
+            raw = column(name)
+            if raw is None:
+                values.append([0.0] * num_rows)
+                continue
+            if pyarrow is not None and isinstance(raw, pyarrow.Array):
+                raw = raw.fill_null(0).to_numpy(zero_copy_only=False)
+            values.append(numpy.asarray(raw, dtype=numpy.float64).tolist())
+        
+        return [
+            {"date": d, "open": o, "high": h, "low": l, "close": c, "volume": v}
+            for d, o, h, l, c, v in zip(dates, *values)
+        ]
+    
+    @staticmethod
+    def _epoch_micros(values: Any) -> Any:
+        """Convert a timestamp column to a NumPy int64 array of epoch microseconds.
+        
+        Args:
+            values: Arrow timestamp array, NumPy datetime64 array, or integer
+                array already holding epoch microseconds
+        
+        Returns:
+            NumPy int64 array
+        """
+        if values is None:
+            raise ValueError("Columnar batch has no 'timestamp' column")
+        
+        if pyarrow is not None and isinstance(values, pyarrow.Array):
+            if pyarrow.types.is_timestamp(values.type):
+                values = values.cast(pyarrow.timestamp("us", tz=values.type.tz))
+                return values.cast(pyarrow.int64()).to_numpy(zero_copy_only=False)
+            values = values.to_numpy(zero_copy_only=False)
+        
+        values = numpy.asarray(values)
+        if values.dtype.kind == "M":
+            return values.astype("datetime64[us]").astype(numpy.int64)
+        return values.astype(numpy.int64)
+    
+    def transform_batches(
+        self,
+        batches: Iterable[Any],
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Lazily transform a stream of BigQuery result batches.
+        
+        Args:
+            batches: Iterable of raw row batches (e.g., from BigQueryClient.iter_query),
+                either lists of row dictionaries or columnar batches
+                (see transform_columns)
+        
+        Yields:
+            Transformed batches with candle fields
+        """
+        for batch in batches:
+            if isinstance(batch, list):
+                yield self.transform_results(batch)
+            else:
+                # Columnar batch (e.g., Arrow from the Storage Read API engine)
+                yield self.transform_columns(batch)
     
     def save_to_file(
         self,
@@ -87,6 +714,7 @@ class OutputHandler:
         timeframe: str,
         metadata: Optional[Dict[str, Any]] = None,
         use_gcs: bool = True,
+        pretty: bool = True,
     ) -> Tuple[Path, Optional[str]]:
         """Save transformed data to JSON file (local or GCS) with optional metadata.
         
@@ -97,10 +725,11 @@ class OutputHandler:
             timeframe: Timeframe (for filename in local mode)
             metadata: Optional metadata dictionary to include in output
             use_gcs: If True and gcs_handler available, upload to GCS (default: True)
+            pretty: If True, indent JSON with 2 spaces; otherwise write compact JSON
         
         Returns:
             Tuple of (local_file_path, gcs_download_url or None)
-            - local_file_path: Path to saved file
+            - local_file_path: Path to saved file (object name in GCS mode)
             - gcs_download_url: Public URL if uploaded to GCS, None otherwise
         
         Raises:
@@ -123,57 +752,99 @@ class OutputHandler:
             >>> print(gcs_url)
             None
         """
+        file_path, gcs_url, _ = self.write_stream(
+            [data],
+            output_path,
+            symbol,
+            timeframe,
+            metadata=metadata,
+            use_gcs=use_gcs,
+            pretty=pretty,
+        )
+        return file_path, gcs_url
+    
+    def write_stream(
+        self,
+        batches: Iterable[List[Dict[str, Any]]],
+        output_path: Path,
+        symbol: str,
+        timeframe: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        use_gcs: bool = True,
+        pretty: bool = True,
+        name: Optional[str] = None,
+        append: bool = False,
+    ) -> Tuple[Path, Optional[str], int]:
+        """Write transformed record batches to file (local or GCS) as they arrive.
+        
+        Records are serialized batch by batch in the handler's output format,
+        so memory use does not grow with the number of records.
+        
+        Args:
+            batches: Iterable of transformed record batches
+            output_path: Output directory path (used for local saves)
+            symbol: Stock symbol (for logging)
+            timeframe: Timeframe (for logging)
+            metadata: Optional metadata dictionary to include in output
+            use_gcs: If True and gcs_handler available, upload to GCS (default: True)
+            pretty: If True, indent JSON with 2 spaces; otherwise write compact JSON
+                (JSON format only)
+            name: File or object name without extension, may include '/'
+                separated prefixes (default: the request ID)
+            append: If True, append to an existing file or object instead of
+                replacing it (appendable formats only; GCS objects are
+                appended with compose)
+        
+        Returns:
+            Tuple of (local_file_path, gcs_download_url or None, record_count);
+            in GCS mode the path is the object name
+        
+        Raises:
+            ValidationError: If append is requested for a non-appendable format
+            FileSystemError: If file cannot be written
+            GCSUploadError: If GCS upload fails (raised by GCSHandler)
+        """
+        if append and not self.writer_cls.appendable:
+            raise ValidationError(
+                f"Appending is not supported for {self.writer_cls.format_name} output",
+                context={"format": self.writer_cls.format_name},
+            )
+        
         try:
             # Get request ID for filename (used in both GCS and local modes)
             request_id = get_request_id() or "unknown"
-            filename = f"{request_id}.json"
-            
-            # Prepare output structure
-            if metadata:
-                # With metadata: wrap data in structure
-                output = {
-                    "metadata": metadata,
-                    "data": data
-                }
-            else:
-                # Without metadata: just the data array (backward compatible)
-                output = data
+            filename = f"{name or request_id}.{self.writer_cls.extension}"
+            options = {"pretty": pretty, **self.writer_options}
+            codec = COMPRESSION_CODECS.get(self.compression, {})
             
             # Decision point: GCS or local storage?
             if use_gcs and self.gcs_handler:
-                # Mode 1: Upload to GCS
-                # Save to temporary file first
-                temp_dir = Path(tempfile.gettempdir())
-                temp_path = temp_dir / filename
-                
-                # Write JSON to temp file
-                with open(temp_path, 'w', encoding='utf-8') as f:
-                    json.dump(output, f, indent=2, ensure_ascii=False)
+                # Mode 1: Stream directly into a GCS resumable upload
+                # (serialization and upload run concurrently, no temp file)
+                # gzip objects keep the format's name and content type and are
+                # transcoded by GCS; other codecs are stored as opaque files
+                transcoded = codec.get("content_encoding") is not None
+                object_name = filename if (transcoded or not codec) else f"{filename}.{codec['extension']}"
+                upload_name = object_name
+                if append:
+                    # Upload the new records as a part, then compose it onto the object
+                    options["header"] = not self.gcs_handler.object_exists(object_name)
+                    upload_name = f"{object_name}.{request_id}.part"
+                with self.gcs_handler.open_upload_stream(
+                    upload_name,
+                    content_type=codec.get("content_type", self.writer_cls.content_type),
+                    chunk_size=self.upload_chunk_size,
+                    content_encoding=codec.get("content_encoding"),
+                    cache_control=TRANSCODING_CACHE_CONTROL if transcoded else None,
+                ) as stream:
+                    record_count, raw_size = self._write_records(stream, batches, metadata, options)
+                gcs_url = stream.url
+                if append:
+                    gcs_url = self.gcs_handler.compose_append(object_name, upload_name)
+                filename = object_name
                 
                 self.logger.info(
-                    f"Temporary file created: {temp_path}",
-                    extra={
-                        "labels": {
-                            "symbol": symbol,
-                            "timeframe": timeframe,
-                        },
-                        "fields": {
-                            "temp_path": str(temp_path),
-                            "filename": filename,
-                            "record_count": len(data),
-                            "file_size_bytes": temp_path.stat().st_size,
-                        },
-                    }
-                )
-                
-                # Upload to GCS
-                gcs_url = self.gcs_handler.upload_file(temp_path, filename)
-                
-                # Clean up temporary file after successful upload
-                temp_path.unlink()
-                
-                self.logger.info(
-                    f"File uploaded to GCS and temp file cleaned up",
+                    f"Output streamed to GCS",
                     extra={
                         "labels": {
                             "symbol": symbol,
@@ -182,12 +853,16 @@ class OutputHandler:
                         "fields": {
                             "gcs_url": gcs_url,
                             "filename": filename,
-                            "record_count": len(data),
+                            "record_count": record_count,
+                            "file_size_bytes": stream.bytes_written,
+                            "raw_size_bytes": raw_size,
+                            "compression": self.compression or "none",
+                            "append": append,
                         },
                     }
                 )
                 
-                return temp_path, gcs_url
+                return Path(filename), gcs_url, record_count
             
             else:
                 # Mode 2: Save to local filesystem
@@ -199,11 +874,16 @@ class OutputHandler:
                     output_path = Path('.')
                 
                 # Use same filename for local storage
+                if codec:
+                    filename = f"{filename}.{codec['extension']}"
                 file_path = output_path / filename
+                file_path.parent.mkdir(parents=True, exist_ok=True)
                 
-                # Write JSON file
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(output, f, indent=2, ensure_ascii=False)
+                # Write output file (gzip members and zstd frames concatenate)
+                if append:
+                    options["header"] = not (file_path.exists() and file_path.stat().st_size > 0)
+                with open(file_path, 'ab' if append else 'wb') as f:
+                    record_count, raw_size = self._write_records(f, batches, metadata, options)
                 
                 self.logger.info(
                     f"Output file saved locally: {file_path}",
@@ -215,15 +895,18 @@ class OutputHandler:
                         "fields": {
                             "file_path": str(file_path),
                             "filename": filename,
-                            "record_count": len(data),
+                            "record_count": record_count,
                             "file_size_bytes": file_path.stat().st_size,
+                            "raw_size_bytes": raw_size,
+                            "compression": self.compression or "none",
                             "has_metadata": metadata is not None,
+                            "append": append,
                         },
                     }
                 )
                 
-                return file_path, None
-            
+                return file_path, None, record_count
+        
         except PermissionError as exc:
             raise FileSystemError(
                 f"Permission denied writing to {output_path}: {exc}",
@@ -242,4 +925,149 @@ class OutputHandler:
                     "timeframe": timeframe,
                 }
             )
-
+    
+    def write_symbol_streams(
+        self,
+        batches: Iterable[List[Dict[str, Any]]],
+        output_path: Path,
+        timeframe: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        use_gcs: bool = True,
+        pretty: bool = True,
+    ) -> Dict[str, Tuple[Path, Optional[str], int]]:
+        """Split a multi-symbol result stream into one output per symbol.
+        
+        Raw rows must carry a ``symbol`` column and arrive grouped by symbol
+        (as ordered by QueryBuilder.build_symbols_range_query), so a single
+        pass writes each symbol's file in turn with one writer open at a time.
+        Files are named ``{request_id}/{symbol}.{extension}``.
+        
+        Args:
+            batches: Iterable of raw row batches ordered by symbol
+            output_path: Output directory path (used for local saves)
+            timeframe: Timeframe (for logging)
+            metadata: Optional metadata shared by all files; each file's
+                metadata also records its symbol
+            use_gcs: If True and gcs_handler available, upload to GCS (default: True)
+            pretty: If True, indent JSON with 2 spaces; otherwise write compact JSON
+        
+        Returns:
+            Mapping of symbol to (file_path, gcs_download_url or None,
+            record_count) for every symbol that returned rows
+        
+        Raises:
+            FileSystemError: If a file cannot be written
+            GCSUploadError: If a GCS upload fails (raised by GCSHandler)
+        """
+        request_id = get_request_id() or "unknown"
+        
+        def symbol_runs() -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+            for batch in batches:
+                for symbol, rows in itertools.groupby(batch, key=itemgetter("symbol")):
+                    yield symbol, list(rows)
+        
+        results: Dict[str, Tuple[Path, Optional[str], int]] = {}
+        for symbol, runs in itertools.groupby(symbol_runs(), key=itemgetter(0)):
+            if symbol in results:
+                raise ValueError(f"Result rows are not grouped by symbol: {symbol} seen twice")
+            results[symbol] = self.write_stream(
+                self.transform_batches(rows for _, rows in runs),
+                output_path,
+                symbol,
+                timeframe,
+                metadata={**metadata, "symbol": symbol} if metadata else None,
+                use_gcs=use_gcs,
+                pretty=pretty,
+                name=f"{request_id}/{symbol}",
+            )
+        return results
+    
+    def write_to(
+        self,
+        f: BinaryIO,
+        batches: Iterable[List[Dict[str, Any]]],
+        metadata: Optional[Dict[str, Any]] = None,
+        pretty: bool = True,
+    ) -> int:
+        """Stream transformed record batches into an open binary file object.
+        
+        Used for outputs that are neither local files nor GCS objects, such
+        as HTTP response bodies. The file object is not closed.
+        
+        Args:
+            f: Binary file object to write to
+            batches: Iterable of transformed record batches
+            metadata: Optional metadata dictionary to include in output
+            pretty: If True, indent JSON with 2 spaces (JSON format only)
+        
+        Returns:
+            Number of records written
+        """
+        record_count, _ = self._write_records(
+            f, batches, metadata, {"pretty": pretty, **self.writer_options},
+        )
+        return record_count
+    
+    def _write_records(
+        self,
+        f: BinaryIO,
+        batches: Iterable[List[Dict[str, Any]]],
+        metadata: Optional[Dict[str, Any]],
+        options: Dict[str, Any],
+    ) -> Tuple[int, int]:
+        """Stream record batches through the configured writer and compressor.
+        
+        Args:
+            f: Binary file object to write to
+            batches: Iterable of record batches
+            metadata: Optional metadata dictionary
+            options: Writer options
+        
+        Returns:
+            Tuple of (record_count, raw_size_bytes) where raw size is the
+            serialized size before compression
+        """
+        compressor = self._open_compressor(f)
+        counter = CountingWriter(compressor if compressor is not None else f)
+        
+        if self.writer_cls.binary:
+            target = counter
+        else:
+            target = io.TextIOWrapper(counter, encoding="utf-8", newline="")
+        
+        writer = self.writer_cls(target, metadata=metadata, **options)
+        for batch in batches:
+            writer.write_batch(batch)
+        writer.close()
+        
+        if target is not counter:
+            # Flush text layer without closing the underlying file
+            target.flush()
+            target.detach()
+        
+        if compressor is not None:
+            # Writes the codec trailer; the underlying file stays open
+            compressor.close()
+        
+        return writer.record_count, counter.bytes_written
+    
+    def _open_compressor(self, f: BinaryIO) -> Optional[Any]:
+        """Open a streaming compressor writing into f, or None if uncompressed.
+        
+        Args:
+            f: Binary file object receiving compressed bytes
+        
+        Returns:
+            Writable compressor whose close() leaves f open
+        """
+        if not self.compression:
+            return None
+        
+        level = self.compression_level
+        if level is None:
+            level = COMPRESSION_CODECS[self.compression]["default_level"]
+        
+        if self.compression == "gzip":
+            # mtime=0 keeps output deterministic for identical data
+            return gzip.GzipFile(fileobj=f, mode="wb", compresslevel=level, mtime=0)
+        return zstandard.ZstdCompressor(level=level).stream_writer(f, closefd=False)
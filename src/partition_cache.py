@@ -0,0 +1,241 @@
+"""
+Local partition-level result cache.
+
+Candles are stored per (symbol, timeframe, exchange, UTC day) as Parquet
+files under CACHE_DIR, mirroring the table's daily partitions. A manifest
+tracks which days are present (including days without candles), the size
+and last access of each file, and the table modification time the cached
+days are consistent with. Least recently used days are evicted once the
+cache grows past its size limit. Instances sharing a cache directory merge
+their changes into the manifest on flush, so concurrent requests neither
+drop each other's days nor leave unreferenced files behind.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .config import DEFAULT_RESULT_CACHE_MAX_MB
+from .exceptions import ConfigurationError
+from .json_cache import JsonCacheFile, atomic_write_path
+
+# Optional dependency for the columnar cache files
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - depends on environment
+    pyarrow = None
+
+
+# Bump when the on-disk layout changes; older caches are rebuilt
+MANIFEST_VERSION = 1
+
+
+class PartitionCache:
+    """On-disk cache of query results keyed by symbol and day partition."""
+    
+    def __init__(
+        self,
+        root: Path,
+        logger: logging.Logger,
+        max_bytes: int = DEFAULT_RESULT_CACHE_MAX_MB * 1024 * 1024,
+    ):
+        """Initialize partition cache.
+        
+        Args:
+            root: Cache directory (created on first write)
+            logger: Logger instance
+            max_bytes: Total size of cached files before LRU eviction
+        
+        Raises:
+            ConfigurationError: If pyarrow is not installed
+        """
+        if pyarrow is None:
+            raise ConfigurationError(
+                "pyarrow is required for the result cache",
+                context={"cache_dir": str(root)},
+            )
+        
+        self.root = Path(root)
+        self.logger = logger
+        self.max_bytes = max_bytes
+        self._manifest = JsonCacheFile(self.root / "manifest.json", MANIFEST_VERSION, logger)
+        self._lock = threading.Lock()
+        
+        data = self._manifest.load()
+        self.snapshot: Optional[datetime] = (
+            datetime.fromisoformat(data["snapshot"]) if data.get("snapshot") else None
+        )
+        # key -> {'YYYY-MM-DD': [size_bytes, last_access]}; size 0 marks a day without candles
+        self._entries: Dict[str, Dict[str, List[float]]] = data.get("entries", {})
+        # (key, day) removed since the manifest was last merged
+        self._removed: Set[Tuple[str, str]] = set()
+    
+    @staticmethod
+    def key(symbol: str, timeframe: str, exchange: Optional[str] = None) -> str:
+        """Build the cache key for a symbol/timeframe/exchange combination."""
+        return f"{symbol}|{timeframe}|{exchange or '*'}"
+    
+    @property
+    def total_bytes(self) -> int:
+        """Total size of cached files."""
+        return int(sum(size for days in self._entries.values() for size, _ in days.values()))
+    
+    def missing_days(self, key: str, days: Iterable[date]) -> List[date]:
+        """Return the days not present in the cache for a key.
+        
+        Args:
+            key: Cache key
+            days: Days to check
+        
+        Returns:
+            Missing days in input order
+        """
+        cached = self._entries.get(key, {})
+        return [day for day in days if day.isoformat() not in cached]
+    
+    def read(self, key: str, day: date) -> Optional[List[Dict[str, Any]]]:
+        """Read the cached rows of one day.
+        
+        Args:
+            key: Cache key
+            day: Cached day
+        
+        Returns:
+            Rows in ascending timestamp order (empty for days without
+            candles), or None if the day was evicted in the meantime
+        """
+        with self._lock:
+            entry = self._entries.get(key, {}).get(day.isoformat())
+            if entry is None:
+                return None
+            entry[1] = time.time()
+            if not entry[0]:
+                return []
+        try:
+            return pyarrow.parquet.read_table(self._path(key, day)).to_pylist()
+        except FileNotFoundError:
+            # Evicted by another instance sharing the cache directory
+            return None
+    
+    def write(self, key: str, day: date, rows: List[Dict[str, Any]]) -> None:
+        """Store the complete rows of one day.
+        
+        Args:
+            key: Cache key
+            day: Day the rows belong to
+            rows: All rows of the day (may be empty)
+        """
+        size = 0
+        if rows:
+            path = self._path(key, day)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with atomic_write_path(path) as f:
+                try:
+                    pyarrow.parquet.write_table(pyarrow.Table.from_pylist(rows), f)
+                except BaseException:
+                    os.unlink(f.name)
+                    raise
+                size = f.tell()
+            os.replace(f.name, path)
+        
+        with self._lock:
+            self._entries.setdefault(key, {})[day.isoformat()] = [size, time.time()]
+            self._removed.discard((key, day.isoformat()))
+    
+    def invalidate(self, days: Optional[Iterable[date]] = None) -> int:
+        """Drop cached days for all keys.
+        
+        Args:
+            days: Days to drop, or None to drop everything
+        
+        Returns:
+            Number of dropped entries
+        """
+        names = None if days is None else {day.isoformat() for day in days}
+        dropped = 0
+        with self._lock:
+            for key, cached in self._entries.items():
+                for name in [name for name in cached if names is None or name in names]:
+                    self._remove(key, name)
+                    dropped += 1
+        return dropped
+    
+    def flush(self) -> None:
+        """Merge the manifest, evict least recently used days past the size limit and save it."""
+        with self._lock:
+            self._manifest.update(self._merge_manifest)
+    
+    def _merge_manifest(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Merge the stored manifest into this instance, then evict (caller holds the lock).
+        
+        Days written by other instances are adopted and days removed here
+        stay removed; the later access time wins for days present in both.
+        
+        Args:
+            data: Manifest currently on disk
+        
+        Returns:
+            Manifest to save
+        """
+        for key, cached in data.get("entries", {}).items():
+            local = self._entries.setdefault(key, {})
+            for name, entry in cached.items():
+                if (key, name) in self._removed:
+                    continue
+                if name not in local or local[name][1] < entry[1]:
+                    local[name] = entry
+        if data.get("snapshot"):
+            stored = datetime.fromisoformat(data["snapshot"])
+            self.snapshot = max(stored, self.snapshot) if self.snapshot else stored
+        
+        total = self.total_bytes
+        if total > self.max_bytes:
+            by_access = sorted(
+                (entry[1], key, name)
+                for key, cached in self._entries.items()
+                for name, entry in cached.items()
+                if entry[0]
+            )
+            evicted = 0
+            for _, key, name in by_access:
+                if total <= self.max_bytes:
+                    break
+                total -= self._entries[key][name][0]
+                self._remove(key, name)
+                evicted += 1
+            self.logger.info(
+                "Result cache evicted least recently used partitions",
+                extra={
+                    "labels": {},
+                    "fields": {
+                        "evicted": evicted,
+                        "total_bytes": total,
+                        "max_bytes": self.max_bytes,
+                    },
+                }
+            )
+        
+        self._entries = {key: cached for key, cached in self._entries.items() if cached}
+        self._removed.clear()
+        return {
+            "snapshot": self.snapshot.isoformat() if self.snapshot else None,
+            "entries": self._entries,
+        }
+    
+    def _remove(self, key: str, name: str) -> None:
+        """Delete one cached day (caller holds the lock)."""
+        size, _ = self._entries[key].pop(name)
+        self._removed.add((key, name))
+        if size:
+            self._path(key, date.fromisoformat(name)).unlink(missing_ok=True)
+    
+    def _path(self, key: str, day: date) -> Path:
+        """Location of the Parquet file for one cached day."""
+        parts = [re.sub(r"[^A-Za-z0-9_-]", "_", part) for part in key.split("|")]
+        return self.root.joinpath(*parts, f"{day.isoformat()}.parquet")
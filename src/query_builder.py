@@ -3,20 +3,103 @@ Query builder for BigQuery SQL query construction.
 
 Implements hybrid string template approach with validator and helpers.
 Supports three query modes: ALL, RANGE, NEIGHBORHOOD.
+
+Queries are returned as SQL templates with named query parameters. Values
+never become part of the SQL text, so each mode has one stable query shape
+per table; templates are rendered and validated once and then cached.
 """
 
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+from google.cloud import bigquery
 
 from .query_helpers import (
+    _as_naive_utc,
     calculate_adaptive_window,
-    build_exchange_clause,
-    format_timestamp_for_bigquery,
     calculate_default_time_range,
+    clamp_to_coverage,
+    canonicalize_sql,
+    snap_time_range,
+    MonthDensity,
 )
 from .query_validator import QueryValidator, QueryValidationError
 
 
+# NEIGHBORHOOD query strategies:
+# - union: three UNION ALL branches (before, center, after), each a separate scan
+# - window: one scan of the combined window, rows picked with ROW_NUMBER()/QUALIFY
+NEIGHBORHOOD_STRATEGIES = ("union", "window")
+DEFAULT_NEIGHBORHOOD_STRATEGY = "union"
+
+# Row filters bound to query parameters of the same name
+FILTER_COLUMNS = ("symbol", "timeframe")
+
+
+class ParameterizedQuery(NamedTuple):
+    """SQL template with the query parameters it binds."""
+    
+    sql: str
+    parameters: List[Union[bigquery.ScalarQueryParameter, bigquery.ArrayQueryParameter]]
+
+
+def parameter_value(
+    parameter: Union[bigquery.ScalarQueryParameter, bigquery.ArrayQueryParameter],
+) -> Any:
+    """Return the bound value of a scalar or array query parameter.
+    
+    Arrays of structs are returned as lists of dicts keyed by field name.
+    """
+    if isinstance(parameter, bigquery.ArrayQueryParameter):
+        return [
+            dict(value.struct_values) if isinstance(value, bigquery.StructQueryParameter) else value
+            for value in parameter.values
+        ]
+    return parameter.value
+
+
+def _string_parameter(name: str, value: str) -> bigquery.ScalarQueryParameter:
+    """Build a STRING query parameter."""
+    return bigquery.ScalarQueryParameter(name, "STRING", value)
+
+
+def _int_parameter(name: str, value: int) -> bigquery.ScalarQueryParameter:
+    """Build an INT64 query parameter."""
+    return bigquery.ScalarQueryParameter(name, "INT64", int(value))
+
+
+def _timestamp_parameter(name: str, value: datetime) -> bigquery.ScalarQueryParameter:
+    """Build a TIMESTAMP query parameter (naive values are treated as UTC)."""
+    return bigquery.ScalarQueryParameter(
+        name, "TIMESTAMP", _as_naive_utc(value).replace(tzinfo=timezone.utc),
+    )
+
+
+def _filter_parameters(
+    symbol: str,
+    timeframe: str,
+    exchange: Optional[str] = None,
+) -> List[bigquery.ScalarQueryParameter]:
+    """Build the symbol, timeframe and optional exchange filter parameters."""
+    parameters = [
+        _string_parameter("symbol", symbol),
+        _string_parameter("timeframe", timeframe),
+    ]
+    if exchange:
+        parameters.append(_string_parameter("exchange", exchange))
+    return parameters
+
+
+def _filters(exchange: Optional[str]) -> Tuple[str, ...]:
+    """Filter columns a template must bind, including exchange if filtered."""
+    return FILTER_COLUMNS + ("exchange",) if exchange else FILTER_COLUMNS
+
+
+def _exchange_clause(exchange: Optional[str], indent: str = "    ") -> str:
+    """Build the optional exchange filter of a template."""
+    return f"{indent}AND exchange = @exchange" if exchange else ""
+
+
 class QueryBuilder:
     """Builds parameterized BigQuery SQL queries for stock quotes extraction."""
     
@@ -28,43 +111,153 @@ class QueryBuilder:
         """
         self.table_fqn = table_fqn
         self.validator = QueryValidator()
+        self._templates: Dict[Tuple[str, ...], str] = {}
     
-    def build_all_query(
+    def template(
         self,
-        symbol: str,
+        key: Tuple[str, ...],
+        filters: Sequence[str],
+        render: Callable[[], str],
+    ) -> str:
+        """Return a cached SQL template, rendering and validating it on first use.
+        
+        Args:
+            key: Template identity (mode and query shape options)
+            filters: Filter columns that must be bound to query parameters
+            render: Renders the template SQL
+        
+        Returns:
+            Canonical SQL template
+        
+        Raises:
+            QueryValidationError: If the rendered template fails validation
+        """
+        template = self._templates.get(key)
+        if template is None:
+            template = canonicalize_sql(render())
+            self.validator.validate_template(template, filters)
+            self._templates[key] = template
+        return template
+    
+    def build_symbols_range_query(
+        self,
+        symbols: Sequence[str],
         timeframe: str,
+        from_timestamp: datetime,
+        to_timestamp: datetime,
         exchange: Optional[str] = None,
-    ) -> str:
-        """Build query to fetch all historical data (15 years).
+    ) -> ParameterizedQuery:
+        """Build one query fetching a time range for many symbols.
+        
+        The symbols are bound as an array parameter, so the timestamp
+        partitions are scanned once for the whole universe. Rows are
+        ordered by symbol, then timestamp, so each symbol's rows arrive
+        contiguously and can be split into per-symbol outputs in one pass.
         
         Args:
-            symbol: Stock symbol (e.g., 'BTCUSDT')
+            symbols: Stock symbols (e.g., ['BTCUSDT', 'ETHUSDT'])
             timeframe: Timeframe identifier (e.g., '1d', '1h', '15')
+            from_timestamp: Start of time range (inclusive)
+            to_timestamp: End of time range (inclusive)
             exchange: Optional exchange identifier
         
         Returns:
-            SQL query string
+            ParameterizedQuery returning (symbol, timestamp, OHLCV) rows
         
         Raises:
             QueryValidationError: If generated query fails validation
-        
-        Example:
-            >>> builder = QueryBuilder('project.dataset.table')
-            >>> query = builder.build_all_query('BTCUSDT', '1d')
+            ValueError: If no symbols are given or from_timestamp > to_timestamp
         """
-        # Calculate 15-year time range
-        start_time, end_time = calculate_default_time_range(years=15)
+        if not symbols:
+            raise ValueError("At least one symbol is required")
+        if from_timestamp > to_timestamp:
+            raise ValueError(
+                f"Invalid time range: from_timestamp ({from_timestamp}) "
+                f"must be <= to_timestamp ({to_timestamp})"
+            )
+        
+        sql = self.template(
+            ("symbols_range", bool(exchange)),
+            _filters(exchange),
+            lambda: f"""
+SELECT
+    symbol,
+    timestamp,
+    open,
+    high,
+    low,
+    close,
+    volume
+FROM
+    `{self.table_fqn}`
+WHERE
+    symbol IN UNNEST(@symbols)
+    AND timeframe = @timeframe
+    AND timestamp >= @from_timestamp
+    AND timestamp <= @to_timestamp
+{_exchange_clause(exchange)}
+ORDER BY
+    symbol ASC,
+    timestamp ASC
+""",
+        )
+        
+        parameters = [
+            bigquery.ArrayQueryParameter("symbols", "STRING", list(symbols)),
+            _string_parameter("timeframe", timeframe),
+        ]
+        if exchange:
+            parameters.append(_string_parameter("exchange", exchange))
+        return ParameterizedQuery(sql, [
+            *parameters,
+            _timestamp_parameter("from_timestamp", from_timestamp),
+            _timestamp_parameter("to_timestamp", to_timestamp),
+        ])
+    
+    def build_windows_query(
+        self,
+        windows: Sequence[Tuple[str, datetime, datetime]],
+        timeframe: str,
+        exchange: Optional[str] = None,
+    ) -> ParameterizedQuery:
+        """Build one query fetching a separate time range for each of many windows.
+        
+        The windows are bound as an array of (window_index, window_symbol,
+        window_start, window_end) structs and joined to the table, so
+        partitions covering several windows are scanned once. The table
+        scan is bounded by the union of the windows. Rows are tagged with
+        their window_index and ordered by window, then timestamp, so each
+        window's rows arrive contiguously; a candle inside overlapping
+        windows is returned once per window.
         
-        # Build exchange clause
-        exchange_clause = build_exchange_clause(exchange)
+        Args:
+            windows: (symbol, from_timestamp, to_timestamp) per window,
+                bounds inclusive; window_index is the position in this list
+            timeframe: Timeframe identifier (e.g., '1d', '1h', '15')
+            exchange: Optional exchange identifier
         
-        # Format timestamps
-        start_ts = format_timestamp_for_bigquery(start_time)
-        end_ts = format_timestamp_for_bigquery(end_time)
+        Returns:
+            ParameterizedQuery returning (window_index, timestamp, OHLCV) rows
         
-        # Construct query
-        query = f"""
+        Raises:
+            QueryValidationError: If generated query fails validation
+            ValueError: If no windows are given or a window ends before it starts
+        """
+        if not windows:
+            raise ValueError("At least one window is required")
+        for symbol, from_timestamp, to_timestamp in windows:
+            if from_timestamp > to_timestamp:
+                raise ValueError(
+                    f"Invalid time range for {symbol}: from_timestamp ({from_timestamp}) "
+                    f"must be <= to_timestamp ({to_timestamp})"
+                )
+        
+        sql = self.template(
+            ("windows", bool(exchange)),
+            _filters(exchange),
+            lambda: f"""
 SELECT
+    w.window_index,
     timestamp,
     open,
     high,
@@ -73,20 +266,101 @@ SELECT
     volume
 FROM
     `{self.table_fqn}`
+JOIN
+    UNNEST(@windows) AS w
+    ON symbol = w.window_symbol
+    AND timestamp BETWEEN w.window_start AND w.window_end
 WHERE
-    symbol = '{symbol}'
-    AND timeframe = '{timeframe}'
-    AND timestamp >= TIMESTAMP '{start_ts}'
-    AND timestamp <= TIMESTAMP '{end_ts}'
-    {exchange_clause}
+    symbol IN UNNEST(@symbols)
+    AND timeframe = @timeframe
+    AND timestamp >= @from_timestamp
+    AND timestamp <= @to_timestamp
+{_exchange_clause(exchange)}
 ORDER BY
+    window_index ASC,
     timestamp ASC
-""".strip()
+""",
+        )
         
-        # Validate query before returning
-        self.validator.validate_query(query, symbol, timeframe, exchange)
+        parameters = [
+            bigquery.ArrayQueryParameter("windows", "STRUCT", [
+                bigquery.StructQueryParameter(
+                    None,
+                    _int_parameter("window_index", index),
+                    _string_parameter("window_symbol", symbol),
+                    _timestamp_parameter("window_start", from_timestamp),
+                    _timestamp_parameter("window_end", to_timestamp),
+                )
+                for index, (symbol, from_timestamp, to_timestamp) in enumerate(windows)
+            ]),
+            bigquery.ArrayQueryParameter(
+                "symbols", "STRING", sorted({symbol for symbol, _, _ in windows}),
+            ),
+            _string_parameter("timeframe", timeframe),
+        ]
+        if exchange:
+            parameters.append(_string_parameter("exchange", exchange))
+        return ParameterizedQuery(sql, [
+            *parameters,
+            _timestamp_parameter("from_timestamp", min(window[1] for window in windows)),
+            _timestamp_parameter("to_timestamp", max(window[2] for window in windows)),
+        ])
+    
+    def build_all_query(
+        self,
+        symbol: str,
+        timeframe: str,
+        exchange: Optional[str] = None,
+        first_candle: Optional[datetime] = None,
+        last_candle: Optional[datetime] = None,
+    ) -> ParameterizedQuery:
+        """Build query to fetch all historical data (15 years).
+        
+        Known candle bounds (e.g. from the coverage index) narrow the scanned
+        range to the symbol's actual history; the 15-year range is the limit.
+        
+        Args:
+            symbol: Stock symbol (e.g., 'BTCUSDT')
+            timeframe: Timeframe identifier (e.g., '1d', '1h', '15')
+            exchange: Optional exchange identifier
+            first_candle: Optional timestamp of the symbol's first candle
+            last_candle: Optional timestamp of the symbol's last candle
         
-        return query
+        Returns:
+            ParameterizedQuery with SQL template and parameters
+        
+        Raises:
+            QueryValidationError: If generated query fails validation
+        
+        Example:
+            >>> builder = QueryBuilder('project.dataset.table')
+            >>> query = builder.build_all_query('BTCUSDT', '1d')
+        """
+        # ALL is a RANGE query over the computed bounds
+        start_time, end_time = self.all_time_range(timeframe, first_candle, last_candle)
+        return self.build_range_query(symbol, timeframe, start_time, end_time, exchange)
+    
+    @staticmethod
+    def all_time_range(
+        timeframe: str,
+        first_candle: Optional[datetime] = None,
+        last_candle: Optional[datetime] = None,
+    ) -> Tuple[datetime, datetime]:
+        """Calculate the ALL-mode time range.
+        
+        The 15-year range is snapped so repeated runs produce identical
+        bounds, then narrowed to known candle bounds.
+        
+        Args:
+            timeframe: Timeframe identifier
+            first_candle: Optional timestamp of the symbol's first candle
+            last_candle: Optional timestamp of the symbol's last candle
+        
+        Returns:
+            Tuple of (start, end) in naive UTC
+        """
+        start_time, end_time = snap_time_range(*calculate_default_time_range(years=15), timeframe)
+        return clamp_to_coverage(start_time, end_time, first_candle, last_candle)
     
     def build_range_query(
         self,
@@ -95,7 +369,7 @@ ORDER BY
         from_timestamp: datetime,
         to_timestamp: datetime,
         exchange: Optional[str] = None,
-    ) -> str:
+    ) -> ParameterizedQuery:
         """Build query to fetch data within a specific time range.
         
         Args:
@@ -106,7 +380,7 @@ ORDER BY
             exchange: Optional exchange identifier
         
         Returns:
-            SQL query string
+            ParameterizedQuery with SQL template and parameters
         
         Raises:
             QueryValidationError: If generated query fails validation
@@ -126,15 +400,10 @@ ORDER BY
                 f"must be <= to_timestamp ({to_timestamp})"
             )
         
-        # Build exchange clause
-        exchange_clause = build_exchange_clause(exchange)
-        
-        # Format timestamps
-        from_ts = format_timestamp_for_bigquery(from_timestamp)
-        to_ts = format_timestamp_for_bigquery(to_timestamp)
-        
-        # Construct query
-        query = f"""
+        sql = self.template(
+            ("range", bool(exchange)),
+            _filters(exchange),
+            lambda: f"""
 SELECT
     timestamp,
     open,
@@ -145,19 +414,21 @@ SELECT
 FROM
     `{self.table_fqn}`
 WHERE
-    symbol = '{symbol}'
-    AND timeframe = '{timeframe}'
-    AND timestamp >= TIMESTAMP '{from_ts}'
-    AND timestamp <= TIMESTAMP '{to_ts}'
-    {exchange_clause}
+    symbol = @symbol
+    AND timeframe = @timeframe
+    AND timestamp >= @from_timestamp
+    AND timestamp <= @to_timestamp
+{_exchange_clause(exchange)}
 ORDER BY
     timestamp ASC
-""".strip()
-        
-        # Validate query before returning
-        self.validator.validate_query(query, symbol, timeframe, exchange)
+""",
+        )
         
-        return query
+        return ParameterizedQuery(sql, [
+            *_filter_parameters(symbol, timeframe, exchange),
+            _timestamp_parameter("from_timestamp", from_timestamp),
+            _timestamp_parameter("to_timestamp", to_timestamp),
+        ])
     
     def build_neighborhood_query(
         self,
@@ -167,10 +438,16 @@ ORDER BY
         n_before: int,
         n_after: int,
         exchange: Optional[str] = None,
-    ) -> str:
+        strategy: str = DEFAULT_NEIGHBORHOOD_STRATEGY,
+        month_density: Optional[Mapping[str, MonthDensity]] = None,
+    ) -> ParameterizedQuery:
         """Build query to fetch N records before and after a center timestamp.
         
-        Uses UNION ALL strategy to fetch exact record counts with adaptive time windows.
+        Fetches exact record counts with adaptive time windows. The "union"
+        strategy runs three UNION ALL branches, scanning the partitions around
+        the center up to three times. The "window" strategy scans the combined
+        window once and picks rows by distance from the center with
+        ROW_NUMBER()/QUALIFY; both return the same rows.
         
         Args:
             symbol: Stock symbol (e.g., 'BTCUSDT')
@@ -179,13 +456,16 @@ ORDER BY
             n_before: Number of records to fetch before center
             n_after: Number of records to fetch after center
             exchange: Optional exchange identifier
+            strategy: Query strategy, "union" or "window"
+            month_density: Optional monthly density from the density index,
+                used to size the windows from real data density
         
         Returns:
-            SQL query string
+            ParameterizedQuery with SQL template and parameters
         
         Raises:
             QueryValidationError: If generated query fails validation
-            ValueError: If n_before or n_after are negative
+            ValueError: If n_before or n_after are negative or strategy is unknown
         
         Example:
             >>> from datetime import datetime, timezone
@@ -199,21 +479,43 @@ ORDER BY
                 f"Record counts must be non-negative: n_before={n_before}, n_after={n_after}"
             )
         
+        if strategy not in NEIGHBORHOOD_STRATEGIES:
+            raise ValueError(
+                f"Unknown neighborhood strategy: {strategy}. "
+                f"Expected one of: {', '.join(NEIGHBORHOOD_STRATEGIES)}"
+            )
+        
         # Calculate adaptive windows
-        window_before_days = calculate_adaptive_window(timeframe, n_before)
-        window_after_days = calculate_adaptive_window(timeframe, n_after)
+        window_before_days, window_after_days = self.neighborhood_windows(
+            timeframe, center_timestamp, n_before, n_after, month_density,
+        )
         
-        # Build exchange clause
-        exchange_clause = build_exchange_clause(exchange)
+        parameters = [
+            *_filter_parameters(symbol, timeframe, exchange),
+            _timestamp_parameter("center_timestamp", center_timestamp),
+            _int_parameter("n_before", n_before),
+            _int_parameter("n_after", n_after),
+            _int_parameter("window_before_days", window_before_days),
+            _int_parameter("window_after_days", window_after_days),
+        ]
         
-        # Format center timestamp
-        center_ts = format_timestamp_for_bigquery(center_timestamp)
+        if strategy == "window":
+            sql = self.template(
+                ("neighborhood", strategy, bool(exchange)),
+                _filters(exchange),
+                lambda: self._render_neighborhood_window_template(exchange),
+            )
+            return ParameterizedQuery(sql, parameters)
         
         # Construct query with UNION ALL strategy
         # This ensures we get exactly N records before, the center, and N records after
-        query = f"""
+        # Note: UNION ALL query has multiple timestamp predicates, validator will find them
+        sql = self.template(
+            ("neighborhood", strategy, bool(exchange)),
+            _filters(exchange),
+            lambda: f"""
 (
-  -- {n_before} records BEFORE center timestamp
+  -- Records BEFORE center timestamp
   SELECT
       timestamp,
       open,
@@ -224,14 +526,14 @@ ORDER BY
   FROM
       `{self.table_fqn}`
   WHERE
-      symbol = '{symbol}'
-      AND timeframe = '{timeframe}'
-      AND timestamp < TIMESTAMP '{center_ts}'
-      AND timestamp >= TIMESTAMP_SUB(TIMESTAMP '{center_ts}', INTERVAL {window_before_days} DAY)
-      {exchange_clause}
+      symbol = @symbol
+      AND timeframe = @timeframe
+      AND timestamp < @center_timestamp
+      AND timestamp >= TIMESTAMP_SUB(@center_timestamp, INTERVAL @window_before_days DAY)
+{_exchange_clause(exchange, "      ")}
   ORDER BY
       timestamp DESC
-  LIMIT {n_before}
+  LIMIT @n_before
 )
 UNION ALL
 (
@@ -246,15 +548,15 @@ UNION ALL
   FROM
       `{self.table_fqn}`
   WHERE
-      symbol = '{symbol}'
-      AND timeframe = '{timeframe}'
-      AND timestamp = TIMESTAMP '{center_ts}'
-      {exchange_clause}
+      symbol = @symbol
+      AND timeframe = @timeframe
+      AND timestamp = @center_timestamp
+{_exchange_clause(exchange, "      ")}
   LIMIT 1
 )
 UNION ALL
 (
-  -- {n_after} records AFTER center timestamp
+  -- Records AFTER center timestamp
   SELECT
       timestamp,
       open,
@@ -265,22 +567,310 @@ UNION ALL
   FROM
       `{self.table_fqn}`
   WHERE
-      symbol = '{symbol}'
-      AND timeframe = '{timeframe}'
-      AND timestamp > TIMESTAMP '{center_ts}'
-      AND timestamp <= TIMESTAMP_ADD(TIMESTAMP '{center_ts}', INTERVAL {window_after_days} DAY)
-      {exchange_clause}
+      symbol = @symbol
+      AND timeframe = @timeframe
+      AND timestamp > @center_timestamp
+      AND timestamp <= TIMESTAMP_ADD(@center_timestamp, INTERVAL @window_after_days DAY)
+{_exchange_clause(exchange, "      ")}
   ORDER BY
       timestamp ASC
-  LIMIT {n_after}
+  LIMIT @n_after
 )
 ORDER BY
     timestamp ASC
-""".strip()
+""",
+        )
         
-        # Validate query before returning
-        # Note: UNION ALL query has multiple timestamp predicates, validator will find them
-        self.validator.validate_query(query, symbol, timeframe, exchange)
+        return ParameterizedQuery(sql, parameters)
+    
+    @staticmethod
+    def neighborhood_windows(
+        timeframe: str,
+        center_timestamp: datetime,
+        n_before: int,
+        n_after: int,
+        month_density: Optional[Mapping[str, MonthDensity]] = None,
+    ) -> Tuple[int, int]:
+        """Calculate NEIGHBORHOOD window sizes in days for both sides.
         
-        return query
-
+        Args:
+            timeframe: Timeframe identifier
+            center_timestamp: Central timestamp point
+            n_before: Number of records to fetch before center
+            n_after: Number of records to fetch after center
+            month_density: Optional monthly density from the density index
+        
+        Returns:
+            Tuple of (window_before_days, window_after_days)
+        """
+        return (
+            calculate_adaptive_window(
+                timeframe, n_before, month_density, center_timestamp, "before",
+            ),
+            calculate_adaptive_window(
+                timeframe, n_after, month_density, center_timestamp, "after",
+            ),
+        )
+    
+    def build_coverage_query(self, since: datetime) -> ParameterizedQuery:
+        """Build aggregate query of first/last candle per symbol, timeframe and exchange.
+        
+        One grouped query covers every symbol in the table. It reads only the
+        key and timestamp columns and is the only query without symbol and
+        timeframe filters, so it is validated for the timestamp predicate alone.
+        
+        Args:
+            since: Aggregate candles from this timestamp onwards
+        
+        Returns:
+            SQL query string returning (symbol, timeframe, exchange,
+            first_candle, last_candle) rows
+        
+        Raises:
+            QueryValidationError: If generated query fails validation
+        """
+        sql = self.template(
+            ("coverage",),
+            (),
+            lambda: f"""
+SELECT
+    symbol,
+    timeframe,
+    exchange,
+    MIN(timestamp) AS first_candle,
+    MAX(timestamp) AS last_candle
+FROM
+    `{self.table_fqn}`
+WHERE
+    timestamp >= @since
+GROUP BY
+    symbol,
+    timeframe,
+    exchange
+""",
+        )
+        
+        return ParameterizedQuery(sql, [_timestamp_parameter("since", since)])
+    
+    def build_partitions_query(self, since: datetime) -> ParameterizedQuery:
+        """Build metadata query of daily partitions modified after a timestamp.
+        
+        Reads INFORMATION_SCHEMA.PARTITIONS of the table's dataset, which is
+        metadata rather than the partitioned table itself, so it is exempt
+        from the timestamp predicate validation.
+        
+        Args:
+            since: Return partitions modified after this timestamp
+        
+        Returns:
+            ParameterizedQuery returning (partition_id 'YYYYMMDD',
+            last_modified_time) rows
+        """
+        dataset_fqn, table_name = self.table_fqn.rsplit(".", 1)
+        sql = self._templates.get(("partitions",))
+        if sql is None:
+            sql = self._templates[("partitions",)] = canonicalize_sql(f"""
+SELECT
+    partition_id,
+    last_modified_time
+FROM
+    `{dataset_fqn}.INFORMATION_SCHEMA.PARTITIONS`
+WHERE
+    table_name = @table_name
+    AND last_modified_time > @since
+""")
+        
+        return ParameterizedQuery(sql, [
+            _string_parameter("table_name", table_name),
+            _timestamp_parameter("since", since),
+        ])
+    
+    def build_density_query(
+        self,
+        symbol: str,
+        timeframe: str,
+        since: datetime,
+        exchange: Optional[str] = None,
+    ) -> ParameterizedQuery:
+        """Build aggregate query of candle count and first/last candle per UTC month.
+        
+        Reads only the timestamp and filter columns, so it is much cheaper
+        than fetching the candles themselves.
+        
+        Args:
+            symbol: Stock symbol (e.g., 'BTCUSDT')
+            timeframe: Timeframe identifier (e.g., '1d', '1h', '15')
+            since: Count candles from this timestamp onwards
+            exchange: Optional exchange identifier
+        
+        Returns:
+            SQL query string returning (month 'YYYY-MM', candles, first_candle,
+            last_candle) rows
+        
+        Raises:
+            QueryValidationError: If generated query fails validation
+        """
+        sql = self.template(
+            ("density", bool(exchange)),
+            _filters(exchange),
+            lambda: f"""
+SELECT
+    FORMAT_TIMESTAMP('%Y-%m', timestamp) AS month,
+    COUNT(*) AS candles,
+    MIN(timestamp) AS first_candle,
+    MAX(timestamp) AS last_candle
+FROM
+    `{self.table_fqn}`
+WHERE
+    symbol = @symbol
+    AND timeframe = @timeframe
+    AND timestamp >= @since
+{_exchange_clause(exchange)}
+GROUP BY
+    month
+ORDER BY
+    month ASC
+""",
+        )
+        
+        return ParameterizedQuery(sql, [
+            *_filter_parameters(symbol, timeframe, exchange),
+            _timestamp_parameter("since", since),
+        ])
+    
+    def build_neighborhood_side_query(
+        self,
+        symbol: str,
+        timeframe: str,
+        center_timestamp: datetime,
+        side: str,
+        limit: int,
+        inner_days: int,
+        outer_days: int,
+        exchange: Optional[str] = None,
+    ) -> ParameterizedQuery:
+        """Build query for one side of a neighborhood within a band of days.
+        
+        Used to extend a short NEIGHBORHOOD result: only the band between
+        ``inner_days`` (exclusive, already scanned) and ``outer_days``
+        (inclusive) away from the center is scanned.
+        
+        Args:
+            symbol: Stock symbol (e.g., 'BTCUSDT')
+            timeframe: Timeframe identifier (e.g., '1d', '1h', '15')
+            center_timestamp: Central timestamp point
+            side: "before" or "after"
+            limit: Maximum number of records to fetch (nearest to center first)
+            inner_days: Days from center already covered by earlier queries
+            outer_days: Days from center the band extends to
+            exchange: Optional exchange identifier
+        
+        Returns:
+            ParameterizedQuery with SQL template and parameters
+        
+        Raises:
+            QueryValidationError: If generated query fails validation
+            ValueError: If side is unknown or the band is empty
+        
+        Example:
+            >>> builder = QueryBuilder('project.dataset.table')
+            >>> query = builder.build_neighborhood_side_query(
+            ...     'BTCUSDT', '15', center, 'before', 40, 2, 4)
+        """
+        if side not in ("before", "after"):
+            raise ValueError(f"Unknown neighborhood side: {side}. Expected 'before' or 'after'")
+        
+        if not 0 <= inner_days < outer_days:
+            raise ValueError(
+                f"Invalid band: inner_days ({inner_days}) must be < outer_days ({outer_days})"
+            )
+        
+        if side == "before":
+            band = (
+                "timestamp < TIMESTAMP_SUB(@center_timestamp, INTERVAL @inner_days DAY)\n"
+                "    AND timestamp >= TIMESTAMP_SUB(@center_timestamp, INTERVAL @outer_days DAY)"
+            )
+            order = "DESC"
+        else:
+            band = (
+                "timestamp > TIMESTAMP_ADD(@center_timestamp, INTERVAL @inner_days DAY)\n"
+                "    AND timestamp <= TIMESTAMP_ADD(@center_timestamp, INTERVAL @outer_days DAY)"
+            )
+            order = "ASC"
+        
+        sql = self.template(
+            ("neighborhood_side", side, bool(exchange)),
+            _filters(exchange),
+            lambda: f"""
+-- Records {side.upper()} center timestamp, between inner and outer days out
+SELECT
+    timestamp,
+    open,
+    high,
+    low,
+    close,
+    volume
+FROM
+    `{self.table_fqn}`
+WHERE
+    symbol = @symbol
+    AND timeframe = @timeframe
+    AND {band}
+{_exchange_clause(exchange)}
+ORDER BY
+    timestamp {order}
+LIMIT @limit
+""",
+        )
+        
+        return ParameterizedQuery(sql, [
+            *_filter_parameters(symbol, timeframe, exchange),
+            _timestamp_parameter("center_timestamp", center_timestamp),
+            _int_parameter("limit", limit),
+            _int_parameter("inner_days", inner_days),
+            _int_parameter("outer_days", outer_days),
+        ])
+    
+    def _render_neighborhood_window_template(self, exchange: Optional[str]) -> str:
+        """Render single-scan NEIGHBORHOOD template using ROW_NUMBER()/QUALIFY.
+        
+        Rows are partitioned by side of the center (SIGN of the offset) and
+        numbered by distance from it, so each side keeps its nearest rows.
+        
+        Args:
+            exchange: Optional exchange identifier (adds the exchange filter)
+        
+        Returns:
+            SQL template
+        """
+        offset = "TIMESTAMP_DIFF(timestamp, @center_timestamp, MICROSECOND)"
+        
+        return f"""
+SELECT
+    timestamp,
+    open,
+    high,
+    low,
+    close,
+    volume
+FROM
+    `{self.table_fqn}`
+WHERE
+    symbol = @symbol
+    AND timeframe = @timeframe
+    AND timestamp >= TIMESTAMP_SUB(@center_timestamp, INTERVAL @window_before_days DAY)
+    AND timestamp <= TIMESTAMP_ADD(@center_timestamp, INTERVAL @window_after_days DAY)
+{_exchange_clause(exchange)}
+QUALIFY
+    -- Records BEFORE, center record, records AFTER
+    ROW_NUMBER() OVER (
+        PARTITION BY SIGN({offset})
+        ORDER BY ABS({offset})
+    ) <= CASE SIGN({offset})
+        WHEN -1 THEN @n_before
+        WHEN 0 THEN 1
+        ELSE @n_after
+    END
+ORDER BY
+    timestamp ASC
+"""
@@ -5,8 +5,9 @@ Provides reusable functions for adaptive window calculation,
 exchange clause generation, and other query utilities.
 """
 
-from datetime import datetime, timedelta
-from typing import Optional
+import math
+from datetime import datetime, timedelta, timezone
+from typing import List, Mapping, NamedTuple, Optional, Tuple
 
 
 # Timeframe to records-per-day mapping
@@ -22,17 +23,53 @@ RECORDS_PER_DAY = {
     '1': 1440,       # 1440 candles per day (1-minute)
 }
 
+# Grid candle timestamps fall on, in seconds (day-aligned for 1d and above)
+CANDLE_GRID_SECONDS = {
+    '1M': 86400,
+    '1w': 86400,
+    '1d': 86400,
+    '4h': 14400,
+    '1h': 3600,
+    '15': 900,
+    '5': 300,
+    '1': 60,
+}
+
+# Upper bound for any query window (15 years)
+MAX_WINDOW_DAYS = 5475
+
+
+class MonthDensity(NamedTuple):
+    """Candle count and first/last candle timestamps of one UTC month."""
+    
+    candles: int
+    first: datetime
+    last: datetime
+
 
-def calculate_adaptive_window(timeframe: str, records_needed: int) -> int:
+def calculate_adaptive_window(
+    timeframe: str,
+    records_needed: int,
+    month_density: Optional[Mapping[str, MonthDensity]] = None,
+    center: Optional[datetime] = None,
+    direction: str = "before",
+) -> int:
     """Calculate adaptive time window in days based on timeframe and record count.
     
     For NEIGHBORHOOD mode queries, this determines how many days before/after
     the center timestamp to query to ensure we fetch the required number of candles
     while satisfying BigQuery partition predicates.
     
+    When the symbol's monthly density (from the density index) and the
+    center timestamp are given, the window is derived from the real data
+    density instead of RECORDS_PER_DAY.
+    
     Args:
         timeframe: Timeframe identifier ('1M', '1w', '1d', '4h', '1h', '15', '5', '1')
         records_needed: Number of records to fetch (e.g., n_before or n_after)
+        month_density: Optional MonthDensity keyed by 'YYYY-MM' (UTC months)
+        center: Center timestamp, required to use month_density
+        direction: "before" or "after" the center, used with month_density
     
     Returns:
         Number of days for the query window (minimum 1, maximum 5475 = 15 years)
@@ -44,13 +81,99 @@ def calculate_adaptive_window(timeframe: str, records_needed: int) -> int:
         >>> calculate_adaptive_window('1M', 3)
         108  # For 3 monthly candles, query ~108 days (with buffer)
     """
+    if month_density and center is not None:
+        return calculate_density_window(month_density, center, records_needed, direction)
+    
     records_per_day = RECORDS_PER_DAY.get(timeframe, 1)
     
     # Calculate days needed with 20% buffer
     days_needed = int((records_needed / records_per_day) * 1.2)
     
     # Clamp to reasonable range: 1 day to 15 years (5475 days)
-    return max(1, min(5475, days_needed))
+    return max(1, min(MAX_WINDOW_DAYS, days_needed))
+
+
+def calculate_density_window(
+    month_density: Mapping[str, MonthDensity],
+    center: datetime,
+    records_needed: int,
+    direction: str = "before",
+) -> int:
+    """Calculate the smallest window covering a record count from monthly density.
+    
+    Walks month by month away from the center, assuming candles are spread
+    evenly between each month's first and last candle, until
+    ``records_needed`` candles are covered. If the data ends first, the
+    window stops at the end of the data, since scanning further cannot
+    return more rows.
+    
+    Args:
+        month_density: MonthDensity keyed by 'YYYY-MM' (UTC months)
+        center: Center timestamp (naive values are treated as UTC)
+        records_needed: Number of records to cover
+        direction: "before" or "after" the center
+    
+    Returns:
+        Number of days for the query window (minimum 1, maximum 5475 = 15 years)
+    
+    Example:
+        >>> density = {
+        ...     '2024-01': MonthDensity(2976, datetime(2024, 1, 1), datetime(2024, 1, 31, 23, 45)),
+        ...     '2024-03': MonthDensity(1632, datetime(2024, 3, 15), datetime(2024, 3, 31, 23, 45)),
+        ... }
+        >>> calculate_density_window(density, datetime(2024, 3, 20), 1000, 'before')
+        55  # 5 days of March, the empty gap, ~5.4 days of January, +1 slack
+    """
+    if direction not in ("before", "after"):
+        raise ValueError(f"Unknown direction: {direction}. Expected 'before' or 'after'")
+    
+    if records_needed <= 0 or not month_density:
+        return 1
+    
+    center = _as_naive_utc(center)
+    remaining = float(records_needed)
+    edge = None
+    
+    for month in sorted(month_density, reverse=(direction == "before")):
+        density = month_density[month]
+        first, last = _as_naive_utc(density.first), _as_naive_utc(density.last)
+        span = last - first
+        
+        if direction == "before":
+            bound = min(last, center)
+            if bound < first or density.candles <= 0:
+                continue
+            available = density.candles * (bound - first) / span if span else density.candles
+            if available >= remaining:
+                edge = bound - span * (remaining / density.candles) if span else first
+                break
+            edge = first
+        else:
+            bound = max(first, center)
+            if bound > last or density.candles <= 0:
+                continue
+            available = density.candles * (last - bound) / span if span else density.candles
+            if available >= remaining:
+                edge = bound + span * (remaining / density.candles) if span else last
+                break
+            edge = last
+        remaining -= available
+    
+    # No data on this side of the center
+    if edge is None:
+        return 1
+    
+    days = abs((center - edge).total_seconds()) / 86400
+    
+    # One day of slack for candles spread unevenly within a month
+    return max(1, min(MAX_WINDOW_DAYS, math.ceil(days) + 1))
+
+
+def _as_naive_utc(value: datetime) -> datetime:
+    """Convert a datetime to naive UTC (naive values are assumed UTC)."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
 
 def build_exchange_clause(exchange: Optional[str]) -> str:
@@ -82,16 +205,19 @@ def format_timestamp_for_bigquery(dt: datetime) -> str:
     Args:
         dt: Datetime object (should be timezone-aware)
     
+    Values are converted to UTC and rendered without an offset, so equal
+    instants always produce the same literal.
+    
     Returns:
-        BigQuery-compatible timestamp string
+        BigQuery-compatible timestamp string (UTC)
     
     Example:
         >>> from datetime import datetime, timezone
         >>> dt = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
         >>> format_timestamp_for_bigquery(dt)
-        '2024-01-01 12:00:00+00:00'
+        '2024-01-01 12:00:00'
     """
-    return dt.isoformat(sep=' ')
+    return _as_naive_utc(dt).isoformat(sep=' ')
 
 
 def calculate_default_time_range(years: int = 15) -> tuple[datetime, datetime]:
@@ -112,6 +238,152 @@ def calculate_default_time_range(years: int = 15) -> tuple[datetime, datetime]:
     return start_time, end_time
 
 
+def closed_candle_cutoff(timeframe: str, now: Optional[datetime] = None) -> datetime:
+    """Return the latest open time of a candle that has certainly closed.
+    
+    A candle opened at ``t`` is final once its duration has passed, so only
+    candles opened at or before the cutoff are safe to export incrementally.
+    Monthly candles are assumed to last 31 days.
+    
+    Args:
+        timeframe: Timeframe identifier
+        now: Reference time (default: current UTC time)
+    
+    Returns:
+        Cutoff timestamp in naive UTC
+    
+    Example:
+        >>> closed_candle_cutoff('1h', datetime(2024, 1, 1, 12, 30))
+        datetime.datetime(2024, 1, 1, 11, 30)
+    """
+    now = _as_naive_utc(now) if now is not None else datetime.utcnow()
+    days = 31 if timeframe == '1M' else 1 / RECORDS_PER_DAY[timeframe]
+    return now - timedelta(days=days)
+
+
+def snap_time_range(start: datetime, end: datetime, timeframe: str) -> Tuple[datetime, datetime]:
+    """Widen a generated time range to stable partition and candle boundaries.
+    
+    The start is floored to UTC midnight (a partition boundary) and the end
+    is raised to the next candle of the timeframe. Ranges derived from the
+    current time then stay identical until the next candle can exist, so
+    repeated runs produce the same SQL and can hit the query result cache.
+    The range only grows, so no candle is dropped.
+    
+    Args:
+        start: Range start
+        end: Range end
+        timeframe: Timeframe identifier selecting the candle grid
+    
+    Returns:
+        Tuple of (start, end) in naive UTC
+    
+    Example:
+        >>> snap_time_range(datetime(2010, 3, 5, 13, 7), datetime(2025, 3, 1, 13, 7, 42), '15')
+        (datetime.datetime(2010, 3, 5, 0, 0), datetime.datetime(2025, 3, 1, 13, 15))
+    """
+    grid = CANDLE_GRID_SECONDS.get(timeframe, 86400)
+    start = _as_naive_utc(start).replace(hour=0, minute=0, second=0, microsecond=0)
+    end = _as_naive_utc(end)
+    day_start = end.replace(hour=0, minute=0, second=0, microsecond=0)
+    elapsed = (end - day_start).total_seconds()
+    end = day_start + timedelta(seconds=math.ceil(elapsed / grid) * grid)
+    return start, end
+
+
+def canonicalize_sql(sql: str) -> str:
+    """Normalize whitespace of generated SQL.
+    
+    Strips trailing whitespace and drops blank lines (e.g. left by an empty
+    exchange clause), so logically identical queries are byte-identical.
+    
+    Args:
+        sql: Generated SQL text
+    
+    Returns:
+        Canonical SQL text
+    """
+    return "\n".join(line.rstrip() for line in sql.splitlines() if line.strip())
+
+
+def clamp_to_coverage(
+    start: datetime,
+    end: datetime,
+    first_candle: Optional[datetime] = None,
+    last_candle: Optional[datetime] = None,
+) -> Tuple[datetime, datetime]:
+    """Narrow a time range to a symbol's known first and last candle.
+    
+    Args:
+        start: Range start (naive UTC)
+        end: Range end (naive UTC)
+        first_candle: Optional first candle timestamp
+        last_candle: Optional last candle timestamp
+    
+    Returns:
+        Tuple of (start, end) in naive UTC, never wider than the input range
+    
+    Example:
+        >>> clamp_to_coverage(datetime(2010, 1, 1), datetime(2025, 1, 1),
+        ...                   first_candle=datetime(2024, 6, 1))
+        (datetime.datetime(2024, 6, 1, 0, 0), datetime.datetime(2025, 1, 1, 0, 0))
+    """
+    if first_candle is not None:
+        start = max(start, _as_naive_utc(first_candle))
+    if last_candle is not None:
+        end = min(end, _as_naive_utc(last_candle))
+    return start, end
+
+
+def plan_time_slices(
+    start: datetime,
+    end: datetime,
+    timeframe: str,
+    target_rows: int,
+) -> List[Tuple[datetime, datetime]]:
+    """Split an inclusive time range into day-aligned, non-overlapping slices.
+    
+    Slice boundaries fall on UTC midnight so every slice covers whole daily
+    partitions (except the first and last, which are clipped to the range).
+    The number of days per slice is derived from RECORDS_PER_DAY so that
+    each slice returns roughly ``target_rows`` candles.
+    
+    Args:
+        start: Start of time range (inclusive)
+        end: End of time range (inclusive)
+        timeframe: Timeframe identifier
+        target_rows: Approximate number of rows per slice
+    
+    Returns:
+        List of (slice_start, slice_end) tuples in ascending order; each
+        slice_end is one microsecond before the next slice_start
+    
+    Example:
+        >>> start = datetime(2024, 1, 1, 6, 0)
+        >>> end = datetime(2024, 1, 3, 12, 0)
+        >>> plan_time_slices(start, end, '1', 1440)
+        [(2024-01-01 06:00, 2024-01-01 23:59:59.999999),
+         (2024-01-02 00:00, 2024-01-02 23:59:59.999999),
+         (2024-01-03 00:00, 2024-01-03 12:00)]
+    """
+    if start > end:
+        raise ValueError(f"Invalid time range: start ({start}) must be <= end ({end})")
+    
+    records_per_day = RECORDS_PER_DAY.get(timeframe, 1)
+    days_per_slice = max(1, int(target_rows / records_per_day))
+    step = timedelta(days=days_per_slice)
+    
+    slices = []
+    slice_start = start
+    boundary = start.replace(hour=0, minute=0, second=0, microsecond=0) + step
+    while slice_start <= end:
+        slice_end = min(boundary - timedelta(microseconds=1), end)
+        slices.append((slice_start, slice_end))
+        slice_start = boundary
+        boundary += step
+    return slices
+
+
 def validate_symbol_format(symbol: str) -> bool:
     """Validate symbol format (alphanumeric, typically like BTCUSDT).
     
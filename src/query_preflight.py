@@ -0,0 +1,104 @@
+"""
+Pre-flight dry runs of built queries.
+
+QueryValidator only checks the SQL text for a timestamp predicate; it cannot
+tell whether partitions are actually pruned or how many bytes a query will
+scan. QueryPreflight dry-runs queries before they run (nothing is billed),
+reports the bytes BigQuery would process and compares them to a byte budget.
+Estimates are cached per canonical query (SQL template and bound
+parameters) for a short TTL, so a batch dry-runs each distinct query once.
+"""
+
+import logging
+import math
+from typing import Any, Dict, NamedTuple, Optional
+
+from .bigquery_client import Query, query_fingerprint
+from .config import PREFLIGHT_ESTIMATE_MAX_ENTRIES, PREFLIGHT_ESTIMATE_TTL_SECONDS
+from .logger import log_struct
+from .single_flight import SingleFlight
+
+
+class PreflightEstimate(NamedTuple):
+    """Dry-run estimate of a query checked against a byte budget."""
+    
+    bytes_processed: int
+    max_bytes: Optional[int]
+    slices: int
+    
+    @property
+    def within_budget(self) -> bool:
+        """True if the query fits the budget (or no budget is set)."""
+        return self.slices == 1
+
+
+class QueryPreflight:
+    """Dry-runs queries and caches their byte estimates."""
+    
+    def __init__(self, bq_client: Any, logger: logging.Logger):
+        """Initialize pre-flight checker.
+        
+        Args:
+            bq_client: BigQueryClient running the dry runs
+            logger: Logger instance
+        """
+        self.bq_client = bq_client
+        self.logger = logger
+        # Concurrent dry runs of one query are shared and results reused briefly
+        self._estimates = SingleFlight(
+            ttl=PREFLIGHT_ESTIMATE_TTL_SECONDS,
+            max_entries=PREFLIGHT_ESTIMATE_MAX_ENTRIES,
+        )
+    
+    def estimate(self, sql: Query, context: Optional[Dict[str, Any]] = None) -> int:
+        """Return the bytes a query would process, dry-running it once.
+        
+        Args:
+            sql: SQL query or ParameterizedQuery
+            context: Additional context for logging
+        
+        Returns:
+            Estimated total bytes processed
+        
+        Raises:
+            QueryExecutionError: If the query is invalid
+        """
+        key = query_fingerprint(sql)
+        bytes_processed, cached = self._estimates.do(
+            key, lambda: self.bq_client.dry_run(sql, context=context),
+        )
+        log_struct(
+            self.logger,
+            "INFO",
+            f"Query dry run: {bytes_processed} bytes would be processed",
+            labels=context or {},
+            fields={
+                "bytes_processed": bytes_processed,
+                "query_fingerprint": key[:16],
+                "cached": cached,
+            },
+        )
+        return bytes_processed
+    
+    def check(
+        self,
+        sql: Query,
+        max_bytes: Optional[int] = None,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> PreflightEstimate:
+        """Estimate a query and compare it to a byte budget.
+        
+        Args:
+            sql: SQL query or ParameterizedQuery
+            max_bytes: Bytes a single query may process (None for no budget)
+            context: Additional context for logging
+        
+        Returns:
+            PreflightEstimate with the number of slices needed for each to
+            stay within the budget (1 if the query fits)
+        """
+        bytes_processed = self.estimate(sql, context=context)
+        slices = 1
+        if max_bytes is not None and bytes_processed > max_bytes:
+            slices = math.ceil(bytes_processed / max_bytes)
+        return PreflightEstimate(bytes_processed, max_bytes, slices)
@@ -6,7 +6,7 @@ because the BigQuery table is partitioned by timestamp field.
 """
 
 import re
-from typing import Optional
+from typing import Optional, Sequence
 
 
 class QueryValidationError(Exception):
@@ -111,6 +111,33 @@ class QueryValidator:
                     f"Query validation failed: Missing exchange filter for '{exchange}'"
                 )
     
+    @staticmethod
+    def validate_template(sql: str, filters: Sequence[str] = ("symbol", "timeframe")) -> None:
+        """Validate a parameterized query template.
+        
+        Templates carry no values, so instead of the filter literals each
+        filter column must be bound to the query parameter of the same name
+        (e.g. ``symbol = @symbol``), or to the array parameter of its plural
+        (e.g. ``symbol IN UNNEST(@symbols)``).
+        
+        Args:
+            sql: SQL template to validate
+            filters: Filter columns that must be bound to query parameters
+        
+        Raises:
+            QueryValidationError: If the template lacks the timestamp predicate
+                or a parameterized filter
+        """
+        QueryValidator.validate_has_timestamp_predicate(sql)
+        
+        normalized_sql = ' '.join(sql.lower().split())
+        for column in filters:
+            bindings = (f"{column} = @{column}", f"{column} in unnest(@{column}s)")
+            if not any(binding in normalized_sql for binding in bindings):
+                raise QueryValidationError(
+                    f"Query validation failed: Missing {column} filter bound to @{column}"
+                )
+    
     @staticmethod
     def validate_query(
         sql: str,
@@ -0,0 +1,234 @@
+"""
+Coalescing of compatible RANGE requests into shared BigQuery jobs.
+
+Requests with the same timeframe and exchange whose time windows overlap or
+nearly touch are planned into one group. Each group runs as a single query
+over the union of its windows, binding the windows as an array of
+(window_index, window_symbol, window_start, window_end) structs, so the
+partitions they share are scanned once and one job replaces many. The
+streamed rows arrive ordered by window and are sliced back out to the
+original requests one window after another.
+"""
+
+import itertools
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .config import COALESCE_MAX_GAP_DAYS, COALESCE_MAX_WINDOWS, DEFAULT_PAGE_SIZE
+from .logger import log_struct
+from .query_helpers import _as_naive_utc
+
+
+class RangeRequest(NamedTuple):
+    """One RANGE request considered for coalescing."""
+    
+    key: Hashable
+    symbol: str
+    timeframe: str
+    exchange: Optional[str]
+    from_timestamp: datetime
+    to_timestamp: datetime
+
+
+class RequestGroup(NamedTuple):
+    """Requests served by one query, in window order."""
+    
+    timeframe: str
+    exchange: Optional[str]
+    requests: List[RangeRequest]
+    
+    @property
+    def from_timestamp(self) -> datetime:
+        """Start of the union of the group's windows."""
+        return min(request.from_timestamp for request in self.requests)
+    
+    @property
+    def to_timestamp(self) -> datetime:
+        """End of the union of the group's windows."""
+        return max(request.to_timestamp for request in self.requests)
+
+
+def _compatibility(request: RangeRequest) -> Tuple[str, str]:
+    """Key shared by requests that can be served by one query."""
+    return request.timeframe, request.exchange or ""
+
+
+def plan_groups(
+    requests: Sequence[RangeRequest],
+    max_gap: timedelta = timedelta(days=COALESCE_MAX_GAP_DAYS),
+    max_windows: int = COALESCE_MAX_WINDOWS,
+) -> List[RequestGroup]:
+    """Group compatible requests whose windows overlap or are close.
+    
+    Requests are compatible when they share timeframe and exchange. Within
+    each such set, requests are swept in order of window start; a request
+    joins the current group while it starts at most max_gap after the
+    group's end, so a group never scans long stretches no request asked for.
+    
+    Args:
+        requests: Requests to plan
+        max_gap: Largest gap between a window and the group it joins
+        max_windows: Maximum number of windows per group
+    
+    Returns:
+        Groups in order of first request; requests that could not be
+        coalesced form groups of one
+    """
+    groups: List[RequestGroup] = []
+    for (timeframe, _), members in itertools.groupby(
+        sorted(requests, key=_compatibility), key=_compatibility,
+    ):
+        group: List[RangeRequest] = []
+        for request in sorted(members, key=lambda request: _as_naive_utc(request.from_timestamp)):
+            if group and (
+                len(group) >= max_windows
+                or _as_naive_utc(request.from_timestamp)
+                > max(_as_naive_utc(member.to_timestamp) for member in group) + max_gap
+            ):
+                groups.append(RequestGroup(timeframe, group[0].exchange, group))
+                group = []
+            group.append(request)
+        groups.append(RequestGroup(timeframe, group[0].exchange, group))
+    
+    order = {request.key: position for position, request in enumerate(requests)}
+    return sorted(groups, key=lambda group: min(order[request.key] for request in group.requests))
+
+
+def log_plan(logger: logging.Logger, groups: Sequence[RequestGroup]) -> None:
+    """Log the coalescing plan and the number of jobs it saves.
+    
+    Args:
+        logger: Logger instance
+        groups: Planned groups
+    """
+    requests = sum(len(group.requests) for group in groups)
+    log_struct(
+        logger,
+        "INFO",
+        f"Coalesced {requests} range requests into {len(groups)} jobs",
+        labels={},
+        fields={
+            "requests": requests,
+            "jobs": len(groups),
+            "jobs_saved": requests - len(groups),
+            "groups": [
+                {
+                    "timeframe": group.timeframe,
+                    "exchange": group.exchange,
+                    "symbols": sorted({request.symbol for request in group.requests}),
+                    "windows": len(group.requests),
+                    "from_timestamp": _as_naive_utc(group.from_timestamp).isoformat(),
+                    "to_timestamp": _as_naive_utc(group.to_timestamp).isoformat(),
+                }
+                for group in groups
+                if len(group.requests) > 1
+            ],
+        }
+    )
+
+
+class CoalescedStream:
+    """Runs a group's query once and hands each request its own rows.
+    
+    Windows must be read in group order (typically one after another in the
+    same worker). Rows of a window that was not read to the end are skipped
+    when a later window is requested. If the query fails, the error is
+    raised to the window being read and to every later window.
+    """
+    
+    def __init__(
+        self,
+        bq_client: Any,
+        query_builder: Any,
+        group: RequestGroup,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        context: Optional[Dict[str, Any]] = None,
+    ):
+        """Initialize coalesced stream.
+        
+        Args:
+            bq_client: BigQueryClient used to stream the group's rows
+            query_builder: QueryBuilder used to build the windows query
+            group: Planned group
+            page_size: Maximum number of rows fetched per result page and
+                yielded per batch
+            context: Additional context for logging
+        """
+        self.bq_client = bq_client
+        self.query_builder = query_builder
+        self.group = group
+        self.page_size = page_size
+        self.context = context or {}
+        self._rows: Optional[Iterator[Tuple[int, Dict[str, Any]]]] = None
+        self._pending: Optional[Tuple[int, Dict[str, Any]]] = None
+        self._position = 0
+        self._error: Optional[BaseException] = None
+    
+    def position(self, key: Hashable) -> int:
+        """Return the window index of a request in the group."""
+        return next(
+            index for index, request in enumerate(self.group.requests) if request.key == key
+        )
+    
+    def _tagged_rows(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Stream the group's rows as (window_index, row) pairs."""
+        query = self.query_builder.build_windows_query(
+            [
+                (request.symbol, request.from_timestamp, request.to_timestamp)
+                for request in self.group.requests
+            ],
+            self.group.timeframe,
+            self.group.exchange,
+        )
+        for batch in self.bq_client.iter_query(query, context=self.context, page_size=self.page_size):
+            for row in batch:
+                yield row.pop("window_index"), row
+    
+    def _next_row(self) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """Return the next tagged row, remembering a query failure."""
+        if self._error is not None:
+            raise self._error
+        if self._rows is None:
+            self._rows = self._tagged_rows()
+        try:
+            return next(self._rows, None)
+        except Exception as exc:
+            self._error = exc
+            raise
+    
+    def batches(self, key: Hashable) -> Iterator[List[Dict[str, Any]]]:
+        """Stream the rows of one request's window.
+        
+        Args:
+            key: Request key
+        
+        Yields:
+            Non-empty batches of rows in ascending timestamp order
+        
+        Raises:
+            ValueError: If an earlier window is requested after a later one
+        """
+        position = self.position(key)
+        if position < self._position:
+            raise ValueError(f"Window {position} requested after window {self._position}")
+        self._position = position
+        
+        batch: List[Dict[str, Any]] = []
+        while True:
+            if self._pending is None:
+                self._pending = self._next_row()
+                if self._pending is None:
+                    break
+            index, row = self._pending
+            if index > position:
+                break
+            self._pending = None
+            if index < position:
+                continue
+            batch.append(row)
+            if len(batch) >= self.page_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
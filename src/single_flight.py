@@ -0,0 +1,428 @@
+"""
+In-flight deduplication of identical queries and extractions.
+
+When several requests for the same data arrive within seconds (e.g. in
+--batch or --serve mode), each would run its own billed BigQuery job and
+upload its own copy of the output. SingleFlight runs one call per key and
+hands its result to every caller waiting on the same key, optionally
+remembering successful results for a short TTL. SharedQueryClient applies
+it to a BigQueryClient: identical queries running at the same time share
+one job, and streamed results are replayed page by page to each consumer.
+"""
+
+import functools
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from .bigquery_client import Query, QueryResult, query_fingerprint
+from .config import DEFAULT_PAGE_SIZE, SHARED_STREAM_MAX_PAGES
+from .logger import log_struct
+
+
+# Options that change how an extraction runs but not the data it produces
+EXECUTION_OPTIONS = frozenset({
+    "page_size", "engine", "read_streams", "chunked", "max_parallel_jobs", "slice_rows",
+    "result_cache", "result_cache_max_mb", "coverage_index", "density_index",
+    "gcs_chunk_size_mb", "batch", "batch_workers", "no_coalesce", "no_dedup",
+    "serve", "serve_workers", "max_scan_gb", "over_budget",
+})
+
+
+def request_fingerprint(args: Any, query_mode: str) -> str:
+    """Identify an extraction by the options that determine its output.
+    
+    Args:
+        args: Parsed arguments namespace
+        query_mode: Query mode returned by validate_args
+    
+    Returns:
+        Canonical JSON of the query mode and output-relevant options
+    """
+    options = {
+        key: value for key, value in vars(args).items() if key not in EXECUTION_OPTIONS
+    }
+    return json.dumps([query_mode, options], sort_keys=True, default=str)
+
+
+class _Call:
+    """One in-flight call of a SingleFlight key."""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Runs one call per key at a time and shares its outcome with waiting callers."""
+    
+    def __init__(self, ttl: float = 0.0, max_entries: Optional[int] = None):
+        """Initialize single-flight group.
+        
+        Args:
+            ttl: Seconds a successful result is returned to later callers of
+                the same key without calling again (0 shares only in-flight calls)
+            max_entries: Memoized results kept at most; the oldest are
+                dropped first (None for no limit)
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._memo: Dict[Hashable, Tuple[float, Any]] = {}
+    
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Call func once for all concurrent callers of key.
+        
+        If func raises, every caller waiting on the same call receives the
+        exception; failures are never memoized.
+        
+        Args:
+            key: Identity of the call
+            func: Produces the result
+        
+        Returns:
+            Tuple of (result, shared) where shared is True if the result came
+            from another caller's call or from the memo
+        """
+        with self._lock:
+            memo = self._memo.get(key)
+            if memo is not None and memo[0] > time.monotonic():
+                return memo[1], True
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+        
+        try:
+            call.value = func()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None and self.ttl > 0:
+                    now = time.monotonic()
+                    self._memo = {
+                        memo_key: entry for memo_key, entry in self._memo.items() if entry[0] > now
+                    }
+                    self._memo.pop(key, None)
+                    self._memo[key] = (now + self.ttl, call.value)
+                    while self.max_entries is not None and len(self._memo) > self.max_entries:
+                        del self._memo[next(iter(self._memo))]
+            call.done.set()
+        return call.value, False
+    
+    def forget(self, key: Hashable) -> None:
+        """Drop the memoized result of key, if any."""
+        with self._lock:
+            self._memo.pop(key, None)
+
+
+# End-of-stream marker of SharedStream reads
+_END = object()
+
+
+class StreamDetached(Exception):
+    """Raised to a SharedStream consumer dropped for falling too far behind."""
+
+
+class SharedStream:
+    """Replays the pages of one source iterator to several consumers.
+    
+    Pages are pulled from the source by whichever consumer needs the next one
+    first and buffered for the others. Consumers may join until the stream
+    ends, fails, has produced max_pages pages or loses its last consumer;
+    from then on, pages every consumer has read are released. At most
+    max_pages pages are buffered: a consumer needing a new page then
+    detaches the slowest consumers, whose reads raise StreamDetached.
+    """
+    
+    def __init__(
+        self,
+        source: Iterator[Any],
+        max_pages: int = SHARED_STREAM_MAX_PAGES,
+        on_closed: Optional[Callable[["SharedStream"], None]] = None,
+    ):
+        """Initialize shared stream.
+        
+        Args:
+            source: Iterator producing the pages (started on first read)
+            max_pages: Pages produced after which no consumer may join, and
+                pages buffered for the slowest consumer at most
+            on_closed: Called with the stream once it stops accepting consumers
+        """
+        self._source = source
+        self.max_pages = max_pages
+        self._on_closed = on_closed
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._pages: List[Any] = []
+        self._offset = 0
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._joinable = True
+        self._cursors: Dict[int, int] = {}
+        self._next_token = 0
+    
+    def attach(self) -> Optional[int]:
+        """Register a consumer reading from the first page.
+        
+        Returns:
+            Consumer token, or None if the stream no longer accepts consumers
+        """
+        with self._lock:
+            if not self._joinable:
+                return None
+            token = self._next_token
+            self._next_token += 1
+            self._cursors[token] = 0
+            return token
+    
+    def detach(self, token: int) -> None:
+        """Unregister a consumer (finished or abandoned)."""
+        with self._lock:
+            self._cursors.pop(token, None)
+            closing = not self._cursors and self._joinable
+            if not self._cursors:
+                self._joinable = False
+            self._release()
+            abandoned = not self._cursors and not self._done and self._error is None
+        if closing and self._on_closed is not None:
+            self._on_closed(self)
+        if abandoned and hasattr(self._source, "close"):
+            # Stops the source generator (and its job's result download)
+            self._source.close()
+    
+    def read(self, token: int) -> Iterator[Any]:
+        """Yield every page of the stream for a consumer.
+        
+        Raises:
+            StreamDetached: If the consumer fell max_pages pages behind
+        """
+        while True:
+            page = self._next_page(token)
+            if page is _END:
+                return
+            yield page
+    
+    def _next_page(self, token: int) -> Any:
+        """Return the consumer's next page, pulling it from the source if needed."""
+        while True:
+            with self._lock:
+                position = self._cursors.get(token)
+                if position is None:
+                    raise StreamDetached()
+                if position - self._offset < len(self._pages):
+                    self._cursors[token] = position + 1
+                    page = self._pages[position - self._offset]
+                    self._release()
+                    return page
+                if self._error is not None:
+                    raise self._error
+                if self._done:
+                    return _END
+            
+            # One consumer at a time pulls from the source; the others wait
+            # here and then find the page buffered
+            with self._fetch_lock:
+                with self._lock:
+                    if self._offset + len(self._pages) > position or self._done or self._error:
+                        continue
+                    self._detach_laggards()
+                try:
+                    page = next(self._source, _END)
+                except BaseException as exc:
+                    with self._lock:
+                        self._error = exc
+                    self._close()
+                    raise
+                with self._lock:
+                    if page is _END:
+                        self._done = True
+                    else:
+                        self._pages.append(page)
+                    closing = self._done or self._offset + len(self._pages) >= self.max_pages
+                if closing:
+                    self._close()
+    
+    def _close(self) -> None:
+        """Stop accepting consumers."""
+        with self._lock:
+            if not self._joinable:
+                return
+            self._joinable = False
+            self._release()
+        if self._on_closed is not None:
+            self._on_closed(self)
+    
+    def _detach_laggards(self) -> None:
+        """Drop the slowest consumers while max_pages pages are buffered (lock held)."""
+        while not self._joinable and len(self._pages) >= self.max_pages:
+            for token, position in list(self._cursors.items()):
+                if position == self._offset:
+                    del self._cursors[token]
+            self._release()
+    
+    def _release(self) -> None:
+        """Drop pages read by every consumer once no consumer can join (lock held)."""
+        if self._joinable:
+            return
+        keep_from = min(self._cursors.values(), default=self._offset + len(self._pages))
+        del self._pages[:keep_from - self._offset]
+        self._offset = keep_from
+
+
+class SharedQueryClient:
+    """BigQueryClient wrapper sharing one job among identical concurrent queries.
+    
+    Queries are identified by query_fingerprint. Only calls that overlap in
+    time are shared; nothing is cached once a query has completed. Other
+    attributes are delegated to the wrapped client.
+    """
+    
+    def __init__(
+        self,
+        bq_client: Any,
+        logger: logging.Logger,
+        max_shared_pages: int = SHARED_STREAM_MAX_PAGES,
+    ):
+        """Initialize shared query client.
+        
+        Args:
+            bq_client: BigQueryClient running the queries
+            logger: Logger instance
+            max_shared_pages: Result pages of a streamed query after which
+                identical queries start their own job
+        """
+        self.bq_client = bq_client
+        self.logger = logger
+        self.max_shared_pages = max_shared_pages
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._streams: Dict[Tuple[str, Optional[int]], SharedStream] = {}
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.bq_client, name)
+    
+    def _log_shared(self, method: str, key: str, context: Optional[Dict[str, Any]]) -> None:
+        log_struct(
+            self.logger,
+            "INFO",
+            "Sharing the job of an identical in-flight query",
+            labels=context or {},
+            fields={"method": method, "query_fingerprint": key[:16]},
+        )
+    
+    def execute_query(self, sql: Query, context: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Execute a query, sharing the job with identical concurrent calls.
+        
+        See BigQueryClient.execute_query.
+        """
+        key = query_fingerprint(sql)
+        rows, shared = self._flight.do(
+            ("execute_query", key), lambda: self.bq_client.execute_query(sql, context=context),
+        )
+        if shared:
+            self._log_shared("execute_query", key, context)
+        return rows
+    
+    def run_query(
+        self,
+        sql: Query,
+        context: Optional[Dict[str, Any]] = None,
+        maximum_bytes_billed: Optional[int] = None,
+    ) -> QueryResult:
+        """Run a small query, sharing the job with identical concurrent calls.
+        
+        See BigQueryClient.run_query.
+        """
+        key = query_fingerprint(sql)
+        result, shared = self._flight.do(
+            ("run_query", key, maximum_bytes_billed),
+            lambda: self.bq_client.run_query(
+                sql, context=context, maximum_bytes_billed=maximum_bytes_billed,
+            ),
+        )
+        if shared:
+            self._log_shared("run_query", key, context)
+        return result
+    
+    def iter_query(
+        self,
+        sql: Query,
+        context: Optional[Dict[str, Any]] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        maximum_bytes_billed: Optional[int] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Stream a query's pages, sharing the job with identical concurrent streams.
+        
+        See BigQueryClient.iter_query. A consumer joining a running stream
+        receives its pages from the first one, at the page size of the stream
+        that started the job. A consumer detached for falling behind runs the
+        query again and continues after the rows it has already received.
+        """
+        key = (query_fingerprint(sql), maximum_bytes_billed)
+        with self._lock:
+            stream = self._streams.get(key)
+            token = stream.attach() if stream is not None else None
+            shared = token is not None
+            if not shared:
+                stream = SharedStream(
+                    self.bq_client.iter_query(
+                        sql,
+                        context=context,
+                        page_size=page_size,
+                        maximum_bytes_billed=maximum_bytes_billed,
+                    ),
+                    max_pages=self.max_shared_pages,
+                    on_closed=functools.partial(self._release, key),
+                )
+                self._streams[key] = stream
+                token = stream.attach()
+        if shared:
+            self._log_shared("iter_query", key[0], context)
+        
+        rows_read = 0
+        try:
+            for page in stream.read(token):
+                rows_read += len(page)
+                yield page
+        except StreamDetached:
+            log_struct(
+                self.logger,
+                "WARNING",
+                "Fell behind a shared query stream, running the query again",
+                labels=context or {},
+                fields={"query_fingerprint": key[0][:16], "rows_read": rows_read},
+            )
+            pages = self.bq_client.iter_query(
+                sql,
+                context=context,
+                page_size=page_size,
+                maximum_bytes_billed=maximum_bytes_billed,
+            )
+            for page in pages:
+                if rows_read >= len(page):
+                    rows_read -= len(page)
+                    continue
+                yield page[rows_read:]
+                rows_read = 0
+        finally:
+            stream.detach(token)
+    
+    def _release(self, key: Tuple[str, Optional[int]], stream: SharedStream) -> None:
+        """Stop routing new queries to a stream that no longer accepts consumers."""
+        with self._lock:
+            if self._streams.get(key) is stream:
+                del self._streams[key]
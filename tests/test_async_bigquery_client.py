@@ -0,0 +1,120 @@
+"""
+Unit tests for the asyncio BigQuery execution layer.
+"""
+
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.async_bigquery_client import AsyncBigQueryClient
+from src.exceptions import QueryExecutionError
+from src.query_builder import QueryBuilder
+
+pytest.importorskip("duckdb")
+pyarrow = pytest.importorskip("pyarrow")
+
+from benchmarks.fakes import DuckDBQueryClient, FakeBigQueryJobClient, make_candles  # noqa: E402
+
+TABLE_FQN = "p.d.t"
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def engine():
+    table = make_candles(10 * 24, start=START, timeframe='1h')
+    table = table.append_column("symbol", pyarrow.array(["BTCUSDT"] * 10 * 24))
+    return DuckDBQueryClient(TABLE_FQN, table.append_column("timeframe", pyarrow.array(["1h"] * 10 * 24)))
+
+
+def _query(day):
+    return QueryBuilder(TABLE_FQN).build_range_query(
+        "BTCUSDT", "1h", START + timedelta(days=day), START + timedelta(days=day, hours=23),
+    )
+
+
+class TestAsyncBigQueryClient:
+    """Test async job submission, polling and result streaming."""
+    
+    def _client(self, server, mocker, **kwargs):
+        return AsyncBigQueryClient(server, mocker.MagicMock(), poll_interval=0.01, **kwargs)
+    
+    def test_iter_query_streams_pages(self, engine, mocker):
+        """Test pages match the rows of the query, page by page."""
+        client = self._client(FakeBigQueryJobClient(engine, run_seconds=0.02), mocker)
+        
+        async def collect():
+            return [batch async for batch in client.iter_query(_query(2), page_size=10)]
+        
+        batches = asyncio.run(collect())
+        client.close()
+        
+        assert [len(batch) for batch in batches] == [10, 10, 4]
+        assert [row for batch in batches for row in batch] == engine.run_query(_query(2)).rows
+    
+    def test_many_jobs_in_flight_within_quota(self, engine, mocker):
+        """Test hundreds of jobs run on a few threads without exceeding the quota."""
+        server = FakeBigQueryJobClient(engine, run_seconds=0.05, max_running=20)
+        client = self._client(server, mocker, max_concurrent_jobs=20, io_threads=4)
+        threads_before = threading.active_count()
+        
+        async def run_all():
+            return await asyncio.gather(*(client.run_query(_query(n % 10)) for n in range(200)))
+        
+        results = asyncio.run(run_all())
+        client.close()
+        
+        assert len(results) == 200
+        assert all(len(result.rows) == 24 for result in results)
+        assert server.peak_running == 20
+        assert len(server.jobs) == 200
+        assert threading.active_count() <= threads_before + 4
+    
+    def test_failed_job_maps_error(self, engine, mocker):
+        """Test a job finishing with an error raises QueryExecutionError."""
+        client = self._client(FakeBigQueryJobClient(engine, run_seconds=0.0), mocker)
+        
+        with pytest.raises(QueryExecutionError):
+            asyncio.run(client.run_query("SELECT * FROM missing_table WHERE timestamp >= 0"))
+        client.close()
+    
+    def test_cancelled_task_cancels_job(self, engine, mocker):
+        """Test cancelling a waiting task cancels its BigQuery job."""
+        server = FakeBigQueryJobClient(engine, run_seconds=10)
+        client = self._client(server, mocker)
+        
+        async def cancel_soon():
+            task = asyncio.ensure_future(client.run_query(_query(0)))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        
+        asyncio.run(cancel_soon())
+        client.close()
+        
+        assert server.cancelled == 1
+        assert server.running == 0
+    
+    def test_transient_error_retried(self, engine, mocker):
+        """Test run_query retries transient errors with the shared retry policy."""
+        from google.api_core import exceptions as google_exceptions
+        mocker.patch("src.bigquery_client.BACKOFF_BASE", 0)
+        server = FakeBigQueryJobClient(engine, run_seconds=0.0)
+        failures = [google_exceptions.ServiceUnavailable("backend error")]
+        submit = server.query
+        
+        def flaky_query(*args, **kwargs):
+            if failures:
+                raise failures.pop()
+            return submit(*args, **kwargs)
+        
+        server.query = flaky_query
+        client = self._client(server, mocker)
+        
+        result = asyncio.run(client.run_query(_query(1)))
+        client.close()
+        
+        assert len(result.rows) == 24
+        assert len(server.jobs) == 1
@@ -0,0 +1,98 @@
+"""
+Unit tests for the batch request runner.
+"""
+
+import threading
+
+import pytest
+
+from main import record_to_argv
+from src.batch_runner import BatchRunner, load_batch_file
+from src.exceptions import QueryExecutionError, ValidationError
+from src.logger import clear_request_id, get_request_id
+
+
+class TestBatchRunner:
+    """Test concurrent execution of request records."""
+    
+    def test_each_request_keeps_its_request_id(self, mocker):
+        """Test handlers see their own request ID while running concurrently."""
+        barrier = threading.Barrier(4)
+        seen = {}
+        
+        def handler(index, record, request_id):
+            barrier.wait(timeout=5)
+            seen[record["n"]] = (request_id, get_request_id())
+            return 0
+        
+        clear_request_id()
+        records = [{"n": 0, "request_id": "fixed-id"}] + [{"n": n} for n in range(1, 4)]
+        summary = BatchRunner(mocker.MagicMock(), max_workers=4).run(records, handler)
+        
+        assert all(request_id == current for request_id, current in seen.values())
+        assert seen[0][0] == "fixed-id"
+        assert len({request_id for request_id, _ in seen.values()}) == 4
+        assert [result.request_id for result in summary.results] == [seen[n][0] for n in range(4)]
+        assert get_request_id() is None
+    
+    def test_failures_keep_their_exit_codes(self, mocker):
+        """Test failed requests are counted without stopping the batch."""
+        def handler(index, record, request_id):
+            if record["n"] == 1:
+                raise QueryExecutionError("Query failed")
+            if record["n"] == 2:
+                raise RuntimeError("boom")
+            return 0
+        
+        summary = BatchRunner(mocker.MagicMock(), max_workers=2).run(
+            [{"n": n} for n in range(4)], handler,
+        )
+        
+        assert [result.exit_code for result in summary.results] == [
+            0, QueryExecutionError.DEFAULT_EXIT_CODE, 1, 0,
+        ]
+        assert [result.index for result in summary.failed] == [1, 2]
+        assert summary.failed[1].error == "boom"
+        assert summary.requests_per_second > 0
+
+
+class TestBatchFile:
+    """Test reading batch files and converting records to arguments."""
+    
+    def test_load_skips_blank_lines(self, tmp_path):
+        """Test records are returned in file order."""
+        path = tmp_path / "requests.jsonl"
+        path.write_text('{"symbol": "BTCUSDT"}\n\n{"symbol": "ETHUSDT"}\n')
+        
+        assert load_batch_file(path) == [{"symbol": "BTCUSDT"}, {"symbol": "ETHUSDT"}]
+    
+    @pytest.mark.parametrize("line", ['["BTCUSDT"]', '{"symbol": '])
+    def test_load_rejects_non_objects(self, tmp_path, line):
+        """Test lines that are not JSON objects are rejected with their line number."""
+        path = tmp_path / "requests.jsonl"
+        path.write_text('{"symbol": "BTCUSDT"}\n' + line + '\n')
+        
+        with pytest.raises(ValidationError) as exc_info:
+            load_batch_file(path)
+        assert exc_info.value.context["line"] == 2
+    
+    def test_record_to_argv(self):
+        """Test options map to flags, values and comma-joined lists."""
+        argv = record_to_argv({
+            "request_id": "r1",
+            "symbols": ["BTCUSDT", "ETHUSDT"],
+            "timeframe": "1h",
+            "all": True,
+            "compact": True,
+            "chunked": False,
+            "exchange": None,
+            "page_size": 500,
+        })
+        
+        assert argv == [
+            "--symbols", "BTCUSDT,ETHUSDT",
+            "--timeframe", "1h",
+            "--all",
+            "--compact",
+            "--page-size", "500",
+        ]
@@ -0,0 +1,376 @@
+"""
+Unit tests for BigQuery client wrapper.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from src.bigquery_client import BigQueryClient, StorageReadEngine
+from src.exceptions import QueryExecutionError
+
+
+class TestBigQueryClient:
+    """Test BigQuery client query execution."""
+    
+    @pytest.fixture
+    def client(self, mocker):
+        """Create BigQuery client with mocked google client."""
+        mocker.patch.object(BigQueryClient, "_initialize_client")
+        bq_client = BigQueryClient(mocker.MagicMock(), mocker.MagicMock())
+        bq_client.client = mocker.MagicMock()
+        return bq_client
+    
+    @pytest.fixture
+    def pages(self):
+        """Create sample result pages."""
+        return [
+            [{"timestamp": 1, "open": 1.0}, {"timestamp": 2, "open": 2.0}],
+            [],
+            [{"timestamp": 3, "open": 3.0}],
+        ]
+    
+    def _mock_job(self, client, mocker, pages):
+        query_job = mocker.MagicMock()
+        query_job.result.return_value.pages = iter(pages)
+        client.client.query.return_value = query_job
+        return query_job
+    
+    def test_iter_query_yields_pages(self, client, mocker, pages):
+        """Test iter_query yields one non-empty batch per page."""
+        query_job = self._mock_job(client, mocker, pages)
+        
+        batches = list(client.iter_query("SELECT 1", page_size=2))
+        
+        assert batches == [pages[0], pages[2]]
+        query_job.result.assert_called_once_with(page_size=2)
+    
+    def test_iter_query_is_lazy(self, client, mocker, pages):
+        """Test no job is submitted until iteration starts."""
+        self._mock_job(client, mocker, pages)
+        
+        batches = client.iter_query("SELECT 1")
+        client.client.query.assert_not_called()
+        
+        next(batches)
+        client.client.query.assert_called_once()
+    
+    def test_execute_query_collects_all_rows(self, client, mocker, pages):
+        """Test execute_query flattens all pages into one list."""
+        self._mock_job(client, mocker, pages)
+        
+        rows = client.execute_query("SELECT 1")
+        
+        assert [row["timestamp"] for row in rows] == [1, 2, 3]
+    
+    def test_iter_query_not_initialized(self, client):
+        """Test iter_query fails when client is not initialized."""
+        client.client = None
+        
+        with pytest.raises(QueryExecutionError, match="not initialized"):
+            next(client.iter_query("SELECT 1"))
+    
+    def test_run_query_returns_rows_and_bytes(self, client):
+        """Test run_query materializes rows and reports bytes billed."""
+        query_job = client.client.query.return_value
+        query_job.result.return_value = iter([{"timestamp": 1}, {"timestamp": 2}])
+        query_job.total_bytes_processed = 2048
+        query_job.total_bytes_billed = 10485760
+        
+        result = client.run_query("SELECT 1", maximum_bytes_billed=1000)
+        
+        assert result.rows == [{"timestamp": 1}, {"timestamp": 2}]
+        assert result.bytes_billed == 10485760
+        job_config = client.client.query.call_args.kwargs["job_config"]
+        assert job_config.maximum_bytes_billed == 1000
+    
+    def test_iter_query_caps_bytes_billed(self, client):
+        """Test iter_query submits its job with the bytes billed limit."""
+        client.client.query.return_value.result.return_value.pages = iter([[{"timestamp": 1}]])
+        
+        assert list(client.iter_query("SELECT 1", maximum_bytes_billed=2048)) == [[{"timestamp": 1}]]
+        job_config = client.client.query.call_args.kwargs["job_config"]
+        assert job_config.maximum_bytes_billed == 2048
+    
+    def test_parameterized_query_binds_parameters(self, client):
+        """Test a ParameterizedQuery is submitted with its query parameters."""
+        from src.query_builder import QueryBuilder
+        query = QueryBuilder("p.d.t").build_range_query(
+            "BTCUSDT", "1h", datetime(2024, 1, 1), datetime(2024, 12, 31),
+        )
+        query_job = client.client.query.return_value
+        query_job.result.return_value.pages = iter([[{"timestamp": 1}]])
+        
+        rows = client.execute_query(query)
+        
+        assert rows == [{"timestamp": 1}]
+        args, kwargs = client.client.query.call_args
+        assert args == (query.sql,)
+        assert kwargs["job_config"].query_parameters == query.parameters
+        client.client.query_and_wait.assert_not_called()
+    
+    def test_short_query_uses_jobs_query(self, client):
+        """Test a query estimated to return few rows runs through jobs.query."""
+        from src.query_builder import QueryBuilder
+        query = QueryBuilder("p.d.t").build_range_query(
+            "BTCUSDT", "1h", datetime(2024, 1, 1), datetime(2024, 1, 2),
+        )
+        row_iterator = client.client.query_and_wait.return_value
+        row_iterator.pages = iter([[{"timestamp": 1}]])
+        row_iterator.job_id = None
+        
+        rows = client.execute_query(query)
+        
+        assert rows == [{"timestamp": 1}]
+        client.client.query.assert_not_called()
+        args, kwargs = client.client.query_and_wait.call_args
+        assert args == (query.sql,)
+        assert kwargs["job_config"].query_parameters == query.parameters
+        fields = client.logger.info.call_args.kwargs["extra"]["fields"]
+        assert fields["api_method"] == "QUERY"
+        assert fields["job_id"] is None
+    
+    def test_short_query_with_job_reports_job_billing(self, client):
+        """Test billing statistics are read from the job jobs.query created."""
+        from src.query_builder import QueryBuilder
+        query = QueryBuilder("p.d.t").build_range_query(
+            "BTCUSDT", "1h", datetime(2024, 1, 1), datetime(2024, 1, 2),
+        )
+        row_iterator = client.client.query_and_wait.return_value
+        row_iterator.job_id = "job_1"
+        row_iterator.total_bytes_processed = 1000
+        row_iterator.__iter__ = lambda self: iter([{"timestamp": 1}])
+        client.client.get_job.return_value.total_bytes_billed = 10485760
+        client.client.get_job.return_value.cache_hit = False
+        
+        result = client.run_query(query)
+        
+        assert result.bytes_processed == 1000
+        assert result.bytes_billed == 10485760
+        assert client.client.get_job.call_args.args == ("job_1",)
+    
+    @pytest.mark.parametrize("error,calls", [
+        ("ServiceUnavailable", 2),
+        ("DeadlineExceeded", 1),
+    ])
+    def test_short_query_timeout_not_resent(self, client, mocker, error, calls):
+        """Test a jobs.query request is resent after transient errors but not timeouts."""
+        from google.api_core import exceptions as google_exceptions
+        from src.exceptions import NetworkError
+        from src.query_builder import QueryBuilder
+        mocker.patch("src.bigquery_client.BACKOFF_BASE", 0)
+        query = QueryBuilder("p.d.t").build_range_query(
+            "BTCUSDT", "1h", datetime(2024, 1, 1), datetime(2024, 1, 2),
+        )
+        row_iterator = mocker.MagicMock(job_id=None)
+        row_iterator.pages = iter([[{"timestamp": 1}]])
+        client.client.query_and_wait.side_effect = [getattr(google_exceptions, error)("failed"), row_iterator]
+        
+        if calls == 1:
+            with pytest.raises(NetworkError):
+                client.execute_query(query)
+        else:
+            assert client.execute_query(query) == [{"timestamp": 1}]
+        assert client.client.query_and_wait.call_count == calls
+    
+    def test_dry_run_returns_bytes_processed(self, client):
+        """Test a dry run submits a dry-run job without the query cache."""
+        client.client.query.return_value.total_bytes_processed = 1234
+        
+        assert client.dry_run("SELECT 1") == 1234
+        job_config = client.client.query.call_args.kwargs["job_config"]
+        assert job_config.dry_run is True
+        assert job_config.use_query_cache is False
+    
+    @pytest.mark.parametrize("build,expected", [
+        (lambda b: b.build_neighborhood_query("BTCUSDT", "1h", datetime(2024, 1, 5), 10, 5), 16),
+        (lambda b: b.build_range_query("BTCUSDT", "1d", datetime(2024, 1, 1), datetime(2024, 1, 31)), 31),
+        (lambda b: b.build_range_query("BTCUSDT", "1", datetime(2024, 1, 1), datetime(2024, 1, 8)), 10081),
+        (lambda b: "SELECT 1", None),
+    ])
+    def test_estimate_result_rows(self, build, expected):
+        """Test result size estimates of built queries."""
+        from src.bigquery_client import estimate_result_rows
+        from src.query_builder import QueryBuilder
+        
+        assert estimate_result_rows(build(QueryBuilder("p.d.t"))) == expected
+    
+    def test_run_query_logs_cache_hit(self, client):
+        """Test result cache hits are reported and logged."""
+        query_job = client.client.query.return_value
+        query_job.result.return_value = iter([])
+        query_job.total_bytes_processed = 0
+        query_job.total_bytes_billed = 0
+        query_job.cache_hit = True
+        
+        result = client.run_query("SELECT 1")
+        
+        assert result.cache_hit is True
+        fields = client.logger.info.call_args.kwargs["extra"]["fields"]
+        assert fields["cache_hit"] is True
+    
+    def test_run_query_maps_byte_limit_error(self, client):
+        """Test exceeding maximum_bytes_billed surfaces the error reason."""
+        from google.api_core import exceptions as google_exceptions
+        client.client.query.side_effect = google_exceptions.BadRequest(
+            "Query exceeded limit for bytes billed",
+            errors=[{"reason": "bytesBilledLimitExceeded"}],
+        )
+        
+        with pytest.raises(QueryExecutionError) as exc_info:
+            client.run_query("SELECT 1", maximum_bytes_billed=1000)
+        
+        assert exc_info.value.context["reason"] == "bytesBilledLimitExceeded"
+        client.client.query.assert_called_once()
+
+
+class TestQueryRetries:
+    """Test resumed page fetches and idempotent job submission on the fake job server."""
+    
+    @pytest.fixture
+    def engine(self):
+        pytest.importorskip("duckdb")
+        pyarrow = pytest.importorskip("pyarrow")
+        from benchmarks.fakes import DuckDBQueryClient, make_candles
+        
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        table = make_candles(240, start=start, timeframe="1h")
+        table = table.append_column("symbol", pyarrow.array(["BTCUSDT"] * 240))
+        return DuckDBQueryClient("p.d.t", table.append_column("timeframe", pyarrow.array(["1h"] * 240)))
+    
+    def _client(self, mocker, server):
+        mocker.patch("src.bigquery_client.BACKOFF_BASE", 0)
+        mocker.patch("src.bigquery_client.STATELESS_QUERY_MAX_ROWS", 0)
+        mocker.patch.object(BigQueryClient, "_initialize_client")
+        bq_client = BigQueryClient(mocker.MagicMock(), mocker.MagicMock())
+        bq_client.client = server
+        return bq_client
+    
+    def _query(self):
+        from src.query_builder import QueryBuilder
+        return QueryBuilder("p.d.t").build_range_query(
+            "BTCUSDT", "1h", datetime(2024, 1, 1), datetime(2024, 1, 10),
+        )
+    
+    def test_page_failure_resumes_from_last_page(self, mocker, engine):
+        """Test a reset page fetch resumes at that page without re-running the query."""
+        from benchmarks.fakes import FakeBigQueryJobClient
+        server = FakeBigQueryJobClient(engine, run_seconds=0, failing_pages=[0, 7])
+        bq_client = self._client(mocker, server)
+        expected = engine.run_query(self._query()).rows
+        
+        rows = [row for batch in bq_client.iter_query(self._query(), page_size=10) for row in batch]
+        
+        assert rows == expected
+        assert len(server.jobs) == 1
+        assert server.page_fetches == 22 + 2
+        assert bq_client.logger.info.call_args.kwargs["extra"]["fields"]["resumes"] == 2
+    
+    def test_ambiguous_submission_reuses_job(self, mocker, engine):
+        """Test a retry after a lost job insert response attaches to the created job."""
+        from benchmarks.fakes import FakeBigQueryJobClient
+        server = FakeBigQueryJobClient(engine, run_seconds=0, failing_submissions=1)
+        bq_client = self._client(mocker, server)
+        
+        batches = list(bq_client.iter_query(self._query(), page_size=100))
+        
+        assert sum(len(batch) for batch in batches) == 217
+        assert len(server.jobs) == 1
+        assert server.jobs[0].job_id.startswith("bq_extractor_")
+    
+    def test_failed_job_reruns_under_new_id(self, mocker):
+        """Test a job that failed with a transient error is re-run as a new job."""
+        from google.api_core import exceptions as google_exceptions
+        mocker.patch("src.bigquery_client.BACKOFF_BASE", 0)
+        mocker.patch.object(BigQueryClient, "_initialize_client")
+        bq_client = BigQueryClient(mocker.MagicMock(), mocker.MagicMock())
+        bq_client.client = mocker.MagicMock()
+        failed_job, query_job = mocker.MagicMock(state="DONE"), mocker.MagicMock()
+        failed_job.result.side_effect = google_exceptions.InternalServerError("backendError")
+        query_job.result.return_value = iter([{"timestamp": 1}])
+        bq_client.client.query.side_effect = [failed_job, query_job]
+        
+        result = bq_client.run_query("SELECT 1")
+        
+        assert result.rows == [{"timestamp": 1}]
+        first, second = (call.kwargs["job_id"] for call in bq_client.client.query.call_args_list)
+        assert first != second
+
+
+class TestStorageReadEngine:
+    """Test Arrow fetch path against the local Storage Read API fake."""
+    
+    @pytest.fixture
+    def fakes(self):
+        """Import fakes module (requires pyarrow)."""
+        pytest.importorskip("pyarrow")
+        from benchmarks import fakes
+        return fakes
+    
+    @pytest.fixture
+    def table_path(self):
+        return StorageReadEngine.table_path("proj", "_anon", "results")
+    
+    @pytest.mark.parametrize("streams", [1, 3])
+    def test_read_table_preserves_order(self, mocker, fakes, table_path, streams):
+        """Test ordered reads use one stream and come back complete and ordered."""
+        table = fakes.make_candles(2500)
+        read_client = fakes.FakeBigQueryReadClient({table_path: table}, batch_rows=400)
+        engine = StorageReadEngine(read_client, "proj", mocker.MagicMock(), max_streams=streams)
+        
+        batches = list(engine.read_table(table_path, batch_size=300))
+        
+        timestamps = [ts for batch in batches for ts in batch.column("timestamp").to_pylist()]
+        assert timestamps == table.column("timestamp").to_pylist()
+        assert all(batch.num_rows <= 300 for batch in batches)
+        assert read_client.sessions[0]["max_stream_count"] == 1
+    
+    def test_unordered_read_streams_in_parallel(self, mocker, fakes, table_path):
+        """Test unordered reads spread over several streams without buffering the table."""
+        table = fakes.make_candles(2500)
+        read_client = fakes.FakeBigQueryReadClient({table_path: table}, batch_rows=100)
+        engine = StorageReadEngine(read_client, "proj", mocker.MagicMock(), max_streams=3)
+        
+        batches = engine.read_table(table_path, order_by=None)
+        first = next(batches)
+        timestamps = first.column("timestamp").to_pylist() + [
+            ts for batch in batches for ts in batch.column("timestamp").to_pylist()
+        ]
+        
+        assert first.num_rows == 100
+        assert sorted(timestamps) == table.column("timestamp").to_pylist()
+        assert read_client.sessions[0]["max_stream_count"] == 3
+    
+    def _client_with_job(self, mocker, read_client, pages):
+        mocker.patch.object(BigQueryClient, "_initialize_client")
+        config = mocker.MagicMock(gcp_project_id="proj")
+        bq_client = BigQueryClient(config, mocker.MagicMock(), read_client=read_client)
+        bq_client.client = mocker.MagicMock()
+        query_job = bq_client.client.query.return_value
+        query_job.destination.project = "proj"
+        query_job.destination.dataset_id = "_anon"
+        query_job.destination.table_id = "results"
+        query_job.result.return_value.pages = iter(pages)
+        return bq_client
+    
+    def test_iter_query_arrow_uses_storage_api(self, mocker, fakes, table_path):
+        """Test query results are read as Arrow batches."""
+        table = fakes.make_candles(300)
+        read_client = fakes.FakeBigQueryReadClient({table_path: table}, batch_rows=100)
+        bq_client = self._client_with_job(mocker, read_client, pages=[])
+        
+        batches = list(bq_client.iter_query_arrow("SELECT 1", max_streams=2))
+        
+        assert sum(batch.num_rows for batch in batches) == 300
+        assert all(hasattr(batch, "schema") for batch in batches)
+    
+    def test_iter_query_arrow_falls_back_to_rest(self, mocker, fakes, table_path):
+        """Test REST pages are used when a read session cannot be created."""
+        read_client = fakes.FakeBigQueryReadClient({}, fail_sessions=True)
+        pages = [[{"timestamp": 1, "open": 1.0}]]
+        bq_client = self._client_with_job(mocker, read_client, pages=pages)
+        
+        batches = list(bq_client.iter_query_arrow("SELECT 1"))
+        
+        assert batches == pages
+        bq_client.client.query.assert_called_once()
@@ -0,0 +1,166 @@
+"""
+Unit tests for chunked query execution.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from src.chunked_executor import ChunkedQueryExecutor
+from src.exceptions import NetworkError, QueryExecutionError
+from src.query_builder import QueryBuilder
+
+
+class FakeSliceClient:
+    """BigQueryClient stand-in returning ``batches`` batches per slice."""
+    
+    def __init__(self, delays=None, failures=None, batches=1):
+        self.delays = delays or {}
+        self.failures = dict(failures or {})
+        self.batches = batches
+        self.produced = {}
+        self.calls = []
+        self.max_bytes = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+    
+    def iter_query(self, sql, context=None, page_size=None, maximum_bytes_billed=None):
+        index = context["slice"]
+        with self.lock:
+            self.calls.append(index)
+            self.max_bytes.append(maximum_bytes_billed)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delays.get(index, 0))
+            if self.failures.get(index):
+                self.failures[index] -= 1
+                raise NetworkError("Transient slice failure", retryable=True)
+            for _ in range(self.batches):
+                with self.lock:
+                    self.produced[index] = self.produced.get(index, 0) + 1
+                yield [{"slice": index, "start": context["slice_start"]}]
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+class TestChunkedQueryExecutor:
+    """Test slice scheduling, ordering and buffering."""
+    
+    START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    END = datetime(2024, 1, 10, 23, 59, tzinfo=timezone.utc)
+    
+    def _executor(self, client, mocker, **kwargs):
+        options = {"max_parallel": 3, "slice_rows": 1440}
+        options.update(kwargs)
+        return ChunkedQueryExecutor(
+            client,
+            QueryBuilder("project.dataset.table"),
+            mocker.MagicMock(),
+            **options,
+        )
+    
+    def test_batches_yielded_in_slice_order(self, mocker):
+        """Test slices finishing out of order are merged in timestamp order."""
+        client = FakeSliceClient(delays={0: 0.05, 1: 0.02})
+        executor = self._executor(client, mocker)
+        
+        batches = list(executor.iter_range("BTCUSDT", "1", self.START, self.END))
+        
+        assert [batch[0]["slice"] for batch in batches] == list(range(10))
+        assert batches[1][0]["start"] == "2024-01-02T00:00:00+00:00"
+    
+    def test_parallelism_is_bounded(self, mocker):
+        """Test no more than max_parallel slices run at once."""
+        client = FakeSliceClient(delays={i: 0.01 for i in range(10)})
+        executor = self._executor(client, mocker, max_parallel=2)
+        
+        list(executor.iter_range("BTCUSDT", "1", self.START, self.END))
+        
+        assert client.max_active <= 2
+        assert sorted(client.calls) == list(range(10))
+    
+    def test_lookahead_slices_hold_one_batch(self, mocker):
+        """Test slices waiting their turn fetch only their first batch."""
+        client = FakeSliceClient(batches=5)
+        executor = self._executor(client, mocker)
+        
+        batches = executor.iter_range("BTCUSDT", "1", self.START, self.END)
+        for _ in range(5):
+            next(batches)
+        time.sleep(0.1)
+        
+        assert client.produced[0] == 5
+        assert client.produced[1] == 1 and client.produced[2] == 1
+        assert 3 not in client.produced
+        assert len(list(batches)) == 45
+    
+    def test_early_close_stops_open_slices(self, mocker):
+        """Test closing the stream closes the current, buffered and running slices."""
+        client = FakeSliceClient(delays={2: 0.1}, batches=3)
+        # Keep the slice iterators referenced so only close() can stop them
+        opened = []
+        iter_query = client.iter_query
+        
+        def keep_open(*args, **kwargs):
+            opened.append(iter_query(*args, **kwargs))
+            return opened[-1]
+        
+        client.iter_query = keep_open
+        executor = self._executor(client, mocker)
+        
+        batches = executor.iter_range("BTCUSDT", "1", self.START, self.END)
+        next(batches)
+        time.sleep(0.05)
+        batches.close()
+        time.sleep(0.2)
+        
+        assert client.active == 0
+        assert 3 not in client.produced
+    
+    def test_failed_slice_not_retried_again(self, mocker):
+        """Test slice errors surface as-is; retries belong to the client."""
+        client = FakeSliceClient(failures={1: 1})
+        executor = self._executor(client, mocker)
+        
+        with pytest.raises(NetworkError):
+            list(executor.iter_range("BTCUSDT", "1", self.START, self.END))
+        assert client.calls.count(1) == 1
+    
+    def test_non_retryable_error_not_retried(self, mocker):
+        """Test non-retryable errors fail the slice immediately."""
+        client = FakeSliceClient()
+        client.iter_query = mocker.MagicMock(side_effect=QueryExecutionError("Bad request"))
+        executor = self._executor(client, mocker)
+        
+        with pytest.raises(QueryExecutionError):
+            list(executor.iter_range("BTCUSDT", "1", self.START, self.END))
+        assert client.iter_query.call_count <= 3
+    
+    def test_slice_jobs_capped_by_byte_budget(self, mocker):
+        """Test every slice job carries the per-slice bytes billed limit."""
+        client = FakeSliceClient()
+        executor = self._executor(client, mocker, max_bytes_billed=2 * 1024 ** 3)
+        
+        list(executor.iter_range("BTCUSDT", "1", self.START, self.END))
+        
+        assert client.max_bytes == [2 * 1024 ** 3] * 10
+    
+    def test_slice_queries_do_not_overlap(self, mocker):
+        """Test consecutive slice queries use adjacent bounds."""
+        builder = mocker.MagicMock()
+        client = FakeSliceClient()
+        executor = ChunkedQueryExecutor(client, builder, mocker.MagicMock(), slice_rows=1440)
+        
+        list(executor.iter_range("BTCUSDT", "1", self.START, self.END, "BINANCE"))
+        
+        bounds = [call.args[2:4] for call in builder.build_range_query.call_args_list]
+        assert bounds[0][0] == self.START
+        assert bounds[-1][1] == self.END
+        for (_, prev_end), (next_start, _) in zip(bounds, bounds[1:]):
+            assert (next_start - prev_end).total_seconds() == pytest.approx(1e-6)
+        assert all(call.args[4] == "BINANCE" for call in builder.build_range_query.call_args_list)
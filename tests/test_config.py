@@ -148,6 +148,7 @@ LOG_LEVEL=DEBUG
         monkeypatch.delenv("SERVICE_NAME", raising=False)
         monkeypatch.delenv("ENVIRONMENT", raising=False)
         monkeypatch.delenv("LOG_LEVEL", raising=False)
+        monkeypatch.delenv("CACHE_DIR", raising=False)
         
         env_file = tmp_path / ".env"
         key_file = tmp_path / "test-key.json"
@@ -166,6 +167,7 @@ GCP_KEY_PATH={key_file}
         assert config.service_name == "bq-stock-extractor"
         assert config.environment == "development"
         assert config.log_level == "INFO"
+        assert config.cache_dir == Path(".cache")
 
 
 class TestBackoffConstants:
@@ -0,0 +1,121 @@
+"""
+Unit tests for the per-symbol coverage index and tight ALL-mode bounds.
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.coverage_index import CoverageIndex
+from src.query_builder import QueryBuilder
+
+pytest.importorskip("duckdb")
+pyarrow = pytest.importorskip("pyarrow")
+
+from benchmarks.fakes import DuckDBQueryClient, make_candles  # noqa: E402
+
+TABLE_FQN = "p.d.t"
+
+
+def _symbol_candles(symbol, exchange, n_rows, start):
+    table = make_candles(n_rows, start=start, timeframe='1h')
+    table = table.append_column("symbol", pyarrow.array([symbol] * n_rows))
+    table = table.append_column("timeframe", pyarrow.array(["1h"] * n_rows))
+    return table.append_column("exchange", pyarrow.array([exchange] * n_rows))
+
+
+@pytest.fixture
+def today():
+    return datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+@pytest.fixture
+def client(today):
+    """A young live symbol on two exchanges and a delisted symbol."""
+    return DuckDBQueryClient(TABLE_FQN, pyarrow.concat_tables([
+        _symbol_candles("YOUNG", "BINANCE", 30 * 24, today - timedelta(days=30)),
+        _symbol_candles("YOUNG", "BYBIT", 10 * 24, today - timedelta(days=10)),
+        _symbol_candles("DELISTED", "BINANCE", 100 * 24, datetime(2020, 1, 1, tzinfo=timezone.utc)),
+    ]))
+
+
+class TestCoverageIndex:
+    """Test building, persisting and refreshing the coverage index."""
+    
+    def _index(self, tmp_path, client, mocker, **kwargs):
+        return CoverageIndex(
+            tmp_path / "coverage_index.json",
+            client,
+            QueryBuilder(TABLE_FQN),
+            mocker.MagicMock(),
+            **kwargs,
+        )
+    
+    def test_bounds_from_one_grouped_query(self, tmp_path, client, mocker, today):
+        """Test all symbols are covered by a single grouped query."""
+        index = self._index(tmp_path, client, mocker)
+        
+        young = index.bounds("YOUNG", "1h")
+        delisted = index.bounds("DELISTED", "1h")
+        
+        assert young == (today.replace(tzinfo=None) - timedelta(days=30), None)
+        assert delisted == (datetime(2020, 1, 1), datetime(2020, 4, 9, 23, 0))
+        assert len(client.queries) == 1
+        assert "GROUP BY" in client.queries[0].sql
+    
+    def test_bounds_per_exchange(self, tmp_path, client, mocker, today):
+        """Test an exchange narrows bounds to that exchange's candles."""
+        index = self._index(tmp_path, client, mocker)
+        
+        first, _ = index.bounds("YOUNG", "1h", "BYBIT")
+        
+        assert first == today.replace(tzinfo=None) - timedelta(days=10)
+    
+    def test_unknown_symbol_has_no_bounds(self, tmp_path, client, mocker):
+        """Test a symbol without data returns None."""
+        assert self._index(tmp_path, client, mocker).bounds("NOPE", "1h") is None
+    
+    def test_persisted_index_is_reused(self, tmp_path, client, mocker):
+        """Test a fresh index is read from disk without querying."""
+        self._index(tmp_path, client, mocker).bounds("YOUNG", "1h")
+        
+        bounds = self._index(tmp_path, client, mocker).bounds("DELISTED", "1h")
+        
+        assert bounds[0] == datetime(2020, 1, 1)
+        assert len(client.queries) == 1
+        saved = json.loads((tmp_path / "coverage_index.json").read_text())
+        assert "YOUNG|1h|BYBIT" in saved["entries"]
+    
+    def test_stale_index_refreshed_incrementally(self, tmp_path, client, mocker, today):
+        """Test refresh only aggregates from the previous refresh minus the overlap."""
+        self._index(tmp_path, client, mocker).bounds("YOUNG", "1h")
+        first_refresh = datetime.fromisoformat(
+            json.loads((tmp_path / "coverage_index.json").read_text())["refreshed_at"]
+        )
+        index = self._index(tmp_path, client, mocker, ttl=timedelta(0))
+        
+        young = index.bounds("YOUNG", "1h")
+        delisted = index.bounds("DELISTED", "1h")
+        
+        since = first_refresh - timedelta(hours=24)
+        assert len(client.queries) == 3
+        assert client.queries[1].parameters[0].value == since.replace(tzinfo=timezone.utc)
+        assert young[0] == today.replace(tzinfo=None) - timedelta(days=30)
+        assert delisted[0] == datetime(2020, 1, 1)
+    
+    def test_bounded_all_query_returns_same_rows(self, tmp_path, client, mocker):
+        """Test tight bounds scan less without changing the result."""
+        builder = QueryBuilder(TABLE_FQN)
+        first, last = self._index(tmp_path, client, mocker).bounds("DELISTED", "1h")
+        
+        full = client.run_query(builder.build_all_query("DELISTED", "1h"))
+        tight_query = builder.build_all_query("DELISTED", "1h", first_candle=first, last_candle=last)
+        tight = client.run_query(tight_query)
+        
+        assert [param.value for param in tight_query.parameters[2:]] == [
+            datetime(2020, 1, 1, tzinfo=timezone.utc),
+            datetime(2020, 4, 9, 23, 0, tzinfo=timezone.utc),
+        ]
+        assert tight.rows == full.rows
+        assert len(tight.rows) == 100 * 24
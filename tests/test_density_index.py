@@ -0,0 +1,114 @@
+"""
+Unit tests for the per-symbol density index.
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.density_index import DensityIndex
+from src.neighborhood_fetcher import NeighborhoodFetcher
+from src.query_builder import QueryBuilder
+
+pytest.importorskip("duckdb")
+pyarrow = pytest.importorskip("pyarrow")
+
+from benchmarks.fakes import DuckDBQueryClient, make_candles  # noqa: E402
+
+TABLE_FQN = "p.d.t"
+
+
+@pytest.fixture
+def client():
+    """15-minute candles for January 2024 and March 15 - April 13 2024."""
+    january = make_candles(31 * 96, start=datetime(2024, 1, 1), timeframe='15')
+    march = make_candles(30 * 96, start=datetime(2024, 3, 15), timeframe='15')
+    table = pyarrow.concat_tables([january, march])
+    table = table.append_column("symbol", pyarrow.array(["BTCUSDT"] * table.num_rows))
+    table = table.append_column("timeframe", pyarrow.array(["15"] * table.num_rows))
+    return DuckDBQueryClient(TABLE_FQN, table)
+
+
+class TestDensityIndex:
+    """Test building, persisting and refreshing the density index."""
+    
+    def _index(self, tmp_path, client, mocker, **kwargs):
+        return DensityIndex(
+            tmp_path / "density_index.json",
+            client,
+            QueryBuilder(TABLE_FQN),
+            mocker.MagicMock(),
+            **kwargs,
+        )
+    
+    def test_builds_monthly_counts(self, tmp_path, client, mocker):
+        """Test one aggregate query yields candle counts per month."""
+        index = self._index(tmp_path, client, mocker)
+        
+        counts = index.month_density("BTCUSDT", "15")
+        
+        assert {month: d.candles for month, d in counts.items()} == {
+            "2024-01": 2976, "2024-03": 1632, "2024-04": 1248,
+        }
+        assert counts["2024-03"].first == datetime(2024, 3, 15, tzinfo=timezone.utc)
+        assert counts["2024-04"].last == datetime(2024, 4, 13, 23, 45, tzinfo=timezone.utc)
+        assert len(client.queries) == 1
+        assert "GROUP BY" in client.queries[0].sql
+    
+    def test_persisted_index_is_reused(self, tmp_path, client, mocker):
+        """Test a fresh entry is read from disk without querying."""
+        self._index(tmp_path, client, mocker).month_density("BTCUSDT", "15")
+        
+        counts = self._index(tmp_path, client, mocker).month_density("BTCUSDT", "15")
+        
+        assert counts["2024-01"].candles == 2976
+        assert len(client.queries) == 1
+        saved = json.loads((tmp_path / "density_index.json").read_text())
+        assert "BTCUSDT|15|*" in saved["entries"]
+    
+    def test_instances_sharing_a_file_keep_each_others_entries(self, tmp_path, client, mocker):
+        """Test concurrent requests merge their entries instead of overwriting them."""
+        first = self._index(tmp_path, client, mocker)
+        second = self._index(tmp_path, client, mocker)
+        
+        first.month_density("BTCUSDT", "15")
+        second.month_density("ETHUSDT", "15")
+        
+        saved = json.loads((tmp_path / "density_index.json").read_text())
+        assert set(saved["entries"]) == {"BTCUSDT|15|*", "ETHUSDT|15|*"}
+    
+    def test_stale_entry_refreshed_incrementally(self, tmp_path, client, mocker):
+        """Test refresh only re-counts from the latest stored month."""
+        self._index(tmp_path, client, mocker).month_density("BTCUSDT", "15")
+        index = self._index(tmp_path, client, mocker, ttl=timedelta(0))
+        
+        counts = index.month_density("BTCUSDT", "15")
+        
+        assert len(client.queries) == 2
+        assert client.queries[1].parameters[-1].value == datetime(2024, 4, 1, tzinfo=timezone.utc)
+        assert {month: d.candles for month, d in counts.items()} == {
+            "2024-01": 2976, "2024-03": 1632, "2024-04": 1248,
+        }
+    
+    def test_unreadable_index_is_rebuilt(self, tmp_path, client, mocker):
+        """Test a corrupt index file is ignored and rebuilt."""
+        (tmp_path / "density_index.json").write_text("{not json")
+        
+        counts = self._index(tmp_path, client, mocker).month_density("BTCUSDT", "15")
+        
+        assert counts["2024-04"].candles == 1248
+    
+    def test_density_windows_avoid_expansion(self, tmp_path, client, mocker):
+        """Test density-sized windows fill a gapped neighborhood in one query."""
+        counts = self._index(tmp_path, client, mocker).month_density("BTCUSDT", "15")
+        fetcher = NeighborhoodFetcher(client, QueryBuilder(TABLE_FQN), mocker.MagicMock())
+        center = datetime(2024, 3, 20, 12, 0)
+        
+        static = fetcher.fetch("BTCUSDT", "15", center, 1000, 10)
+        sized = fetcher.fetch("BTCUSDT", "15", center, 1000, 10, month_density=counts)
+        
+        assert static.expansion_rounds >= 1
+        assert sized.expansion_rounds == 0
+        assert sized.complete is True
+        assert sized.rows == static.rows
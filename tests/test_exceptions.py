@@ -197,6 +197,21 @@ class TestErrorMapper:
         assert "BigQuery internal error" in mapped.message
         assert mapped.retryable is True
     
+    def test_map_connection_reset(self):
+        """Test mapping of dropped connections (retryable)."""
+        mapped = ErrorMapper.map_exception(ConnectionResetError("Connection reset by peer"))
+        
+        assert isinstance(mapped, NetworkError)
+        assert "Connection error" in mapped.message
+        assert mapped.retryable is True
+    
+    def test_map_custom_exception_passthrough(self):
+        """Test already-mapped exceptions keep their type and retryability."""
+        original = NetworkError("Slice failed", retryable=True)
+        
+        assert ErrorMapper.map_exception(original) is original
+        assert ErrorMapper.is_retryable(original) is True
+    
     def test_map_with_context(self):
         """Test mapping preserves context."""
         original = google_exceptions.BadRequest("Error")
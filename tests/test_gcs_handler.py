@@ -0,0 +1,174 @@
+"""
+Unit tests for GCS handler streaming uploads.
+"""
+
+import threading
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from src.gcs_handler import COMPOSE_MAX_COMPONENTS, GCSHandler, UPLOAD_CHUNK_ALIGNMENT
+from src.exceptions import GCSUploadError
+
+
+class FakeBlobWriter:
+    """Records chunks written to a resumable upload session."""
+    
+    def __init__(self, fail_on_write=False, fail_on_close=False):
+        self.chunks = []
+        self.closed = False
+        self.fail_on_write = fail_on_write
+        self.fail_on_close = fail_on_close
+        self.threads = set()
+    
+    def write(self, data):
+        self.threads.add(threading.current_thread().name)
+        if self.fail_on_write:
+            raise google_exceptions.Forbidden("denied")
+        self.chunks.append(bytes(data))
+    
+    def close(self):
+        if self.fail_on_close:
+            raise google_exceptions.Forbidden("denied")
+        self.closed = True
+
+
+class TestGCSUploadStream:
+    """Test direct streaming uploads."""
+    
+    @pytest.fixture
+    def handler(self, mocker):
+        """Create GCS handler with mocked storage client."""
+        mocker.patch("src.gcs_handler.storage.Client.from_service_account_json")
+        return GCSHandler("test-bucket", mocker.MagicMock(), mocker.MagicMock())
+    
+    def _open(self, handler, mocker, writer, chunk_size=1):
+        blob = mocker.MagicMock()
+        blob.open.return_value = writer
+        handler.bucket.blob.return_value = blob
+        stream = handler.open_upload_stream("obj.json", content_type="text/csv", chunk_size=chunk_size)
+        return stream, blob
+    
+    def test_stream_uploads_chunks_in_background(self, handler, mocker):
+        """Test data is uploaded in aligned chunks from the uploader thread."""
+        writer = FakeBlobWriter()
+        stream, blob = self._open(handler, mocker, writer)
+        
+        payload = b"x" * (UPLOAD_CHUNK_ALIGNMENT * 2 + 10)
+        with stream:
+            stream.write(payload[:100])
+            stream.write(payload[100:])
+        
+        assert writer.closed
+        assert b"".join(writer.chunks) == payload
+        assert [len(chunk) for chunk in writer.chunks] == [UPLOAD_CHUNK_ALIGNMENT, UPLOAD_CHUNK_ALIGNMENT, 10]
+        assert writer.threads == {"gcs-upload-obj.json"}
+        assert stream.url == "https://storage.googleapis.com/test-bucket/obj.json"
+        assert stream.bytes_written == len(payload)
+        _, kwargs = blob.open.call_args
+        assert kwargs["content_type"] == "text/csv"
+        assert kwargs["chunk_size"] == UPLOAD_CHUNK_ALIGNMENT
+    
+    def test_stream_abort_does_not_finalize(self, handler, mocker):
+        """Test an exception inside the with block discards the upload."""
+        writer = FakeBlobWriter()
+        stream, _ = self._open(handler, mocker, writer)
+        
+        with pytest.raises(RuntimeError):
+            with stream:
+                stream.write(b"partial")
+                raise RuntimeError("serialization failed")
+        
+        assert not writer.closed
+        assert stream.url is None
+    
+    def test_stream_upload_error_is_mapped(self, handler, mocker):
+        """Test uploader thread failures surface as GCSUploadError."""
+        writer = FakeBlobWriter(fail_on_write=True)
+        stream, _ = self._open(handler, mocker, writer)
+        
+        with pytest.raises(GCSUploadError, match="Permission denied") as exc_info:
+            with stream:
+                stream.write(b"y" * (UPLOAD_CHUNK_ALIGNMENT + 1))
+        
+        assert exc_info.value.retryable is False
+        assert not writer.closed
+    
+    def test_finalize_error_is_raised_from_close(self, handler, mocker):
+        """Test a failure finalizing the upload is raised instead of hanging close()."""
+        writer = FakeBlobWriter(fail_on_close=True)
+        stream, _ = self._open(handler, mocker, writer, chunk_size=UPLOAD_CHUNK_ALIGNMENT)
+        stream.write(b"small")
+        
+        errors = []
+        
+        def close():
+            try:
+                stream.close()
+            except GCSUploadError as exc:
+                errors.append(exc)
+        
+        closer = threading.Thread(target=close, daemon=True)
+        closer.start()
+        closer.join(timeout=5)
+        
+        assert not closer.is_alive()
+        assert len(errors) == 1
+        assert "Permission denied" in errors[0].message
+        assert not writer.closed
+
+
+class TestGCSComposeAppend:
+    """Test appending parts to objects with compose."""
+    
+    @pytest.fixture
+    def handler(self, mocker):
+        """Create GCS handler with mocked storage client."""
+        mocker.patch("src.gcs_handler.storage.Client.from_service_account_json")
+        return GCSHandler("test-bucket", mocker.MagicMock(), mocker.MagicMock())
+    
+    def test_part_composed_onto_existing_object(self, handler, mocker):
+        """Test the object and part are composed conditionally and the part deleted."""
+        existing = mocker.MagicMock(generation=7, component_count=3)
+        part = mocker.MagicMock(content_type="text/csv", content_encoding="gzip", cache_control=None)
+        handler.bucket.get_blob.side_effect = lambda name: part if name.endswith(".part") else existing
+        
+        url = handler.compose_append("data.csv", "data.csv.req.part")
+        
+        target = handler.bucket.blob.return_value
+        target.compose.assert_called_once_with([existing, part], if_generation_match=7)
+        assert target.content_encoding == "gzip"
+        part.delete.assert_called_once()
+        assert url == "https://storage.googleapis.com/test-bucket/data.csv"
+    
+    def test_missing_object_created_from_part(self, handler, mocker):
+        """Test the first append creates the object only if it still does not exist."""
+        part = mocker.MagicMock()
+        handler.bucket.get_blob.side_effect = lambda name: part if name.endswith(".part") else None
+        
+        handler.compose_append("data.csv", "data.csv.req.part")
+        
+        handler.bucket.blob.return_value.compose.assert_called_once_with([part], if_generation_match=0)
+    
+    def test_object_at_component_limit_rewritten(self, handler, mocker):
+        """Test an object with the maximum components is rewritten before composing."""
+        existing = mocker.MagicMock(generation=7, component_count=COMPOSE_MAX_COMPONENTS)
+        existing.name = "data.csv"
+        part = mocker.MagicMock(component_count=None)
+        handler.bucket.get_blob.side_effect = lambda name: part if name.endswith(".part") else existing
+        target = handler.bucket.blob.return_value
+        target.generation = 8
+        
+        handler.compose_append("data.csv", "data.csv.req.part")
+        
+        assert existing.download_to_file.call_args.kwargs == {"raw_download": True, "if_generation_match": 7}
+        assert target.upload_from_file.call_args.kwargs == {"if_generation_match": 7}
+        target.compose.assert_called_once_with([target, part], if_generation_match=8)
+    
+    def test_compose_conflict_is_mapped(self, handler, mocker):
+        """Test a concurrent append surfaces as GCSUploadError."""
+        handler.bucket.get_blob.return_value = mocker.MagicMock(generation=1, component_count=None)
+        handler.bucket.blob.return_value.compose.side_effect = google_exceptions.PreconditionFailed("stale")
+        
+        with pytest.raises(GCSUploadError):
+            handler.compose_append("data.csv", "data.csv.req.part")
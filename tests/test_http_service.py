@@ -0,0 +1,156 @@
+"""
+Unit tests for the HTTP service mode.
+"""
+
+import io
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import pytest
+
+from main import parse_args, parse_service_request, validate_args
+from src.exceptions import ValidationError
+from src.http_service import ExtractionService
+
+pytest.importorskip("duckdb")
+pyarrow = pytest.importorskip("pyarrow")
+
+from benchmarks.fakes import DuckDBQueryClient, make_candles  # noqa: E402
+
+TABLE_FQN = "p.d.t"
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def service_url(mocker):
+    table = make_candles(10 * 24, start=START, timeframe='1h')
+    table = table.append_column("symbol", pyarrow.array(["BTCUSDT"] * 10 * 24))
+    engine = DuckDBQueryClient(TABLE_FQN, table.append_column("timeframe", pyarrow.array(["1h"] * 10 * 24)))
+    config = mocker.MagicMock(bq_table_fqn=TABLE_FQN)
+    service = ExtractionService(config, mocker.MagicMock(), engine, parse_service_request, max_concurrent=4)
+    server = service.make_server("127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _get(url, headers=None):
+    with urllib.request.urlopen(urllib.request.Request(url, headers=headers or {}), timeout=10) as response:
+        return response.status, dict(response.headers), response.read()
+
+
+RANGE = "/v1/candles?symbol=BTCUSDT&timeframe=1h&from=2024-01-02T00:00:00Z&to=2024-01-02T23:59:59Z"
+
+
+class TestExtractionService:
+    """Test serving candle requests over HTTP."""
+    
+    def test_range_request_returns_json(self, service_url):
+        """Test a RANGE request streams the candles with metadata and the request ID."""
+        status, headers, body = _get(service_url + RANGE, {"X-Request-ID": "req-1"})
+        document = json.loads(body)
+        
+        assert status == 200
+        assert headers["X-Request-ID"] == "req-1"
+        assert headers["Content-Type"] == "application/json"
+        assert document["metadata"]["query_type"] == "range"
+        assert document["metadata"]["request_id"] == "req-1"
+        assert len(document["data"]) == 24
+        assert document["data"][0]["date"].startswith("2024-01-02T00:00:00")
+    
+    def test_arrow_format(self, service_url):
+        """Test format=arrow returns an Arrow IPC file."""
+        status, headers, body = _get(service_url + RANGE + "&format=arrow&page_size=5")
+        
+        assert status == 200
+        assert headers["Content-Type"] == "application/vnd.apache.arrow.file"
+        assert pyarrow.ipc.open_file(io.BytesIO(body)).read_all().num_rows == 24
+    
+    def test_neighborhood_request(self, service_url):
+        """Test NEIGHBORHOOD parameters are accepted."""
+        _, _, body = _get(
+            service_url + "/v1/candles?symbol=BTCUSDT&timeframe=1h"
+            "&timestamp=2024-01-05T12:00:00Z&n-before=3&n_after=2&compact=true"
+        )
+        
+        assert len(json.loads(body)["data"]) == 6
+    
+    @pytest.mark.parametrize("query,status", [
+        ("symbol=BTCUSDT&timeframe=1h", 400),
+        ("symbol=BTCUSDT&timeframe=1h&all=true&output=/tmp", 400),
+        ("symbol=ETHUSDT&timeframe=1h&all=1", 404),
+    ])
+    def test_errors_map_to_status(self, service_url, query, status):
+        """Test validation and empty results map to HTTP errors with a JSON body."""
+        with pytest.raises(urllib.error.HTTPError) as exc_info:
+            _get(service_url + "/v1/candles?" + query)
+        
+        assert exc_info.value.code == status
+        assert "error_type" in json.loads(exc_info.value.read())
+    
+    def test_concurrent_requests(self, service_url):
+        """Test concurrent requests each receive their own rows."""
+        urls = [
+            service_url + f"/v1/candles?symbol=BTCUSDT&timeframe=1h&compact"
+            f"&from=2024-01-0{day}T00:00:00Z&to=2024-01-0{day}T05:59:59Z"
+            for day in range(1, 9)
+        ]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            documents = [json.loads(body) for _, _, body in pool.map(_get, urls)]
+        
+        for day, document in enumerate(documents, start=1):
+            assert len(document["data"]) == 6
+            assert document["data"][0]["date"].startswith(f"2024-01-0{day}T00:00:00")
+        assert len({document["metadata"]["request_id"] for document in documents}) == 8
+
+
+class TestParseServiceRequest:
+    """Test validation of service query parameters."""
+    
+    def test_range_timestamps_parsed(self):
+        """Test RANGE parameters are validated and parsed."""
+        args, query_mode = parse_service_request({
+            "symbol": "BTCUSDT", "timeframe": "1h",
+            "from": "2024-01-01T00:00:00Z", "to": "2024-01-02T00:00:00Z",
+        })
+        
+        assert query_mode == 'RANGE'
+        assert args.from_ts == datetime(2024, 1, 1)
+        assert args.compact is False
+    
+    def test_neighborhood_budget_default_resolved(self):
+        """Test an omitted expansion budget resolves to the default."""
+        args, query_mode = parse_service_request({
+            "symbol": "BTCUSDT", "timeframe": "1h",
+            "timestamp": "2024-01-01T00:00:00Z", "n_before": "5", "n_after": "5",
+        })
+        
+        assert query_mode == 'NEIGHBORHOOD'
+        assert args.expansion_budget_gb == 10
+    
+    def test_explicit_budget_rejected_with_result_cache(self):
+        """Test --expansion-budget-gb is rejected with --result-cache even at its default."""
+        args = parse_args([
+            "--symbol", "BTCUSDT", "--timeframe", "1h", "--result-cache",
+            "--timestamp", "2024-01-01T00:00:00Z", "--n-before", "5", "--n-after", "5",
+            "--expansion-budget-gb", "10",
+        ])
+        
+        with pytest.raises(ValidationError, match="--result-cache"):
+            validate_args(args)
+    
+    @pytest.mark.parametrize("params", [
+        {"symbol": "BTCUSDT", "timeframe": "1h", "sync": "true"},
+        {"symbol": "BTCUSDT", "timeframe": "1h", "all": "true", "page_size": "x"},
+        {"symbol": "BTCUSDT", "timeframe": "1h", "all": "false"},
+    ])
+    def test_invalid_requests_rejected(self, params):
+        """Test unsupported options and invalid values raise ValidationError."""
+        with pytest.raises(ValidationError):
+            parse_service_request(params)
@@ -0,0 +1,112 @@
+"""
+Unit tests for incremental sync with export watermarks.
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.incremental_sync import IncrementalSync, SyncState
+from src.output_handler import OutputHandler
+from src.query_builder import QueryBuilder
+from src.query_helpers import closed_candle_cutoff
+
+pytest.importorskip("duckdb")
+pyarrow = pytest.importorskip("pyarrow")
+
+from benchmarks.fakes import DuckDBQueryClient, make_candles  # noqa: E402
+
+TABLE_FQN = "p.d.t"
+
+
+def _candles(n_rows, start):
+    table = make_candles(n_rows, start=start, timeframe='1h')
+    table = table.append_column("symbol", pyarrow.array(["BTCUSDT"] * n_rows))
+    return table.append_column("timeframe", pyarrow.array(["1h"] * n_rows))
+
+
+@pytest.fixture
+def today():
+    return datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+@pytest.fixture
+def client(today):
+    """Three days of hourly candles ending two days ago."""
+    return DuckDBQueryClient(TABLE_FQN, _candles(3 * 24, today - timedelta(days=5)))
+
+
+class TestIncrementalSync:
+    """Test watermark-based incremental export."""
+    
+    def _sync(self, tmp_path, client, mocker, output_format="ndjson"):
+        return IncrementalSync(
+            client,
+            QueryBuilder(TABLE_FQN),
+            OutputHandler(mocker.MagicMock(), output_format=output_format),
+            SyncState(tmp_path / "sync_state.json", mocker.MagicMock()),
+            mocker.MagicMock(),
+        )
+    
+    def _run(self, tmp_path, client, mocker, output_format="ndjson"):
+        return self._sync(tmp_path, client, mocker, output_format).run(
+            "BTCUSDT", "1h", tmp_path / "out", use_gcs=False,
+        )
+    
+    def test_first_sync_exports_history(self, tmp_path, client, mocker, today):
+        """Test the first sync exports everything and stores the watermark."""
+        result = self._run(tmp_path, client, mocker)
+        
+        assert result.record_count == 3 * 24
+        assert result.file_path.name == "BTCUSDT_1h_all.ndjson"
+        assert result.watermark == today.replace(tzinfo=None) - timedelta(days=2, hours=1)
+        state = json.loads((tmp_path / "sync_state.json").read_text())
+        assert state["entries"]["BTCUSDT|1h|*"]["record_count"] == 3 * 24
+    
+    def test_second_sync_appends_only_new_candles(self, tmp_path, client, mocker, today):
+        """Test new candles are queried after the watermark and appended."""
+        first = self._run(tmp_path, client, mocker)
+        client.insert(_candles(24, today - timedelta(days=2)))
+        
+        second = self._run(tmp_path, client, mocker)
+        
+        assert second.record_count == 24
+        assert client.queries[-1].parameters[2].value == (
+            first.watermark + timedelta(microseconds=1)
+        ).replace(tzinfo=timezone.utc)
+        lines = second.file_path.read_text().splitlines()
+        assert len(lines) == 4 * 24
+        assert len(set(lines)) == len(lines)
+    
+    def test_up_to_date_writes_nothing(self, tmp_path, client, mocker):
+        """Test a sync without new candles leaves the dataset untouched."""
+        first = self._run(tmp_path, client, mocker)
+        size = first.file_path.stat().st_size
+        
+        result = self._run(tmp_path, client, mocker)
+        
+        assert result.file_path is None
+        assert result.watermark == first.watermark
+        assert first.file_path.stat().st_size == size
+    
+    def test_open_candles_are_not_exported(self, tmp_path, client, mocker, today):
+        """Test candles still being updated wait for a later sync."""
+        now = datetime.now(timezone.utc)
+        client.insert(_candles(2, now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)))
+        
+        result = self._run(tmp_path, client, mocker)
+        
+        assert result.watermark <= closed_candle_cutoff("1h")
+        assert result.record_count == 3 * 24 + 1
+    
+    def test_parquet_sync_writes_new_part(self, tmp_path, client, mocker, today):
+        """Test non-appendable formats get one part file per sync."""
+        pq = pytest.importorskip("pyarrow.parquet")
+        self._run(tmp_path, client, mocker, "parquet")
+        client.insert(_candles(24, today - timedelta(days=2)))
+        
+        self._run(tmp_path, client, mocker, "parquet")
+        
+        parts = sorted((tmp_path / "out" / "BTCUSDT_1h_all").glob("part-*.parquet"))
+        assert [pq.read_metadata(part).num_rows for part in parts] == [3 * 24, 24]
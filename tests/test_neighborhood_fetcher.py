@@ -0,0 +1,153 @@
+"""
+Unit tests for the self-correcting NEIGHBORHOOD fetcher.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from src.exceptions import QueryExecutionError
+from src.neighborhood_fetcher import NeighborhoodFetcher
+from src.query_builder import QueryBuilder
+
+duckdb = pytest.importorskip("duckdb")
+pyarrow = pytest.importorskip("pyarrow")
+
+from benchmarks.fakes import DuckDBQueryClient, make_candles  # noqa: E402
+
+TABLE_FQN = "p.d.t"
+BYTES_PER_QUERY = 1000
+
+
+@pytest.fixture
+def gapped_client():
+    """15-minute candles for January 2024 and from March 15, with a gap between."""
+    january = make_candles(31 * 96, start=datetime(2024, 1, 1), timeframe='15')
+    march = make_candles(30 * 96, start=datetime(2024, 3, 15), timeframe='15')
+    table = pyarrow.concat_tables([january, march])
+    table = table.append_column("symbol", pyarrow.array(["BTCUSDT"] * table.num_rows))
+    table = table.append_column("timeframe", pyarrow.array(["15"] * table.num_rows))
+    return DuckDBQueryClient(TABLE_FQN, table, bytes_per_query=BYTES_PER_QUERY)
+
+
+class TestNeighborhoodFetcher:
+    """Test expansion of short NEIGHBORHOOD results."""
+    
+    CENTER = datetime(2024, 3, 20, 12, 0)
+    
+    def _fetcher(self, client, mocker, **kwargs):
+        return NeighborhoodFetcher(client, QueryBuilder(TABLE_FQN), mocker.MagicMock(), **kwargs)
+    
+    def test_dense_data_needs_no_expansion(self, gapped_client, mocker):
+        """Test a filled result is returned from the first query."""
+        fetcher = self._fetcher(gapped_client, mocker)
+        
+        result = fetcher.fetch("BTCUSDT", "15", self.CENTER, 50, 50)
+        
+        assert result.expansion_rounds == 0
+        assert result.complete is True
+        assert len(result.rows) == 101
+        assert len(gapped_client.queries) == 1
+    
+    @pytest.mark.parametrize("strategy", ["union", "window"])
+    def test_short_side_is_expanded(self, gapped_client, mocker, strategy):
+        """Test only the short side is re-queried until filled."""
+        fetcher = self._fetcher(gapped_client, mocker)
+        
+        result = fetcher.fetch("BTCUSDT", "15", self.CENTER, 1000, 10, strategy=strategy)
+        
+        center = self.CENTER.replace(tzinfo=timezone.utc)
+        timestamps = [row["timestamp"] for row in result.rows]
+        assert result.complete is True
+        assert result.expansion_rounds >= 1
+        assert sum(1 for ts in timestamps if ts < center) == 1000
+        assert sum(1 for ts in timestamps if ts > center) == 10
+        assert timestamps == sorted(timestamps)
+        assert len(set(timestamps)) == len(timestamps)
+        assert all("BEFORE" in query.sql for query in gapped_client.queries[1:])
+    
+    def test_expanded_result_matches_nearest_rows(self, gapped_client, mocker):
+        """Test expansion returns the rows nearest to the center."""
+        fetcher = self._fetcher(gapped_client, mocker)
+        
+        result = fetcher.fetch("BTCUSDT", "15", self.CENTER, 1000, 0)
+        
+        expected = gapped_client.con.execute(
+            f'SELECT timestamp FROM "{TABLE_FQN}" WHERE timestamp <= ? '
+            'ORDER BY timestamp DESC LIMIT 1001',
+            [self.CENTER],
+        ).to_arrow_table().column("timestamp").to_pylist()
+        assert [row["timestamp"] for row in result.rows] == sorted(expected)
+    
+    def test_expansion_disabled(self, gapped_client, mocker):
+        """Test max_rounds=0 returns the short first result."""
+        fetcher = self._fetcher(gapped_client, mocker, max_rounds=0)
+        
+        result = fetcher.fetch("BTCUSDT", "15", self.CENTER, 1000, 10)
+        
+        assert result.expansion_rounds == 0
+        assert result.complete is False
+        assert len(gapped_client.queries) == 1
+    
+    def test_byte_budget_stops_expansion(self, gapped_client, mocker):
+        """Test expansion stops once the bytes billed budget is spent."""
+        fetcher = self._fetcher(gapped_client, mocker, max_bytes_billed=BYTES_PER_QUERY * 2)
+        
+        result = fetcher.fetch("BTCUSDT", "15", self.CENTER, 5000, 10)
+        
+        assert result.complete is False
+        assert result.bytes_billed == BYTES_PER_QUERY * 2
+        assert len(gapped_client.queries) == 2
+    
+    def test_byte_budget_caps_first_query(self, gapped_client, mocker):
+        """Test the first query is refused when it alone exceeds the budget."""
+        fetcher = self._fetcher(gapped_client, mocker, max_bytes_billed=BYTES_PER_QUERY - 1)
+        
+        with pytest.raises(QueryExecutionError):
+            fetcher.fetch("BTCUSDT", "15", self.CENTER, 1000, 10)
+        
+        assert gapped_client.queries == []
+    
+    def test_short_queries_charge_the_byte_budget(self, gapped_client, mocker):
+        """Test queries answered by jobs.query still draw down the budget."""
+        from benchmarks.fakes import FakeBigQueryJobClient
+        from src.bigquery_client import BigQueryClient
+        
+        mocker.patch.object(BigQueryClient, "_initialize_client")
+        bq_client = BigQueryClient(mocker.MagicMock(), mocker.MagicMock())
+        bq_client.client = server = FakeBigQueryJobClient(gapped_client, run_seconds=0)
+        fetcher = NeighborhoodFetcher(
+            bq_client, QueryBuilder(TABLE_FQN), mocker.MagicMock(),
+            max_bytes_billed=BYTES_PER_QUERY * 2,
+        )
+        
+        result = fetcher.fetch("BTCUSDT", "15", self.CENTER, 1000, 10)
+        
+        assert server.stateless_queries == 2
+        assert server.jobs == []
+        assert result.bytes_billed == BYTES_PER_QUERY * 2
+        assert result.complete is False
+    
+    def test_missing_data_stops_at_window_cap(self, gapped_client, mocker):
+        """Test a side that cannot be filled stops at the maximum window."""
+        fetcher = self._fetcher(gapped_client, mocker, max_rounds=20)
+        
+        result = fetcher.fetch("BTCUSDT", "1d", self.CENTER, 0, 10)
+        
+        assert result.complete is False
+        assert result.rows == []
+    
+    def test_other_errors_propagate(self, gapped_client, mocker):
+        """Test query errors other than the byte limit are raised."""
+        fetcher = self._fetcher(gapped_client, mocker)
+        original = gapped_client.run_query
+        
+        def failing(sql, context=None, maximum_bytes_billed=None):
+            if maximum_bytes_billed is not None:
+                raise QueryExecutionError("Bad request")
+            return original(sql, context)
+        
+        gapped_client.run_query = failing
+        
+        with pytest.raises(QueryExecutionError, match="Bad request"):
+            fetcher.fetch("BTCUSDT", "15", self.CENTER, 1000, 10)
@@ -9,7 +9,7 @@ from pathlib import Path
 import pytest
 
 from src.output_handler import OutputHandler
-from src.exceptions import FileSystemError
+from src.exceptions import FileSystemError, ValidationError
 
 
 class TestOutputHandler:
@@ -317,4 +317,323 @@ class TestOutputHandler:
         assert "n_after" in params
         assert params["n_before"] == 10
         assert params["n_after"] == 10
+    
+    
+    def test_transform_batches_is_lazy(self, handler, sample_rows):
+        """Test batches are transformed one at a time as they are consumed."""
+        consumed = []
+        
+        def batches():
+            for row in sample_rows:
+                consumed.append(row)
+                yield [row]
+        
+        stream = handler.transform_batches(batches())
+        assert consumed == []
+        
+        first = next(stream)
+        assert len(consumed) == 1
+        assert first[0]["date"] == "2024-01-01T00:00:00Z"
+    
+    @pytest.mark.parametrize("pretty", [True, False])
+    @pytest.mark.parametrize("with_metadata", [True, False])
+    def test_write_stream_matches_json_dump(self, handler, sample_rows, tmp_path, with_metadata, pretty):
+        """Test streamed output is byte-identical to json.dump (pretty and compact)."""
+        transformed = handler.transform_results(sample_rows)
+        metadata = {
+            "request_id": "test-stream-1",
+            "symbol": "BTCUSDT",
+            "query_parameters": {"n_before": 10, "note": "ünïcode"},
+        } if with_metadata else None
+        
+        file_path, gcs_url, record_count = handler.write_stream(
+            [transformed[:1], [], transformed[1:]],
+            tmp_path,
+            "BTCUSDT",
+            "1d",
+            metadata=metadata,
+            pretty=pretty,
+        )
+        
+        expected = {"metadata": metadata, "data": transformed} if with_metadata else transformed
+        dump_options = {"indent": 2} if pretty else {"separators": (",", ":")}
+        assert record_count == 2
+        assert gcs_url is None
+        assert file_path.read_text(encoding="utf-8") == json.dumps(
+            expected, ensure_ascii=False, **dump_options
+        )
+    
+    @pytest.mark.parametrize("pretty", [True, False])
+    def test_write_stream_empty_with_metadata(self, handler, tmp_path, pretty):
+        """Test streaming no batches still produces a valid document."""
+        metadata = {"request_id": "empty", "query_parameters": {}}
+        
+        file_path, _, record_count = handler.write_stream(
+            iter([]), tmp_path, "BTCUSDT", "1d", metadata=metadata, pretty=pretty
+        )
+        
+        assert record_count == 0
+        assert json.loads(file_path.read_text()) == {"metadata": metadata, "data": []}
+    
+    def test_transform_columns_arrow_matches_rows(self, handler, sample_rows):
+        """Test Arrow columnar transform matches per-row transform."""
+        pyarrow = pytest.importorskip("pyarrow")
+        batch = pyarrow.RecordBatch.from_pylist(sample_rows)
+        
+        assert handler.transform_columns(batch) == handler.transform_results(sample_rows)
+    
+    def test_transform_columns_numpy_epoch_micros(self, handler, sample_rows):
+        """Test NumPy columns with int64 epoch microseconds and missing columns."""
+        numpy = pytest.importorskip("numpy")
+        columns = {
+            "timestamp": numpy.array(
+                [int(row["timestamp"].timestamp() * 1_000_000) for row in sample_rows],
+                dtype=numpy.int64,
+            ),
+            "open": numpy.array([row["open"] for row in sample_rows], dtype=numpy.float32),
+            "high": numpy.array([row["high"] for row in sample_rows]),
+            "low": numpy.array([row["low"] for row in sample_rows]),
+            "close": numpy.array([row["close"] for row in sample_rows]),
+        }
+        
+        transformed = handler.transform_columns(columns)
+        
+        assert transformed[1]["date"] == "2024-01-02T00:00:00Z"
+        assert transformed[0]["open"] == 42000.5
+        assert transformed[0]["volume"] == 0.0
+        assert list(transformed[0].keys()) == OutputHandler.CANDLE_FIELDS
+    
+    def test_transform_batches_mixed_inputs(self, handler, sample_rows):
+        """Test transform_batches routes row and columnar batches."""
+        pyarrow = pytest.importorskip("pyarrow")
+        batches = [sample_rows[:1], pyarrow.RecordBatch.from_pylist(sample_rows[1:])]
+        
+        transformed = [record for batch in handler.transform_batches(batches) for record in batch]
+        
+        assert transformed == handler.transform_results(sample_rows)
 
+
+class TestOutputFormats:
+    """Test pluggable output format writers."""
+    
+    @pytest.fixture
+    def records(self):
+        """Create transformed candle records."""
+        return [
+            {"date": "2024-01-01T00:00:00Z", "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 10.0},
+            {"date": "2024-01-02T00:00:00Z", "open": 1.5, "high": 2.5, "low": 1.0, "close": 2.0, "volume": 20.0},
+            {"date": "2024-01-03T00:00:00Z", "open": 2.0, "high": 3.0, "low": 1.5, "close": 2.5, "volume": 30.0},
+        ]
+    
+    @pytest.fixture
+    def metadata(self):
+        return {"request_id": "fmt-1", "symbol": "BTCUSDT", "query_parameters": {}}
+    
+    def _write(self, mocker, tmp_path, records, metadata, output_format, **writer_options):
+        mocker.patch('src.output_handler.get_request_id', return_value='fmt-1')
+        handler = OutputHandler(mocker.MagicMock(), output_format=output_format, writer_options=writer_options)
+        file_path, _, record_count = handler.write_stream(
+            [records[:2], records[2:]], tmp_path, "BTCUSDT", "1d", metadata=metadata
+        )
+        assert record_count == len(records)
+        return file_path
+    
+    def test_unknown_format(self, mocker):
+        """Test unknown formats are rejected."""
+        with pytest.raises(ValidationError, match="Unsupported output format"):
+            OutputHandler(mocker.MagicMock(), output_format="xml")
+    
+    def test_ndjson(self, mocker, tmp_path, records, metadata):
+        """Test NDJSON writes only records, one per line."""
+        file_path = self._write(mocker, tmp_path, records, metadata, "ndjson")
+        
+        lines = [json.loads(line) for line in file_path.read_text().splitlines()]
+        assert file_path.name == "fmt-1.ndjson"
+        assert lines == records
+    
+    def test_ndjson_metadata_line(self, mocker, tmp_path, records, metadata):
+        """Test the metadata_line option writes the metadata as the first line."""
+        file_path = self._write(mocker, tmp_path, records, metadata, "ndjson", metadata_line=True)
+        
+        lines = [json.loads(line) for line in file_path.read_text().splitlines()]
+        assert lines[0] == {"metadata": metadata}
+        assert lines[1:] == records
+    
+    def test_csv(self, mocker, tmp_path, records, metadata):
+        """Test CSV writes metadata comment, header and rows."""
+        file_path = self._write(mocker, tmp_path, records, metadata, "csv")
+        
+        lines = file_path.read_text().splitlines()
+        assert json.loads(lines[0][len("# metadata: "):]) == metadata
+        assert lines[1] == "date,open,high,low,close,volume"
+        assert lines[2] == "2024-01-01T00:00:00Z,1.0,2.0,0.5,1.5,10.0"
+        assert len(lines) == 5
+    
+    def test_csv_append_writes_header_once(self, mocker, tmp_path, records):
+        """Test appending to an existing CSV file adds rows without a header."""
+        handler = OutputHandler(mocker.MagicMock(), output_format="csv")
+        
+        for batch in (records[:2], records[2:]):
+            file_path, _, _ = handler.write_stream(
+                [batch], tmp_path, "BTCUSDT", "1d", name="BTCUSDT_1d_all", append=True
+            )
+        
+        lines = file_path.read_text().splitlines()
+        assert file_path.name == "BTCUSDT_1d_all.csv"
+        assert lines[0] == "date,open,high,low,close,volume"
+        assert len(lines) == 4
+    
+    def test_symbol_streams_split_per_symbol(self, mocker, tmp_path):
+        """Test a stream grouped by symbol is written to one file per symbol in one pass."""
+        mocker.patch('src.output_handler.get_request_id', return_value='multi-1')
+        handler = OutputHandler(
+            mocker.MagicMock(), output_format="ndjson", writer_options={"metadata_line": True},
+        )
+        
+        def row(symbol, day):
+            return {"symbol": symbol, "timestamp": datetime(2024, 1, day, tzinfo=timezone.utc),
+                    "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 10.0}
+        
+        # ETHUSDT spans a page boundary
+        batches = [[row("BTCUSDT", 1), row("BTCUSDT", 2), row("ETHUSDT", 1)], [row("ETHUSDT", 2)]]
+        results = handler.write_symbol_streams(batches, tmp_path, "1d", metadata={"request_id": "multi-1"})
+        
+        assert list(results) == ["BTCUSDT", "ETHUSDT"]
+        eth_path, _, eth_count = results["ETHUSDT"]
+        assert eth_path == tmp_path / "multi-1" / "ETHUSDT.ndjson"
+        assert eth_count == 2
+        lines = [json.loads(line) for line in eth_path.read_text().splitlines()]
+        assert lines[0]["metadata"]["symbol"] == "ETHUSDT"
+        assert [line["date"] for line in lines[1:]] == ["2024-01-01T00:00:00Z", "2024-01-02T00:00:00Z"]
+    
+    def test_append_rejected_for_json(self, mocker, tmp_path, records):
+        """Test formats that cannot be concatenated refuse to append."""
+        handler = OutputHandler(mocker.MagicMock(), output_format="json")
+        
+        with pytest.raises(ValidationError, match="Appending is not supported"):
+            handler.write_stream([records], tmp_path, "BTCUSDT", "1d", append=True)
+    
+    def test_parquet(self, mocker, tmp_path, records, metadata):
+        """Test Parquet honors row group size and stores metadata in the schema."""
+        pytest.importorskip("pyarrow")
+        import pyarrow.parquet as pq
+        
+        file_path = self._write(
+            mocker, tmp_path, records, metadata, "parquet", row_group_size=2, compression="snappy"
+        )
+        
+        parquet_file = pq.ParquetFile(file_path)
+        assert parquet_file.metadata.num_row_groups == 2
+        assert parquet_file.metadata.row_group(0).column(1).compression == "SNAPPY"
+        assert json.loads(parquet_file.schema_arrow.metadata[b"metadata"]) == metadata
+        table = parquet_file.read()
+        assert table.column("close").to_pylist() == [1.5, 2.0, 2.5]
+        assert table.column("date")[0].as_py() == datetime(2024, 1, 1, tzinfo=timezone.utc)
+    
+    def test_arrow_ipc(self, mocker, tmp_path, records, metadata):
+        """Test Arrow IPC file is readable as Feather with metadata."""
+        pyarrow = pytest.importorskip("pyarrow")
+        import pyarrow.feather
+        
+        file_path = self._write(mocker, tmp_path, records, metadata, "arrow")
+        
+        table = pyarrow.feather.read_table(file_path)
+        assert table.num_rows == 3
+        assert json.loads(table.schema.metadata[b"metadata"]) == metadata
+    
+    def test_gcs_upload_streams_with_format_content_type(self, mocker, tmp_path, records):
+        """Test GCS output is streamed with the content type of the output format."""
+        import io
+        mocker.patch('src.output_handler.get_request_id', return_value='fmt-1')
+        
+        class FakeStream(io.BytesIO):
+            url = "https://storage.googleapis.com/b/fmt-1.ndjson"
+            bytes_written = 0
+            
+            def close(self):
+                self.uploaded = self.getvalue()
+                super().close()
+        
+        stream = FakeStream()
+        gcs_handler = mocker.MagicMock()
+        gcs_handler.open_upload_stream.return_value = stream
+        handler = OutputHandler(mocker.MagicMock(), gcs_handler=gcs_handler, output_format="ndjson")
+        
+        file_path, gcs_url, _ = handler.write_stream([records], tmp_path, "BTCUSDT", "1d")
+        
+        assert gcs_url.endswith("fmt-1.ndjson")
+        assert file_path.name == "fmt-1.ndjson"
+        assert not (tmp_path / "fmt-1.ndjson").exists()
+        assert len(stream.uploaded.splitlines()) == 3
+        _, kwargs = gcs_handler.open_upload_stream.call_args
+        assert kwargs["content_type"] == "application/x-ndjson"
+
+
+class TestOutputCompression:
+    """Test streaming compression of text outputs."""
+    
+    @pytest.fixture
+    def records(self):
+        return [
+            {"date": f"2024-01-{day:02d}T00:00:00Z", "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 10.0}
+            for day in range(1, 29)
+        ]
+    
+    def test_gzip_local(self, mocker, tmp_path, records):
+        """Test gzip output decompresses to the uncompressed document."""
+        import gzip
+        mocker.patch('src.output_handler.get_request_id', return_value='gz-1')
+        logger = mocker.MagicMock()
+        handler = OutputHandler(logger, compression="gzip", compression_level=9)
+        
+        file_path, _, record_count = handler.write_stream([records], tmp_path, "BTCUSDT", "1d")
+        
+        assert file_path.name == "gz-1.json.gz"
+        raw = gzip.decompress(file_path.read_bytes())
+        assert raw == json.dumps(records, indent=2).encode()
+        fields = logger.info.call_args.kwargs["extra"]["fields"]
+        assert fields["raw_size_bytes"] == len(raw)
+        assert fields["file_size_bytes"] < len(raw)
+        assert fields["compression"] == "gzip"
+    
+    def test_zstd_local(self, mocker, tmp_path, records):
+        """Test zstd output round trip."""
+        zstandard = pytest.importorskip("zstandard")
+        mocker.patch('src.output_handler.get_request_id', return_value='zst-1')
+        handler = OutputHandler(mocker.MagicMock(), output_format="ndjson", compression="zstd")
+        
+        file_path, _, _ = handler.write_stream([records], tmp_path, "BTCUSDT", "1d")
+        
+        assert file_path.name == "zst-1.ndjson.zst"
+        raw = zstandard.ZstdDecompressor().stream_reader(file_path.read_bytes()).read()
+        assert len(raw.splitlines()) == len(records)
+    
+    @pytest.mark.parametrize("compression,level", [("gzip", 10), ("gzip", -1), ("zstd", 0), ("zstd", 23)])
+    def test_compression_level_out_of_range(self, mocker, compression, level):
+        """Test levels outside the codec's range are rejected up front."""
+        with pytest.raises(ValidationError, match="out of range"):
+            OutputHandler(mocker.MagicMock(), compression=compression, compression_level=level)
+    
+    def test_compression_rejected_for_binary_formats(self, mocker):
+        """Test outer compression is refused for natively compressed formats."""
+        with pytest.raises(ValidationError, match="not supported for parquet"):
+            OutputHandler(mocker.MagicMock(), output_format="parquet", compression="gzip")
+    
+    def test_gzip_gcs_sets_transcoding_metadata(self, mocker, tmp_path, records):
+        """Test gzip GCS objects keep their name and use Content-Encoding."""
+        import io
+        mocker.patch('src.output_handler.get_request_id', return_value='gz-2')
+        stream = io.BytesIO()
+        stream.url = "https://storage.googleapis.com/b/gz-2.json"
+        stream.bytes_written = 0
+        gcs_handler = mocker.MagicMock()
+        gcs_handler.open_upload_stream.return_value = stream
+        handler = OutputHandler(mocker.MagicMock(), gcs_handler=gcs_handler, compression="gzip")
+        
+        handler.write_stream([records], tmp_path, "BTCUSDT", "1d")
+        
+        args, kwargs = gcs_handler.open_upload_stream.call_args
+        assert args[0] == "gz-2.json"
+        assert kwargs["content_type"] == "application/json"
+        assert kwargs["content_encoding"] == "gzip"
+        assert "no-transform" not in kwargs["cache_control"]
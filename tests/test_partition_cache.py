@@ -0,0 +1,195 @@
+"""
+Unit tests for the local partition-level result cache.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.cached_fetcher import CachedFetcher
+from src.neighborhood_fetcher import NeighborhoodFetcher
+from src.query_builder import QueryBuilder
+
+pytest.importorskip("duckdb")
+pyarrow = pytest.importorskip("pyarrow")
+
+from benchmarks.fakes import DuckDBQueryClient, make_candles  # noqa: E402
+from src.partition_cache import PartitionCache  # noqa: E402
+
+TABLE_FQN = "p.d.t"
+
+
+@pytest.fixture
+def today():
+    return datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+@pytest.fixture
+def client(today):
+    """Hourly candles for the last 20 days plus the first hours of today."""
+    n_rows = 20 * 24 + 3
+    table = make_candles(n_rows, start=today - timedelta(days=20), timeframe='1h')
+    table = table.append_column("symbol", pyarrow.array(["BTCUSDT"] * n_rows))
+    return DuckDBQueryClient(TABLE_FQN, table.append_column("timeframe", pyarrow.array(["1h"] * n_rows)))
+
+
+def _days_ago(today, days):
+    return today.replace(tzinfo=None) - timedelta(days=days)
+
+
+class TestCachedFetcher:
+    """Test serving RANGE and NEIGHBORHOOD requests through the partition cache."""
+    
+    def _fetcher(self, tmp_path, client, mocker, **kwargs):
+        cache = PartitionCache(tmp_path / "partitions", mocker.MagicMock(), **kwargs)
+        return CachedFetcher(client, QueryBuilder(TABLE_FQN), cache, mocker.MagicMock())
+    
+    def _rows(self, fetcher, start, end):
+        return [row for batch in fetcher.iter_range("BTCUSDT", "1h", start, end) for row in batch]
+    
+    def test_repeated_range_served_from_cache(self, tmp_path, client, mocker, today):
+        """Test a repeated range is read from disk with the same rows."""
+        start, end = _days_ago(today, 5) + timedelta(hours=7), _days_ago(today, 2) + timedelta(hours=3)
+        direct = client.run_query(QueryBuilder(TABLE_FQN).build_range_query("BTCUSDT", "1h", start, end)).rows
+        client.queries.clear()
+        
+        first = self._rows(self._fetcher(tmp_path, client, mocker), start, end)
+        second = self._rows(self._fetcher(tmp_path, client, mocker), start, end)
+        
+        assert first == second == direct
+        assert len(client.queries) == 1
+        assert (tmp_path / "partitions" / "BTCUSDT" / "1h" / "_").is_dir()
+    
+    def test_only_missing_days_fetched(self, tmp_path, client, mocker, today):
+        """Test a wider range fetches one query per run of missing days."""
+        fetcher = self._fetcher(tmp_path, client, mocker)
+        self._rows(fetcher, _days_ago(today, 5), _days_ago(today, 3))
+        client.queries.clear()
+        
+        rows = self._rows(fetcher, _days_ago(today, 8), _days_ago(today, 1))
+        
+        assert len(rows) == 7 * 24 + 1
+        assert [query.parameters[2].value.date() for query in client.queries] == [
+            _days_ago(today, 8).date(),
+            _days_ago(today, 2).date(),
+        ]
+    
+    def test_days_without_candles_are_cached(self, tmp_path, client, mocker, today):
+        """Test empty days before the first candle are not re-fetched."""
+        fetcher = self._fetcher(tmp_path, client, mocker)
+        
+        assert self._rows(fetcher, _days_ago(today, 30), _days_ago(today, 25)) == []
+        assert self._rows(fetcher, _days_ago(today, 30), _days_ago(today, 25)) == []
+        assert len(client.queries) == 1
+    
+    def test_current_day_always_queried(self, tmp_path, client, mocker, today):
+        """Test the incomplete current day is never cached."""
+        fetcher = self._fetcher(tmp_path, client, mocker)
+        end = today.replace(tzinfo=None) + timedelta(hours=23)
+        
+        self._rows(fetcher, _days_ago(today, 1), end)
+        rows = self._rows(fetcher, _days_ago(today, 1), end)
+        
+        assert len(rows) == 24 + 3
+        assert len(client.queries) == 3
+        assert client.queries[-1].parameters[2].value == today
+    
+    def test_modified_partitions_invalidated(self, tmp_path, client, mocker, today):
+        """Test only partitions modified after the snapshot are re-fetched."""
+        fetcher = self._fetcher(tmp_path, client, mocker)
+        fetcher.sync_snapshot()
+        self._rows(fetcher, _days_ago(today, 5), _days_ago(today, 1))
+        
+        client.modify_partitions([_days_ago(today, 3).strftime("%Y%m%d")])
+        fetcher = self._fetcher(tmp_path, client, mocker)
+        fetcher.sync_snapshot()
+        client.queries.clear()
+        self._rows(fetcher, _days_ago(today, 5), _days_ago(today, 1))
+        
+        assert len(client.queries) == 1
+        assert client.queries[0].parameters[2].value.date() == _days_ago(today, 3).date()
+        assert fetcher.cache.snapshot == client.modified.replace(tzinfo=None)
+    
+    def test_unpartitioned_changes_drop_everything(self, tmp_path, client, mocker, today):
+        """Test rows in the streaming buffer invalidate the whole cache."""
+        fetcher = self._fetcher(tmp_path, client, mocker)
+        fetcher.sync_snapshot()
+        self._rows(fetcher, _days_ago(today, 5), _days_ago(today, 1))
+        
+        client.modify_partitions(["__UNPARTITIONED__"])
+        fetcher.sync_snapshot()
+        
+        assert fetcher.cache.total_bytes == 0
+        assert list((tmp_path / "partitions").rglob("*.parquet")) == []
+    
+    def test_least_recently_used_days_evicted(self, tmp_path, client, mocker, today):
+        """Test the cache is trimmed to its size limit oldest access first."""
+        fetcher = self._fetcher(tmp_path, client, mocker)
+        self._rows(fetcher, _days_ago(today, 6), _days_ago(today, 1))
+        day_size = fetcher.cache.total_bytes // 6
+        
+        fetcher = self._fetcher(tmp_path, client, mocker, max_bytes=day_size * 3)
+        self._rows(fetcher, _days_ago(today, 2), _days_ago(today, 1))
+        
+        cached = sorted(path.stem for path in (tmp_path / "partitions").rglob("*.parquet"))
+        assert fetcher.cache.total_bytes <= day_size * 3
+        assert len(cached) <= 3
+        assert _days_ago(today, 1).date().isoformat() in cached
+        assert _days_ago(today, 6).date().isoformat() not in cached
+    
+    def test_neighborhood_served_from_cache(self, tmp_path, client, mocker, today):
+        """Test NEIGHBORHOOD rows match the direct fetch and repeat without queries."""
+        center = _days_ago(today, 10) + timedelta(hours=12)
+        expected = NeighborhoodFetcher(client, QueryBuilder(TABLE_FQN), mocker.MagicMock()).fetch(
+            "BTCUSDT", "1h", center, 30, 30,
+        )
+        fetcher = self._fetcher(tmp_path, client, mocker)
+        
+        first = fetcher.fetch_neighborhood("BTCUSDT", "1h", center, 30, 30)
+        client.queries.clear()
+        second = fetcher.fetch_neighborhood("BTCUSDT", "1h", center, 30, 30)
+        
+        assert first.rows == second.rows == expected.rows
+        assert first.complete
+        assert client.queries == []
+    
+    def test_instances_sharing_a_directory_merge_manifests(self, tmp_path, client, mocker, today):
+        """Test concurrent requests keep each other's days and leave no orphaned files."""
+        first = self._fetcher(tmp_path, client, mocker)
+        second = self._fetcher(tmp_path, client, mocker)
+        
+        self._rows(first, _days_ago(today, 6), _days_ago(today, 4))
+        self._rows(second, _days_ago(today, 3), _days_ago(today, 1))
+        
+        reopened = self._fetcher(tmp_path, client, mocker)
+        client.queries.clear()
+        rows = self._rows(reopened, _days_ago(today, 6), _days_ago(today, 1))
+        
+        assert len(rows) == 5 * 24 + 1
+        assert client.queries == []
+        files = list((tmp_path / "partitions").rglob("*.parquet"))
+        assert len(files) == 6
+        assert list((tmp_path / "partitions").rglob("*.tmp")) == []
+    
+    def test_evicted_day_is_queried_directly(self, tmp_path, client, mocker, today):
+        """Test a day evicted by another instance is re-queried instead of failing."""
+        fetcher = self._fetcher(tmp_path, client, mocker)
+        start, end = _days_ago(today, 3), _days_ago(today, 2)
+        expected = self._rows(fetcher, start, end)
+        
+        for path in (tmp_path / "partitions").rglob("*.parquet"):
+            path.unlink()
+        
+        assert self._rows(fetcher, start, end) == expected
+    
+    def test_short_neighborhood_side_keeps_every_candle(self, tmp_path, client, mocker, today):
+        """Test a before side shorter than requested returns all its candles."""
+        center = _days_ago(today, 20) + timedelta(hours=29)
+        fetcher = self._fetcher(tmp_path, client, mocker)
+        
+        result = fetcher.fetch_neighborhood("BTCUSDT", "1h", center, 40, 5, max_rounds=0)
+        
+        center_utc = center.replace(tzinfo=timezone.utc)
+        assert sum(1 for row in result.rows if row["timestamp"] < center_utc) == 29
+        assert result.rows[0]["timestamp"] == _days_ago(today, 20).replace(tzinfo=timezone.utc)
+        assert result.complete is False
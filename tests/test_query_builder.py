@@ -13,10 +13,14 @@ from src.query_helpers import (
     calculate_default_time_range,
     validate_symbol_format,
     validate_timeframe,
+    plan_time_slices,
+    snap_time_range,
+    calculate_density_window,
+    MonthDensity,
     RECORDS_PER_DAY,
 )
 from src.query_validator import QueryValidator, QueryValidationError
-from src.query_builder import QueryBuilder
+from src.query_builder import QueryBuilder, NEIGHBORHOOD_STRATEGIES, parameter_value
 
 
 class TestQueryHelpers:
@@ -112,6 +116,97 @@ class TestQueryHelpers:
         assert validate_timeframe('30m') is False
         assert validate_timeframe('2h') is False
         assert validate_timeframe('invalid') is False
+    
+    @pytest.fixture
+    def gapped_density(self):
+        """Monthly density with January data, an empty February and a mid-March listing gap."""
+        return {
+            '2024-01': MonthDensity(2976, datetime(2024, 1, 1), datetime(2024, 1, 31, 23, 45)),
+            '2024-03': MonthDensity(1632, datetime(2024, 3, 15), datetime(2024, 3, 31, 23, 45)),
+        }
+    
+    def test_calculate_density_window_skips_gaps(self, gapped_density):
+        """Test density window stretches over gaps to reach enough candles."""
+        center = datetime(2024, 3, 20)
+        
+        # 480 candles in March, the rest from late January
+        assert calculate_density_window(gapped_density, center, 1000, 'before') == 55
+        assert calculate_density_window(gapped_density, center, 100, 'before') == 3
+    
+    def test_calculate_density_window_stops_at_data_edge(self, gapped_density):
+        """Test window never extends past the first/last candle."""
+        center = datetime(2024, 3, 20, tzinfo=timezone.utc)
+        
+        assert calculate_density_window(gapped_density, center, 10 ** 6, 'before') == 80
+        assert calculate_density_window(gapped_density, center, 10 ** 6, 'after') == 13
+        assert calculate_density_window(gapped_density, datetime(2023, 6, 1), 10, 'before') == 1
+    
+    def test_calculate_adaptive_window_uses_density(self, gapped_density):
+        """Test adaptive window delegates to density when provided."""
+        center = datetime(2024, 3, 20)
+        
+        assert calculate_adaptive_window('15', 1000, gapped_density, center, 'before') == 55
+        assert calculate_adaptive_window('15', 1000) == 12
+    
+    def test_format_timestamp_canonical(self):
+        """Test equal instants format to the same UTC literal."""
+        aware = datetime(2024, 6, 15, 14, 30, tzinfo=timezone(timedelta(hours=2)))
+        
+        assert format_timestamp_for_bigquery(aware) == '2024-06-15 12:30:00'
+        assert format_timestamp_for_bigquery(datetime(2024, 6, 15, 12, 30)) == '2024-06-15 12:30:00'
+    
+    def test_snap_time_range(self):
+        """Test generated ranges widen to partition and candle boundaries."""
+        start = datetime(2010, 3, 5, 13, 7, 12, 345)
+        
+        assert snap_time_range(start, datetime(2025, 3, 1, 13, 7, 42, 1), '15') == (
+            datetime(2010, 3, 5), datetime(2025, 3, 1, 13, 15),
+        )
+        assert snap_time_range(start, datetime(2025, 3, 1, 13, 14, 59), '15')[1] == datetime(2025, 3, 1, 13, 15)
+        assert snap_time_range(start, datetime(2025, 3, 1, 13, 7), '1d')[1] == datetime(2025, 3, 2)
+        assert snap_time_range(start, datetime(2025, 3, 1, 13, 0), '1h')[1] == datetime(2025, 3, 1, 13, 0)
+    
+    def test_plan_time_slices_day_aligned(self):
+        """Test slices break on UTC midnight and clip to the range."""
+        start = datetime(2024, 1, 1, 6, 0, tzinfo=timezone.utc)
+        end = datetime(2024, 1, 3, 12, 0, tzinfo=timezone.utc)
+        
+        slices = plan_time_slices(start, end, '1', 1440)
+        
+        assert [s for s, _ in slices] == [
+            start,
+            datetime(2024, 1, 2, tzinfo=timezone.utc),
+            datetime(2024, 1, 3, tzinfo=timezone.utc),
+        ]
+        assert slices[0][1] == datetime(2024, 1, 1, 23, 59, 59, 999999, tzinfo=timezone.utc)
+        assert slices[-1][1] == end
+    
+    def test_plan_time_slices_contiguous(self):
+        """Test slices cover the range without gaps or overlaps."""
+        start = datetime(2020, 3, 5, 13, 45)
+        end = datetime(2024, 11, 20, 8, 0)
+        
+        slices = plan_time_slices(start, end, '1h', 24 * 30)
+        
+        assert slices[0][0] == start
+        assert slices[-1][1] == end
+        for (_, prev_end), (next_start, _) in zip(slices, slices[1:]):
+            assert next_start - prev_end == timedelta(microseconds=1)
+            assert next_start.time() == datetime.min.time()
+    
+    def test_plan_time_slices_sized_by_timeframe(self):
+        """Test days per slice follow RECORDS_PER_DAY."""
+        start = datetime(2024, 1, 1)
+        end = datetime(2024, 12, 31, 23, 59)
+        
+        assert len(plan_time_slices(start, end, '1', 1440 * 7)) == 53
+        assert len(plan_time_slices(start, end, '1d', 1000)) == 1
+        assert len(plan_time_slices(start, end, '1', 1)) == 366
+    
+    def test_plan_time_slices_invalid_range(self):
+        """Test reversed range raises ValueError."""
+        with pytest.raises(ValueError):
+            plan_time_slices(datetime(2024, 2, 1), datetime(2024, 1, 1), '1d', 100)
 
 
 class TestQueryValidator:
@@ -178,6 +273,11 @@ class TestQueryValidator:
         # Should not raise
 
 
+def parameter_values(query):
+    """Map a ParameterizedQuery's parameter names to values."""
+    return {param.name: parameter_value(param) for param in query.parameters}
+
+
 class TestQueryBuilder:
     """Test query builder."""
     
@@ -191,19 +291,71 @@ class TestQueryBuilder:
         query = builder.build_all_query('BTCUSDT', '1d')
         
         # Check query contains required elements
-        assert 'test-project.test_dataset.test_table' in query
-        assert "symbol = 'BTCUSDT'" in query
-        assert "timeframe = '1d'" in query
-        assert 'timestamp >=' in query
-        assert 'timestamp <=' in query
-        assert 'ORDER BY' in query
-        assert 'timestamp ASC' in query
+        assert 'test-project.test_dataset.test_table' in query.sql
+        assert "symbol = @symbol" in query.sql
+        assert "timeframe = @timeframe" in query.sql
+        assert 'timestamp >=' in query.sql
+        assert 'timestamp <=' in query.sql
+        assert 'ORDER BY' in query.sql
+        assert 'timestamp ASC' in query.sql
+        assert parameter_values(query)['symbol'] == 'BTCUSDT'
+        assert parameter_values(query)['timeframe'] == '1d'
     
     def test_build_all_query_with_exchange(self, builder):
         """Test ALL query with exchange filter."""
         query = builder.build_all_query('BTCUSDT', '1d', exchange='BINANCE')
         
-        assert "exchange = 'BINANCE'" in query
+        assert "exchange = @exchange" in query.sql
+        assert parameter_values(query)['exchange'] == 'BINANCE'
+    
+    def test_values_are_never_interpolated(self, builder):
+        """Test symbols share one cached template and values stay out of the SQL."""
+        btc = builder.build_all_query('BTCUSDT', '1d')
+        odd = builder.build_all_query("O'HARE", '1d')
+        
+        assert btc.sql is odd.sql
+        assert "O'HARE" not in odd.sql
+        assert [p.type_ for p in odd.parameters] == ['STRING', 'STRING', 'TIMESTAMP', 'TIMESTAMP']
+    
+    def test_template_validated_once(self, builder, mocker):
+        """Test each template shape is rendered and validated only once."""
+        validate = mocker.spy(builder.validator, 'validate_template')
+        
+        for symbol in ('BTCUSDT', 'ETHUSDT', 'SOLUSDT'):
+            builder.build_all_query(symbol, '1h')
+        builder.build_all_query('BTCUSDT', '1h', exchange='BINANCE')
+        
+        assert validate.call_count == 2
+    
+    def test_build_all_query_is_canonical(self, builder):
+        """Test repeated ALL requests produce byte-identical SQL."""
+        query = builder.build_all_query('BTCUSDT', '1d')
+        
+        assert query == builder.build_all_query('BTCUSDT', '1d')
+        assert '\n\n' not in query.sql
+        assert all(line == line.rstrip() for line in query.sql.splitlines())
+        assert parameter_values(query)['to_timestamp'].time() == datetime.min.time()
+    
+    def test_build_all_query_with_coverage_bounds(self, builder):
+        """Test ALL query narrowed to known candle bounds within 15 years."""
+        first = datetime(2024, 6, 1, tzinfo=timezone.utc)
+        last = datetime(2024, 9, 30, 23, 0)
+        
+        query = builder.build_all_query('BTCUSDT', '1h', first_candle=first, last_candle=last)
+        ancient = builder.build_all_query('BTCUSDT', '1h', first_candle=datetime(1990, 1, 1))
+        
+        assert parameter_values(query)['from_timestamp'] == first
+        assert parameter_values(query)['to_timestamp'] == last.replace(tzinfo=timezone.utc)
+        assert parameter_values(ancient)['from_timestamp'].year > 1990
+    
+    def test_build_coverage_query(self, builder):
+        """Test coverage query groups all symbols with a timestamp predicate."""
+        query = builder.build_coverage_query(datetime(2024, 1, 1))
+        
+        assert "timestamp >= @since" in query.sql
+        assert "symbol =" not in query.sql
+        assert 'GROUP BY' in query.sql
+        assert parameter_values(query) == {'since': datetime(2024, 1, 1, tzinfo=timezone.utc)}
     
     def test_build_range_query_structure(self, builder):
         """Test RANGE query structure and validation."""
@@ -213,13 +365,17 @@ class TestQueryBuilder:
         query = builder.build_range_query('ETHUSDT', '1h', start, end)
         
         # Check query contains required elements
-        assert 'test-project.test_dataset.test_table' in query
-        assert "symbol = 'ETHUSDT'" in query
-        assert "timeframe = '1h'" in query
-        assert 'timestamp >=' in query
-        assert 'timestamp <=' in query
-        assert '2024-01-01' in query
-        assert '2024-12-31' in query
+        assert 'test-project.test_dataset.test_table' in query.sql
+        assert "symbol = @symbol" in query.sql
+        assert "timeframe = @timeframe" in query.sql
+        assert 'timestamp >= @from_timestamp' in query.sql
+        assert 'timestamp <= @to_timestamp' in query.sql
+        assert parameter_values(query) == {
+            'symbol': 'ETHUSDT',
+            'timeframe': '1h',
+            'from_timestamp': start,
+            'to_timestamp': end,
+        }
     
     def test_build_range_query_invalid_range(self, builder):
         """Test RANGE query fails with invalid time range."""
@@ -229,6 +385,83 @@ class TestQueryBuilder:
         with pytest.raises(ValueError, match="Invalid time range"):
             builder.build_range_query('BTCUSDT', '1d', start, end)
     
+    def test_build_symbols_range_query_structure(self, builder):
+        """Test multi-symbol RANGE query binds the symbols as one array."""
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        end = datetime(2024, 12, 31, tzinfo=timezone.utc)
+        
+        query = builder.build_symbols_range_query(['BTCUSDT', 'ETHUSDT'], '1h', start, end, 'BINANCE')
+        
+        assert "symbol IN UNNEST(@symbols)" in query.sql
+        assert "exchange = @exchange" in query.sql
+        assert "symbol ASC" in query.sql
+        assert parameter_values(query) == {
+            'symbols': ['BTCUSDT', 'ETHUSDT'],
+            'timeframe': '1h',
+            'exchange': 'BINANCE',
+            'from_timestamp': start,
+            'to_timestamp': end,
+        }
+    
+    def test_build_symbols_range_query_requires_symbols(self, builder):
+        """Test multi-symbol query needs at least one symbol."""
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        
+        with pytest.raises(ValueError, match="At least one symbol"):
+            builder.build_symbols_range_query([], '1d', start, start)
+    
+    def test_symbols_range_query_matches_single_symbol_queries(self, builder):
+        """Test one multi-symbol query returns each symbol's single-query rows, grouped."""
+        duckdb = pytest.importorskip("duckdb")
+        pyarrow = pytest.importorskip("pyarrow")
+        from benchmarks.fakes import make_candles, to_duckdb
+        
+        tables = []
+        for symbol in ('ETHUSDT', 'BTCUSDT', 'SOLUSDT'):
+            table = make_candles(48, start=datetime(2024, 1, 1, tzinfo=timezone.utc), timeframe='1h')
+            table = table.append_column("symbol", pyarrow.array([symbol] * 48))
+            tables.append(table.append_column("timeframe", pyarrow.array(['1h'] * 48)))
+        con = duckdb.connect()
+        con.execute("SET TimeZone = 'UTC'")
+        con.register("candles", pyarrow.concat_tables(tables))
+        con.execute('CREATE TABLE "test-project.test_dataset.test_table" AS SELECT * FROM candles')
+        start = datetime(2024, 1, 1, 6, tzinfo=timezone.utc)
+        end = datetime(2024, 1, 1, 18, tzinfo=timezone.utc)
+        
+        rows = con.execute(*to_duckdb(builder.build_symbols_range_query(
+            ['ETHUSDT', 'BTCUSDT'], '1h', start, end,
+        ))).to_arrow_table().to_pylist()
+        
+        for symbol in ('BTCUSDT', 'ETHUSDT'):
+            single = con.execute(*to_duckdb(builder.build_range_query(symbol, '1h', start, end)))
+            assert [
+                {key: value for key, value in row.items() if key != 'symbol'}
+                for row in rows if row['symbol'] == symbol
+            ] == single.to_arrow_table().to_pylist()
+        assert [row['symbol'] for row in rows] == ['BTCUSDT'] * 13 + ['ETHUSDT'] * 13
+    
+    def test_build_windows_query_structure(self, builder):
+        """Test coalesced query binds windows as structs over their union."""
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        
+        query = builder.build_windows_query([
+            ('ETHUSDT', start + timedelta(days=2), start + timedelta(days=3)),
+            ('BTCUSDT', start, start + timedelta(days=1)),
+        ], '1h')
+        
+        assert "JOIN UNNEST(@windows) AS w" in ' '.join(query.sql.split())
+        assert "window_index ASC" in query.sql
+        values = parameter_values(query)
+        assert values['symbols'] == ['BTCUSDT', 'ETHUSDT']
+        assert values['from_timestamp'] == start
+        assert values['to_timestamp'] == start + timedelta(days=3)
+        assert values['windows'][1] == {
+            'window_index': 1,
+            'window_symbol': 'BTCUSDT',
+            'window_start': start,
+            'window_end': start + timedelta(days=1),
+        }
+    
     def test_build_neighborhood_query_structure(self, builder):
         """Test NEIGHBORHOOD query structure and validation."""
         center = datetime(2024, 6, 15, 12, 0, 0, tzinfo=timezone.utc)
@@ -236,16 +469,17 @@ class TestQueryBuilder:
         query = builder.build_neighborhood_query('BTCUSDT', '15', center, 100, 100)
         
         # Check query contains required elements
-        assert 'test-project.test_dataset.test_table' in query
-        assert "symbol = 'BTCUSDT'" in query
-        assert "timeframe = '15'" in query
-        assert 'UNION ALL' in query
-        assert 'LIMIT 100' in query
-        assert '2024-06-15' in query
+        assert 'test-project.test_dataset.test_table' in query.sql
+        assert "symbol = @symbol" in query.sql
+        assert "timeframe = @timeframe" in query.sql
+        assert 'UNION ALL' in query.sql
+        assert 'LIMIT @n_before' in query.sql
+        assert parameter_values(query)['n_before'] == 100
+        assert parameter_values(query)['center_timestamp'] == center
         
         # Check for before/after comments
-        assert 'BEFORE' in query
-        assert 'AFTER' in query
+        assert 'BEFORE' in query.sql
+        assert 'AFTER' in query.sql
     
     def test_build_neighborhood_query_negative_counts(self, builder):
         """Test NEIGHBORHOOD query fails with negative record counts."""
@@ -262,6 +496,61 @@ class TestQueryBuilder:
         query = builder.build_neighborhood_query('BTCUSDT', '1M', center, 3, 3)
         
         # Should include INTERVAL with days (at least 90 days for 3 monthly candles)
-        assert 'INTERVAL' in query
-        assert 'DAY' in query
-
+        assert 'INTERVAL @window_before_days DAY' in query.sql
+        assert parameter_values(query)['window_before_days'] >= 90
+    
+    def test_build_neighborhood_query_window_strategy(self, builder):
+        """Test single-scan NEIGHBORHOOD query structure."""
+        center = datetime(2024, 6, 15, 12, 0, 0, tzinfo=timezone.utc)
+        
+        query = builder.build_neighborhood_query(
+            'BTCUSDT', '15', center, 100, 50, 'BINANCE', strategy='window'
+        )
+        
+        assert 'UNION ALL' not in query.sql
+        assert query.sql.count('test-project.test_dataset.test_table') == 1
+        assert 'QUALIFY' in query.sql
+        assert 'ROW_NUMBER() OVER' in query.sql
+        assert 'WHEN -1 THEN @n_before' in query.sql
+        assert 'ELSE @n_after' in query.sql
+        assert "exchange = @exchange" in query.sql
+        assert parameter_values(query)['n_after'] == 50
+    
+    def test_build_neighborhood_query_unknown_strategy(self, builder):
+        """Test NEIGHBORHOOD query rejects unknown strategies."""
+        center = datetime(2024, 6, 15, 12, 0, 0, tzinfo=timezone.utc)
+        
+        with pytest.raises(ValueError, match="Unknown neighborhood strategy"):
+            builder.build_neighborhood_query('BTCUSDT', '15', center, 1, 1, strategy='scan')
+    
+    @pytest.mark.parametrize("center, n_before, n_after", [
+        (datetime(2024, 3, 1, 12, 0), 100, 50),    # center candle exists
+        (datetime(2024, 3, 1, 12, 7), 100, 50),    # center between candles
+        (datetime(2024, 3, 1, 12, 0), 0, 10),      # nothing before
+        (datetime(2024, 1, 1, 0, 30), 500, 0),     # window starts before data
+        (datetime(2024, 3, 1, 12, 0), 5000, 5000), # more than the window holds
+    ])
+    def test_neighborhood_strategies_return_same_rows(self, center, n_before, n_after):
+        """Test union and window strategies agree on a local SQL engine."""
+        duckdb = pytest.importorskip("duckdb")
+        pyarrow = pytest.importorskip("pyarrow")
+        from benchmarks.fakes import make_candles, to_duckdb
+        
+        table = make_candles(20000, start=datetime(2024, 1, 1), timeframe='15')
+        table = table.append_column("symbol", pyarrow.array(["BTCUSDT"] * table.num_rows))
+        table = table.append_column("timeframe", pyarrow.array(["15"] * table.num_rows))
+        con = duckdb.connect()
+        con.execute("SET TimeZone = 'UTC'")
+        con.register("candles", table)
+        con.execute('CREATE TABLE "p.d.t" AS SELECT * FROM candles')
+        builder = QueryBuilder("p.d.t")
+        
+        results = [
+            con.execute(*to_duckdb(builder.build_neighborhood_query(
+                'BTCUSDT', '15', center, n_before, n_after, strategy=strategy
+            ))).to_arrow_table()
+            for strategy in NEIGHBORHOOD_STRATEGIES
+        ]
+        
+        assert results[0].num_rows > 0
+        assert results[0].equals(results[1])
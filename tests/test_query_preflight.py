@@ -0,0 +1,84 @@
+"""
+Unit tests for pre-flight dry runs and the scan budget.
+"""
+
+from argparse import Namespace
+from datetime import datetime
+
+import pytest
+
+from main import scan_budget_slice_rows
+from src.exceptions import ValidationError
+from src.query_builder import QueryBuilder
+from src.query_preflight import PreflightEstimate, QueryPreflight
+
+GIB = 1024 ** 3
+
+
+def _range_query(day=1):
+    return QueryBuilder("p.d.t").build_range_query(
+        "BTCUSDT", "1h", datetime(2024, 1, day), datetime(2024, 1, day + 9, 23),
+    )
+
+
+class TestQueryPreflight:
+    """Test dry-run estimates and their cache."""
+    
+    def test_estimates_cached_per_query(self, mocker):
+        """Test identical queries are dry-run once, different ones again."""
+        bq_client = mocker.MagicMock()
+        bq_client.dry_run.return_value = 5 * GIB
+        preflight = QueryPreflight(bq_client, mocker.MagicMock())
+        
+        assert preflight.estimate(_range_query()) == 5 * GIB
+        assert preflight.estimate(_range_query()) == 5 * GIB
+        preflight.estimate(_range_query(day=2))
+        
+        assert bq_client.dry_run.call_count == 2
+    
+    @pytest.mark.parametrize("max_bytes,slices", [(None, 1), (10 * GIB, 1), (2 * GIB, 3)])
+    def test_check_against_budget(self, mocker, max_bytes, slices):
+        """Test the number of slices needed to stay within the budget."""
+        bq_client = mocker.MagicMock()
+        bq_client.dry_run.return_value = 5 * GIB
+        
+        estimate = QueryPreflight(bq_client, mocker.MagicMock()).check(_range_query(), max_bytes)
+        
+        assert estimate == PreflightEstimate(5 * GIB, max_bytes, slices)
+        assert estimate.within_budget is (slices == 1)
+
+
+class TestScanBudget:
+    """Test splitting or rejecting over-budget queries."""
+    
+    def test_over_budget_query_split(self):
+        """Test an over-budget RANGE query is split into slices of its estimated rows."""
+        args = Namespace(max_scan_gb=2.0, over_budget="split", timeframe="1h")
+        
+        rows = scan_budget_slice_rows(args, _range_query(), PreflightEstimate(5 * GIB, 2 * GIB, 3))
+        
+        # 240 hourly candles in three slices
+        assert rows == 80
+        assert scan_budget_slice_rows(args, _range_query(), PreflightEstimate(GIB, 2 * GIB, 1)) is None
+    
+    @pytest.mark.parametrize("over_budget,splittable", [("reject", True), ("split", False)])
+    def test_over_budget_query_rejected(self, over_budget, splittable):
+        """Test --over-budget reject and unsplittable queries raise ValidationError."""
+        args = Namespace(max_scan_gb=2.0, over_budget=over_budget, timeframe="1h")
+        
+        with pytest.raises(ValidationError) as exc_info:
+            scan_budget_slice_rows(
+                args, _range_query(), PreflightEstimate(5 * GIB, 2 * GIB, 3), splittable=splittable,
+            )
+        
+        assert exc_info.value.context["bytes_processed"] == 5 * GIB
+    
+    def test_over_budget_day_rejected(self):
+        """Test a query is rejected when a one-day slice is already over budget."""
+        args = Namespace(max_scan_gb=0.25, over_budget="split", timeframe="1h")
+        
+        # 10 days at 0.5 GiB per day need 20 slices of 12 rows, below one day
+        with pytest.raises(ValidationError, match="one-day slice") as exc_info:
+            scan_budget_slice_rows(args, _range_query(), PreflightEstimate(5 * GIB, GIB // 4, 20))
+        
+        assert exc_info.value.context["day_bytes"] == GIB // 2
@@ -0,0 +1,122 @@
+"""
+Unit tests for coalescing batch RANGE requests into shared jobs.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.exceptions import QueryExecutionError
+from src.query_builder import QueryBuilder
+from src.request_coalescer import CoalescedStream, RangeRequest, plan_groups
+
+TABLE_FQN = "p.d.t"
+START = datetime(2024, 1, 1)
+
+
+def _request(key, symbol, first_day, last_day, timeframe="1h", exchange=None):
+    return RangeRequest(
+        key,
+        symbol,
+        timeframe,
+        exchange,
+        START + timedelta(days=first_day),
+        START + timedelta(days=last_day, hours=23),
+    )
+
+
+class TestPlanGroups:
+    """Test grouping of compatible requests."""
+    
+    def test_overlapping_and_adjacent_windows_grouped(self):
+        """Test overlapping or touching windows share a group across symbols."""
+        groups = plan_groups([
+            _request(0, "BTCUSDT", 0, 2),
+            _request(1, "ETHUSDT", 1, 3),
+            _request(2, "SOLUSDT", 4, 5),
+            _request(3, "BTCUSDT", 20, 21),
+        ])
+        
+        assert [[request.key for request in group.requests] for group in groups] == [[0, 1, 2], [3]]
+        assert groups[0].from_timestamp == START
+        assert groups[0].to_timestamp == START + timedelta(days=5, hours=23)
+    
+    def test_incompatible_requests_not_grouped(self):
+        """Test timeframe and exchange must match."""
+        groups = plan_groups([
+            _request(0, "BTCUSDT", 0, 2),
+            _request(1, "BTCUSDT", 0, 2, timeframe="1d"),
+            _request(2, "BTCUSDT", 0, 2, exchange="BINANCE"),
+        ])
+        
+        assert sorted(len(group.requests) for group in groups) == [1, 1, 1]
+        assert [group.requests[0].key for group in groups] == [0, 1, 2]
+    
+    def test_group_size_limited(self):
+        """Test groups are split at the window limit."""
+        groups = plan_groups([_request(key, "BTCUSDT", 0, 1) for key in range(5)], max_windows=2)
+        
+        assert [len(group.requests) for group in groups] == [2, 2, 1]
+
+
+class TestCoalescedStream:
+    """Test slicing one shared query back out to its requests."""
+    
+    @pytest.fixture
+    def client(self):
+        pytest.importorskip("duckdb")
+        pyarrow = pytest.importorskip("pyarrow")
+        from benchmarks.fakes import DuckDBQueryClient, make_candles
+        
+        tables = []
+        for symbol in ("BTCUSDT", "ETHUSDT"):
+            table = make_candles(10 * 24, start=START.replace(tzinfo=timezone.utc), timeframe="1h")
+            table = table.append_column("symbol", pyarrow.array([symbol] * 10 * 24))
+            tables.append(table.append_column("timeframe", pyarrow.array(["1h"] * 10 * 24)))
+        return DuckDBQueryClient(TABLE_FQN, pyarrow.concat_tables(tables))
+    
+    def _direct(self, client, request):
+        return client.run_query(QueryBuilder(TABLE_FQN).build_range_query(
+            request.symbol, request.timeframe, request.from_timestamp, request.to_timestamp,
+        )).rows
+    
+    def test_each_request_gets_its_own_rows(self, client):
+        """Test rows match per-request queries, including overlapping windows, with one job."""
+        requests = [
+            _request("a", "BTCUSDT", 0, 3),
+            _request("b", "ETHUSDT", 2, 4),
+            _request("c", "BTCUSDT", 2, 5),
+        ]
+        expected = {request.key: self._direct(client, request) for request in requests}
+        client.queries.clear()
+        (group,) = plan_groups(requests)
+        stream = CoalescedStream(client, QueryBuilder(TABLE_FQN), group, page_size=50)
+        
+        for request in group.requests:
+            batches = list(stream.batches(request.key))
+            assert all(len(batch) <= 50 for batch in batches)
+            assert [row for batch in batches for row in batch] == expected[request.key]
+        assert len(client.queries) == 1
+    
+    def test_unread_rows_skipped(self, client):
+        """Test a window abandoned halfway does not leak into the next one."""
+        requests = [_request("a", "BTCUSDT", 0, 3), _request("b", "ETHUSDT", 1, 2)]
+        (group,) = plan_groups(requests)
+        stream = CoalescedStream(client, QueryBuilder(TABLE_FQN), group, page_size=10)
+        
+        next(stream.batches("a"))
+        rows = [row for batch in stream.batches("b") for row in batch]
+        
+        assert rows == self._direct(client, requests[1])
+    
+    def test_query_failure_reaches_every_request(self, mocker):
+        """Test a failed shared job fails each remaining request."""
+        client = mocker.MagicMock()
+        client.iter_query.side_effect = QueryExecutionError("Query failed")
+        (group,) = plan_groups([_request("a", "BTCUSDT", 0, 1), _request("b", "ETHUSDT", 0, 1)])
+        stream = CoalescedStream(client, QueryBuilder(TABLE_FQN), group)
+        
+        for key in ("a", "b"):
+            with pytest.raises(QueryExecutionError):
+                list(stream.batches(key))
+        assert client.iter_query.call_count == 1
@@ -0,0 +1,211 @@
+"""
+Unit tests for in-flight deduplication of queries and extractions.
+"""
+
+import threading
+import time
+from argparse import Namespace
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.exceptions import QueryExecutionError
+from src.query_builder import QueryBuilder
+from src.single_flight import SharedQueryClient, SingleFlight, request_fingerprint
+
+TABLE_FQN = "p.d.t"
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class TestSingleFlight:
+    """Test sharing calls between concurrent callers."""
+    
+    def test_concurrent_callers_share_one_call(self):
+        """Test callers arriving while a call runs receive its result."""
+        started, release = threading.Event(), threading.Event()
+        calls = []
+        
+        def func():
+            calls.append(1)
+            started.set()
+            release.wait(timeout=5)
+            return "result"
+        
+        flight = SingleFlight()
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do("key", func)))
+        leader.start()
+        started.wait(timeout=5)
+        followers = [
+            threading.Thread(target=lambda: results.append(flight.do("key", func)))
+            for _ in range(3)
+        ]
+        for follower in followers:
+            follower.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(timeout=5)
+        
+        assert len(calls) == 1
+        assert sorted(results) == [("result", False)] + [("result", True)] * 3
+        # Nothing is remembered without a TTL
+        assert flight.do("key", lambda: "again") == ("again", False)
+    
+    def test_memo_within_ttl(self, mocker):
+        """Test successful results are reused until the TTL expires."""
+        clock = mocker.patch("src.single_flight.time.monotonic", return_value=100.0)
+        flight = SingleFlight(ttl=60)
+        
+        assert flight.do("key", lambda: 1) == (1, False)
+        assert flight.do("key", lambda: 2) == (1, True)
+        clock.return_value = 161.0
+        assert flight.do("key", lambda: 3) == (3, False)
+    
+    def test_memo_bounded(self):
+        """Test the oldest memoized results are dropped past max_entries."""
+        flight = SingleFlight(ttl=60, max_entries=2)
+        
+        for key in ("a", "b", "c"):
+            flight.do(key, lambda: key)
+        
+        assert flight.do("a", lambda: "again") == ("again", False)
+        assert flight.do("c", lambda: "again") == ("c", True)
+    
+    def test_failures_not_memoized(self):
+        """Test a failed call raises and the next caller calls again."""
+        flight = SingleFlight(ttl=60)
+        
+        with pytest.raises(QueryExecutionError):
+            flight.do("key", lambda: (_ for _ in ()).throw(QueryExecutionError("Query failed")))
+        assert flight.do("key", lambda: "ok") == ("ok", False)
+    
+    def test_request_fingerprint(self):
+        """Test execution options do not change the fingerprint, output options do."""
+        args = Namespace(symbol="BTCUSDT", timeframe="1h", output_format="json", page_size=100)
+        
+        same = Namespace(**{**vars(args), "page_size": 5000})
+        other = Namespace(**{**vars(args), "output_format": "csv"})
+        
+        assert request_fingerprint(args, "ALL") == request_fingerprint(same, "ALL")
+        assert request_fingerprint(args, "ALL") != request_fingerprint(other, "ALL")
+        assert request_fingerprint(args, "ALL") != request_fingerprint(args, "RANGE")
+
+
+class TestSharedQueryClient:
+    """Test identical concurrent queries sharing one job."""
+    
+    @pytest.fixture
+    def engine(self):
+        pytest.importorskip("duckdb")
+        pyarrow = pytest.importorskip("pyarrow")
+        from benchmarks.fakes import DuckDBQueryClient, make_candles
+        
+        table = make_candles(10 * 24, start=START, timeframe="1h")
+        table = table.append_column("symbol", pyarrow.array(["BTCUSDT"] * 10 * 24))
+        return DuckDBQueryClient(TABLE_FQN, table.append_column("timeframe", pyarrow.array(["1h"] * 10 * 24)))
+    
+    def _query(self, days=2):
+        return QueryBuilder(TABLE_FQN).build_range_query(
+            "BTCUSDT", "1h", START, START + timedelta(days=days) - timedelta(seconds=1),
+        )
+    
+    def test_late_consumer_replays_from_first_page(self, engine, mocker):
+        """Test a stream joining a running one gets every page from one job."""
+        client = SharedQueryClient(engine, mocker.MagicMock())
+        expected = engine.run_query(self._query()).rows
+        engine.queries.clear()
+        
+        first = client.iter_query(self._query(), page_size=10)
+        first_page = next(first)
+        second_rows = [row for batch in client.iter_query(self._query(), page_size=10) for row in batch]
+        first_rows = first_page + [row for batch in first for row in batch]
+        
+        assert first_rows == expected
+        assert second_rows == expected
+        assert len(engine.queries) == 1
+    
+    def test_finished_query_not_cached(self, engine, mocker):
+        """Test a query started after an identical one finished runs its own job."""
+        client = SharedQueryClient(engine, mocker.MagicMock())
+        
+        list(client.iter_query(self._query()))
+        list(client.iter_query(self._query()))
+        
+        assert len(engine.queries) == 2
+    
+    def test_no_joining_past_page_limit(self, engine, mocker):
+        """Test streams past max_shared_pages are not joined and release read pages."""
+        client = SharedQueryClient(engine, mocker.MagicMock(), max_shared_pages=2)
+        
+        first = client.iter_query(self._query(), page_size=10)
+        next(first)
+        next(first)
+        second = list(client.iter_query(self._query(), page_size=10))
+        
+        assert len(engine.queries) == 2
+        assert sum(len(batch) for batch in second) == 48
+        assert sum(len(batch) for batch in first) == 28
+    
+    def test_lagging_consumer_detached(self, engine, mocker):
+        """Test a consumer max_shared_pages behind is detached and runs its own job."""
+        client = SharedQueryClient(engine, mocker.MagicMock(), max_shared_pages=2)
+        expected = engine.run_query(self._query()).rows
+        engine.queries.clear()
+        
+        first = client.iter_query(self._query(), page_size=10)
+        first_page = next(first)
+        second_rows = [row for batch in client.iter_query(self._query(), page_size=10) for row in batch]
+        first_rows = first_page + [row for batch in first for row in batch]
+        
+        assert second_rows == expected
+        assert first_rows == expected
+        assert len(engine.queries) == 2
+    
+    def test_failure_reaches_every_consumer(self, mocker):
+        """Test a failed shared job fails each consumer attached to it."""
+        def failing_pages(sql, context=None, page_size=None, maximum_bytes_billed=None):
+            yield [{"n": 1}]
+            raise QueryExecutionError("Query failed")
+        
+        bq_client = mocker.MagicMock()
+        bq_client.iter_query.side_effect = failing_pages
+        client = SharedQueryClient(bq_client, mocker.MagicMock())
+        
+        first = client.iter_query("SELECT 1")
+        second = client.iter_query("SELECT 1")
+        assert next(first) == [{"n": 1}]
+        assert next(second) == [{"n": 1}]
+        for stream in (first, second):
+            with pytest.raises(QueryExecutionError):
+                next(stream)
+        assert bq_client.iter_query.call_count == 1
+    
+    def test_run_query_shared_while_in_flight(self, mocker):
+        """Test identical run_query calls made while one runs share its job."""
+        started, release = threading.Event(), threading.Event()
+        
+        def run_query(*args, **kwargs):
+            started.set()
+            release.wait(timeout=5)
+            return "result"
+        
+        bq_client = mocker.MagicMock()
+        bq_client.run_query.side_effect = run_query
+        client = SharedQueryClient(bq_client, mocker.MagicMock())
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(client.run_query("SELECT 1")))
+            for _ in range(4)
+        ]
+        threads[0].start()
+        started.wait(timeout=5)
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+        
+        assert results == ["result"] * 4
+        assert bq_client.run_query.call_count == 1